@@ -9,6 +9,7 @@ import math
 #import needed local classes
 import sys
 import traceback
+import threading
 
 APP_CONTEXT = "None"
 
@@ -68,6 +69,9 @@ from utilsOpenEMS.ScriptLinesGenerator.PythonScriptLinesGenerator import PythonS
 
 from utilsOpenEMS.ScriptLinesGenerator.OctaveScriptLinesGenerator2 import OctaveScriptLinesGenerator2	#EXPERIMENTAL JUST FOR DEBUGGING TILL MOVE TO RELEASE
 from utilsOpenEMS.ScriptLinesGenerator.PythonScriptLinesGenerator2 import PythonScriptLinesGenerator2	#EXPERIMENTAL JUST FOR DEBUGGING TILL MOVE TO RELEASE
+from utilsOpenEMS.ScriptLinesGenerator.EngineCalibrator import EngineCalibrator
+from utilsOpenEMS.ScriptLinesGenerator.ParameterSweep import ParameterSweep
+from utilsOpenEMS.JobRunner.LocalScheduler import LocalScheduler, SimulationJob
 
 from utilsOpenEMS.GuiHelpers.GuiHelpers import GuiHelpers
 from utilsOpenEMS.GuiHelpers.FactoryCadInterface import FactoryCadInterface
@@ -121,6 +125,20 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		#
 		self.simulationOutputDir = None
 
+		#
+		#	Local simulation job queue, polled by timer while there are queued or running jobs
+		#
+		self.jobQueue = LocalScheduler()
+		self.jobQueueTimer = None
+		self.jobQueueTreeItems = {}
+
+		#
+		#	openEMS engine calibration runs in worker thread, timer checks when it finished
+		#
+		self.engineCalibrationThread = None
+		self.engineCalibrationResult = None
+		self.engineCalibrationTimer = None
+
 		#
 		# LOCAL OPENEMS OBJECT
 		#
@@ -280,6 +298,18 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		self.form.drawS11Button.clicked.connect(self.drawS11ButtonClicked)			# Clicked on "Write Draw S11 Script"
 		self.form.drawS21Button.clicked.connect(self.drawS21ButtonClicked)			# Clicked on "Write Draw S21 Script"
 		self.form.writeNf2ffButton.clicked.connect(self.writeNf2ffButtonClicked)	# Clicked on "Write NF2FF"
+		self.form.combinedPostprocessingButton.clicked.connect(self.combinedPostprocessingButtonClicked)	# Clicked on "Write Combined Post-Processing Script"
+		self.form.openEMSEngineCalibrateButton.clicked.connect(self.openEMSEngineCalibrateButtonClicked)	# Clicked on "Calibrate" openEMS engine
+		self.form.parameterSweepButton.clicked.connect(self.parameterSweepButtonClicked)					# Clicked on "Generate Sweep..."
+		self.form.sMatrixButton.clicked.connect(self.sMatrixButtonClicked)									# Clicked on "Generate S-Matrix Runs"
+
+		#
+		#	Simulation job queue
+		#
+		self.form.jobQueueRunButton.clicked.connect(self.jobQueueRunButtonClicked)
+		self.form.jobQueueCancelButton.clicked.connect(self.jobQueueCancelButtonClicked)
+		self.form.jobQueueShowLogButton.clicked.connect(self.jobQueueShowLogButtonClicked)
+		self.form.jobQueueClearButton.clicked.connect(self.jobQueueClearButtonClicked)
 
 		#
 		# GRID
@@ -289,6 +319,7 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		#		
 		self.form.createUserdefGridLinesFromCurrentButton.clicked.connect(self.createUserdefGridLinesFromCurrentButtonClicked)
 		self.form.displayXYGridLinesInModelButton.clicked.connect(self.displayXYGridLinesInModelButtonClicked)
+		self.form.meshCostEstimateButton.clicked.connect(self.meshCostEstimateButtonClicked)
 		self.form.gridRectangularRadio.toggled.connect(self.gridCoordsTypeChoosed)
 		self.form.gridCylindricalRadio.toggled.connect(self.gridCoordsTypeChoosed)
 
@@ -412,9 +443,9 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		self.form.BCzmax.currentIndexChanged.connect(self.BCzmaxCurrentIndexChanged)
 
 		self.form.genParamMinGridSpacingEnable.stateChanged.connect(lambda:
-			[element.setEnabled(True) for element in [self.form.genParamMinGridSpacingX, self.form.genParamMinGridSpacingY, self.form.genParamMinGridSpacingZ]]
+			[element.setEnabled(True) for element in [self.form.genParamMinGridSpacingX, self.form.genParamMinGridSpacingY, self.form.genParamMinGridSpacingZ, self.form.genParamMinGridSpacingSummary]]
 			if self.form.genParamMinGridSpacingEnable.isChecked() else
-			[element.setEnabled(False) for element in [self.form.genParamMinGridSpacingX, self.form.genParamMinGridSpacingY, self.form.genParamMinGridSpacingZ]]
+			[element.setEnabled(False) for element in [self.form.genParamMinGridSpacingX, self.form.genParamMinGridSpacingY, self.form.genParamMinGridSpacingZ, self.form.genParamMinGridSpacingSummary]]
 		)
 
 		####################################################################################################
@@ -453,6 +484,8 @@ class ExportOpenEMSDialog(QtCore.QObject):
 				self.observer.objectCreated += self.freecadObjectCreated
 				self.observer.objectChanged += self.freecadObjectChanged
 				self.observer.objectDeleted += self.freecadBeforeObjectDeleted
+				self.octaveScriptGenerator.observeCadDocument(self.observer)
+				self.pythonScriptGenerator.observeCadDocument(self.observer)
 				self.observer.startObservation()
 
 			except:
@@ -737,6 +770,12 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		"""
 		self.guiHelpers.displayMessage("createUserdefGridLinesFromCurrentButtonClicked")
 
+	#
+	#	Estimate mesh cost, mesh lines are resolved same way as during script generation and result is displayed in grid tab
+	#
+	def meshCostEstimateButtonClicked(self):
+		self.scriptGenerator.estimateMeshCost(self.simulationOutputDir)
+
 	def displayXYGridLinesInModelButtonClicked(self):        
 		print('displayXYGridLinesInModelButtonClicked: start draw whole XY grid for each object')
 
@@ -1287,6 +1326,46 @@ class ExportOpenEMSDialog(QtCore.QObject):
 
 		self.form.objectAssignmentLeftTreeWidget.insertTopLevelItems(0, treeItems)
 
+	#
+	#	openEMS engine calibration button handler
+	#		runs small model with each engine and number of threads, fastest one is stored for this host
+	#		calibration takes minutes so it runs in worker thread, GUI is not blocked and timer waits for its result
+	#
+	def openEMSEngineCalibrateButtonClicked(self):
+		if self.engineCalibrationThread is not None and self.engineCalibrationThread.is_alive():
+			return
+
+		self.form.openEMSEngineCalibrateButton.setEnabled(False)
+		self.guiHelpers.displayMessage("openEMS engine calibration started, it can take few minutes.", forceModal=False)
+
+		self.engineCalibrationResult = None
+		self.engineCalibrationThread = threading.Thread(target=self.runEngineCalibration, daemon=True)
+		self.engineCalibrationThread.start()
+
+		if self.engineCalibrationTimer is None:
+			self.engineCalibrationTimer = QtCore.QTimer()
+			self.engineCalibrationTimer.timeout.connect(self.engineCalibrationTimerTimeout)
+		self.engineCalibrationTimer.start(500)
+
+	def runEngineCalibration(self):
+		# worker thread, must not touch GUI
+		self.engineCalibrationResult = EngineCalibrator().calibrate()
+
+	def engineCalibrationTimerTimeout(self):
+		if self.engineCalibrationThread.is_alive():
+			return
+
+		self.engineCalibrationTimer.stop()
+		self.form.openEMSEngineCalibrateButton.setEnabled(True)
+
+		hostResult = self.engineCalibrationResult
+		if hostResult is None:
+			self.guiHelpers.displayMessage("openEMS engine calibration failed, check openEMS is installed and available on PATH.")
+			return
+
+		self.form.openEMSEngineList.setCurrentText("calibrated")
+		self.guiHelpers.displayMessage(f"openEMS engine calibrated for {EngineCalibrator.getHostName()}: engine {hostResult['engine']}, threads {hostResult['numThreads']}, speed {hostResult['speed_MCs']:g} MC/s")
+
 	#
 	#	ABORT simulation button handler
 	#		write empty file ABORT into simulation_output/ folder what should abort simulation in next iteration
@@ -1302,10 +1381,7 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		outFile = os.path.join(absoluteOutputDir, "ABORT")
 		print("------------->" + outFile)
 
-		if os.path.exists(absoluteOutputDir):
-			f = open(outFile, "w+", encoding='utf-8')
-			f.write("THIS CAN BE JUST EMPTY FILE. ABORT simulation.")
-			f.close()
+		if LocalScheduler.writeAbortFile(absoluteOutputDir):
 			print(f"ABORT file written into {absoluteOutputDir}")
 			self.guiHelpers.displayMessage(f"ABORT file written into {absoluteOutputDir}", forceModal=False)
 		else:
@@ -1618,6 +1694,12 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		self.simulationOutputDir = f"{os.path.dirname(outputFile)}/{programbase}_openEMS_simulation"
 		print(f"-----> loadFromFileSettingsButtonClicked, setting simulationOutputDir: {self.simulationOutputDir}")
 
+		#
+		#	Sections generated for previous settings are not reused after load
+		#
+		self.octaveScriptGenerator.invalidateSectionCache()
+		self.pythonScriptGenerator.invalidateSectionCache()
+
 		#
 		#	Add default PEC material during load
 		#
@@ -1658,6 +1740,7 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		objListStr = ""
 
 		if APP_CONTEXT == "FreeCAD":
+			self.scriptGenerator.beginExportSession()
 			materialCategories = self.scriptGenerator.getItemsByClassName().get("MaterialSettingsItem", None)
 			for [materialItem, currSetting] in materialCategories:
 
@@ -1666,10 +1749,9 @@ class ExportOpenEMSDialog(QtCore.QObject):
 				#	just on XY, XZ, YZ planes
 				#
 				if currSetting.type != "conducting sheet":
-					allCadObjects = self.scriptGenerator.cadHelpers.getObjects()
 					for k in range(materialItem.childCount()):
 						childName = materialItem.child(k).text(0)
-						freeCadObj = [i for i in  allCadObjects if (i.Label) == childName][0]
+						freeCadObj = self.scriptGenerator.getCadObjectsByLabel(childName)[0]
 						if freeCadObj.Name.startswith("Face"):
 							objListStr += f"\t{materialItem.text(0)} - {freeCadObj.Label}\n"
 
@@ -1708,10 +1790,117 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		#write result .m file into subfolder named after .ini file next to simulation settings .ini file
 		print(f"----> start saving file into {self.simulationOutputDir}")
 
-		self.scriptGenerator.generateOpenEMSScript(self.simulationOutputDir)
+		scriptFileName = self.scriptGenerator.generateOpenEMSScript(self.simulationOutputDir)
 		#self.scriptGenerator2.generateOpenEMSScript(self.simulationOutputDir + "_2nd_generator")
 		#self.scriptGenerator3.generateOpenEMSScript(self.simulationOutputDir + "_3rd_generator")
 
+		return scriptFileName
+
+	#
+	#	Parameter sweep, each variant is generated into subdirectory of simulation output dir and optionally added into job queue
+	#
+	def parameterSweepButtonClicked(self):
+		sweepFileName, filter = QtWidgets.QFileDialog.getOpenFileName(parent=self.form, caption='Open parameter sweep definition', dir=os.path.dirname(self.cadHelpers.getCurrDocumentFileName()), filter='Sweep definition (*.json *.csv)')
+		if not sweepFileName:
+			return
+
+		try:
+			sweep = ParameterSweep.load(sweepFileName)
+			variantsOutput = self.scriptGenerator.generateParameterSweep(sweep, self.simulationOutputDir)
+		except (OSError, ValueError) as e:
+			self.guiHelpers.displayMessage(f"Parameter sweep not generated: {e}")
+			return
+
+		if not self.form.parameterSweepRunCheckbox.isChecked():
+			return
+
+		for [variantName, variantOutputDir, scriptFileName] in variantsOutput:
+			self.addJobToQueue(variantName, scriptFileName)
+
+	def sMatrixButtonClicked(self):
+		try:
+			variantsOutput, sMatrixFileName = self.scriptGenerator.generateSMatrixRuns(self.simulationOutputDir)
+		except (OSError, ValueError) as e:
+			self.guiHelpers.displayMessage(f"S-matrix runs not generated: {e}")
+			return
+
+		if not self.form.parameterSweepRunCheckbox.isChecked():
+			return
+
+		#
+		#	Touchstone file is assembled by one thread job after all runs finished
+		#
+		runJobs = [self.addJobToQueue(variantName, scriptFileName) for [variantName, variantOutputDir, scriptFileName] in variantsOutput]
+		self.addJobToQueue("S-matrix", sMatrixFileName, numThreads=1, dependencies=runJobs)
+
+	#
+	#	Simulation job queue, generated scripts are run as subprocesses, queue is polled by timer so GUI is not blocked
+	#	while simulations are running, tree view shows state of each job
+	#
+	def addJobToQueue(self, jobName, scriptFileName, numThreads=None, dependencies=None):
+		self.jobQueue.setLimits(self.form.jobQueueMaxJobs.value(), self.form.jobQueueThreadsPerJob.value(), self.form.jobQueueMaxTotalThreads.value())
+		job = self.jobQueue.addJob(jobName, self.scriptGenerator.getScriptRunCommand(scriptFileName), os.path.dirname(os.path.abspath(scriptFileName)), numThreads, dependencies)
+
+		if self.jobQueueTimer is None:
+			self.jobQueueTimer = QtCore.QTimer()
+			self.jobQueueTimer.timeout.connect(self.jobQueueTimerTimeout)
+		if not self.jobQueueTimer.isActive():
+			self.jobQueueTimer.start(1000)
+
+		self.jobQueueTimerTimeout()
+		return job
+
+	def jobQueueTimerTimeout(self):
+		isActive = self.jobQueue.poll()
+		self.updateJobQueueTreeWidget()
+		if not isActive:
+			self.jobQueueTimer.stop()
+			failedJobs = [job.name for job in self.jobQueue.jobs if job.state == "failed"]
+			if len(failedJobs) > 0:
+				self.guiHelpers.displayMessage(f"Simulation jobs failed (see {SimulationJob.LOG_FILE_NAME} in their directory): {', '.join(failedJobs)}", forceModal=False)
+
+	def updateJobQueueTreeWidget(self):
+		for job in self.jobQueue.jobs:
+			if not job in self.jobQueueTreeItems:
+				treeItem = QtWidgets.QTreeWidgetItem([job.name])
+				treeItem.setToolTip(0, job.cwd)
+				self.form.jobQueueTreeWidget.addTopLevelItem(treeItem)
+				self.jobQueueTreeItems[job] = treeItem
+
+			treeItem = self.jobQueueTreeItems[job]
+			treeItem.setText(1, job.state if not (job.cancelRequested and job.state == "running") else "cancelling")
+			treeItem.setText(2, str(self.jobQueue.getJobThreads(job)))
+			treeItem.setText(3, job.getProgress())
+
+	def getSelectedQueueJobs(self):
+		selectedItems = self.form.jobQueueTreeWidget.selectedItems()
+		return [job for job, treeItem in self.jobQueueTreeItems.items() if treeItem in selectedItems]
+
+	def jobQueueRunButtonClicked(self):
+		scriptFileName = self.generateOpenEMSScriptButtonClicked()
+		if scriptFileName is None:
+			return
+		self.addJobToQueue(os.path.splitext(os.path.basename(scriptFileName))[0], scriptFileName)
+
+	def jobQueueCancelButtonClicked(self):
+		for job in self.getSelectedQueueJobs():
+			self.jobQueue.cancelJob(job)
+		self.updateJobQueueTreeWidget()
+
+	def jobQueueShowLogButtonClicked(self):
+		for job in self.getSelectedQueueJobs():
+			if os.path.isfile(job.getLogFileName()):
+				QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(job.getLogFileName()))
+			else:
+				self.guiHelpers.displayMessage(f"Job {job.name} has no log yet.", forceModal=False)
+
+	def jobQueueClearButtonClicked(self):
+		self.jobQueue.removeDoneJobs()
+		for job in list(self.jobQueueTreeItems.keys()):
+			if not job in self.jobQueue.jobs:
+				treeItem = self.jobQueueTreeItems.pop(job)
+				self.form.jobQueueTreeWidget.takeTopLevelItem(self.form.jobQueueTreeWidget.indexOfTopLevelItem(treeItem))
+
 	def drawS11ButtonClicked(self):
 		portName = self.form.drawS11Port.currentText()
 
@@ -1746,12 +1935,30 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		self.scriptGenerator.drawS21ButtonClicked(self.simulationOutputDir, sourcePortName, targetPortName)
 		self.guiHelpers.displayMessage("S21 script generated.")
 
+	def getNf2ffPlotFrequencies(self):
+		"""
+		Far field frequencies in Hz, frequency list has priority over single frequency, both are in MHz in GUI.
+		"""
+		freqListText = self.form.portNf2ffFreqList.text().strip()
+		if (len(freqListText) == 0):
+			return self.form.portNf2ffFreq.value()*1e6
+
+		try:
+			return [float(freq)*1e6 for freq in re.split(r"[\s,;]+", freqListText) if len(freq) > 0]
+		except ValueError:
+			raise ValueError(f"frequency list '{freqListText}' must contain numbers separated by comma or space")
+
 	def writeNf2ffButtonClicked(self):
 		nf2ffBoxName = self.form.portNf2ffObjectList.currentText()
 		nf2ffBoxInputPortName = self.form.portNf2ffInput.currentText()
-		freq = self.form.portNf2ffFreq.value()*1e6						#freq for nf2ff is in MHz in GUI
 		freqCount = self.form.portNf2ffFreqCount.value()
 
+		try:
+			freq = self.getNf2ffPlotFrequencies()
+		except ValueError as e:
+			self.guiHelpers.displayMessage(f"NF2FF script not generated: {e}")
+			return
+
 		if (len(nf2ffBoxName) == 0):
 			self.guiHelpers.displayMessage("NF2FF port not set, script will not be generated.")
 			return
@@ -1771,6 +1978,39 @@ class ExportOpenEMSDialog(QtCore.QObject):
 		# display message that script was generated
 		self.guiHelpers.displayMessage("Script to display far field generated.")
 
+	def combinedPostprocessingButtonClicked(self):
+		"""
+		Results are taken from S11, S21 and NF2FF settings above, all checked ones are computed by one script.
+		"""
+		s11PortNames = []
+		s21PortPairs = []
+		nf2ffBoxes = []
+
+		if (self.form.combinedPostprocessingS11Checkbox.isChecked() and len(self.form.drawS11Port.currentText()) > 0):
+			s11PortNames.append(self.form.drawS11Port.currentText())
+		if (self.form.combinedPostprocessingS21Checkbox.isChecked() and len(self.form.drawS21Source.currentText()) > 0 and len(self.form.drawS21Target.currentText()) > 0):
+			s21PortPairs.append([self.form.drawS21Source.currentText(), self.form.drawS21Target.currentText()])
+		if (self.form.combinedPostprocessingNf2ffCheckbox.isChecked() and len(self.form.portNf2ffObjectList.currentText()) > 0 and len(self.form.portNf2ffInput.currentText()) > 0):
+			try:
+				nf2ffBoxes.append([self.form.portNf2ffObjectList.currentText(), self.form.portNf2ffInput.currentText(), self.getNf2ffPlotFrequencies()])
+			except ValueError as e:
+				self.guiHelpers.displayMessage(f"Combined post-processing script not generated: {e}")
+				return
+
+		sParameterExport = self.form.combinedPostprocessingSParamCheckbox.isChecked()
+
+		if (len(s11PortNames) + len(s21PortPairs) + len(nf2ffBoxes) == 0 and not sParameterExport):
+			self.guiHelpers.displayMessage("No post-processing result selected, script will not be generated.")
+			return
+
+		try:
+			self.scriptGenerator.combinedPostprocessingButtonClicked(self.simulationOutputDir, s11PortNames, s21PortPairs, nf2ffBoxes, self.form.portNf2ffFreqCount.value(), sParameterExport)
+		except ValueError as e:
+			self.guiHelpers.displayMessage(f"Combined post-processing script not generated: {e}")
+			return
+
+		self.guiHelpers.displayMessage("Combined post-processing script generated.")
+
 	# GRID SETTINGS
 	#   _____ _____  _____ _____     _____ ______ _______ _______ _____ _   _  _____  _____ 
 	#  / ____|  __ \|_   _|  __ \   / ____|  ____|__   __|__   __|_   _| \ | |/ ____|/ ____|
@@ -0,0 +1,185 @@
+#
+#	Headless batch export, generates openEMS simulation scripts from *_settings.ini files without opening GUI dialog.
+#
+#	Model objects are read from model directory by FileCadHelpers (STL/STEP files named by object labels), settings are loaded
+#	by IniFile0v1 into HeadlessForm, widget-free form with same widget names and defaults as ui/dialog.ui, so same script
+#	generators as in GUI are used without creating any Qt widget.
+#
+#	usage:
+#		python ExportOpenEMSHeadless.py --model-dir <dir with STL files> [--output-dir <dir>] [--type python|octave] [--calibrate] [--sweep sweep.json | --s-matrix [--run] [--jobs N] [--threads-per-job N] [--max-threads N]] file1_settings.ini [file2_settings.ini ...]
+#
+import os, sys
+import argparse
+import traceback
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+path_to_ui = os.path.join(APP_DIR, "ui", "dialog.ui")
+
+from utilsOpenEMS.ScriptLinesGenerator.OctaveScriptLinesGenerator2 import OctaveScriptLinesGenerator2
+from utilsOpenEMS.ScriptLinesGenerator.PythonScriptLinesGenerator2 import PythonScriptLinesGenerator2
+from utilsOpenEMS.ScriptLinesGenerator.EngineCalibrator import EngineCalibrator
+from utilsOpenEMS.ScriptLinesGenerator.ParameterSweep import ParameterSweep
+from utilsOpenEMS.JobRunner.LocalScheduler import LocalScheduler
+
+from utilsOpenEMS.GuiHelpers.GuiHelpers import GuiHelpers
+from utilsOpenEMS.GuiHelpers.FactoryCadInterface import FactoryCadInterface
+from utilsOpenEMS.GuiHelpers.FileCadHelpers import FileCadHelpers
+from utilsOpenEMS.GuiHelpers.HeadlessForm import HeadlessForm
+
+from utilsOpenEMS.SaveLoad.IniFile0v1 import IniFile0v1
+
+SETTINGS_FILE_SUFFIX = "_settings.ini"
+
+class ExportOpenEMSHeadless:
+
+	def __init__(self, cadHelpers):
+		"""
+		:param cadHelpers: CAD interface used to get objects for export, for batch export FileCadHelpers
+		"""
+		self.APP_DIR = APP_DIR
+		self.cadHelpers = cadHelpers
+
+		#
+		#	all parts of application asking for CAD interface get this one, no message boxes are displayed and tree
+		#	items are created for headless form
+		#
+		FactoryCadInterface.setHelper(self.cadHelpers)
+		GuiHelpers.headless = True
+
+	def getDocumentFileName(self, settingsFile):
+		"""
+		Returns CAD document filename which would have settings file with given name, output files are named based on it.
+		:param settingsFile: path to *_settings.ini
+		:return: path to document file
+		"""
+		settingsDir = os.path.dirname(os.path.abspath(settingsFile))
+		settingsName = os.path.basename(settingsFile)
+		if settingsName.endswith(SETTINGS_FILE_SUFFIX):
+			documentBase = settingsName[:-len(SETTINGS_FILE_SUFFIX)]
+		else:
+			documentBase = os.path.splitext(settingsName)[0]
+		return os.path.join(settingsDir, documentBase + ".FCStd")
+
+	def createScriptGenerator(self, settingsFile, scriptType=None):
+		"""
+		Load settings file into new form and create script generator for it.
+		:param settingsFile: path to *_settings.ini
+		:param scriptType: 'python', 'octave' or None to use type saved in settings file
+		:return: script generator
+		"""
+		self.cadHelpers.documentFileName = self.getDocumentFileName(settingsFile)
+
+		#
+		#	new form instance for each settings file, so nothing is left from previous one
+		#
+		form = HeadlessForm(path_to_ui)
+		guiHelpers = GuiHelpers(form, APP_DIR=self.APP_DIR)
+		guiHelpers.initRightColumnTopLevelItems()
+
+		simulationSettingsFile = IniFile0v1(form, APP_DIR=self.APP_DIR)
+		simulationSettingsFile.read(os.path.abspath(settingsFile))
+
+		if scriptType is None:
+			scriptType = "python" if form.radioButton_pythonType.isChecked() else "octave"
+
+		if scriptType == "python":
+			scriptGenerator = PythonScriptLinesGenerator2(form)
+		else:
+			scriptGenerator = OctaveScriptLinesGenerator2(form)
+
+		return scriptGenerator
+
+	def exportSettingsFile(self, settingsFile, outputDir=None, scriptType=None):
+		"""
+		Load settings file and generate openEMS script.
+		:param settingsFile: path to *_settings.ini
+		:param outputDir: directory for simulation files, if None it's created next to settings file as in GUI
+		:param scriptType: 'python', 'octave' or None to use type saved in settings file
+		:return: path to generated script
+		"""
+		return self.createScriptGenerator(settingsFile, scriptType).generateOpenEMSScript(outputDir)
+
+	def exportParameterSweep(self, settingsFile, sweep, outputDir=None, scriptType=None, run=False, maxConcurrentJobs=0, threadsPerJob=0, maxTotalThreads=0):
+		"""
+		Load settings file and generate openEMS script for each sweep variant, optionally run them by local scheduler.
+		:param sweep: ParameterSweep
+		:param run: run generated variants, blocks till all of them are done
+		:return: list of failed jobs, empty if variants were not run
+		"""
+		scriptGenerator = self.createScriptGenerator(settingsFile, scriptType)
+		variantsOutput = scriptGenerator.generateParameterSweep(sweep, outputDir)
+		if not run:
+			return []
+
+		scheduler = LocalScheduler(maxConcurrentJobs, threadsPerJob, maxTotalThreads)
+		for [variantName, variantOutputDir, scriptFileName] in variantsOutput:
+			scheduler.addJob(variantName, scriptGenerator.getScriptRunCommand(scriptFileName), variantOutputDir)
+		return scheduler.run()
+
+	def exportSMatrix(self, settingsFile, outputDir=None, scriptType=None, run=False, maxConcurrentJobs=0, threadsPerJob=0, maxTotalThreads=0):
+		"""
+		Load settings file and generate one run per port with just that port excited and script assembling Touchstone
+		file from them, optionally run them by local scheduler, S-matrix script is run after all runs finished.
+		:return: list of failed jobs, empty if runs were not run
+		"""
+		scriptGenerator = self.createScriptGenerator(settingsFile, scriptType)
+		variantsOutput, sMatrixFileName = scriptGenerator.generateSMatrixRuns(outputDir)
+		if not run:
+			return []
+
+		scheduler = LocalScheduler(maxConcurrentJobs, threadsPerJob, maxTotalThreads)
+		runJobs = [scheduler.addJob(variantName, scriptGenerator.getScriptRunCommand(scriptFileName), variantOutputDir) for [variantName, variantOutputDir, scriptFileName] in variantsOutput]
+		scheduler.addJob("S-matrix", scriptGenerator.getScriptRunCommand(sMatrixFileName), os.path.dirname(os.path.abspath(sMatrixFileName)), 1, runJobs)
+		return scheduler.run()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Generate openEMS simulation scripts from settings files without GUI.")
+	parser.add_argument("settingsFiles", nargs="+", help="*_settings.ini files saved by FreeCAD-OpenEMS-Export")
+	parser.add_argument("--model-dir", required=True, help="directory with model objects as <label>.stl/<label>.step files and optional model.json")
+	parser.add_argument("--output-dir", default=None, help="output directory, if more settings files are exported each one gets its own subdirectory")
+	parser.add_argument("--type", choices=["python", "octave"], default=None, help="output script type, by default type saved in settings file")
+	parser.add_argument("--calibrate", action="store_true", help="measure fastest openEMS engine and number of threads on this host before export, used by settings with calibrated engine")
+	parser.add_argument("--sweep", default=None, help="parameter sweep definition (.json or .csv), each variant is generated into subdirectory of output directory")
+	parser.add_argument("--s-matrix", action="store_true", help="generate one run per port with just that port excited and script writing Touchstone file from their results")
+	parser.add_argument("--run", action="store_true", help="run generated sweep variants or S-matrix runs on this computer")
+	parser.add_argument("--jobs", type=int, default=0, help="max number of concurrently running sweep jobs, 0 means as many as fit into cores by --threads-per-job")
+	parser.add_argument("--threads-per-job", type=int, default=0, help="openEMS threads of each sweep job, 0 means all cores")
+	parser.add_argument("--max-threads", type=int, default=0, help="openEMS threads of all running sweep jobs together, 0 means number of cores")
+	args = parser.parse_args(argv)
+
+	if args.calibrate and EngineCalibrator().calibrate() is None:
+		print("openEMS engine calibration failed, openEMS defaults are used for calibrated engine")
+
+	exporter = ExportOpenEMSHeadless(FileCadHelpers(args.model_dir, APP_DIR=APP_DIR))
+
+	failedFiles = []
+	for settingsFile in args.settingsFiles:
+		outputDir = args.output_dir
+		if outputDir is not None and len(args.settingsFiles) > 1:
+			outputDir = os.path.join(outputDir, os.path.splitext(os.path.basename(settingsFile))[0])
+
+		try:
+			if args.sweep is not None:
+				sweepFailedJobs = exporter.exportParameterSweep(settingsFile, ParameterSweep.load(args.sweep), outputDir, args.type, args.run, args.jobs, args.threads_per_job, args.max_threads)
+				if len(sweepFailedJobs) > 0:
+					print(f"Sweep jobs failed: {', '.join([job.name for job in sweepFailedJobs])}")
+					failedFiles.append(settingsFile)
+			elif args.s_matrix:
+				sMatrixFailedJobs = exporter.exportSMatrix(settingsFile, outputDir, args.type, args.run, args.jobs, args.threads_per_job, args.max_threads)
+				if len(sMatrixFailedJobs) > 0:
+					print(f"S-matrix jobs failed: {', '.join([job.name for job in sMatrixFailedJobs])}")
+					failedFiles.append(settingsFile)
+			else:
+				exporter.exportSettingsFile(settingsFile, outputDir, args.type)
+		except Exception:
+			traceback.print_exc()
+			failedFiles.append(settingsFile)
+
+	if len(failedFiles) > 0:
+		print(f"Export failed for: {', '.join(failedFiles)}")
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+try:
+    import PySide2
+    from utilsOpenEMS.ScriptLinesGenerator.PythonScriptLinesGenerator2 import PythonScriptLinesGenerator2
+    from utilsOpenEMS.ScriptLinesGenerator.OctaveScriptLinesGenerator2 import OctaveScriptLinesGenerator2
+except ImportError:
+    PySide2 = None
+
+from utilsOpenEMS.GuiHelpers.HeadlessForm import HeadlessForm, HeadlessTreeWidgetItem
+from utilsOpenEMS.ScriptLinesGenerator.ParameterSweep import ParameterSweep
+from utilsOpenEMS.SettingsItem.ExcitationSettingsItem import ExcitationSettingsItem
+
+USER_ROLE = 256
+
+@unittest.skipIf(PySide2 is None, "script generators need PySide2")
+class TestExcitationOverrides(unittest.TestCase):
+
+    def setUp(self):
+        self.form = HeadlessForm(os.path.join(parentdir, "ui", "dialog.ui"))
+
+        excitationCategory = HeadlessTreeWidgetItem(["Excitation"])
+        excitationItem = HeadlessTreeWidgetItem(["pulse"])
+        excitationItem.setData(0, USER_ROLE, ExcitationSettingsItem(name="pulse", type="gaussian", gaussian={'f0': 1e9, 'fc': 5e8}, units="Hz"))
+        excitationCategory.addChild(excitationItem)
+        self.form.objectAssignmentRightTreeWidget.addTopLevelItem(excitationCategory)
+
+        self.tempDir = tempfile.TemporaryDirectory()
+        sweepFileName = os.path.join(self.tempDir.name, "sweep.json")
+        with open(sweepFileName, "w") as f:
+            json.dump({"parameters": {"pulse": {"gaussian.f0": [1e9, 2e9]}}}, f)
+        self.sweep = ParameterSweep.load(sweepFileName)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def getVariantsExcitationLines(self, generator):
+        variantsLines = []
+        for [variantName, overrides] in self.sweep.getVariants():
+            generator.settingsOverrides = overrides
+            itemsByClassName = generator.getItemsByClassName()
+            variantsLines.append(str(generator.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None))))
+        generator.settingsOverrides = None
+        return variantsLines
+
+    def test_pythonVariantsHaveOwnExcitation(self):
+        variantsLines = self.getVariantsExcitationLines(PythonScriptLinesGenerator2(self.form))
+        self.assertEqual(len(variantsLines), 2)
+        self.assertNotEqual(variantsLines[0], variantsLines[1])
+        self.assertIn("f0 = 2000000000.0", variantsLines[1])
+
+    def test_octaveVariantsHaveOwnExcitation(self):
+        variantsLines = self.getVariantsExcitationLines(OctaveScriptLinesGenerator2(self.form))
+        self.assertEqual(len(variantsLines), 2)
+        self.assertNotEqual(variantsLines[0], variantsLines[1])
+        self.assertIn("f0 = 2000000000.0", variantsLines[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+try:
+    import PySide2
+    from utilsOpenEMS.GuiHelpers.FileCadHelpers import FileCadHelpers, FileToCadObject
+except ImportError:
+    PySide2 = None
+
+TRIANGLE = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]]], dtype=np.float64)
+
+@unittest.skipIf(PySide2 is None, "CAD helpers need PySide2")
+class TestFileCadHelpers(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.modelDir = os.path.join(self.tempDir.name, "model")
+        os.makedirs(self.modelDir)
+        self.cadHelpers = FileCadHelpers(self.modelDir)
+        self.exportFileName = os.path.join(self.tempDir.name, "part_gen_model.stl")
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def createSTLObject(self, label, vertexes):
+        fileName = os.path.join(self.modelDir, label + ".stl")
+        self.cadHelpers.writeSTL(fileName, vertexes)
+        return self.cadHelpers.createObject(label, label, fileName)
+
+    def test_objectsWithSameLabelAreMerged(self):
+        parts = [self.createSTLObject("part_a", TRIANGLE), self.createSTLObject("part_b", TRIANGLE + 5)]
+        self.cadHelpers.exportSTL(parts, self.exportFileName)
+
+        np.testing.assert_allclose(self.cadHelpers.readSTL(self.exportFileName), np.concatenate([TRIANGLE, TRIANGLE + 5]))
+
+    def test_objectWithoutSTLFails(self):
+        stepObject = FileToCadObject("housing", "housing", os.path.join(self.modelDir, "housing.step"), boundBox=[0, 0, 0, 1, 1, 1])
+        with self.assertRaisesRegex(ValueError, "housing"):
+            self.cadHelpers.exportSTL([stepObject], self.exportFileName)
+        self.assertFalse(os.path.exists(self.exportFileName))
+
+if __name__ == '__main__':
+    unittest.main()
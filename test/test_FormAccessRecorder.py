@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.GuiHelpers.HeadlessForm import HeadlessForm, HeadlessTreeWidgetItem
+from utilsOpenEMS.ScriptLinesGenerator.FormAccessRecorder import FormAccessRecorder, USER_ROLE
+
+class PortSettings:
+    def __init__(self, R):
+        self.R = R
+
+class TestFormAccessRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.form = HeadlessForm(os.path.join(parentdir, "ui", "dialog.ui"))
+
+    def test_recordsWidgetsReadBySection(self):
+        recorder = FormAccessRecorder(self.form)
+        recorder.BCxmin.currentText()
+        recorder.PMLxmincells.value()
+        recorder.genParamMinGridSpacingEnable.isChecked()
+        self.assertEqual(recorder.widgetNames, {"BCxmin", "PMLxmincells", "genParamMinGridSpacingEnable"})
+
+    def test_formStateChangesWithRecordedWidgets(self):
+        widgetNames = ["BCxmin", "PMLxmincells", "genParamMinGridSpacingEnable", "simParamsDeltaUnitList"]
+        state = FormAccessRecorder.getFormState(self.form, widgetNames)
+        self.assertEqual(state, FormAccessRecorder.getFormState(self.form, widgetNames))
+
+        self.form.PMLxmincells.setValue(self.form.PMLxmincells.value() + 1)
+        self.assertNotEqual(state, FormAccessRecorder.getFormState(self.form, widgetNames))
+
+    def test_treeStateContainsItemData(self):
+        tree = self.form.objectAssignmentRightTreeWidget
+        portItem = HeadlessTreeWidgetItem(["port 1"])
+        portItem.setData(0, USER_ROLE, PortSettings(50))
+        tree.addTopLevelItem(portItem)
+
+        state = FormAccessRecorder.getWidgetState(tree)
+        portItem.data(0, USER_ROLE).R = 75
+        self.assertNotEqual(state, FormAccessRecorder.getWidgetState(tree))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.GuiHelpers.HeadlessForm import HeadlessForm, HeadlessTreeWidgetItem, MATCH_EXACTLY, MATCH_FIXED_STRING, MATCH_RECURSIVE
+
+USER_ROLE = 256
+
+class TestHeadlessForm(unittest.TestCase):
+
+    def setUp(self):
+        self.form = HeadlessForm(os.path.join(parentdir, "ui", "dialog.ui"))
+
+    def test_defaultsFromUiFile(self):
+        self.assertEqual(self.form.simParamsDeltaUnitList.currentText(), "mm")
+        self.assertTrue(self.form.radioButton_octaveType.isChecked())
+        self.assertFalse(self.form.radioButton_pythonType.isChecked())
+        self.assertEqual(self.form.simParamsMaxTimesteps.value(), 1000000)
+
+    def test_radioButtonsAreExclusive(self):
+        self.form.radioButton_pythonType.setChecked(True)
+        self.assertTrue(self.form.radioButton_pythonType.isChecked())
+        self.assertFalse(self.form.radioButton_octaveType.isChecked())
+
+        # checked exclusive button is not unchecked directly
+        self.form.radioButton_pythonType.setChecked(False)
+        self.assertTrue(self.form.radioButton_pythonType.isChecked())
+
+    def test_comboboxFindTextFlags(self):
+        comboBox = self.form.simParamsDeltaUnitList
+        self.assertEqual(comboBox.findText("MM"), -1)
+        self.assertEqual(comboBox.findText("MM", MATCH_FIXED_STRING), comboBox.findText("mm"))
+
+        comboBox.setCurrentText("m")
+        self.assertEqual(comboBox.currentText(), "m")
+        comboBox.setCurrentText("not an unit")
+        self.assertEqual(comboBox.currentText(), "m")
+
+    def test_doubleSpinBoxRoundsToDecimals(self):
+        spinBox = self.form.simParamsMinDecrement
+        spinBox.setValue(spinBox.maximum() * 10)
+        self.assertEqual(spinBox.value(), spinBox.maximum())
+
+    def test_treeWidgetFindItems(self):
+        tree = self.form.objectAssignmentRightTreeWidget
+        portCategory = HeadlessTreeWidgetItem(["Port"])
+        tree.insertTopLevelItem(0, portCategory)
+        portItem = HeadlessTreeWidgetItem(["port 1"])
+        portItem.setData(0, USER_ROLE, "port settings")
+        portCategory.addChild(portItem)
+        portItem.addChild(HeadlessTreeWidgetItem(["box"]))
+
+        self.assertEqual(tree.findItems("Port", MATCH_EXACTLY), [portCategory])
+        self.assertEqual(tree.findItems("port 1", MATCH_EXACTLY), [])
+        self.assertEqual(tree.findItems("port 1", MATCH_EXACTLY | MATCH_RECURSIVE), [portItem])
+        self.assertIsNone(portCategory.parent())
+        self.assertIs(portItem.parent(), portCategory)
+
+        clonedItem = portItem.clone()
+        self.assertEqual(clonedItem.data(0, USER_ROLE), "port settings")
+        self.assertEqual(clonedItem.child(0).text(0), "box")
+        self.assertIsNone(clonedItem.parent())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.JobRunner.LocalScheduler import LocalScheduler
+
+SLEEP_COMMAND = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+class TestLocalScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.scheduler = LocalScheduler(maxConcurrentJobs=1, threadsPerJob=1)
+
+    def tearDown(self):
+        for job in self.scheduler.getRunningJobs():
+            job.process.kill()
+            job.process.wait()
+            job.logFile.close()
+        self.tempDir.cleanup()
+
+    def createJobDir(self, name):
+        jobDir = os.path.join(self.tempDir.name, name)
+        os.makedirs(jobDir)
+        return jobDir
+
+    def waitUntilDone(self, job, timeout=10):
+        endTime = time.time() + timeout
+        while not job.isDone() and time.time() < endTime:
+            self.scheduler.poll()
+            time.sleep(0.05)
+
+    def test_jobsRunInOrder(self):
+        jobs = [self.scheduler.addJob(f"job{k}", [sys.executable, "-c", "pass"], self.createJobDir(f"job{k}")) for k in range(3)]
+        failedJobs = self.scheduler.run(pollInterval=0.05)
+
+        self.assertEqual(failedJobs, [])
+        self.assertEqual([job.state for job in jobs], ["finished"] * 3)
+        self.assertEqual(sorted(jobs, key=lambda job: job.startTime), jobs)
+
+    def test_failedDependencyCancelsJob(self):
+        failingJob = self.scheduler.addJob("failing", [sys.executable, "-c", "raise SystemExit(1)"], self.createJobDir("failing"))
+        dependentJob = self.scheduler.addJob("dependent", [sys.executable, "-c", "pass"], self.createJobDir("dependent"), dependencies=[failingJob])
+        self.scheduler.run(pollInterval=0.05)
+
+        self.assertEqual(failingJob.state, "failed")
+        self.assertEqual(dependentJob.state, "cancelled")
+
+    def test_cancelQueuedJob(self):
+        runningJob = self.scheduler.addJob("running", SLEEP_COMMAND, self.createJobDir("running"))
+        queuedJob = self.scheduler.addJob("queued", SLEEP_COMMAND, self.createJobDir("queued"))
+        self.scheduler.poll()
+
+        self.scheduler.cancelJob(queuedJob)
+        self.assertEqual(queuedJob.state, "cancelled")
+        self.assertIsNone(queuedJob.process)
+        self.assertEqual(runningJob.state, "running")
+
+    def test_cancelBeforeSimulationStartedTerminatesProcess(self):
+        job = self.scheduler.addJob("preparing", SLEEP_COMMAND, self.createJobDir("preparing"))
+        self.scheduler.poll()
+
+        # simulation output directory from previous run is wiped by script, ABORT file there would be lost
+        os.makedirs(job.getSimulationOutputDir())
+        self.scheduler.cancelJob(job)
+        self.waitUntilDone(job)
+
+        self.assertEqual(job.state, "cancelled")
+        self.assertFalse(os.path.exists(os.path.join(job.getSimulationOutputDir(), "ABORT")))
+
+    def test_cancelRunningSimulationWritesAbortThenTerminates(self):
+        job = self.scheduler.addJob("simulating", SLEEP_COMMAND, self.createJobDir("simulating"))
+        self.scheduler.poll()
+
+        os.makedirs(job.getSimulationOutputDir())
+        with open(os.path.join(job.getSimulationOutputDir(), "model.xml"), "w") as f:
+            f.write("<openEMS/>\n")
+        os.utime(os.path.join(job.getSimulationOutputDir(), "model.xml"), (job.startTime + 1, job.startTime + 1))
+        self.scheduler.cancelJob(job)
+
+        self.assertTrue(os.path.exists(os.path.join(job.getSimulationOutputDir(), "ABORT")))
+        self.scheduler.poll()
+        self.assertEqual(job.state, "running")
+
+        # process did not react to ABORT file, it's terminated after timeout
+        job.cancelTime -= LocalScheduler.CANCEL_TIMEOUT + 1
+        self.waitUntilDone(job)
+        self.assertEqual(job.state, "cancelled")
+
+if __name__ == '__main__':
+    unittest.main()
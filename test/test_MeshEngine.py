@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.ScriptLinesGenerator.MeshEngine import MeshEngine
+
+class TestMeshEngine(unittest.TestCase):
+
+    def setUp(self):
+        MeshEngine.smoothMeshLinesCache.clear()
+
+    def tearDown(self):
+        MeshEngine.smoothMeshLinesCache.clear()
+
+    def test_resolveAppliesGridsInOrder(self):
+        engine = MeshEngine(MeshEngine.arangeWithEndpoint)
+        engine.addRange('x', 0, 10, 2)
+
+        # higher priority grid removes lines in its range and adds its own
+        engine.removeLines('x', 3, 7)
+        engine.addLinspace('x', 4, 6, 3)
+        engine.addLines('x', [8])
+
+        np.testing.assert_allclose(engine.getLines('x'), [0, 2, 4, 5, 6, 8, 10])
+        self.assertTrue(engine.isResolved())
+
+        engine.setUnresolved("user defined grid")
+        self.assertFalse(engine.isResolved())
+
+    def test_rangeFunctionsIncludeEndpoint(self):
+        np.testing.assert_allclose(MeshEngine.arangeWithEndpoint(0, 1, 0.25), [0, 0.25, 0.5, 0.75, 1])
+        np.testing.assert_allclose(MeshEngine.octaveRange(0, 1, 0.1), np.linspace(0, 1, 11))
+        self.assertEqual(MeshEngine.octaveRange(1, 0, 0.1).size, 0)
+
+    def test_removeCloseLinesKeepsFirstLineOfRun(self):
+        np.testing.assert_allclose(MeshEngine.removeCloseLines([0, 0.1, 0.2, 0.3, 1, 2], 0.15), [0, 0.2, 1, 2])
+
+    def test_smoothMeshLinesInvariants(self):
+        fixedLines = [0, 1, 10, 10.5, 30]
+        maxRes = 2.0
+        ratio = 1.5
+        lines = MeshEngine.smoothMeshLines(fixedLines, maxRes, ratio)
+
+        cells = np.diff(lines)
+        self.assertTrue(np.all(cells > 0))
+        self.assertTrue(np.all(np.isin(fixedLines, lines)))
+        self.assertLessEqual(np.max(cells), maxRes * (1 + 1e-9))
+        self.assertLessEqual(np.max(np.maximum(cells[1:] / cells[:-1], cells[:-1] / cells[1:])), ratio * (1 + 1e-9))
+
+    def test_smoothMeshLinesResultIsCopy(self):
+        lines = MeshEngine.smoothMeshLines([0, 10], 1.0)
+        lines[0] = -1
+        self.assertEqual(MeshEngine.smoothMeshLines([0, 10], 1.0)[0], 0)
+
+    def test_smoothMeshLinesCacheIsBounded(self):
+        cacheSize = MeshEngine.SMOOTH_MESH_LINES_CACHE_SIZE
+        for k in range(cacheSize + 5):
+            MeshEngine.smoothMeshLines([0, 10 + k], 1.0)
+            # first result is used again each time so it's never least recently used
+            MeshEngine.smoothMeshLines([0, 10], 1.0)
+
+        self.assertEqual(len(MeshEngine.smoothMeshLinesCache), cacheSize)
+        cachedStops = [np.frombuffer(key[0])[-1] for key in MeshEngine.smoothMeshLinesCache.keys()]
+        self.assertIn(10, cachedStops)
+        self.assertNotIn(11, cachedStops)
+
+if __name__ == '__main__':
+    unittest.main()
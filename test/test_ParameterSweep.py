@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.ScriptLinesGenerator.ParameterSweep import ParameterSweep
+
+class MaterialSettings:
+    def __init__(self):
+        self.name = "FR4"
+        self.constants = {'epsilon': 4.4, 'kappa': 0}
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeFile(self, name, content):
+        fileName = os.path.join(self.tempDir.name, name)
+        with open(fileName, "w", encoding="utf-8") as f:
+            f.write(content)
+        return fileName
+
+    def test_jsonParametersAreCartesianProduct(self):
+        sweep = ParameterSweep.load(self.writeFile("sweep.json", json.dumps({
+            "parameters": {"FR4": {"constants.epsilon": [4.2, 4.4]}, "port1": {"R": [50, 75]}}
+        })))
+
+        variants = sweep.getVariants()
+        self.assertEqual([name for [name, overrides] in variants], ["variant_001", "variant_002", "variant_003", "variant_004"])
+        self.assertEqual(variants[0][1], {"FR4": {"constants.epsilon": 4.2}, "port1": {"R": 50}})
+        self.assertEqual(variants[3][1], {"FR4": {"constants.epsilon": 4.4}, "port1": {"R": 75}})
+
+    def test_jsonVariantsAreAddedAfterProduct(self):
+        sweep = ParameterSweep.load(self.writeFile("sweep.json", json.dumps({
+            "parameters": {"port1": {"R": [50]}},
+            "variants": [{"name": "lossy FR4", "overrides": {"FR4": {"constants.kappa": 0.001}}}]
+        })))
+
+        self.assertEqual(sweep.getVariants(), [
+            ["variant_001", {"port1": {"R": 50}}],
+            ["lossy_FR4", {"FR4": {"constants.kappa": 0.001}}]
+        ])
+
+    def test_csvRowsAreVariants(self):
+        sweep = ParameterSweep.load(self.writeFile("sweep.csv", "name,FR4:constants.epsilon,port1:R,port1:type\nlow,4.2,50,\nhigh,4.6,75,\"lumped\"\n"))
+
+        self.assertEqual(sweep.getVariants(), [
+            ["low", {"FR4": {"constants.epsilon": 4.2}, "port1": {"R": 50}}],
+            ["high", {"FR4": {"constants.epsilon": 4.6}, "port1": {"R": 75, "type": "lumped"}}]
+        ])
+
+    def test_csvColumnWithoutItemNameIsError(self):
+        with self.assertRaises(ValueError):
+            ParameterSweep.load(self.writeFile("sweep.csv", "name,epsilon\nlow,4.2\n"))
+
+    def test_variantNamesAreSanitizedAndUnique(self):
+        self.assertEqual([name for [name, overrides] in ParameterSweep.nameVariants([["a/b c", {}], [None, {}]])], ["a_b_c", "variant_002"])
+        with self.assertRaises(ValueError):
+            ParameterSweep.nameVariants([["a b", {}], ["a/b", {}]])
+
+    def test_applyOverridesReturnsChangedCopy(self):
+        itemData = MaterialSettings()
+        overriddenItemData = ParameterSweep.applyOverrides(itemData, {"constants.epsilon": 4.2})
+
+        self.assertEqual(overriddenItemData.constants['epsilon'], 4.2)
+        self.assertEqual(itemData.constants['epsilon'], 4.4)
+
+        with self.assertRaises(ValueError):
+            ParameterSweep.applyOverrides(itemData, {"constants.mue": 2})
+
+if __name__ == '__main__':
+    unittest.main()
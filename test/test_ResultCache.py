@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.ScriptLinesGenerator.ResultCache import ResultCache
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(cacheDir=os.path.join(self.tempDir.name, "cache"))
+        self.stlFileName = self.writeFile("model", "box.stl", "solid box\n")
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeFile(self, dirName, name, content):
+        os.makedirs(os.path.join(self.tempDir.name, dirName), exist_ok=True)
+        fileName = os.path.join(self.tempDir.name, dirName, name)
+        with open(fileName, "w") as f:
+            f.write(content)
+        return fileName
+
+    def test_sameModelHasSameHash(self):
+        modelHash = ResultCache.computeModelHash(["max_timesteps = 1000"], [self.stlFileName])
+        self.assertEqual(modelHash, ResultCache.computeModelHash(["max_timesteps = 1000"], [self.stlFileName]))
+
+        # files are identified by base name, same model exported into other directory has same hash
+        otherStlFileName = self.writeFile("other", "box.stl", "solid box\n")
+        self.assertEqual(modelHash, ResultCache.computeModelHash(["max_timesteps = 1000"], [otherStlFileName]))
+
+    def test_changedModelHasOtherHash(self):
+        modelHash = ResultCache.computeModelHash(["max_timesteps = 1000"], [self.stlFileName])
+        self.assertNotEqual(modelHash, ResultCache.computeModelHash(["max_timesteps = 2000"], [self.stlFileName]))
+
+        self.writeFile("model", "box.stl", "solid box changed\n")
+        self.assertNotEqual(modelHash, ResultCache.computeModelHash(["max_timesteps = 1000"], [self.stlFileName]))
+
+        os.remove(self.stlFileName)
+        self.assertNotEqual(modelHash, ResultCache.computeModelHash(["max_timesteps = 1000"], [self.stlFileName]))
+
+    def test_hasResultsOnlyForCompleteEntry(self):
+        modelHash = ResultCache.computeModelHash(["max_timesteps = 1000"], [self.stlFileName])
+        self.assertFalse(self.cache.hasResults(modelHash))
+
+        # entry directory is created by renaming .part directory, it's complete when simulation_output exists
+        os.makedirs(self.cache.getEntryDir(modelHash))
+        self.assertFalse(self.cache.hasResults(modelHash))
+
+        os.makedirs(os.path.join(self.cache.getEntryDir(modelHash), "simulation_output"))
+        self.assertTrue(self.cache.hasResults(modelHash))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.ScriptLinesGenerator.ScriptEmitter import ScriptEmitter
+
+class TestScriptEmitter(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.tempDir.name, "script_openEMS.py")
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_sectionEmitterIsAppendedIntoFile(self):
+        section = ScriptEmitter()
+        section += "a = 1\n"
+        section += "b = 2\n"
+
+        with ScriptEmitter(self.fileName, flushSize=4) as genScript:
+            genScript += "# header\n"
+            genScript += section
+            self.assertTrue(os.path.exists(self.fileName + ".part"))
+
+        with open(self.fileName, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "# header\na = 1\nb = 2\n")
+        self.assertFalse(os.path.exists(self.fileName + ".part"))
+
+    def test_partFileRemovedOnError(self):
+        with open(self.fileName, "w", encoding="utf-8") as f:
+            f.write("previous script\n")
+
+        with self.assertRaises(ValueError):
+            with ScriptEmitter(self.fileName, flushSize=1) as genScript:
+                genScript += "# header\n"
+                raise ValueError("generation failed")
+
+        self.assertFalse(os.path.exists(self.fileName + ".part"))
+        with open(self.fileName, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "previous script\n")
+
+    def test_stringPlusEmitter(self):
+        section = ScriptEmitter()
+        section += "x = 1\n"
+        structureScript = "# structure\n"
+        structureScript += section
+        self.assertEqual(structureScript, "# structure\nx = 1\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import tempfile
+import unittest
+
+currentdir = os.path.dirname(os.path.abspath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utilsOpenEMS.ScriptLinesGenerator.StlCache import StlCache
+
+class TestStlCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.cache = StlCache(cacheDir=os.path.join(self.tempDir.name, "cache"), maxSizeMB=1)
+        self.exportFileName = os.path.join(self.tempDir.name, "box_gen_model.stl")
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeExportFile(self, content):
+        with open(self.exportFileName, "w") as f:
+            f.write(content)
+
+    def readExportFile(self):
+        with open(self.exportFileName) as f:
+            return f.read()
+
+    def test_missWithoutEntry(self):
+        self.assertFalse(self.cache.get("abc", self.exportFileName))
+        self.assertFalse(self.cache.get(None, self.exportFileName))
+        self.assertFalse(os.path.exists(self.exportFileName))
+
+    def test_hitIsCopyOfStoredFile(self):
+        self.writeExportFile("solid box\n")
+        self.cache.put("abc", self.exportFileName)
+        os.remove(self.exportFileName)
+
+        self.assertTrue(self.cache.get("abc", self.exportFileName))
+        self.assertEqual(self.readExportFile(), "solid box\n")
+        self.assertFalse(os.path.samefile(self.exportFileName, self.cache.getCacheFileName("abc")))
+
+        # changing output file must not change cache content
+        self.writeExportFile("solid changed\n")
+        with open(self.cache.getCacheFileName("abc")) as f:
+            self.assertEqual(f.read(), "solid box\n")
+
+        self.assertEqual([name for name in os.listdir(self.cache.cacheDir) if name.endswith(".part")], [])
+
+    def test_evictRemovesLeastRecentlyUsed(self):
+        for key in ["old", "new"]:
+            self.writeExportFile("x" * (600 * 1024))
+            self.cache.put(key, self.exportFileName)
+        pastTime = time.time() - 100
+        os.utime(self.cache.getCacheFileName("old"), (pastTime, pastTime))
+
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertFalse(os.path.exists(self.cache.getCacheFileName("old")))
+        self.assertTrue(os.path.exists(self.cache.getCacheFileName("new")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import re
 import os
+import time
 
 import PySide2.QtWidgets
 from PySide2 import QtGui, QtCore, QtWidgets, QtUiTools
@@ -30,6 +31,9 @@ class CadInterface:
         return
 
     def getIconByCategory(self, categoryName):
+        return QtGui.QIcon(self.getIconFileByCategory(categoryName))
+
+    def getIconFileByCategory(self, categoryName):
         if 'Material' in categoryName:
             iconPath = os.path.join(self.APP_DIR, "img", "material.svg")
         elif 'Excitation' in categoryName:
@@ -45,7 +49,7 @@ class CadInterface:
         else:
             iconPath = os.path.join(self.APP_DIR, "img", "error.svg")
 
-        return QtGui.QIcon(iconPath)
+        return iconPath
 
     # return all items, at least all top level
     def getAllTreeWidgetItems(self, treeWidget):
@@ -139,5 +143,29 @@ class CadInterface:
         print(f"{__file__} > exportSTL()")
         return None
 
+    def getSTLCacheKey(self, partToExport):
+        """
+        Returns hash identifying STL file content which would be generated for objects, it must cover geometry, placement
+        and tessellation parameters.
+        :param partToExport: list of CAD objects exported into one STL file
+        :return: hex string or None if objects cannot be cached
+        """
+        return None
+
+    def exportSTLBatch(self, exportJobs, workersCount=1):
+        """
+        Export STL files for list of jobs, default implementation exports them one after another, CAD specific helpers
+        can run it in parallel.
+        :param exportJobs: list of [partToExport, exportFileName]
+        :param workersCount: maximum number of parallel workers
+        :return: list of [exportFileName, duration in seconds]
+        """
+        timings = []
+        for [partToExport, exportFileName] in exportJobs:
+            startTime = time.perf_counter()
+            self.exportSTL(partToExport, exportFileName)
+            timings.append([exportFileName, time.perf_counter() - startTime])
+        return timings
+
 if __name__ == "__main__":
     cadInterface = CadInterface()
\ No newline at end of file
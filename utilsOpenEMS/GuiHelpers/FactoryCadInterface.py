@@ -2,8 +2,21 @@ from utilsOpenEMS.GuiHelpers.CadInterface import CadInterface
 
 class FactoryCadInterface:
 
+    #
+    #   Helper instance returned for all createHelper() calls, used when running without CAD application (ie. headless batch export
+    #   with file based CAD interface), in that case all parts of application (generators, ini file loader) share same objects.
+    #
+    overrideHelper = None
+
+    @staticmethod
+    def setHelper(helperInstance):
+        FactoryCadInterface.overrideHelper = helperInstance
+
     @staticmethod
     def createHelper(APP_DIR = ""):
+        if FactoryCadInterface.overrideHelper is not None:
+            return FactoryCadInterface.overrideHelper
+
         interfaceInstance = CadInterface()
         if interfaceInstance.type == "FreeCAD":
             from  utilsOpenEMS.GuiHelpers.FreeCADHelpers import FreeCADHelpers
@@ -13,4 +26,4 @@ class FactoryCadInterface:
             return BlenderHelpers(APP_DIR)
         else:
             return CadInterface(APP_DIR)
-            #raise Exception("Cannot recognize CAD interface nor FreeCAD or Blender.")
\ No newline at end of file
+            #raise Exception("Cannot recognize CAD interface nor FreeCAD or Blender.")
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import time
+import concurrent.futures
+
+import numpy as np
+
+from utilsOpenEMS.GuiHelpers.CadInterface import CadInterface
+
+class FileToCadObject:
+    """
+    Simple class to have same members for rest of application as FreeCAD objects, it expects items to have obj.Name, obj.Label, obj.Shape
+    """
+    def __init__(self, label, name, sourceFile, vertexes=None, boundBox=None):
+        self.Label = label
+        self.Name = name
+        self.SourceFile = sourceFile
+        self.Shape = FileToCadShapeObject(vertexes, boundBox)
+
+class FileToCadShapeObject:
+    def __init__(self, vertexes=None, boundBox=None):
+        """
+        :param vertexes: numpy array of triangles vertexes with shape (N, 3, 3) or None if geometry is not known (STEP file)
+        :param boundBox: [xmin, ymin, zmin, xmax, ymax, zmax], if None it's calculated from vertexes
+        """
+        self.vertexes = vertexes
+        if boundBox is None and vertexes is not None and len(vertexes) > 0:
+            flatVertexes = vertexes.reshape(-1, 3)
+            boundBox = list(flatVertexes.min(axis=0)) + list(flatVertexes.max(axis=0))
+        self.BoundBox = FileToCadBoundBoxObject(boundBox)
+
+    @property
+    def Faces(self):
+        """
+        Triangles of STL mesh used as faces, this is used when object is assigned to conducting sheet material.
+        """
+        if self.vertexes is None:
+            return []
+        return [FileToCadFaceObject(triangle) for triangle in self.vertexes]
+
+class FileToCadFaceObject:
+    def __init__(self, triangle):
+        self.Vertexes = [FileToCadVertexObject(point) for point in triangle]
+
+class FileToCadVertexObject:
+    def __init__(self, point):
+        self.X = float(point[0])
+        self.Y = float(point[1])
+        self.Z = float(point[2])
+
+class FileToCadBoundBoxObject:
+    def __init__(self, boundBox):
+        if boundBox is None:
+            boundBox = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+        self.XMin = float(boundBox[0])
+        self.YMin = float(boundBox[1])
+        self.ZMin = float(boundBox[2])
+        self.XMax = float(boundBox[3])
+        self.YMax = float(boundBox[4])
+        self.ZMax = float(boundBox[5])
+
+class FileCadHelpers(CadInterface):
+    """
+    CAD interface which is not connected to any running CAD application, objects are read from model directory:
+        - <label>.stl files (ASCII or binary), object label is filename without extension
+        - <label>.step/.stp files, bounding box is read from manifest or estimated from CARTESIAN_POINT entries
+        - optional manifest file model.json with entries:
+            {"objects": [{"label": "...", "name": "FreeCAD internal name", "file": "part.stl", "boundBox": [xmin, ymin, zmin, xmax, ymax, zmax]}]}
+
+    All coordinates are expected in FreeCAD units (mm).
+    """
+
+    MANIFEST_FILENAME = "model.json"
+    STL_DTYPE = np.dtype([("normal", "<f4", (3,)), ("vertexes", "<f4", (3, 3)), ("attribute", "<u2")])
+
+    def __init__(self, modelDir, documentFileName=None, APP_DIR=""):
+        super(FileCadHelpers, self).__init__(APP_DIR)
+        self.type = "File"
+        self.modelDir = os.path.abspath(modelDir)
+
+        #
+        #   document filename is used to name output folders and files in same way as FreeCAD file would be,
+        #   if not set it's named by model directory
+        #
+        if documentFileName is None:
+            documentFileName = os.path.join(self.modelDir, os.path.basename(self.modelDir) + ".FCStd")
+        self.documentFileName = os.path.abspath(documentFileName)
+
+        self.objects = []
+        self.loadModelDir()
+
+    #########################################################################################################################
+    #   FILE SPECIFIC FUNCTIONS
+    #########################################################################################################################
+
+    def loadModelDir(self):
+        self.objects = []
+        manifestEntries = {}
+
+        manifestPath = os.path.join(self.modelDir, self.MANIFEST_FILENAME)
+        if os.path.exists(manifestPath):
+            with open(manifestPath, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            for entry in manifest.get("objects", []):
+                manifestEntries[entry["label"]] = entry
+
+        #
+        #   objects from manifest first, after that all remaining STL/STEP files in model directory, STL file is preferred over STEP with same name
+        #
+        for label, entry in manifestEntries.items():
+            sourceFile = entry.get("file", None)
+            if sourceFile is not None:
+                sourceFile = os.path.join(self.modelDir, sourceFile)
+            self.objects.append(self.createObject(label, entry.get("name", label), sourceFile, entry.get("boundBox", None)))
+
+        for fileName in sorted(os.listdir(self.modelDir), key=lambda item: (os.path.splitext(item)[1].lower() != ".stl", item)):
+            label, ext = os.path.splitext(fileName)
+            if ext.lower() not in [".stl", ".step", ".stp"] or label in manifestEntries:
+                continue
+            if any(obj.Label == label for obj in self.objects):
+                print(f"{__file__} > loadModelDir() > duplicate object label '{label}', file {fileName} skipped")
+                continue
+            self.objects.append(self.createObject(label, label, os.path.join(self.modelDir, fileName)))
+
+        print(f"{__file__} > loadModelDir() > loaded {len(self.objects)} objects from {self.modelDir}")
+
+    def createObject(self, label, name, sourceFile, boundBox=None):
+        vertexes = None
+        if sourceFile is not None and os.path.splitext(sourceFile)[1].lower() == ".stl":
+            vertexes = self.readSTL(sourceFile)
+        elif sourceFile is not None and boundBox is None:
+            boundBox = self.readSTEPBoundBox(sourceFile)
+        return FileToCadObject(label, name, sourceFile, vertexes, boundBox)
+
+    def readSTL(self, fileName):
+        """
+        Read STL file triangles.
+        :param fileName: path to ASCII or binary STL file
+        :return: numpy array of shape (N, 3, 3)
+        """
+        with open(fileName, "rb") as f:
+            content = f.read()
+
+        #
+        #   binary STL has 80 bytes header, uint32 triangle count and 50 bytes per triangle, ASCII STL starts with 'solid'
+        #   but some binary exporters also put 'solid' into header so size check is used
+        #
+        if len(content) >= 84:
+            triangleCount = int(np.frombuffer(content, dtype="<u4", count=1, offset=80)[0])
+            if len(content) == 84 + triangleCount * 50:
+                triangles = np.frombuffer(content, dtype=self.STL_DTYPE, count=triangleCount, offset=84)
+                return triangles["vertexes"].astype(np.float64)
+
+        vertexValues = re.findall(r"vertex\s+(\S+)\s+(\S+)\s+(\S+)", content.decode("ascii", errors="ignore"))
+        return np.array(vertexValues, dtype=np.float64).reshape(-1, 3, 3)
+
+    def writeSTL(self, fileName, vertexes):
+        """
+        Write triangles into binary STL file, normals are calculated from vertexes order.
+        :param vertexes: numpy array of shape (N, 3, 3)
+        """
+        normals = np.cross(vertexes[:, 1] - vertexes[:, 0], vertexes[:, 2] - vertexes[:, 0])
+        normalsLength = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = normals / np.where(normalsLength > 0, normalsLength, 1)
+
+        triangles = np.zeros(len(vertexes), dtype=self.STL_DTYPE)
+        triangles["normal"] = normals
+        triangles["vertexes"] = vertexes
+
+        with open(fileName, "wb") as f:
+            f.write(b"FreeCAD-OpenEMS-Export merged STL".ljust(80, b" "))
+            f.write(np.array([len(triangles)], dtype="<u4").tobytes())
+            f.write(triangles.tobytes())
+
+    def readSTEPBoundBox(self, fileName):
+        """
+        Estimate bounding box of STEP file from its CARTESIAN_POINT entries, this is just approximation (ie. for circles just their center
+        is stored) so for exact values boundBox should be provided in manifest.
+        :param fileName: path to STEP file
+        :return: [xmin, ymin, zmin, xmax, ymax, zmax] or None
+        """
+        with open(fileName, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+
+        coords = re.findall(r"CARTESIAN_POINT\s*\(\s*'[^']*'\s*,\s*\(([^)]*)\)", content)
+        points = [[float(value) for value in coord.split(",")] for coord in coords if len(coord.split(",")) == 3]
+        if len(points) == 0:
+            self.printWarning(f"{__file__} > readSTEPBoundBox() > no points found in {fileName}, add its boundBox into {self.MANIFEST_FILENAME}\n")
+            return None
+
+        self.printWarning(f"{__file__} > readSTEPBoundBox() > bounding box for {fileName} estimated from its points, for exact value add boundBox into {self.MANIFEST_FILENAME}\n")
+        points = np.array(points)
+        return list(points.min(axis=0)) + list(points.max(axis=0))
+
+    #########################################################################################################################
+    #   CAD INTERFACE FUNCTIONS
+    #########################################################################################################################
+
+    def getObjects(self):
+        return self.objects
+
+    def getObjectsByLabel(self, objLabel):
+        return [obj for obj in self.objects if obj.Label == objLabel]
+
+    def getObjectById(self, objId):
+        for obj in self.objects:
+            if obj.Name == objId:
+                return obj
+        return None
+
+    def getCurrDocumentFileName(self):
+        return self.documentFileName
+
+    def removeObject(self, objName):
+        self.objects = [obj for obj in self.objects if obj.Name != objName]
+
+    def clearSelection(self):
+        return None
+
+    def recompute(self):
+        return None
+
+    def exportSTL(self, partToExport, exportFileName):
+        """
+        STL files are already in model directory so single object is just copied, more objects are merged into one STL
+        file same as FreeCAD Mesh.export() does. STEP files cannot be tessellated without CAD kernel so export fails for them.
+        """
+        for obj in partToExport:
+            if obj.SourceFile is None or os.path.splitext(obj.SourceFile)[1].lower() != ".stl":
+                raise ValueError(f"object '{obj.Label}' has no STL file, export it next to {obj.SourceFile} as {obj.Label}.stl")
+
+        if len(partToExport) == 1:
+            shutil.copyfile(partToExport[0].SourceFile, exportFileName)
+        else:
+            self.writeSTL(exportFileName, np.concatenate([obj.Shape.vertexes.reshape(-1, 3, 3) for obj in partToExport]))
+
+    def getSTLCacheKey(self, partToExport):
+        """
+        Exported file is copy of source STL file so its content is the key.
+        """
+        if len(partToExport) != 1 or partToExport[0].SourceFile is None or os.path.splitext(partToExport[0].SourceFile)[1].lower() != ".stl":
+            return None
+
+        fileHash = hashlib.sha256()
+        with open(partToExport[0].SourceFile, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                fileHash.update(block)
+        return fileHash.hexdigest()
+
+    def exportSTLBatch(self, exportJobs, workersCount=1):
+        """
+        Files are just copied so threads are enough, copying releases GIL.
+        """
+        if workersCount <= 1 or len(exportJobs) <= 1:
+            return super(FileCadHelpers, self).exportSTLBatch(exportJobs, workersCount)
+
+        def exportJob(partToExport, exportFileName):
+            startTime = time.perf_counter()
+            self.exportSTL(partToExport, exportFileName)
+            return [exportFileName, time.perf_counter() - startTime]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workersCount) as executor:
+            return list(executor.map(lambda job: exportJob(*job), exportJobs))
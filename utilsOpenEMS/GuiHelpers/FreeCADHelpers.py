@@ -1,10 +1,18 @@
 from utilsOpenEMS.GuiHelpers.CadInterface import CadInterface
-
+from utilsOpenEMS.GuiHelpers import FreeCADStlExportWorker
+
+import os
+import sys
+import hashlib
+import tempfile
+import subprocess
+import concurrent.futures
 from PySide2 import QtCore
 import FreeCAD
 import FreeCADGui
 import Draft
 import Mesh
+import Part
 
 class FreeCADHelpers(CadInterface):
 
@@ -129,3 +137,108 @@ class FreeCADHelpers(CadInterface):
 
     def exportSTL(self, partToExport, exportFileName):
         Mesh.export(partToExport, exportFileName)
+
+    def getWorkerPythonExecutable(self):
+        """
+        Inside FreeCAD sys.executable is FreeCAD binary, worker processes must be started by python interpreter shipped with it.
+        :return: path to python interpreter or None if not found
+        """
+        if os.path.basename(sys.executable).lower().startswith("python"):
+            return sys.executable
+
+        for binDir in [os.path.dirname(sys.executable), os.path.join(FreeCAD.getHomePath(), "bin")]:
+            for pythonName in ["python.exe", "python3", "python"]:
+                pythonPath = os.path.join(binDir, pythonName)
+                if os.path.isfile(pythonPath):
+                    return pythonPath
+
+        return None
+
+    def getMeshExportTolerance(self):
+        return FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Mesh").GetFloat("MaxDeviationExport", 0.1)
+
+    def getGlobalShape(self, obj):
+        """
+        Shape of object in global coordinates, objects inside App::Part containers get container placement applied
+        same as Mesh.export() does.
+        """
+        shape = obj.Shape.copy()
+        shape.Placement = obj.getGlobalPlacement()
+        return shape
+
+    def getShapeBrepString(self, partToExport):
+        """
+        :return: BREP string of objects shape in global placement, multiple objects are put into compound, None if some object has no shape
+        """
+        if len(partToExport) == 0 or not all([hasattr(obj, "Shape") and not obj.Shape.isNull() for obj in partToExport]):
+            return None
+        shape = self.getGlobalShape(partToExport[0]) if len(partToExport) == 1 else Part.makeCompound([self.getGlobalShape(obj) for obj in partToExport])
+        return shape.exportBrepToString()
+
+    def getSTLCacheKey(self, partToExport):
+        """
+        Shape placement is part of BREP as shape location so hash of BREP and mesh export tolerance identifies STL content.
+        """
+        brepString = self.getShapeBrepString(partToExport)
+        if brepString is None:
+            return None
+        return hashlib.sha256(f"{self.getMeshExportTolerance()!r}\n{brepString}".encode("utf-8")).hexdigest()
+
+    def exportSTLBatch(self, exportJobs, workersCount=1):
+        """
+        Export STL files in parallel, each shape is written as BREP file and exported by FreeCADStlExportWorker script
+        started by python interpreter shipped with FreeCAD. Worker processes are started by subprocess, multiprocessing
+        would require changing its process wide executable setting.
+        Objects without shape and jobs which fail in worker are exported one after another by exportSTL().
+        :param exportJobs: list of [partToExport, exportFileName]
+        :param workersCount: maximum number of worker processes
+        :return: list of [exportFileName, duration in seconds]
+        """
+        pythonExecutable = self.getWorkerPythonExecutable()
+        if workersCount <= 1 or len(exportJobs) <= 1 or pythonExecutable is None:
+            return super(FreeCADHelpers, self).exportSTLBatch(exportJobs, workersCount)
+
+        tolerance = self.getMeshExportTolerance()
+
+        #
+        #   worker interpreter must find FreeCAD modules same as this process
+        #
+        workerEnv = os.environ.copy()
+        workerEnv["PYTHONPATH"] = os.pathsep.join([path for path in sys.path if path])
+
+        def runWorker(brepFileName, exportFileName):
+            result = subprocess.run(
+                [pythonExecutable, FreeCADStlExportWorker.__file__, brepFileName, exportFileName, repr(tolerance)],
+                env=workerEnv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+            )
+            if result.returncode != 0:
+                raise Exception(result.stderr.strip())
+            return float(result.stdout.strip().splitlines()[-1])
+
+        timings = {}
+        localJobs = []
+        with tempfile.TemporaryDirectory(prefix="stl_export_") as brepDir:
+            brepJobs = []
+            for [partToExport, exportFileName] in exportJobs:
+                brepString = self.getShapeBrepString(partToExport)
+                if brepString is not None:
+                    brepFileName = os.path.join(brepDir, f"{len(brepJobs)}.brep")
+                    with open(brepFileName, "w") as f:
+                        f.write(brepString)
+                    brepJobs.append([partToExport, exportFileName, brepFileName])
+                else:
+                    localJobs.append([partToExport, exportFileName])
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(workersCount, max(len(brepJobs), 1))) as executor:
+                futures = {executor.submit(runWorker, brepFileName, exportFileName): [partToExport, exportFileName] for [partToExport, exportFileName, brepFileName] in brepJobs}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        timings[futures[future][1]] = future.result()
+                    except Exception as e:
+                        self.printWarning(f"STL export worker failed for {futures[future][1]}, exporting it again in main process: {e}\n")
+                        localJobs.append(futures[future])
+
+        for [exportFileName, duration] in super(FreeCADHelpers, self).exportSTLBatch(localJobs):
+            timings[exportFileName] = duration
+
+        return [[exportFileName, timings.get(exportFileName, 0.0)] for [partToExport, exportFileName] in exportJobs]
@@ -0,0 +1,42 @@
+#   author: Lubomir Jagos
+#
+#   STL export worker running in separate process
+#       this module must not import FreeCADGui or PySide2, it's run by separate python interpreter without GUI,
+#       shapes are received as BREP files since FreeCAD objects cannot be sent between processes
+#
+#   usage: python FreeCADStlExportWorker.py <brepFileName> <exportFileName> <tolerance>
+#       prints export duration in seconds on last line of output
+#
+import sys
+import time
+
+def exportBrepToSTL(brepFileName, exportFileName, tolerance):
+    """
+    Load shape into temporary document and export it by Mesh.export() same as export in main process.
+    :param brepFileName: shape written by Shape.exportBrep(), already in its global placement
+    :param exportFileName: output STL file path
+    :param tolerance: maximum mesh deviation, same as Mesh.export() tolerance in main process
+    :return: [exportFileName, duration in seconds]
+    """
+    import FreeCAD
+    import Part
+    import Mesh
+
+    startTime = time.perf_counter()
+
+    shape = Part.Shape()
+    shape.importBrep(brepFileName)
+
+    doc = FreeCAD.newDocument("STLExportWorker")
+    try:
+        feature = doc.addObject("Part::Feature", "Shape")
+        feature.Shape = shape
+        Mesh.export([feature], exportFileName, tolerance)
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+    return [exportFileName, time.perf_counter() - startTime]
+
+if __name__ == "__main__":
+    [exportFileName, duration] = exportBrepToSTL(sys.argv[1], sys.argv[2], float(sys.argv[3]))
+    print(duration)
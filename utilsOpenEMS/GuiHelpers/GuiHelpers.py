@@ -2,15 +2,24 @@ from PySide2 import QtGui, QtCore, QtWidgets
 import re
 import os
 from utilsOpenEMS.GlobalFunctions.GlobalFunctions import _bool, _r
+from utilsOpenEMS.GuiHelpers.HeadlessForm import HeadlessTreeWidgetItem
 
 class GuiHelpers:
+
+    #
+    #   When set to True no message boxes are displayed, messages are just printed, used when running without GUI (headless batch export)
+    #
+    headless = False
+
     def __init__(self, form, statusBar = None, APP_DIR=""):
         self.APP_DIR = APP_DIR
         self.form = form
         self.statusBar = statusBar
 
     def displayMessage(self, msgText, forceModal=True):
-        if (not forceModal) and (self.statusBar is not None):
+        if GuiHelpers.headless:
+            print(msgText)
+        elif (not forceModal) and (self.statusBar is not None):
             self.statusBar.showMessage(msgText, 5000)
         else:
             msgBox = QtWidgets.QMessageBox()
@@ -21,41 +30,58 @@ class GuiHelpers:
     #   Display messagebox wit Save/Cancel buttons and after user choice return True/False
     #
     def displayYesNoMessage(self, msgText):
+        if GuiHelpers.headless:
+            print(msgText)
+            return False
+
         msgBox = QtWidgets.QMessageBox()
         msgBox.setText(msgText)
         #msgBox.setInformativeText("Do you want to save your changes?")
         msgBox.setStandardButtons(QtWidgets.QMessageBox.Save | QtWidgets.QMessageBox.Cancel)
         return msgBox.exec() == QtWidgets.QMessageBox.Save
 
+    def createTreeWidgetItem(self, strings=None, iconFileName=None):
+        """
+        Tree items are Qt items in GUI, headless export uses widget-free form so its items are plain python objects.
+        :param strings: column texts
+        :param iconFileName: icon image file, not used in headless mode
+        :return: tree widget item
+        """
+        if GuiHelpers.headless:
+            return HeadlessTreeWidgetItem(strings)
+
+        treeItem = QtWidgets.QTreeWidgetItem(strings) if strings is not None else QtWidgets.QTreeWidgetItem()
+        self.setTreeWidgetItemIcon(treeItem, iconFileName)
+        return treeItem
+
+    def setTreeWidgetItemIcon(self, treeItem, iconFileName):
+        if GuiHelpers.headless or iconFileName is None:
+            return
+        treeItem.setIcon(0, QtGui.QIcon(iconFileName))
+
     def initRightColumnTopLevelItems(self):
         # MATERIALS
-        topItem = QtWidgets.QTreeWidgetItem(["Material"])
-        topItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "material.svg")))
+        topItem = self.createTreeWidgetItem(["Material"], os.path.join(self.APP_DIR, "img", "material.svg"))
         self.form.objectAssignmentRightTreeWidget.insertTopLevelItem(0, topItem)
 
         # EXCITATION
-        topItem = QtWidgets.QTreeWidgetItem(["Excitation"])
-        topItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "excitation.svg")))
+        topItem = self.createTreeWidgetItem(["Excitation"], os.path.join(self.APP_DIR, "img", "excitation.svg"))
         self.form.objectAssignmentRightTreeWidget.insertTopLevelItem(0, topItem)
 
         # GRID
-        topItem = QtWidgets.QTreeWidgetItem(["Grid"])
-        topItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "grid.svg")))
+        topItem = self.createTreeWidgetItem(["Grid"], os.path.join(self.APP_DIR, "img", "grid.svg"))
         self.form.objectAssignmentRightTreeWidget.insertTopLevelItem(0, topItem)
 
         # PORTS
-        topItem = QtWidgets.QTreeWidgetItem(["Port"])
-        topItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "port.svg")))
+        topItem = self.createTreeWidgetItem(["Port"], os.path.join(self.APP_DIR, "img", "port.svg"))
         self.form.objectAssignmentRightTreeWidget.insertTopLevelItem(0, topItem)
 
         # PROBES
-        topItem = QtWidgets.QTreeWidgetItem(["Probe"])
-        topItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "probe.svg")))
+        topItem = self.createTreeWidgetItem(["Probe"], os.path.join(self.APP_DIR, "img", "probe.svg"))
         self.form.objectAssignmentRightTreeWidget.insertTopLevelItem(0, topItem)
 
         # LUMPED PART
-        topItem = QtWidgets.QTreeWidgetItem(["LumpedPart"])
-        topItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "lumpedpart.svg")))
+        topItem = self.createTreeWidgetItem(["LumpedPart"], os.path.join(self.APP_DIR, "img", "lumpedpart.svg"))
         self.form.objectAssignmentRightTreeWidget.insertTopLevelItem(0, topItem)
 
         return
@@ -101,6 +127,8 @@ class GuiHelpers:
             gridParent = self.form.objectAssignmentRightTreeWidget.findItems(itemNameFields[1].strip(),
                                                                              QtCore.Qt.MatchRecursive)
             if len(gridParent) > 0:
+                if GuiHelpers.headless:
+                    continue
                 if not _bool(gridParent[0].data(0, QtCore.Qt.UserRole).topPriorityLines):
                     self.form.meshPriorityTreeView.topLevelItem(k).setBackground(0, QtGui.QColor('white'))
                 else:
@@ -123,12 +151,10 @@ class GuiHelpers:
     #
     def addSettingsItemGui(self, settingsItem):
         treeItemName = settingsItem.name
-        treeItem = QtWidgets.QTreeWidgetItem([treeItemName])
-
         itemTypeReg = re.search("(.*)SettingsItem", str(settingsItem.__class__.__name__))
         typeStr = itemTypeReg.group(1)
 
-        treeItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img",  typeStr.lower()+".svg")))
+        treeItem = self.createTreeWidgetItem([treeItemName], os.path.join(self.APP_DIR, "img",  typeStr.lower()+".svg"))
         treeItem.setData(0, QtCore.Qt.UserRole, settingsItem)
 
         # add item into excitation list
@@ -0,0 +1,595 @@
+#   author: Lubomir Jagos
+#
+#
+import re
+import fnmatch
+import xml.etree.ElementTree as ET
+
+#
+#   Widget-free form for headless export
+#       generators and IniFile0v1 read and write settings through self.form widgets, this form has same widget names and
+#       default values as ui/dialog.ui but widgets are plain python value holders, so no Qt widget or QApplication is created
+#
+
+#
+#   Qt.MatchFlag values, flags are passed as Qt enums by callers and converted to int
+#
+MATCH_EXACTLY = 0
+MATCH_CONTAINS = 1
+MATCH_STARTS_WITH = 2
+MATCH_ENDS_WITH = 3
+MATCH_REGEXP = 4
+MATCH_WILDCARD = 5
+MATCH_FIXED_STRING = 8
+MATCH_CASE_SENSITIVE = 16
+MATCH_RECURSIVE = 64
+
+#
+#   Qt.ItemDataRole and Qt.CheckState values used by form users
+#
+DISPLAY_ROLE = 0
+EDIT_ROLE = 2
+CHECKED = 2
+UNCHECKED = 0
+
+def matchText(itemText, text, flags):
+    """
+    Compare texts same way as Qt views do it for given match flags.
+    :return: True if item text matches
+    """
+    flags = int(flags)
+    matchType = flags & 0x0F
+    if matchType == MATCH_EXACTLY:
+        return itemText == text
+
+    caseSensitive = bool(flags & MATCH_CASE_SENSITIVE)
+    if not caseSensitive:
+        itemText = itemText.lower()
+        text = text.lower()
+
+    if matchType == MATCH_CONTAINS:
+        return text in itemText
+    elif matchType == MATCH_STARTS_WITH:
+        return itemText.startswith(text)
+    elif matchType == MATCH_ENDS_WITH:
+        return itemText.endswith(text)
+    elif matchType == MATCH_REGEXP:
+        return re.fullmatch(text, itemText) is not None
+    elif matchType == MATCH_WILDCARD:
+        return fnmatch.fnmatchcase(itemText, text)
+    return itemText == text
+
+class HeadlessSignal:
+    """
+    Signal with connect() and emit(), connected functions are called directly.
+    """
+
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+class HeadlessWidget:
+    """
+    Base of all widgets, anything not listed in ui file properties is left at Qt default value.
+    """
+
+    SIGNAL_NAMES = []
+
+    def __init__(self, name, properties=None):
+        self.name = name
+        self.properties = {} if properties is None else properties
+        self.enabled = self.properties.get("enabled", True)
+        self.signals = {signalName: HeadlessSignal() for signalName in self.SIGNAL_NAMES}
+
+    def __getattr__(self, name):
+        signals = self.__dict__.get("signals", {})
+        if name in signals:
+            return signals[name]
+        raise AttributeError(f"{self.__class__.__name__} '{self.__dict__.get('name', '')}' has no attribute '{name}'")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+    def isEnabled(self):
+        return self.enabled
+
+    def setEnabled(self, enabled):
+        self.enabled = bool(enabled)
+
+class HeadlessLabel(HeadlessWidget):
+
+    def __init__(self, name, properties=None):
+        super().__init__(name, properties)
+        self.textValue = str(self.properties.get("text", ""))
+
+    def text(self):
+        return self.textValue
+
+    def setText(self, text):
+        self.textValue = str(text)
+
+class HeadlessLineEdit(HeadlessLabel):
+    SIGNAL_NAMES = ["textChanged", "editingFinished"]
+
+    def setText(self, text):
+        super().setText(text)
+        self.textChanged.emit(self.textValue)
+
+class HeadlessPlainTextEdit(HeadlessWidget):
+    SIGNAL_NAMES = ["textChanged"]
+
+    def __init__(self, name, properties=None):
+        super().__init__(name, properties)
+        self.textValue = str(self.properties.get("plainText", ""))
+
+    def toPlainText(self):
+        return self.textValue
+
+    def setPlainText(self, text):
+        self.textValue = str(text)
+        self.textChanged.emit()
+
+class HeadlessButton(HeadlessWidget):
+    """
+    Check box, radio button, push button or checkable group box, radio buttons with same parent widget are exclusive.
+    """
+
+    SIGNAL_NAMES = ["clicked", "toggled", "stateChanged"]
+
+    def __init__(self, name, properties=None, exclusiveGroup=None):
+        super().__init__(name, properties)
+        self.checked = bool(self.properties.get("checked", False))
+        self.textValue = str(self.properties.get("text", self.properties.get("title", "")))
+        self.exclusiveGroup = exclusiveGroup
+        if self.exclusiveGroup is not None:
+            self.exclusiveGroup.append(self)
+
+    def text(self):
+        return self.textValue
+
+    def isChecked(self):
+        return self.checked
+
+    def checkState(self):
+        return CHECKED if self.checked else UNCHECKED
+
+    def setCheckState(self, state):
+        self.setChecked(int(state) != UNCHECKED)
+
+    def setChecked(self, checked):
+        checked = bool(checked)
+        if self.exclusiveGroup is not None and not checked and self.checked:
+            return      # exclusive button cannot be unchecked, other one in group must be checked instead
+        if checked == self.checked:
+            return
+
+        self.checked = checked
+        if self.exclusiveGroup is not None and checked:
+            for button in self.exclusiveGroup:
+                if button is not self and button.checked:
+                    button.checked = False
+                    button.toggled.emit(False)
+        self.toggled.emit(checked)
+        self.stateChanged.emit(self.checkState())
+
+    def click(self):
+        self.setChecked(True if self.exclusiveGroup is not None else not self.checked)
+        self.clicked.emit()
+
+class HeadlessSpinBox(HeadlessWidget):
+    """
+    QSpinBox and QDoubleSpinBox, values are clamped to range and double values are rounded to decimals like in Qt.
+    """
+
+    SIGNAL_NAMES = ["valueChanged"]
+
+    def __init__(self, name, properties=None, isDouble=False):
+        super().__init__(name, properties)
+        self.isDouble = isDouble
+        self.decimals = int(self.properties.get("decimals", 2))
+        self.minimumValue = self.properties.get("minimum", 0)
+        self.maximumValue = self.properties.get("maximum", 99.99 if isDouble else 99)
+        self.currentValue = self.minimumValue
+        self.setValue(self.properties.get("value", 0))
+
+    def value(self):
+        return self.currentValue
+
+    def setValue(self, value):
+        value = min(max(value, self.minimumValue), self.maximumValue)
+        value = round(float(value), self.decimals) if self.isDouble else int(value)
+        if value != self.currentValue:
+            self.currentValue = value
+            self.valueChanged.emit(value)
+
+    def minimum(self):
+        return self.minimumValue
+
+    def maximum(self):
+        return self.maximumValue
+
+    def setMinimum(self, minimum):
+        self.minimumValue = minimum
+        self.setValue(self.currentValue)
+
+    def setMaximum(self, maximum):
+        self.maximumValue = maximum
+        self.setValue(self.currentValue)
+
+class HeadlessComboBox(HeadlessWidget):
+    SIGNAL_NAMES = ["currentIndexChanged", "currentTextChanged", "activated"]
+
+    def __init__(self, name, properties=None, items=None):
+        super().__init__(name, properties)
+        self.items = [] if items is None else [[text, None] for text in items]
+        self.editable = bool(self.properties.get("editable", False))
+        self.editText = ""
+        self.index = -1
+        self.setCurrentIndex(int(self.properties.get("currentIndex", 0)))
+
+    def count(self):
+        return len(self.items)
+
+    def itemText(self, index):
+        return self.items[index][0] if 0 <= index < len(self.items) else ""
+
+    def itemData(self, index):
+        return self.items[index][1] if 0 <= index < len(self.items) else None
+
+    def addItem(self, text, userData=None):
+        self.items.append([str(text), userData])
+        if self.index < 0:
+            self.setCurrentIndex(0)
+
+    def addItems(self, texts):
+        for text in texts:
+            self.addItem(text)
+
+    def clear(self):
+        self.items = []
+        self.setCurrentIndex(-1)
+
+    def findText(self, text, flags=MATCH_EXACTLY | MATCH_CASE_SENSITIVE):
+        for index in range(len(self.items)):
+            if matchText(self.items[index][0], str(text), flags):
+                return index
+        return -1
+
+    def currentIndex(self):
+        return self.index
+
+    def setCurrentIndex(self, index):
+        index = index if 0 <= index < len(self.items) else -1
+        self.editText = self.itemText(index)
+        if index != self.index:
+            self.index = index
+            self.currentIndexChanged.emit(index)
+            self.currentTextChanged.emit(self.editText)
+
+    def currentText(self):
+        return self.editText if self.editable else self.itemText(self.index)
+
+    def setCurrentText(self, text):
+        if text is None:
+            return
+        index = self.findText(text)
+        if index >= 0:
+            self.setCurrentIndex(index)
+        elif self.editable:
+            self.editText = str(text)
+
+class HeadlessListWidgetItem:
+
+    def __init__(self, text=""):
+        self.textValue = str(text)
+
+    def text(self):
+        return self.textValue
+
+    def setText(self, text):
+        self.textValue = str(text)
+
+class HeadlessListWidget(HeadlessWidget):
+
+    def __init__(self, name, properties=None):
+        super().__init__(name, properties)
+        self.items = []
+
+    def count(self):
+        return len(self.items)
+
+    def item(self, row):
+        return self.items[row] if 0 <= row < len(self.items) else None
+
+    def addItem(self, item):
+        self.items.append(item if isinstance(item, HeadlessListWidgetItem) else HeadlessListWidgetItem(item))
+
+    def clear(self):
+        self.items = []
+
+class HeadlessTabWidget(HeadlessWidget):
+    SIGNAL_NAMES = ["currentChanged"]
+
+    def __init__(self, name, properties=None, tabTitles=None):
+        super().__init__(name, properties)
+        self.tabTitles = [] if tabTitles is None else tabTitles
+        self.index = int(self.properties.get("currentIndex", 0))
+
+    def count(self):
+        return len(self.tabTitles)
+
+    def tabText(self, index):
+        return self.tabTitles[index]
+
+    def currentIndex(self):
+        return self.index
+
+    def setCurrentIndex(self, index):
+        self.index = index
+        self.currentChanged.emit(index)
+
+class HeadlessTreeWidgetItem:
+    """
+    Tree item with texts and data per column, same interface as QTreeWidgetItem as far as settings load and generators use it.
+    """
+
+    def __init__(self, strings=None):
+        self.texts = [] if strings is None else [str(text) for text in strings]
+        self.itemData = {}
+        self.children = []
+        self.parentItem = None
+        self.isInvisibleRoot = False
+
+    def __repr__(self):
+        return f"<HeadlessTreeWidgetItem {self.text(0)}>"
+
+    def text(self, column):
+        return self.texts[column] if column < len(self.texts) else ""
+
+    def columnCount(self):
+        return len(self.texts)
+
+    def setText(self, column, text):
+        self.texts += [""] * (column + 1 - len(self.texts))
+        self.texts[column] = str(text)
+
+    def data(self, column, role):
+        if int(role) in [DISPLAY_ROLE, EDIT_ROLE]:
+            return self.text(column)
+        return self.itemData.get((column, int(role)), None)
+
+    def setData(self, column, role, value):
+        if int(role) in [DISPLAY_ROLE, EDIT_ROLE]:
+            self.setText(column, value)
+        else:
+            self.itemData[(column, int(role))] = value
+
+    def setIcon(self, column, icon):
+        pass
+
+    def setBackground(self, column, brush):
+        pass
+
+    def setExpanded(self, expanded):
+        pass
+
+    def setDisabled(self, disabled):
+        pass
+
+    def parent(self):
+        return self.parentItem
+
+    def childCount(self):
+        return len(self.children)
+
+    def child(self, index):
+        return self.children[index] if 0 <= index < len(self.children) else None
+
+    def indexOfChild(self, child):
+        for index in range(len(self.children)):
+            if self.children[index] is child:
+                return index
+        return -1
+
+    def insertChild(self, index, child):
+        #
+        #   top level items have no parent as in Qt, invisible root item has its tree widget set instead
+        #
+        child.parentItem = None if self.isInvisibleRoot else self
+        self.children.insert(index, child)
+
+    def addChild(self, child):
+        self.insertChild(len(self.children), child)
+
+    def takeChild(self, index):
+        child = self.children.pop(index)
+        child.parentItem = None
+        return child
+
+    def removeChild(self, child):
+        index = self.indexOfChild(child)
+        if index >= 0:
+            self.takeChild(index)
+
+    def takeChildren(self):
+        children = self.children
+        self.children = []
+        for child in children:
+            child.parentItem = None
+        return children
+
+    def clone(self):
+        item = HeadlessTreeWidgetItem(self.texts)
+        item.itemData = dict(self.itemData)
+        for child in self.children:
+            item.addChild(child.clone())
+        return item
+
+class HeadlessTreeWidget(HeadlessWidget):
+    SIGNAL_NAMES = ["currentItemChanged", "itemChanged", "itemSelectionChanged", "itemDoubleClicked"]
+
+    def __init__(self, name, properties=None):
+        super().__init__(name, properties)
+        self.rootItem = HeadlessTreeWidgetItem()
+        self.rootItem.isInvisibleRoot = True
+        self.current = None
+
+    def invisibleRootItem(self):
+        return self.rootItem
+
+    def topLevelItemCount(self):
+        return self.rootItem.childCount()
+
+    def topLevelItem(self, index):
+        return self.rootItem.child(index)
+
+    def insertTopLevelItem(self, index, item):
+        self.rootItem.insertChild(index, item)
+
+    def insertTopLevelItems(self, index, items):
+        for item in reversed(items):
+            self.rootItem.insertChild(index, item)
+
+    def addTopLevelItem(self, item):
+        self.rootItem.addChild(item)
+
+    def takeTopLevelItem(self, index):
+        if 0 <= index < self.rootItem.childCount():
+            return self.rootItem.takeChild(index)
+        return None
+
+    def indexOfTopLevelItem(self, item):
+        return self.rootItem.indexOfChild(item)
+
+    def clear(self):
+        self.rootItem.takeChildren()
+        self.current = None
+
+    def findItems(self, text, flags, column=0):
+        foundItems = []
+        itemsToCheck = list(self.rootItem.children)
+        while len(itemsToCheck) > 0:
+            item = itemsToCheck.pop(0)
+            if matchText(item.text(column), str(text), flags):
+                foundItems.append(item)
+            if int(flags) & MATCH_RECURSIVE:
+                itemsToCheck = list(item.children) + itemsToCheck
+        return foundItems
+
+    def currentItem(self):
+        return self.current
+
+    def setCurrentItem(self, item):
+        previous = self.current
+        self.current = item
+        self.currentItemChanged.emit(item, previous)
+
+    def selectedItems(self):
+        return [] if self.current is None else [self.current]
+
+    def expandAll(self):
+        pass
+
+    def collapseAll(self):
+        pass
+
+class HeadlessForm:
+    """
+    Form created from Qt Designer .ui file, each widget is attribute named by its objectName as in form loaded by QUiLoader.
+    """
+
+    def __init__(self, path_to_ui):
+        self.widgets = {}
+        root = ET.parse(path_to_ui).getroot()
+        for widgetElement in root.findall("widget"):
+            self.createWidgets(widgetElement, None)
+
+    @staticmethod
+    def getPropertyValue(valueElement):
+        if valueElement.tag == "bool":
+            return valueElement.text == "true"
+        elif valueElement.tag == "number":
+            return int(valueElement.text)
+        elif valueElement.tag == "double":
+            return float(valueElement.text)
+        elif valueElement.tag == "string":
+            return "" if valueElement.text is None else valueElement.text
+        return None
+
+    @staticmethod
+    def getProperties(widgetElement):
+        properties = {}
+        for propertyElement in widgetElement.findall("property"):
+            if len(propertyElement) > 0:
+                properties[propertyElement.get("name")] = HeadlessForm.getPropertyValue(propertyElement[0])
+        return properties
+
+    @staticmethod
+    def getChildWidgetElements(element):
+        """
+        :return: widgets placed directly into element, layouts between them are skipped as they don't own widgets
+        """
+        childWidgets = []
+        for child in element:
+            if child.tag == "widget":
+                childWidgets.append(child)
+            elif child.tag in ["layout", "item"]:
+                childWidgets += HeadlessForm.getChildWidgetElements(child)
+        return childWidgets
+
+    def createWidgets(self, widgetElement, exclusiveGroups):
+        widgetClass = widgetElement.get("class")
+        widgetName = widgetElement.get("name")
+        properties = HeadlessForm.getProperties(widgetElement)
+        childElements = HeadlessForm.getChildWidgetElements(widgetElement)
+
+        if widgetClass in ["QCheckBox", "QPushButton"]:
+            widget = HeadlessButton(widgetName, properties)
+        elif widgetClass == "QRadioButton":
+            widget = HeadlessButton(widgetName, properties, exclusiveGroups.setdefault("radio", []))
+        elif widgetClass == "QGroupBox" and properties.get("checkable", False):
+            widget = HeadlessButton(widgetName, properties)
+        elif widgetClass in ["QSpinBox", "QDoubleSpinBox"]:
+            widget = HeadlessSpinBox(widgetName, properties, widgetClass == "QDoubleSpinBox")
+        elif widgetClass == "QComboBox":
+            items = [HeadlessForm.getProperties(itemElement).get("text", "") for itemElement in widgetElement.findall("item")]
+            widget = HeadlessComboBox(widgetName, properties, items)
+        elif widgetClass == "QLineEdit":
+            widget = HeadlessLineEdit(widgetName, properties)
+        elif widgetClass in ["QPlainTextEdit", "QTextEdit"]:
+            widget = HeadlessPlainTextEdit(widgetName, properties)
+        elif widgetClass == "QLabel":
+            widget = HeadlessLabel(widgetName, properties)
+        elif widgetClass in ["QTreeWidget", "QTreeView"]:
+            widget = HeadlessTreeWidget(widgetName, properties)
+        elif widgetClass == "QListWidget":
+            widget = HeadlessListWidget(widgetName, properties)
+        elif widgetClass == "QTabWidget":
+            tabTitles = []
+            for childElement in childElements:
+                titleElement = childElement.find("attribute[@name='title']/string")
+                tabTitles.append("" if titleElement is None or titleElement.text is None else titleElement.text)
+            widget = HeadlessTabWidget(widgetName, properties, tabTitles)
+        else:
+            widget = HeadlessWidget(widgetName, properties)
+
+        self.widgets[widgetName] = widget
+
+        #
+        #   radio buttons are exclusive among buttons with same parent widget, each widget starts new group for its children
+        #
+        childExclusiveGroups = {}
+        for childElement in childElements:
+            self.createWidgets(childElement, childExclusiveGroups)
+
+    def __getattr__(self, name):
+        widgets = self.__dict__.get("widgets", {})
+        if name in widgets:
+            return widgets[name]
+        raise AttributeError(f"HeadlessForm has no widget '{name}'")
@@ -0,0 +1,237 @@
+#   author: Lubomir Jagos
+#
+#
+import os
+import re
+import time
+import subprocess
+
+class SimulationJob:
+    """
+    Generated simulation script run as subprocess in its output directory, console output is written into log file there.
+    """
+
+    LOG_FILE_NAME = "simulation.log"
+
+    # openEMS progress line: [@ 4s] Timestep: 1386 || Speed: 92.1 MC/s (...) || Energy: ~3.45e-16 (- 9.46dB)
+    PROGRESS_REGEX = re.compile(r"Timestep:\s*(\d+).*?Energy:\s*~?\s*[0-9.eE+\-]+\s*\(\s*-\s*([0-9.]+)\s*dB\)")
+
+    def __init__(self, name, command, cwd, numThreads=0, dependencies=None):
+        """
+        :param name: job name displayed to user
+        :param command: command as list of arguments or shell command string
+        :param cwd: working directory, generated scripts use it as currDir
+        :param numThreads: number of threads openEMS can use, 0 means all cores
+        :param dependencies: jobs which must finish successfully before this job is started
+        """
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.numThreads = numThreads
+        self.dependencies = [] if dependencies is None else dependencies
+
+        self.state = "queued"
+        self.process = None
+        self.logFile = None
+        self.returncode = None
+        self.startTime = None
+        self.endTime = None
+        self.cancelRequested = False
+        self.cancelTime = None
+
+    def getLogFileName(self):
+        return os.path.join(self.cwd, SimulationJob.LOG_FILE_NAME)
+
+    def getSimulationOutputDir(self):
+        return os.path.join(self.cwd, "simulation_output")
+
+    def isSimulationStarted(self):
+        """
+        openEMS is started when generated script wrote model XML into simulation output directory, before that script
+        is preparing model and it would wipe that directory including ABORT file.
+        :return: True if there is XML or log file in simulation output directory written after job started
+        """
+        simulationOutputDir = self.getSimulationOutputDir()
+        if self.startTime is None or not os.path.isdir(simulationOutputDir):
+            return False
+
+        with os.scandir(simulationOutputDir) as entries:
+            for entry in entries:
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in [".xml", ".log"] and entry.stat().st_mtime >= self.startTime:
+                    return True
+        return False
+
+    def isDone(self):
+        return self.state in ["finished", "failed", "cancelled"]
+
+    def getProgress(self):
+        """
+        :return: last timestep and energy decay reported by openEMS, empty string if there is no progress line in log yet
+        """
+        if self.state == "queued" or not os.path.isfile(self.getLogFileName()):
+            return ""
+
+        with open(self.getLogFileName(), "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 4096, 0))
+            logTail = f.read().decode("utf-8", errors="replace")
+
+        progress = SimulationJob.PROGRESS_REGEX.findall(logTail)
+        if len(progress) == 0:
+            return ""
+        return f"timestep {progress[-1][0]}, -{progress[-1][1]} dB"
+
+class LocalScheduler:
+    """
+    Runs simulation jobs on local machine in order they were added, at most maxConcurrentJobs are running at once and sum
+    of their threads does not exceed maxTotalThreads, each job gets its threads budget passed to generated script by
+    environment variable so cores are not oversubscribed.
+    """
+
+    # seconds cancelled job can run after ABORT file was written before its process is terminated
+    CANCEL_TIMEOUT = 60
+
+    def __init__(self, maxConcurrentJobs=0, threadsPerJob=0, maxTotalThreads=0):
+        self.jobs = []
+        self.setLimits(maxConcurrentJobs, threadsPerJob, maxTotalThreads)
+
+    def setLimits(self, maxConcurrentJobs=0, threadsPerJob=0, maxTotalThreads=0):
+        """
+        :param maxConcurrentJobs: number of jobs running at once, 0 means as many as fit into cores by threadsPerJob
+        :param threadsPerJob: default threads budget of job, 0 means all cores so jobs are run one by one
+        :param maxTotalThreads: threads budget of all running jobs, 0 means number of cores
+        """
+        self.coresCount = os.cpu_count() or 1
+        self.maxTotalThreads = maxTotalThreads if maxTotalThreads > 0 else self.coresCount
+        if maxConcurrentJobs <= 0:
+            maxConcurrentJobs = max(self.maxTotalThreads // threadsPerJob, 1) if threadsPerJob > 0 else 1
+
+        self.maxConcurrentJobs = maxConcurrentJobs
+        self.threadsPerJob = threadsPerJob
+
+    def addJob(self, name, command, cwd, numThreads=None, dependencies=None):
+        job = SimulationJob(name, command, cwd, self.threadsPerJob if numThreads is None else numThreads, dependencies)
+        self.jobs.append(job)
+        return job
+
+    def getJobThreads(self, job):
+        return job.numThreads if job.numThreads > 0 else self.coresCount
+
+    def getJobEnvironment(self, job):
+        """
+        Generated scripts read these variables, threads budget overrides numThreads from export settings, geometry
+        preview is not opened and figures are saved into files instead of shown as nobody is waiting for them.
+        """
+        env = os.environ.copy()
+        if job.numThreads > 0:
+            env["OPENEMS_NUM_THREADS"] = str(job.numThreads)
+        env["OPENEMS_NO_PREVIEW"] = "1"
+        env["OPENEMS_HEADLESS"] = "1"
+        return env
+
+    def startJob(self, job):
+        job.logFile = open(job.getLogFileName(), "w", encoding="utf-8")
+        try:
+            job.process = subprocess.Popen(job.command, cwd=job.cwd, env=self.getJobEnvironment(job), shell=isinstance(job.command, str),
+                                           stdout=job.logFile, stderr=subprocess.STDOUT)
+        except OSError as e:
+            job.logFile.write(f"cannot start job: {e}\n")
+            self.endJob(job, -1)
+            return
+
+        job.state = "running"
+        job.startTime = time.time()
+        print(f"job {job.name} started in {job.cwd}")
+
+    def endJob(self, job, returncode):
+        job.returncode = returncode
+        if job.cancelRequested:
+            job.state = "cancelled"
+        else:
+            job.state = "finished" if returncode == 0 else "failed"
+        job.endTime = time.time()
+        job.logFile.close()
+        print(f"job {job.name} {job.state}, return code {returncode}")
+
+    @staticmethod
+    def writeAbortFile(simulationOutputDir):
+        """
+        openEMS checks for ABORT file in its working directory and ends simulation gracefully when it's found.
+        :return: True if file was written, False if simulation output directory does not exist
+        """
+        if not os.path.exists(simulationOutputDir):
+            return False
+
+        with open(os.path.join(simulationOutputDir, "ABORT"), "w+", encoding='utf-8') as f:
+            f.write("THIS CAN BE JUST EMPTY FILE. ABORT simulation.")
+        return True
+
+    def cancelJob(self, job):
+        """
+        Queued job is just removed from run, running simulation is ended by ABORT file so openEMS writes results computed
+        till now. If openEMS did not start yet (script is still preparing model) process is terminated as script would
+        remove ABORT file when it creates simulation output directory, job which is still running CANCEL_TIMEOUT after
+        ABORT file was written is terminated by poll().
+        """
+        if job.state == "queued":
+            job.state = "cancelled"
+        elif job.state == "running" and not job.cancelRequested:
+            job.cancelRequested = True
+            job.cancelTime = time.time()
+            if not job.isSimulationStarted() or not LocalScheduler.writeAbortFile(job.getSimulationOutputDir()):
+                job.process.terminate()
+
+    def getRunningJobs(self):
+        return [job for job in self.jobs if job.state == "running"]
+
+    def removeDoneJobs(self):
+        self.jobs = [job for job in self.jobs if not job.isDone()]
+
+    def poll(self):
+        """
+        Collect finished jobs and start queued ones while concurrency and threads limits allow it, jobs are started in
+        order so big job is not starved by smaller ones added after it, job waiting for its dependencies is skipped and
+        it's cancelled if some of them did not finish successfully.
+        :return: True if some job is still queued or running
+        """
+        for job in self.getRunningJobs():
+            returncode = job.process.poll()
+            if returncode is not None:
+                self.endJob(job, returncode)
+            elif job.cancelRequested and time.time() - job.cancelTime > LocalScheduler.CANCEL_TIMEOUT:
+                print(f"job {job.name} did not end after ABORT, terminating it")
+                job.process.terminate()
+                job.cancelTime = time.time()
+
+        runningJobs = self.getRunningJobs()
+        runningJobsCount = len(runningJobs)
+        runningThreads = sum([self.getJobThreads(job) for job in runningJobs])
+        for job in self.jobs:
+            if job.state != "queued":
+                continue
+            if not all([dependency.isDone() for dependency in job.dependencies]):
+                continue
+            if not all([dependency.state == "finished" for dependency in job.dependencies]):
+                job.state = "cancelled"
+                print(f"job {job.name} cancelled, its dependencies did not finish")
+                continue
+            if runningJobsCount >= self.maxConcurrentJobs:
+                break
+            if runningJobsCount > 0 and runningThreads + self.getJobThreads(job) > self.maxTotalThreads:
+                break
+
+            self.startJob(job)
+            if job.state == "running":
+                runningJobsCount += 1
+                runningThreads += self.getJobThreads(job)
+
+        return any([not job.isDone() for job in self.jobs])
+
+    def run(self, pollInterval=1.0):
+        """
+        Blocks until all jobs are done.
+        :return: list of failed jobs
+        """
+        while self.poll():
+            time.sleep(pollInterval)
+        return [job for job in self.jobs if job.state == "failed"]
@@ -327,6 +327,21 @@ class IniFile0v1:
 
         simulationSettings.params['generateJustPreview'] = self.form.generateJustPreviewCheckbox.isChecked()
         simulationSettings.params['generateDebugPEC'] = self.form.generateDebugPECCheckbox.isChecked()
+        simulationSettings.params['simulationRunMode'] = self.form.simulationRunModeList.currentText()
+        simulationSettings.params['generatePointsSidecar'] = self.form.generatePointsSidecarCheckbox.isChecked()
+        simulationSettings.params['generateMeshSidecar'] = self.form.generateMeshSidecarCheckbox.isChecked()
+        simulationSettings.params['exporterSmoothMesh'] = self.form.exporterSmoothMeshCheckbox.isChecked()
+        simulationSettings.params['stlExportWorkersCount'] = self.form.stlExportWorkersCount.value()
+        simulationSettings.params['stlCacheEnabled'] = self.form.stlCacheEnabledCheckbox.isChecked()
+        simulationSettings.params['stlCacheSizeMB'] = self.form.stlCacheSizeMB.value()
+        simulationSettings.params['resultCacheEnabled'] = self.form.resultCacheEnabledCheckbox.isChecked()
+        simulationSettings.params['resultCacheDir'] = self.form.resultCacheDir.text()
+        simulationSettings.params['openEMSEngine'] = self.form.openEMSEngineList.currentText()
+        simulationSettings.params['openEMSNumThreads'] = self.form.openEMSNumThreads.value()
+        simulationSettings.params['parameterSweepRun'] = self.form.parameterSweepRunCheckbox.isChecked()
+        simulationSettings.params['jobQueueMaxJobs'] = self.form.jobQueueMaxJobs.value()
+        simulationSettings.params['jobQueueThreadsPerJob'] = self.form.jobQueueThreadsPerJob.value()
+        simulationSettings.params['jobQueueMaxTotalThreads'] = self.form.jobQueueMaxTotalThreads.value()
         simulationSettings.params['mFileExecCommand'] = self.form.octaveExecCommandList.currentText()
         simulationSettings.params['base_length_unit_m'] = self.form.simParamsDeltaUnitList.currentText()
 
@@ -346,6 +361,7 @@ class IniFile0v1:
         simulationSettings.params['min_gridspacing_x'] = self.form.genParamMinGridSpacingX.value()
         simulationSettings.params['min_gridspacing_y'] = self.form.genParamMinGridSpacingY.value()
         simulationSettings.params['min_gridspacing_z'] = self.form.genParamMinGridSpacingZ.value()
+        simulationSettings.params['min_gridspacing_summary'] = self.form.genParamMinGridSpacingSummary.isChecked()
 
         simulationSettings.params['outputScriptType'] = 'octave'
         if self.form.radioButton_pythonType.isChecked():
@@ -434,6 +450,15 @@ class IniFile0v1:
         settings.setValue("nf2ffPhiStart", self.form.portNf2ffPhiStart.value())
         settings.setValue("nf2ffPhiStop", self.form.portNf2ffPhiStop.value())
         settings.setValue("nf2ffPhiStep", self.form.portNf2ffPhiStep.value())
+        settings.setValue("nf2ffVtkFormat", self.form.portNf2ffVtkFormat.currentText())
+        settings.setValue("nf2ffFreqList", self.form.portNf2ffFreqList.text())
+        settings.setValue("nf2ffReuseCached", self.form.portNf2ffReuseCachedCheckbox.isChecked())
+        settings.setValue("combinedS11", self.form.combinedPostprocessingS11Checkbox.isChecked())
+        settings.setValue("combinedS21", self.form.combinedPostprocessingS21Checkbox.isChecked())
+        settings.setValue("combinedNf2ff", self.form.combinedPostprocessingNf2ffCheckbox.isChecked())
+        settings.setValue("combinedSParameters", self.form.combinedPostprocessingSParamCheckbox.isChecked())
+        settings.setValue("loadSavedModel", self.form.postprocessingLoadSavedModelCheckbox.isChecked())
+        settings.setValue("headlessPlotting", self.form.postprocessingHeadlessCheckbox.isChecked())
         settings.endGroup()
 
         # sys.exit()  # prevents second call
@@ -716,6 +741,27 @@ class IniFile0v1:
                 self.form.generateJustPreviewCheckbox.setCheckState(QtCore.Qt.Checked if simulationSettings.params.get('generateJustPreview',False) else QtCore.Qt.Unchecked)
                 self.form.generateDebugPECCheckbox.setCheckState(
                     QtCore.Qt.Checked if simulationSettings.params.get('generateDebugPEC', False) else QtCore.Qt.Unchecked)
+                self.guiHelpers.setComboboxItem(self.form.simulationRunModeList, simulationSettings.params.get('simulationRunMode', 'preview and simulate'))
+                self.form.generatePointsSidecarCheckbox.setCheckState(
+                    QtCore.Qt.Checked if simulationSettings.params.get('generatePointsSidecar', False) else QtCore.Qt.Unchecked)
+                self.form.generateMeshSidecarCheckbox.setCheckState(
+                    QtCore.Qt.Checked if simulationSettings.params.get('generateMeshSidecar', False) else QtCore.Qt.Unchecked)
+                self.form.exporterSmoothMeshCheckbox.setCheckState(
+                    QtCore.Qt.Checked if simulationSettings.params.get('exporterSmoothMesh', False) else QtCore.Qt.Unchecked)
+                self.form.stlExportWorkersCount.setValue(simulationSettings.params.get('stlExportWorkersCount', 1))
+                self.form.stlCacheEnabledCheckbox.setCheckState(
+                    QtCore.Qt.Checked if simulationSettings.params.get('stlCacheEnabled', False) else QtCore.Qt.Unchecked)
+                self.form.stlCacheSizeMB.setValue(simulationSettings.params.get('stlCacheSizeMB', 1024))
+                self.form.resultCacheEnabledCheckbox.setCheckState(
+                    QtCore.Qt.Checked if simulationSettings.params.get('resultCacheEnabled', False) else QtCore.Qt.Unchecked)
+                self.form.resultCacheDir.setText(simulationSettings.params.get('resultCacheDir', ''))
+                self.form.openEMSEngineList.setCurrentText(simulationSettings.params.get('openEMSEngine', 'default'))
+                self.form.openEMSNumThreads.setValue(simulationSettings.params.get('openEMSNumThreads', 0))
+                self.form.parameterSweepRunCheckbox.setCheckState(
+                    QtCore.Qt.Checked if simulationSettings.params.get('parameterSweepRun', False) else QtCore.Qt.Unchecked)
+                self.form.jobQueueMaxJobs.setValue(simulationSettings.params.get('jobQueueMaxJobs', 0))
+                self.form.jobQueueThreadsPerJob.setValue(simulationSettings.params.get('jobQueueThreadsPerJob', 0))
+                self.form.jobQueueMaxTotalThreads.setValue(simulationSettings.params.get('jobQueueMaxTotalThreads', 0))
                 self.form.octaveExecCommandList.setCurrentText(
                     simulationSettings.params.get("mFileExecCommand", self.form.octaveExecCommandList.itemData(0)))
                 self.form.simParamsDeltaUnitList.setCurrentText(
@@ -743,6 +789,7 @@ class IniFile0v1:
                     self.form.genParamMinGridSpacingX.setValue(simulationSettings.params['min_gridspacing_x'])
                     self.form.genParamMinGridSpacingY.setValue(simulationSettings.params['min_gridspacing_y'])
                     self.form.genParamMinGridSpacingZ.setValue(simulationSettings.params['min_gridspacing_z'])
+                    self.form.genParamMinGridSpacingSummary.setCheckState(QtCore.Qt.Checked if simulationSettings.params.get('min_gridspacing_summary', True) else QtCore.Qt.Unchecked)
 
                     self.form.radioButton_octaveType.setChecked(True)                                                       # by default octave type is checked
                     self.form.radioButton_octaveType.setChecked(simulationSettings.params['outputScriptType'] == 'octave')
@@ -769,9 +816,7 @@ class IniFile0v1:
                         if (targetGroup[k].child(m).text(0) == objParent):
                             settingsItem = FreeCADSettingsItem(itemName)
 
-                            # treeItem = QtWidgets.QTreeWidgetItem([itemName])
-                            treeItem = QtWidgets.QTreeWidgetItem()
-                            treeItem.setText(0, itemName)
+                            treeItem = self.guiHelpers.createTreeWidgetItem([itemName])
 
                             #
                             #   Check if object valid during load, ie. if object label was changed this will try to find if some other object with
@@ -827,17 +872,17 @@ class IniFile0v1:
                             treeItem.setData(0, QtCore.Qt.UserRole, settingsItem)
 
                             if (freeCadObj.Name.find("Sketch") > -1):
-                                treeItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "wire.svg")))
+                                self.guiHelpers.setTreeWidgetItemIcon(treeItem, os.path.join(self.APP_DIR, "img", "wire.svg"))
                             elif (freeCadObj.Name.find("Discretized_Edge") > -1):
-                                treeItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "curve.svg")))
+                                self.guiHelpers.setTreeWidgetItemIcon(treeItem, os.path.join(self.APP_DIR, "img", "curve.svg"))
                             else:
-                                treeItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "object.svg")))
+                                self.guiHelpers.setTreeWidgetItemIcon(treeItem, os.path.join(self.APP_DIR, "img", "object.svg"))
 
                             #
                             #	THERE IS MISMATCH BETWEEN NAME STORED IN IN FILE AND FREECAD NAME
                             #
                             if errorLoadByName:
-                                treeItem.setIcon(0, QtGui.QIcon(os.path.join(self.APP_DIR, "img", "errorLoadObject.svg")))
+                                self.guiHelpers.setTreeWidgetItemIcon(treeItem, os.path.join(self.APP_DIR, "img", "errorLoadObject.svg"))
 
                             targetGroup[k].child(m).addChild(treeItem)
                             print("\tItem added")
@@ -890,9 +935,8 @@ class IniFile0v1:
                     print("Priority list adding item " + prioritySettingsKey)
 
                     # adding item into priority list
-                    topItem = QtWidgets.QTreeWidgetItem([prioritySettingsKey])
+                    topItem = self.guiHelpers.createTreeWidgetItem([prioritySettingsKey], self.cadHelpers.getIconFileByCategory(prioritySettingsType))
                     topItem.setData(0, QtCore.Qt.UserRole, prioritySettingsType)
-                    topItem.setIcon(0, self.cadHelpers.getIconByCategory(prioritySettingsType))
                     topItemsList[prioritySettingsOrder] = topItem
 
                 #sort topItemList using its keys
@@ -932,9 +976,8 @@ class IniFile0v1:
                     print("Priority list adding item " + prioritySettingsKey)
 
                     # adding item into priority list
-                    topItem = QtWidgets.QTreeWidgetItem([prioritySettingsKey])
+                    topItem = self.guiHelpers.createTreeWidgetItem([prioritySettingsKey], self.cadHelpers.getIconFileByCategory(prioritySettingsType))
                     topItem.setData(0, QtCore.Qt.UserRole, prioritySettingsType)
-                    topItem.setIcon(0, self.cadHelpers.getIconByCategory(prioritySettingsType))
                     topItemsList[prioritySettingsOrder] = topItem
 
                 #sort topItemList using its keys
@@ -975,6 +1018,27 @@ class IniFile0v1:
                 except:
                     pass
 
+                #
+                #   combined post-processing and saved model options are not present in older files, checked by default
+                #
+                self.form.combinedPostprocessingS11Checkbox.setChecked(str(settings.value("combinedS11", "true")).lower() == "true")
+                self.form.combinedPostprocessingS21Checkbox.setChecked(str(settings.value("combinedS21", "true")).lower() == "true")
+                self.form.combinedPostprocessingNf2ffCheckbox.setChecked(str(settings.value("combinedNf2ff", "true")).lower() == "true")
+                self.form.combinedPostprocessingSParamCheckbox.setChecked(str(settings.value("combinedSParameters", "false")).lower() == "true")
+                self.form.postprocessingLoadSavedModelCheckbox.setChecked(str(settings.value("loadSavedModel", "true")).lower() == "true")
+                self.form.postprocessingHeadlessCheckbox.setChecked(str(settings.value("headlessPlotting", "false")).lower() == "true")
+
+                #
+                #   far field pattern file format is not present in older files, binary VTK is used by default
+                #
+                self.guiHelpers.setComboboxItem(self.form.portNf2ffVtkFormat, settings.value("nf2ffVtkFormat", "binary .vtk"))
+
+                #
+                #   far field frequency list and cache option are not present in older files, single frequency and cache are used
+                #
+                self.form.portNf2ffFreqList.setText(str(settings.value("nf2ffFreqList", "")))
+                self.form.portNf2ffReuseCachedCheckbox.setChecked(str(settings.value("nf2ffReuseCached", "true")).lower() == "true")
+
                 settings.endGroup()
                 continue
 
@@ -1049,7 +1113,7 @@ class IniFile0v1:
         meshPriorityItemsToRename = self.form.meshPriorityTreeView.findItems(meshItemName, QtCore.Qt.MatchExactly)
         for meshItemPriority in meshPriorityItemsToRename:
             meshItemPriority.setText(0, meshItemNameNew)
-            meshItemPriority.setIcon(0, QtGui.QIcon("./img/errorLoadObject.svg"))
+            self.guiHelpers.setTreeWidgetItemIcon(meshItemPriority, "./img/errorLoadObject.svg")
 
     def renameObjectsPriorityItem(self, objCategory, objParentItemName, oldName, newName):
         objItemName = objCategory + ", " + objParentItemName + ", " + oldName
@@ -1058,4 +1122,4 @@ class IniFile0v1:
         objPriorityItemsToRename = self.form.objectAssignmentPriorityTreeView.findItems(objItemName, QtCore.Qt.MatchExactly)
         for objItemPriority in objPriorityItemsToRename:
             objItemPriority.setText(0, objItemNameNew)
-            objItemPriority.setIcon(0, QtGui.QIcon("./img/errorLoadObject.svg"))
+            self.guiHelpers.setTreeWidgetItemIcon(objItemPriority, "./img/errorLoadObject.svg")
@@ -605,6 +605,62 @@ class IniValidator0v1:
                                 'mandatory': True,
                                 'allowedValues': "bool"
                             },
+                            'generatePointsSidecar': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
+                            'generateMeshSidecar': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
+                            'exporterSmoothMesh': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
+                            'stlExportWorkersCount': {
+                                'mandatory': False,
+                                'allowedValues': "int"
+                            },
+                            'stlCacheEnabled': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
+                            'stlCacheSizeMB': {
+                                'mandatory': False,
+                                'allowedValues': "int"
+                            },
+                            'resultCacheEnabled': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
+                            'resultCacheDir': {
+                                'mandatory': False,
+                                'allowedValues': "string"
+                            },
+                            'openEMSEngine': {
+                                'mandatory': False,
+                                'allowedValues': r"(calibrated|default|basic|sse|sse-compressed|multithreaded)"
+                            },
+                            'openEMSNumThreads': {
+                                'mandatory': False,
+                                'allowedValues': "int"
+                            },
+                            'parameterSweepRun': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
+                            'jobQueueMaxJobs': {
+                                'mandatory': False,
+                                'allowedValues': "int"
+                            },
+                            'jobQueueThreadsPerJob': {
+                                'mandatory': False,
+                                'allowedValues': "int"
+                            },
+                            'jobQueueMaxTotalThreads': {
+                                'mandatory': False,
+                                'allowedValues': "int"
+                            },
                             'mFileExecCommand': {
                                 'mandatory': False,
                                 'allowedValues': "string"
@@ -629,6 +685,10 @@ class IniValidator0v1:
                                 'mandatory': True,
                                 'allowedValues': "float"
                             },
+                            'min_gridspacing_summary': {
+                                'mandatory': False,
+                                'allowedValues': "bool"
+                            },
                             'outputScriptType': {
                                 'mandatory': True,
                                 'allowedValues': "string"
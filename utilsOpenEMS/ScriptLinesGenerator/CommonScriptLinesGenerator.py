@@ -6,13 +6,24 @@ from PySide2 import QtGui, QtCore, QtWidgets
 import numpy as np
 import re
 import math
+import time
+import copy
+import hashlib
+from abc import ABC, abstractmethod
 
 from utilsOpenEMS.GlobalFunctions.GlobalFunctions import _bool, _r
 from utilsOpenEMS.SettingsItem.SettingsItem import SettingsItem
 from utilsOpenEMS.GuiHelpers.GuiHelpers import GuiHelpers
 from utilsOpenEMS.GuiHelpers.FactoryCadInterface import FactoryCadInterface
+from utilsOpenEMS.ScriptLinesGenerator.StlCache import StlCache
+from utilsOpenEMS.ScriptLinesGenerator.EngineCalibrator import EngineCalibrator
+from utilsOpenEMS.ScriptLinesGenerator.ParameterSweep import ParameterSweep
+from utilsOpenEMS.ScriptLinesGenerator.ResultCache import ResultCache
+from utilsOpenEMS.ScriptLinesGenerator.MeshEngine import MeshEngine
+from utilsOpenEMS.ScriptLinesGenerator.MeshCostEstimator import MeshCostEstimator
+from utilsOpenEMS.ScriptLinesGenerator.FormAccessRecorder import FormAccessRecorder
 
-class CommonScriptLinesGenerator:
+class CommonScriptLinesGenerator(ABC):
 
     #
     #   constructor, get access to form GUI
@@ -25,6 +36,35 @@ class CommonScriptLinesGenerator:
         self.internalMaterialIndexNamesList = {}
         self.internalNF2FFIndexNamesList = {}
 
+        #
+        # CAD objects index label -> [objects], built once per export and shared by all sections
+        #   if document observer is attached index is kept between exports and invalidated just by document changes
+        #
+        self.cadObjectsIndex = None
+        self.cadObjectsIndexObserved = False
+        self.cadDocumentRevision = 0
+
+        #
+        # generated script sections cache, section name -> [signature, script lines, state, artifacts, form widget names, form state]
+        #
+        self.sectionCache = {}
+        self.sectionArtifacts = []
+
+        #
+        # mesh lines resolved in exporter by grid section, None if they are generated as script code
+        #
+        self.resolvedMeshLines = None
+
+        #
+        # settings overrides of parameter sweep variant being exported, item name -> {attribute path: value}
+        #
+        self.settingsOverrides = None
+
+        #
+        # objects priority map, created from priority tree view at start of each export
+        #
+        self.itemPriorityMap = None
+
         #
         # GUI helpers function like display message box and so
         #
@@ -52,6 +92,8 @@ class CommonScriptLinesGenerator:
                 itemData = item.data(0, QtCore.Qt.UserRole)
                 if not itemData:
                     continue
+                if self.settingsOverrides is not None and itemData.name in self.settingsOverrides:
+                    itemData = ParameterSweep.applyOverrides(itemData, self.settingsOverrides[itemData.name])
                 itemClassName = itemData.__class__.__name__
                 if not (itemClassName in itemsByClassName):
                     itemsByClassName[itemClassName] = [[item, itemData]]
@@ -68,21 +110,200 @@ class CommonScriptLinesGenerator:
     #
     def getItemPriority(self, priorityItemName):
         #
-        #	priority is read from tree view
+        #	priority is read from map created from tree view once per export, item name must match exactly
         #
-        priorityItemValue = 42
+        if self.itemPriorityMap is None:
+            self.itemPriorityMap = self.getItemPriorityMap()
+
+        return self.itemPriorityMap.get(self.normalizePriorityItemName(priorityItemName), 42)
+
+    def normalizePriorityItemName(self, priorityItemName):
+        return ", ".join(map(str.strip, priorityItemName.split(',')))
+
+    def getItemPriorityMap(self):
+        """
+        Creates map from objects priority tree view.
+        :return: dict priority item name -> priority value
+        """
+        itemPriorityMap = {}
         itemsCount = self.form.objectAssignmentPriorityTreeView.topLevelItemCount()
         for k in range(itemsCount):
             priorityItem = self.form.objectAssignmentPriorityTreeView.topLevelItem(k)
-            if priorityItemName in priorityItem.text(0):
-                #
-                #	THIS IS MY FORMULA TO HAVE AT LEAST TWO 0 AT END AND NOT HAVE PRIORITY INDEX 0 BUT START AT 100 AT LEAST!
-                #		ATTENTION: higher number means higher priority so fromual is: (1001 - k)     ...to get item at top of tree view with highest priority numbers!
-                #
-                priorityItemValue = (100 - k) * 100
-                break  # this will break loop SO JUST ONE ITEM FROM PRIORITY LIST IS DELETED
+            #
+            #	THIS IS MY FORMULA TO HAVE AT LEAST TWO 0 AT END AND NOT HAVE PRIORITY INDEX 0 BUT START AT 100 AT LEAST!
+            #		ATTENTION: higher number means higher priority so fromual is: (1001 - k)     ...to get item at top of tree view with highest priority numbers!
+            #
+            itemPriorityMap.setdefault(self.normalizePriorityItemName(priorityItem.text(0)), (100 - k) * 100)
+
+        return itemPriorityMap
+
+    #
+    #   CAD objects index
+    #       sections are looking up objects by label many times, instead of linear search over all document objects
+    #       index is built once and reused
+    #
+    def invalidateCadObjectsIndex(self, *args):
+        self.cadObjectsIndex = None
+
+    def cadDocumentChanged(self, *args):
+        self.cadDocumentRevision += 1
+        self.invalidateCadObjectsIndex()
 
-        return priorityItemValue
+    def cadDocumentSwitched(self, *args):
+        """
+        Sections generated for previous document are never used again as document revision changed, they are dropped
+        so section cache does not hold them.
+        """
+        self.cadDocumentChanged()
+        self.invalidateSectionCache()
+
+    #
+    #   properties which change what is found by label or where object geometry is, group change moves object into
+    #   or out of App::Part so its global placement changes
+    #
+    CAD_INDEX_PROPERTIES = ['Label', 'Placement', 'Shape', 'Group']
+
+    def cadObjectChanged(self, obj, prop):
+        if prop in ['Visibility', 'Label2']:
+            return
+        self.cadDocumentRevision += 1
+        if prop in self.CAD_INDEX_PROPERTIES:
+            self.invalidateCadObjectsIndex()
+
+    def observeCadDocument(self, observer):
+        """
+        Keep CAD objects index and generated sections valid between exports, they are rebuilt only when document is
+        created, activated or closed or when object is created, deleted or changed.
+        :param observer: document observer with documentCreated, documentActivated, documentDeleted, objectCreated,
+                         objectChanged, objectDeleted event handlers
+        """
+        observer.documentCreated += self.cadDocumentSwitched
+        observer.documentActivated += self.cadDocumentSwitched
+        observer.documentDeleted += self.cadDocumentSwitched
+        observer.objectCreated += self.cadDocumentChanged
+        observer.objectChanged += self.cadObjectChanged
+        observer.objectDeleted += self.cadDocumentChanged
+        self.cadObjectsIndexObserved = True
+
+    def beginExportSession(self):
+        """
+        Must be called at start of each export, without document observer there is no other way to know if document
+        was changed so index is dropped and built again on first lookup and document is considered as changed.
+        Priority map is always created again as priorities can be reordered in GUI between exports.
+        """
+        self.itemPriorityMap = None
+        if not self.cadObjectsIndexObserved:
+            self.cadDocumentChanged()
+
+    def getCadObjectsByLabel(self, label):
+        """
+        :param label: CAD object label
+        :return: list of CAD objects with given label, empty list if there is no such object
+        """
+        if self.cadObjectsIndex is None:
+            self.cadObjectsIndex = {}
+            for obj in self.cadHelpers.getObjects():
+                self.cadObjectsIndex.setdefault(obj.Label, []).append(obj)
+
+        return self.cadObjectsIndex.get(label, [])
+
+    def getCadObjectByLabel(self, label):
+        objs = self.getCadObjectsByLabel(label)
+        return objs[0] if len(objs) > 0 else None
+
+    #
+    #   Script sections cache
+    #       each section is generated again only if something it depends on changed:
+    #           - form widgets which section read, they are recorded while section is generated
+    #           - settings items with parameter sweep overrides applied, these are not visible in form
+    #           - document revision for sections which use CAD geometry
+    #           - generator state created by previous sections
+    #       state attributes written by section and files it generated are stored along with its script lines
+    #
+    SECTION_STATE_NAMES = {
+        "excitation": ["maxGridResolution_m"],
+        "grid": ["resolvedMeshLines"],
+        "materials": ["internalMaterialIndexNamesList"],
+        "ports": ["internalPortIndexNamesList"],
+        "probes": ["internalNF2FFIndexNamesList"],
+    }
+
+    SECTION_ITEMS_CLASS_NAMES = {
+        "excitation": ["ExcitationSettingsItem"],
+        "materials": ["MaterialSettingsItem"],
+        "grid": ["GridSettingsItem"],
+        "ports": ["PortSettingsItem"],
+        "lumpedParts": ["LumpedPartSettingsItem"],
+        "probes": ["ProbeSettingsItem"],
+        "nf2ff": ["ProbeSettingsItem"],
+    }
+
+    def getSettingsItemsSignature(self, items):
+        if not items:
+            return []
+        return [[item.text(0), [item.child(k).text(0) for k in range(item.childCount())], sorted(vars(itemData).items())] for [item, itemData] in items]
+
+    def getSectionSignature(self, sectionName, itemsByClassName, outputDir=None):
+        """
+        Signature of section inputs which are not read from form, form widgets are compared separately.
+        :param sectionName: section identifier
+        :param itemsByClassName: settings items as returned by getItemsByClassName()
+        :param outputDir: output directory, files generated by section are placed there
+        :return: hash of everything section output depends on except form widgets
+        """
+        signature = [self.__class__.__name__, sectionName, outputDir, self.cadDocumentRevision]
+
+        for className in self.SECTION_ITEMS_CLASS_NAMES.get(sectionName, []):
+            signature += self.getSettingsItemsSignature(itemsByClassName.get(className, None))
+
+        if sectionName == "grid":
+            signature += [getattr(self, "maxGridResolution_m", None)]
+        elif sectionName == "ports":
+            signature += [self.internalMaterialIndexNamesList]
+
+        return hashlib.sha256(repr(signature).encode("utf-8")).hexdigest()
+
+    def getCachedSectionScriptLines(self, sectionName, sectionGenerator, itemsByClassName, outputDir=None):
+        """
+        Returns script lines of section from cache if nothing it depends on changed, otherwise section is generated.
+        :param sectionName: section identifier
+        :param sectionGenerator: function without parameters returning section script lines
+        :param itemsByClassName: settings items as returned by getItemsByClassName()
+        :param outputDir: output directory, files generated by section are placed there
+        :return: script lines
+        """
+        signature = self.getSectionSignature(sectionName, itemsByClassName, outputDir)
+        stateNames = self.SECTION_STATE_NAMES.get(sectionName, [])
+
+        cachedSection = self.sectionCache.get(sectionName, None)
+        if cachedSection is not None and cachedSection[0] == signature and \
+                cachedSection[5] == FormAccessRecorder.getFormState(self.form, cachedSection[4]) and \
+                all([os.path.exists(fileName) for fileName in cachedSection[3]]):
+            for stateName, stateValue in cachedSection[2].items():
+                setattr(self, stateName, copy.deepcopy(stateValue))
+            print(f"Section {sectionName} not changed, using previously generated script lines.")
+            return cachedSection[1]
+
+        #
+        #   form is replaced by recorder while section is generated to get widgets which section reads
+        #
+        self.sectionArtifacts = []
+        formRecorder = FormAccessRecorder(self.form)
+        self.form = formRecorder
+        try:
+            scriptLines = sectionGenerator()
+        finally:
+            self.form = formRecorder.form
+
+        widgetNames = sorted(formRecorder.widgetNames)
+        state = {stateName: copy.deepcopy(getattr(self, stateName)) for stateName in stateNames if hasattr(self, stateName)}
+        self.sectionCache[sectionName] = [signature, scriptLines, state, self.sectionArtifacts, widgetNames, FormAccessRecorder.getFormState(self.form, widgetNames)]
+        self.sectionArtifacts = []
+
+        return scriptLines
+
+    def invalidateSectionCache(self):
+        self.sectionCache = {}
 
     #
     #   Returns current FreeCAD file:
@@ -120,6 +341,224 @@ class CommonScriptLinesGenerator:
 
         return absoluteOutputDir
 
+    #
+    #   Polygon and curve points sidecar file
+    #       when enabled in GUI points are not generated as script lines but collected here and written into one file next to script
+    #
+    def initPointsSidecar(self):
+        self.pointsSidecar = [] if self.form.generatePointsSidecarCheckbox.isChecked() else None
+        self.pointsSidecarRowsCount = 0
+
+    def isPointsSidecarEnabled(self):
+        return getattr(self, "pointsSidecar", None) is not None
+
+    def addPointsToSidecar(self, points):
+        """
+        Add points set into sidecar.
+        :param points: list of coordinates lists [[x0, x1, ...], [y0, y1, ...]] or [[x...], [y...], [z...]]
+        :return: [index, firstRow, lastRow] index of points set and its rows in sidecar table (rows are counted from 1)
+        """
+        pointsArray = np.array(points, dtype=np.float64)
+        self.pointsSidecar.append(pointsArray)
+
+        firstRow = self.pointsSidecarRowsCount + 1
+        self.pointsSidecarRowsCount += pointsArray.shape[1]
+
+        return [len(self.pointsSidecar) - 1, firstRow, self.pointsSidecarRowsCount]
+
+    def getSidecarFileName(self, outputDir, suffix, extension):
+        """
+        Returns name of sidecar file and its absolute path.
+        :param outputDir: directory where script is generated, if None FreeCAD file directory is used
+        :param suffix: appended to FreeCAD file name ie. '_points'
+        :param extension: file extension ie. '.npz'
+        :return: [fileName, filePath]
+        """
+        currDir, nameBase = self.getCurrDir()
+        fileName = nameBase.replace(" ", "_") + suffix + extension
+        return [fileName, os.path.join(currDir if outputDir is None else outputDir, fileName)]
+
+    def getPointsSidecarFileName(self, outputDir, extension):
+        return self.getSidecarFileName(outputDir, "_points", extension)
+
+    #
+    #   Mesh lines resolved in exporter
+    #       when all grids can be evaluated in exporter just final lines are written into script, inline or into sidecar file
+    #
+    def isMeshSidecarEnabled(self):
+        return self.form.generateMeshSidecarCheckbox.isChecked()
+
+    def getMeshSidecarFileName(self, outputDir, extension):
+        return self.getSidecarFileName(outputDir, "_mesh", extension)
+
+    def getSmoothMeshMaxRes(self, maxRes):
+        """
+        Smooth mesh lines are computed by exporter just when it's enabled, by default script smooths them by CSXCAD.
+        :param maxRes: smooth mesh max resolution from grid settings in drawing units, 0 means max_res from excitation
+        :return: max resolution in drawing units, 0 if lines are smoothed in script or max resolution is not known in exporter
+        """
+        if not self.form.exporterSmoothMeshCheckbox.isChecked():
+            return 0
+        if maxRes == 0:
+            return getattr(self, "maxGridResolution_m", 0) / self.getUnitLengthFromUI_m()
+        return maxRes
+
+    #
+    #   Mesh cost estimate
+    #       computed from mesh lines resolved in exporter when grid section is generated, so it's available before
+    #       simulation is run, result is displayed in GUI and written as JSON file next to script
+    #
+    def getExcitationEstimateParams(self, itemsByClassName):
+        """
+        :return: [excitation length in seconds or None if excitation does not end, max excitation frequency in Hz]
+        """
+        excitationItems = itemsByClassName.get("ExcitationSettingsItem", None)
+        if not excitationItems:
+            return [None, None]
+
+        currSetting = excitationItems[0][1]
+        unitsAsNumber = currSetting.getUnitsAsNumber(currSetting.units)
+        if currSetting.getType() == 'gaussian':
+            fc = currSetting.gaussian['fc'] * unitsAsNumber
+            excitationLength = 2 * 9 / (2 * math.pi * fc) if fc > 0 else None     # same gaussian pulse length as openEMS uses
+            return [excitationLength, (currSetting.gaussian['f0'] + currSetting.gaussian['fc']) * unitsAsNumber]
+        elif currSetting.getType() == 'sinusodial':
+            return [None, currSetting.sinusodial['f0'] * unitsAsNumber]
+        elif currSetting.getType() == 'custom':
+            return [None, currSetting.custom['f0'] * unitsAsNumber]
+
+        return [None, None]
+
+    def addDumpBoxesToMeshCostEstimator(self, meshCostEstimator, items):
+        if not items:
+            return
+
+        sf = self.getFreeCADUnitLength_m() / self.getUnitLengthFromUI_m()
+        for [item, currSetting] in items:
+            if not currSetting.getType() in ["dumpbox", "et dump", "ht dump"]:
+                continue
+
+            domain = currSetting.dumpboxDomain if currSetting.getType() == "dumpbox" else "time"
+            for k in range(item.childCount()):
+                childName = item.child(k).text(0)
+                for obj in self.getCadObjectsByLabel(childName):
+                    bbCoords = obj.Shape.BoundBox
+                    meshCostEstimator.addDumpBox(
+                        f"{currSetting.name}_{childName}",
+                        [bbCoords.XMin * sf, bbCoords.YMin * sf, bbCoords.ZMin * sf],
+                        [bbCoords.XMax * sf, bbCoords.YMax * sf, bbCoords.ZMax * sf],
+                        domain,
+                        len(currSetting.dumpboxFrequencyList)
+                    )
+
+    def getMeshCostEstimate(self, itemsByClassName):
+        """
+        Estimate simulation cost from mesh lines resolved by last grid section generation.
+        :return: estimate dict or None if mesh lines were not resolved in exporter
+        """
+        if self.resolvedMeshLines is None:
+            return None
+        if self.getModelCoordsType() == "cylindrical":
+            return {"error": "mesh cost estimate is available only for rectangular coordinates"}
+
+        meshLines = dict(self.resolvedMeshLines)
+        if self.form.genParamMinGridSpacingEnable.isChecked():
+            minSpacing = {
+                'x': self.form.genParamMinGridSpacingX.value() / 1000 / self.getUnitLengthFromUI_m(),
+                'y': self.form.genParamMinGridSpacingY.value() / 1000 / self.getUnitLengthFromUI_m(),
+                'z': self.form.genParamMinGridSpacingZ.value() / 1000 / self.getUnitLengthFromUI_m()
+            }
+            meshLines = {axis: MeshEngine.removeCloseLines(lines, minSpacing[axis]) for axis, lines in meshLines.items()}
+
+        meshCostEstimator = MeshCostEstimator(meshLines, self.getUnitLengthFromUI_m())
+        self.addDumpBoxesToMeshCostEstimator(meshCostEstimator, itemsByClassName.get("ProbeSettingsItem", None))
+
+        excitationLength, maxFrequency = self.getExcitationEstimateParams(itemsByClassName)
+        hostResult = EngineCalibrator().getHostResult()
+        cellsPerSecond = hostResult["speed_MCs"] * 1e6 if hostResult is not None else MeshCostEstimator.DEFAULT_CELLS_PER_SECOND
+        return meshCostEstimator.estimate(self.form.simParamsMaxTimesteps.value(), excitationLength, maxFrequency, cellsPerSecond)
+
+    def reportMeshCostEstimate(self, itemsByClassName, outputDir=None):
+        """
+        Display mesh cost estimate in GUI, print it and write it as JSON file next to generated script.
+        :return: estimate dict or None if mesh lines are generated as script code
+        """
+        estimate = self.getMeshCostEstimate(itemsByClassName)
+        if estimate is None:
+            self.form.meshCostEstimateText.setPlainText("Mesh cost cannot be estimated, mesh lines are generated as script code (User Defined or Smooth Mesh grid).")
+            return None
+
+        report = MeshCostEstimator.formatReport(estimate)
+        self.form.meshCostEstimateText.setPlainText(report)
+        print("Mesh cost estimate:\n" + report)
+        for warning in estimate.get("warnings", []):
+            self.cadHelpers.printWarning(f"mesh cost estimate: {warning}\n")
+
+        if outputDir is not None:
+            estimateFileName, estimateFilePath = self.getSidecarFileName(outputDir, "_mesh_cost", ".json")
+            MeshCostEstimator.writeJson(estimate, estimateFilePath)
+            print(f"Mesh cost estimate written into: {estimateFilePath}")
+
+        return estimate
+
+    def estimateMeshCost(self, outputDir=None):
+        """
+        Resolve mesh lines and estimate simulation cost without generating script, called from GUI.
+        """
+        self.beginExportSession()
+        outputDir = self.createOuputDir(outputDir)
+        itemsByClassName = self.getItemsByClassName()
+
+        self.getCachedSectionScriptLines("excitation", lambda: self.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None)), itemsByClassName)
+        self.getCachedSectionScriptLines("grid", lambda: self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None), outputDir), itemsByClassName, outputDir)
+
+        return self.reportMeshCostEstimate(itemsByClassName)
+
+    #
+    #   STL export
+    #       material objects are collected during script generation and exported at once, CAD helper can tessellate them in parallel,
+    #       objects which did not change since previous export are taken from STL cache
+    #
+    def exportSTLFiles(self, exportJobs):
+        """
+        Export STL files and print how long each file took.
+        :param exportJobs: list of [partToExport, exportFileName]
+        """
+        if len(exportJobs) == 0:
+            return
+
+        workersCount = self.form.stlExportWorkersCount.value()
+        startTime = time.perf_counter()
+
+        stlCache = StlCache(maxSizeMB=self.form.stlCacheSizeMB.value()) if self.form.stlCacheEnabledCheckbox.isChecked() else None
+        cacheKeys = {}
+        jobsToExport = []
+        for [partToExport, exportFileName] in exportJobs:
+            if stlCache is not None:
+                cacheKeys[exportFileName] = self.cadHelpers.getSTLCacheKey(partToExport)
+                if stlCache.get(cacheKeys[exportFileName], exportFileName):
+                    print(f"Material object STL taken from cache: {exportFileName}")
+                    continue
+
+            #   output file from previous export is removed, so file which failed to export is not left there with old content
+            if os.path.lexists(exportFileName):
+                os.remove(exportFileName)
+            jobsToExport.append([partToExport, exportFileName])
+
+        timings = self.cadHelpers.exportSTLBatch(jobsToExport, workersCount) if len(jobsToExport) > 0 else []
+
+        self.sectionArtifacts += [exportFileName for [partToExport, exportFileName] in exportJobs]
+
+        for [exportFileName, duration] in timings:
+            print(f"Material object exported as STL into: {exportFileName} ({duration:.3f} s)")
+            if stlCache is not None:
+                stlCache.put(cacheKeys[exportFileName], exportFileName)
+
+        if stlCache is not None:
+            stlCache.evict()
+
+        print(f"STL export: {len(jobsToExport)} files exported, {len(exportJobs) - len(jobsToExport)} from cache, {workersCount} workers, total {time.perf_counter() - startTime:.3f} s")
+
     def reportFreeCADItemSettings(self, items):
         # "FreeCAD item detection everywhere in Main Tree!!! need to get rid this, now it's tolerated during development!"
         if not items:
@@ -149,6 +588,245 @@ class CommonScriptLinesGenerator:
                 print("Parent of FreeCADSettingItem UNKNOWN")
                 pass
 
+    #
+    #   Result cache
+    #       model hash is computed from script lines of sections defining model and content of files they generated,
+    #       generated script reuses results stored under this hash instead of running simulation again
+    #
+    MODEL_HASH_SECTION_NAMES = ["boundaryConditions", "excitation", "materials", "grid", "ports", "lumpedParts", "probes", "nf2ff", "minimalGridlineSpacing"]
+
+    def getResultCacheDir(self):
+        """
+        :return: result cache directory or None if result cache is disabled
+        """
+        if not self.form.resultCacheEnabledCheckbox.isChecked():
+            return None
+        resultCacheDir = self.form.resultCacheDir.text().strip()
+        return resultCacheDir if resultCacheDir != "" else ResultCache.getDefaultCacheDir()
+
+    def getModelHash(self):
+        """
+        Must be called after all model sections were generated, their script lines and files are taken from section cache.
+        :return: model hash hex digest
+        """
+        modelValues = [self.__class__.__name__, self.getModelCoordsType(), self.form.simParamsDeltaUnitList.currentText(),
+                       self.form.simParamsMaxTimesteps.value(), self.form.simParamsMinDecrement.value()]
+        fileNames = []
+        for sectionName in self.MODEL_HASH_SECTION_NAMES:
+            if sectionName in self.sectionCache:
+                modelValues.append(self.sectionCache[sectionName][1])
+                fileNames += self.sectionCache[sectionName][3]
+
+        modelHash = ResultCache.computeModelHash(modelValues, fileNames)
+
+        resultCacheDir = self.getResultCacheDir()
+        if resultCacheDir is not None and ResultCache(resultCacheDir).hasResults(modelHash):
+            print(f"Simulation results of this model found in result cache {resultCacheDir}, script will reuse them instead of running simulation.")
+
+        return modelHash
+
+    #
+    #   Parameter sweep
+    #       each variant is exported by generateOpenEMSScript() into its own subdirectory, settings items are overridden
+    #       just for export, GUI is not changed
+    #
+    @abstractmethod
+    def getScriptRunCommand(self, scriptFileName):
+        """
+        :return: command running generated simulation script, list of arguments or shell command string
+        """
+
+    def generateParameterSweep(self, sweep, outputDir=None):
+        """
+        :param sweep: ParameterSweep
+        :param outputDir: output directory, variants are generated into its subdirectories
+        :return: list of [variant name, variant output dir, script file name]
+        """
+        outputDir = self.createOuputDir(outputDir)
+
+        #
+        #   check all overridden items exist, otherwise typo in sweep definition would silently export same model for all variants
+        #
+        itemNames = set([itemData.name for items in self.getItemsByClassName().values() for [item, itemData] in items])
+        for [variantName, overrides] in sweep.getVariants():
+            unknownNames = [itemName for itemName in overrides.keys() if itemName not in itemNames]
+            if len(unknownNames) > 0:
+                raise ValueError(f"sweep variant {variantName} overrides unknown settings items: {', '.join(unknownNames)}")
+
+        variantsOutput = []
+        try:
+            for [variantName, overrides] in sweep.getVariants():
+                print(f"Parameter sweep: generating variant {variantName}")
+                self.settingsOverrides = overrides
+                variantOutputDir = os.path.join(outputDir, variantName)
+                scriptFileName = self.generateOpenEMSScript(variantOutputDir)
+                variantsOutput.append([variantName, variantOutputDir, scriptFileName])
+        finally:
+            self.settingsOverrides = None
+
+        sweep.writeManifest(os.path.join(outputDir, "sweep.json"), variantsOutput)
+        self.guiHelpers.displayMessage(f"Parameter sweep with {len(variantsOutput)} variants written to: {outputDir}", forceModal=False)
+
+        return variantsOutput
+
+    #
+    #   S-matrix
+    #       one run per port with only that port excited, runs differ just by port isActive so they are generated as
+    #       parameter sweep, generated script assembles S-parameters of all runs into Touchstone file
+    #
+    def getSMatrixPorts(self):
+        """
+        :return: list of [port settings item name, port index] ordered by port index
+        """
+        self.beginExportSession()
+        self.internalPortIndexNamesList = {}
+        portItems = self.getItemsByClassName().get("PortSettingsItem", None)
+        self.getPortDefinitionsScriptLines(portItems)
+
+        ports = []
+        for [item, itemData] in (portItems if portItems else []):
+            portIndexes = [self.internalPortIndexNamesList[internalPortName] for internalPortName in
+                           [f"{itemData.name} - {item.child(k).text(0)}" for k in range(item.childCount())] if internalPortName in self.internalPortIndexNamesList]
+            if len(portIndexes) > 1:
+                raise ValueError(f"port {itemData.name} has {len(portIndexes)} objects, S-matrix needs one object per port so each port is excited alone")
+            if len(portIndexes) == 1:
+                ports.append([itemData.name, portIndexes[0]])
+
+        return sorted(ports, key=lambda port: port[1])
+
+    @abstractmethod
+    def writeSMatrixScript(self, outputDir, runs, referenceImpedance=50, freqCount=501):
+        """
+        :param runs: list of [excited port name, excited port index, run directory relative to outputDir]
+        :return: script file name
+        """
+
+    def generateSMatrixRuns(self, outputDir=None, referenceImpedance=50, freqCount=501):
+        """
+        :param outputDir: output directory, runs are generated into its subdirectories
+        :param referenceImpedance: reference impedance of S-parameters in Touchstone file
+        :param freqCount: number of frequencies in Touchstone file
+        :return: [list of [run name, run output dir, script file name], S-matrix script file name]
+        """
+        outputDir = self.createOuputDir(outputDir)
+
+        ports = self.getSMatrixPorts()
+        if len(ports) == 0:
+            raise ValueError("there is no port with object assigned")
+
+        variantsOutput = self.generateParameterSweep(ParameterSweep.createSMatrixSweep([portName for [portName, portIndex] in ports]), outputDir)
+        runs = [[portName, portIndex, variantName] for [portName, portIndex], [variantName, variantOutputDir, scriptFileName] in zip(ports, variantsOutput)]
+        sMatrixFileName = self.writeSMatrixScript(outputDir, runs, referenceImpedance, freqCount)
+
+        return [variantsOutput, sMatrixFileName]
+
+    #
+    #   Combined post-processing
+    #       structure is defined once, each port is calculated once and all S-parameters and far fields are computed from it
+    #
+    def getCombinedPostprocessingPortIndexes(self, s11PortNames=[], s21PortPairs=[], nf2ffBoxes=[]):
+        """
+        Must be called after port and NF2FF definitions script lines were generated as they fill index lists.
+        :param s11PortNames: list of port names
+        :param s21PortPairs: list of [source port name, target port name]
+        :param nf2ffBoxes: list of [nf2ff box name, input port name, plot frequency]
+        :return: sorted list of port indexes which must be calculated
+        """
+        portNames = list(s11PortNames)
+        portNames += [portName for portPair in s21PortPairs for portName in portPair]
+        portNames += [nf2ffBoxInputPortName for [nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency] in nf2ffBoxes]
+
+        unknownPortNames = [portName for portName in portNames if portName not in self.internalPortIndexNamesList]
+        if len(unknownPortNames) > 0:
+            raise ValueError(f"post-processing uses unknown ports: {', '.join(unknownPortNames)}")
+
+        unknownNF2FFBoxNames = [nf2ffBoxName for [nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency] in nf2ffBoxes if nf2ffBoxName.replace(" ", "_") not in self.internalNF2FFIndexNamesList]
+        if len(unknownNF2FFBoxNames) > 0:
+            raise ValueError(f"post-processing uses unknown NF2FF boxes: {', '.join(unknownNF2FFBoxNames)}")
+
+        return sorted(set([self.internalPortIndexNamesList[portName] for portName in portNames]))
+
+    def getSParameterExportPorts(self):
+        """
+        Must be called after port definitions script lines were generated as they fill port index list.
+        :return: [list of [port name, port index] of all port objects ordered by index, list of [port name, port index] of excited ones, empty if no port is active]
+        """
+        ports = sorted(self.internalPortIndexNamesList.items(), key=lambda port: port[1])
+
+        excitedPortNames = []
+        portItems = self.getItemsByClassName().get("PortSettingsItem", None)
+        for [item, itemData] in (portItems if portItems else []):
+            if itemData.isActive:
+                excitedPortNames += [f"{itemData.name} - {item.child(k).text(0)}" for k in range(item.childCount())]
+
+        excitedPorts = [[portName, portIndex] for [portName, portIndex] in ports if portName in excitedPortNames]
+
+        return [[list(port) for port in ports], excitedPorts]
+
+    #
+    #   NF2FF far field frequencies and cache
+    #       all frequencies are computed by one CalcNF2FF call, far field file is reused when it was calculated for same
+    #       box, frequencies and angles, simulation script removes it together with previous results
+    #
+    @staticmethod
+    def getNF2FFPlotFrequencies(plotFrequency):
+        """
+        :param plotFrequency: frequency in Hz or list of them
+        :return: list of frequencies in Hz
+        """
+        if isinstance(plotFrequency, (list, tuple)):
+            return list(plotFrequency)
+        return [plotFrequency]
+
+    def getNF2FFCacheKey(self, nf2ffBoxName, plotFrequency):
+        """
+        :return: string stored next to far field file, it describes what the file was calculated for
+        """
+        return (
+            f"box={nf2ffBoxName.replace(' ', '_')};"
+            f"freq={','.join([repr(float(freq)) for freq in self.getNF2FFPlotFrequencies(plotFrequency)])};"
+            f"theta={self.form.portNf2ffThetaStart.value()}:{self.form.portNf2ffThetaStep.value()}:{self.form.portNf2ffThetaStop.value()};"
+            f"phi={self.form.portNf2ffPhiStart.value()}:{self.form.portNf2ffPhiStep.value()}:{self.form.portNf2ffPhiStop.value()}"
+        )
+
+    def getOpenEMSEngineSettings(self):
+        """
+        :return: [engine name or None when openEMS default engine is used, number of threads, 0 means all cores]
+        """
+        engine = self.form.openEMSEngineList.currentText()
+        if engine == "calibrated":
+            #
+            #   fastest engine measured on this host, if host was not calibrated openEMS defaults are used
+            #
+            hostResult = EngineCalibrator().getHostResult()
+            if hostResult is None:
+                return [None, self.form.openEMSNumThreads.value()]
+            return [hostResult["engine"], hostResult["numThreads"]]
+
+        return [None if engine == "default" else engine, self.form.openEMSNumThreads.value()]
+
+    def getOpenEMSEngineCommandLineOptions(self):
+        """
+        :return: openEMS command line options for engine and number of threads
+        """
+        engine, numThreads = self.getOpenEMSEngineSettings()
+        openEMS_opt = []
+        if engine is not None:
+            openEMS_opt.append(f'--engine={engine}')
+        if numThreads > 0:
+            openEMS_opt.append(f'--numThreads={numThreads}')
+        return openEMS_opt
+
+    def getSimulationRunMode(self):
+        """
+        :return: [geometry preview mode None, "blocking" or "background", True if simulation is run]
+        """
+        return {
+            "preview only": ["blocking", False],
+            "simulate only": [None, True],
+            "preview in background": ["background", True],
+        }.get(self.form.simulationRunModeList.currentText(), ["blocking", True])
+
     def getModelCoordsType(self):
         """
         Returns current coordinate system, as there can be just rectangular or just cylindrical for all grid items it's enough to look at first grid item.
@@ -0,0 +1,188 @@
+#   author: Lubomir Jagos
+#
+#
+import os
+import sys
+import re
+import json
+import time
+import socket
+import subprocess
+import tempfile
+import numpy as np
+
+from utilsOpenEMS.ScriptLinesGenerator.MeshEngine import MeshEngine
+
+class EngineCalibrator:
+    """
+    Finds fastest openEMS engine and number of threads for current host.
+
+    Small canonical model (empty PEC box excited by gaussian pulse, fixed number of timesteps) is written as openEMS XML
+    file and run by openEMS executable for each engine and thread count, speed reported by openEMS in MC/s is compared
+    and fastest configuration is stored per host name, script generators use it when engine is set to 'calibrated'.
+    """
+
+    ENGINES = ["basic", "sse", "sse-compressed", "multithreaded"]
+
+    def __init__(self, openEMSExecutable="openEMS", calibrationFile=None, cellsPerAxis=80, timesteps=300):
+        """
+        :param openEMSExecutable: openEMS executable name or path
+        :param calibrationFile: JSON file with results for all hosts, by default in user cache directory
+        :param cellsPerAxis: canonical model size, model has cellsPerAxis^3 cells
+        :param timesteps: number of timesteps run for each configuration
+        """
+        self.openEMSExecutable = openEMSExecutable
+        self.calibrationFile = calibrationFile if calibrationFile is not None else EngineCalibrator.getDefaultCalibrationFile()
+        self.cellsPerAxis = cellsPerAxis
+        self.timesteps = timesteps
+
+    @staticmethod
+    def getDefaultCalibrationFile():
+        if sys.platform.startswith("win"):
+            baseDir = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        elif sys.platform == "darwin":
+            baseDir = os.path.expanduser("~/Library/Caches")
+        else:
+            baseDir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+        return os.path.join(baseDir, "FreeCAD-OpenEMS-Export", "engine_calibration.json")
+
+    @staticmethod
+    def getHostName():
+        return socket.gethostname()
+
+    def getThreadCounts(self):
+        """
+        Thread counts tried for multithreaded engine, powers of two up to number of cores and number of cores itself.
+        """
+        coresCount = os.cpu_count() or 1
+        threadCounts = [2**k for k in range(int(np.log2(coresCount)) + 1)]
+        if threadCounts[-1] != coresCount:
+            threadCounts.append(coresCount)
+        return threadCounts
+
+    def getSweep(self):
+        """
+        :return: list of [engine, numThreads], numThreads is 0 for single threaded engines
+        """
+        sweep = [[engine, 0] for engine in EngineCalibrator.ENGINES if engine != "multithreaded"]
+        sweep += [["multithreaded", numThreads] for numThreads in self.getThreadCounts()]
+        return sweep
+
+    def writeCanonicalModel(self, fileName):
+        """
+        Write canonical model as openEMS XML file, 1mm cells, PEC boundaries, gaussian excitation 0-10GHz, end criteria
+        disabled so exactly given number of timesteps is run.
+        """
+        lines = MeshEngine.formatLines(np.arange(self.cellsPerAxis + 1, dtype=np.float64), ",")
+        center = self.cellsPerAxis / 2
+
+        xml = ""
+        xml += '<?xml version="1.0" encoding="UTF-8" standalone="yes" ?>\n'
+        xml += '<openEMS>\n'
+        xml += f'  <FDTD NumberOfTimesteps="{self.timesteps}" endCriteria="0" f_max="1e10">\n'
+        xml += '    <Excitation Type="0" f0="5e9" fc="5e9"/>\n'
+        xml += '    <BoundaryCond xmin="PEC" xmax="PEC" ymin="PEC" ymax="PEC" zmin="PEC" zmax="PEC"/>\n'
+        xml += '  </FDTD>\n'
+        xml += '  <ContinuousStructure CoordSystem="0">\n'
+        xml += '    <Properties>\n'
+        xml += '      <Excitation Name="excitation" Type="0" Excite="0,0,1">\n'
+        xml += '        <Primitives>\n'
+        xml += '          <Box Priority="0">\n'
+        xml += f'            <P1 X="{center}" Y="{center}" Z="{center - 1}"/>\n'
+        xml += f'            <P2 X="{center}" Y="{center}" Z="{center + 1}"/>\n'
+        xml += '          </Box>\n'
+        xml += '        </Primitives>\n'
+        xml += '      </Excitation>\n'
+        xml += '    </Properties>\n'
+        xml += '    <RectilinearGrid DeltaUnit="0.001" CoordSystem="0">\n'
+        xml += f'      <XLines>{lines}</XLines>\n'
+        xml += f'      <YLines>{lines}</YLines>\n'
+        xml += f'      <ZLines>{lines}</ZLines>\n'
+        xml += '    </RectilinearGrid>\n'
+        xml += '  </ContinuousStructure>\n'
+        xml += '</openEMS>\n'
+
+        with open(fileName, "w") as f:
+            f.write(xml)
+
+    @staticmethod
+    def parseSpeed(output):
+        """
+        :param output: openEMS console output
+        :return: last speed reported by openEMS in MC/s or None
+        """
+        speeds = re.findall(r"Speed:\s*([0-9.eE+-]+)\s*MC(?:ells)?/s", output)
+        return float(speeds[-1]) if len(speeds) > 0 else None
+
+    def runConfiguration(self, modelFile, engine, numThreads):
+        """
+        :return: speed in MC/s or None if run failed
+        """
+        args = [self.openEMSExecutable, os.path.basename(modelFile), f"--engine={engine}"]
+        if numThreads > 0:
+            args.append(f"--numThreads={numThreads}")
+
+        try:
+            result = subprocess.run(args, cwd=os.path.dirname(modelFile), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        except OSError as e:
+            print(f"{__file__} > runConfiguration() > cannot run {self.openEMSExecutable}: {e}")
+            return None
+
+        if result.returncode != 0:
+            print(f"{__file__} > runConfiguration() > openEMS failed for engine {engine}, threads {numThreads}")
+            return None
+        return EngineCalibrator.parseSpeed(result.stdout)
+
+    def calibrate(self, progressCallback=None):
+        """
+        Run whole sweep and save fastest configuration for current host.
+        :param progressCallback: function(engine, numThreads, speed) called after each run
+        :return: result dict for current host or None if no configuration succeeded
+        """
+        results = []
+        with tempfile.TemporaryDirectory() as tmpDir:
+            modelFile = os.path.join(tmpDir, "engine_calibration.xml")
+            self.writeCanonicalModel(modelFile)
+
+            for [engine, numThreads] in self.getSweep():
+                speed = self.runConfiguration(modelFile, engine, numThreads)
+                print(f"engine calibration: engine {engine}, threads {numThreads}, speed {speed} MC/s")
+                if progressCallback is not None:
+                    progressCallback(engine, numThreads, speed)
+                if speed is not None:
+                    results.append({"engine": engine, "numThreads": numThreads, "speed_MCs": speed})
+
+        if len(results) == 0:
+            return None
+
+        hostResult = dict(max(results, key=lambda result: result["speed_MCs"]))
+        hostResult["results"] = results
+        hostResult["calibrated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.saveHostResult(hostResult)
+
+        return hostResult
+
+    def loadCalibration(self):
+        if not os.path.isfile(self.calibrationFile):
+            return {}
+        try:
+            with open(self.calibrationFile, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{__file__} > loadCalibration() > cannot read {self.calibrationFile}: {e}")
+            return {}
+
+    def saveHostResult(self, hostResult):
+        calibration = self.loadCalibration()
+        calibration[EngineCalibrator.getHostName()] = hostResult
+
+        os.makedirs(os.path.dirname(self.calibrationFile), exist_ok=True)
+        with open(self.calibrationFile + ".part", "w") as f:
+            json.dump(calibration, f, indent=4)
+        os.replace(self.calibrationFile + ".part", self.calibrationFile)
+
+    def getHostResult(self):
+        """
+        :return: fastest configuration for current host or None if host was not calibrated
+        """
+        return self.loadCalibration().get(EngineCalibrator.getHostName(), None)
@@ -0,0 +1,60 @@
+#   author: Lubomir Jagos
+#
+#
+USER_ROLE = 256     # QtCore.Qt.UserRole, module is used also without PySide2
+
+class FormAccessRecorder:
+    """
+    Form proxy which records names of widgets read through it.
+
+    Generator replaces its form by recorder while section is generated, recorded widget names are stored along with
+    section script lines in section cache and section is generated again when state of some of these widgets changed.
+    Signature therefore contains exactly widgets which section reads, there is no list of them to keep up to date.
+    """
+
+    def __init__(self, form):
+        self.form = form
+        self.widgetNames = set()
+
+    def __getattr__(self, name):
+        # called just for attributes not found on recorder itself, so these are form widgets
+        self.widgetNames.add(name)
+        return getattr(self.form, name)
+
+    @staticmethod
+    def getTreeItemState(item):
+        itemData = item.data(0, USER_ROLE)
+        return [
+            [item.text(k) for k in range(item.columnCount())],
+            repr(sorted(vars(itemData).items())) if hasattr(itemData, "__dict__") else repr(itemData),
+            [FormAccessRecorder.getTreeItemState(item.child(k)) for k in range(item.childCount())]
+        ]
+
+    @staticmethod
+    def getWidgetState(widget):
+        """
+        Returns value of widget, widget type is recognized by its methods so also headless form widgets are supported.
+        :param widget: form widget
+        :return: value which changes when widget content changes
+        """
+        if hasattr(widget, "topLevelItemCount"):
+            return [FormAccessRecorder.getTreeItemState(widget.topLevelItem(k)) for k in range(widget.topLevelItemCount())]
+        elif hasattr(widget, "currentText"):
+            return widget.currentText()
+        elif hasattr(widget, "isChecked"):
+            return widget.isChecked()
+        elif hasattr(widget, "value"):
+            return widget.value()
+        elif hasattr(widget, "toPlainText"):
+            return widget.toPlainText()
+        elif hasattr(widget, "text"):
+            return widget.text()
+        elif hasattr(widget, "count") and hasattr(widget, "item"):
+            return [widget.item(k).text() for k in range(widget.count())]
+
+        # unknown widget type, new object is never equal to previous state so section is always generated again
+        return object()
+
+    @staticmethod
+    def getFormState(form, widgetNames):
+        return [[widgetName, FormAccessRecorder.getWidgetState(getattr(form, widgetName))] for widgetName in widgetNames]
@@ -0,0 +1,198 @@
+#   author: Lubomir Jagos
+#
+#
+import json
+import numpy as np
+
+class MeshCostEstimator:
+    """
+    Estimates cost of simulation from mesh lines resolved in exporter: number of cells, smallest cells, timestep given by
+    CFL criterion, number of timesteps, memory used by FDTD engine and disk space for field dumps.
+
+    Values are estimates for cartesian mesh, openEMS engine adds some memory for extensions (PML, lumped elements, ...)
+    and simulation can end earlier or later depending how fast energy decays to min_decrement.
+    """
+
+    C0 = 299792458
+
+    # E and H field (6 values) and operator coefficients vv, vi, iv, ii (12 values) per cell in single precision
+    ENGINE_BYTES_PER_CELL = 18 * 4
+
+    # 3 field components per dumped cell, time domain dumps are float32, frequency domain dumps complex float32
+    TD_DUMP_BYTES_PER_CELL = 3 * 4
+    FD_DUMP_BYTES_PER_CELL = 3 * 8
+
+    # throughput of openEMS engine used for runtime estimate, multithreaded engine on desktop CPU
+    DEFAULT_CELLS_PER_SECOND = 50e6
+
+    # warning is reported when removing smallest cell on axis makes timestep at least this times longer
+    DOMINANT_CELL_RATIO = 1.5
+
+    def __init__(self, meshLines, unit_m):
+        """
+        :param meshLines: dict {'x': lines, 'y': lines, 'z': lines} sorted lines in drawing units
+        :param unit_m: drawing unit in meters
+        """
+        self.meshLines = {axis: np.sort(np.asarray(lines, dtype=np.float64)) for axis, lines in meshLines.items()}
+        self.unit_m = unit_m
+        self.dumpBoxes = []
+
+    def addDumpBox(self, name, start, stop, domain="time", frequenciesCount=0):
+        """
+        :param name: dump box name
+        :param start: [x, y, z] box corner in drawing units
+        :param stop: [x, y, z] opposite box corner in drawing units
+        :param domain: 'time' or 'frequency'
+        :param frequenciesCount: number of dumped frequencies for frequency domain dump
+        """
+        self.dumpBoxes.append({
+            "name": name,
+            "start": start,
+            "stop": stop,
+            "domain": domain,
+            "frequenciesCount": frequenciesCount
+        })
+
+    def getCellSizes_m(self, axis):
+        return np.diff(self.meshLines[axis]) * self.unit_m
+
+    @staticmethod
+    def getCflTimestep(minCellSizes_m):
+        """
+        Timestep given by Courant-Friedrichs-Lewy criterion for cartesian grid.
+        :param minCellSizes_m: smallest cell size in each axis in meters
+        """
+        return 1 / (MeshCostEstimator.C0 * np.sqrt(np.sum(1 / np.asarray(minCellSizes_m, dtype=np.float64)**2)))
+
+    def getBoxCellsCount(self, start, stop):
+        cellsCount = 1
+        for k, axis in enumerate(["x", "y", "z"]):
+            boxMin, boxMax = min(start[k], stop[k]), max(start[k], stop[k])
+            axisLines = self.meshLines[axis]
+            cellsCount *= max(int(np.count_nonzero((axisLines >= boxMin) & (axisLines <= boxMax))), 1)
+        return cellsCount
+
+    def estimate(self, maxTimesteps, excitationLength_s=None, maxFrequency_Hz=None, cellsPerSecond=DEFAULT_CELLS_PER_SECOND):
+        """
+        :param maxTimesteps: max_timesteps simulation parameter
+        :param excitationLength_s: excitation signal length, None if excitation does not end (sinusoidal, custom)
+        :param maxFrequency_Hz: highest excitation frequency, used for time domain dump interval
+        :param cellsPerSecond: engine throughput used for runtime estimate
+        :return: dict with estimated values, can be serialized to JSON
+        """
+        for axis in ["x", "y", "z"]:
+            if self.meshLines[axis].size < 2:
+                return {"error": f"not enough mesh lines in {axis} to estimate simulation cost"}
+
+        cellsCountPerAxis = {axis: int(self.meshLines[axis].size - 1) for axis in ["x", "y", "z"]}
+        cellsCount = int(np.prod([cellsCountPerAxis[axis] for axis in ["x", "y", "z"]], dtype=np.float64))
+
+        cellSizes = {axis: self.getCellSizes_m(axis) for axis in ["x", "y", "z"]}
+        minCellSizes = {axis: float(np.min(cellSizes[axis])) for axis in ["x", "y", "z"]}
+        maxCellSizes = {axis: float(np.max(cellSizes[axis])) for axis in ["x", "y", "z"]}
+        timestep = float(MeshCostEstimator.getCflTimestep([minCellSizes[axis] for axis in ["x", "y", "z"]]))
+
+        #
+        #   Timesteps, simulation runs at least till excitation ends then it's running till energy decays to min_decrement
+        #   or max_timesteps is reached, decay cannot be estimated from mesh so range is reported.
+        #
+        if excitationLength_s is None:
+            minTimesteps = int(maxTimesteps)
+        else:
+            minTimesteps = min(int(np.ceil(excitationLength_s / timestep)), int(maxTimesteps))
+
+        #
+        #   Warning for single small cell limiting timestep, smallest cell on axis is replaced by second smallest one
+        #   and if timestep grows significantly user is notified where this cell is.
+        #
+        warnings = []
+        for axis in ["x", "y", "z"]:
+            if cellSizes[axis].size < 2:
+                continue
+            sortedIndexes = np.argsort(cellSizes[axis], kind="stable")
+            relaxedMinCellSizes = [minCellSizes[a] if a != axis else float(cellSizes[axis][sortedIndexes[1]]) for a in ["x", "y", "z"]]
+            relaxedTimestep = float(MeshCostEstimator.getCflTimestep(relaxedMinCellSizes))
+            if relaxedTimestep / timestep >= MeshCostEstimator.DOMINANT_CELL_RATIO:
+                cellIndex = int(sortedIndexes[0])
+                warnings.append(
+                    f"single cell in {axis} between {self.meshLines[axis][cellIndex]:g} and {self.meshLines[axis][cellIndex + 1]:g} "
+                    f"({minCellSizes[axis]:g} m) limits timestep, without it timestep would be {relaxedTimestep / timestep:.2f}x longer"
+                )
+
+        #
+        #   Field dumps, time domain dumps are written every Nyquist interval of excitation, frequency domain once at the end.
+        #
+        nyquistTimesteps = max(int(np.floor(1 / (2 * maxFrequency_Hz * timestep))), 1) if maxFrequency_Hz else 1
+        dumpBoxes = []
+        dumpBytesMin = 0
+        dumpBytesMax = 0
+        for dumpBox in self.dumpBoxes:
+            boxCellsCount = self.getBoxCellsCount(dumpBox["start"], dumpBox["stop"])
+            if dumpBox["domain"] == "frequency":
+                boxBytesMin = boxBytesMax = boxCellsCount * MeshCostEstimator.FD_DUMP_BYTES_PER_CELL * max(dumpBox["frequenciesCount"], 1)
+            else:
+                boxBytesMin = boxCellsCount * MeshCostEstimator.TD_DUMP_BYTES_PER_CELL * int(np.ceil(minTimesteps / nyquistTimesteps))
+                boxBytesMax = boxCellsCount * MeshCostEstimator.TD_DUMP_BYTES_PER_CELL * int(np.ceil(maxTimesteps / nyquistTimesteps))
+            dumpBoxes.append({"name": dumpBox["name"], "domain": dumpBox["domain"], "cells": boxCellsCount, "diskBytesMin": boxBytesMin, "diskBytesMax": boxBytesMax})
+            dumpBytesMin += boxBytesMin
+            dumpBytesMax += boxBytesMax
+
+        return {
+            "cells": cellsCount,
+            "cellsPerAxis": cellsCountPerAxis,
+            "minCellSize_m": minCellSizes,
+            "maxCellSize_m": maxCellSizes,
+            "timestep_s": timestep,
+            "timestepsMin": minTimesteps,
+            "timestepsMax": int(maxTimesteps),
+            "simulatedTimeMax_s": timestep * int(maxTimesteps),
+            "engineMemoryBytes": cellsCount * MeshCostEstimator.ENGINE_BYTES_PER_CELL,
+            "dumpDiskBytesMin": dumpBytesMin,
+            "dumpDiskBytesMax": dumpBytesMax,
+            "dumpBoxes": dumpBoxes,
+            "cellsPerSecond": cellsPerSecond,
+            "runtimeMin_s": cellsCount * minTimesteps / cellsPerSecond,
+            "runtimeMax_s": cellsCount * int(maxTimesteps) / cellsPerSecond,
+            "warnings": warnings
+        }
+
+    @staticmethod
+    def formatBytes(value):
+        for unit in ["B", "kB", "MB", "GB", "TB"]:
+            if value < 1024 or unit == "TB":
+                return f"{value:.1f} {unit}"
+            value /= 1024
+
+    @staticmethod
+    def formatSeconds(value):
+        if value < 60:
+            return f"{value:.1f} s"
+        elif value < 3600:
+            return f"{value / 60:.1f} min"
+        return f"{value / 3600:.1f} h"
+
+    @staticmethod
+    def formatReport(estimate):
+        """
+        :param estimate: dict returned by estimate()
+        :return: human readable multiline text
+        """
+        if "error" in estimate:
+            return estimate["error"]
+
+        report = ""
+        report += f"cells: {estimate['cells']:,} ({' x '.join([str(estimate['cellsPerAxis'][axis]) for axis in ['x', 'y', 'z']])})\n"
+        report += f"min cell: {', '.join([f'{axis}: {value:g} m' for axis, value in estimate['minCellSize_m'].items()])}\n"
+        report += f"timestep (CFL): {estimate['timestep_s']:g} s\n"
+        report += f"timesteps: {estimate['timestepsMin']:,} - {estimate['timestepsMax']:,}\n"
+        report += f"engine memory: {MeshCostEstimator.formatBytes(estimate['engineMemoryBytes'])}\n"
+        report += f"dumps disk: {MeshCostEstimator.formatBytes(estimate['dumpDiskBytesMin'])} - {MeshCostEstimator.formatBytes(estimate['dumpDiskBytesMax'])}\n"
+        report += f"runtime at {estimate['cellsPerSecond'] / 1e6:g} MC/s: {MeshCostEstimator.formatSeconds(estimate['runtimeMin_s'])} - {MeshCostEstimator.formatSeconds(estimate['runtimeMax_s'])}\n"
+        for warning in estimate["warnings"]:
+            report += f"WARNING: {warning}\n"
+        return report
+
+    @staticmethod
+    def writeJson(estimate, fileName):
+        with open(fileName, "w") as f:
+            json.dump(estimate, f, indent=4)
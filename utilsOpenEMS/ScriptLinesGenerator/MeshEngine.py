@@ -0,0 +1,203 @@
+#   author: Lubomir Jagos
+#
+#
+import numpy as np
+from collections import OrderedDict
+
+class MeshEngine:
+    """
+    Resolves grid lines in exporter, grid definitions are applied in mesh priority order same way as generated script
+    would do it at run time (top priority lines remove lines in their range, then lines are added), result are final
+    sorted lines for each axis.
+
+    If some grid cannot be evaluated in exporter (ie. user defined grid is code inserted into script) engine is marked
+    as unresolved and generator has to emit mesh lines code as before.
+    """
+
+    AXES = ['x', 'y', 'z']
+
+    def __init__(self, rangeFunction):
+        """
+        :param rangeFunction: function(start, stop, step) returning lines with same rules as range used in generated script
+        """
+        self.rangeFunction = rangeFunction
+        self.lines = {axis: np.array([], dtype=np.float64) for axis in MeshEngine.AXES}
+        self.unresolvedReasons = []
+
+    def isResolved(self):
+        return len(self.unresolvedReasons) == 0
+
+    def setUnresolved(self, reason):
+        self.unresolvedReasons.append(reason)
+
+    def removeLines(self, axis, minValue, maxValue):
+        axisLines = self.lines[axis]
+        self.lines[axis] = axisLines[(axisLines < minValue) | (axisLines > maxValue)]
+
+    def addLines(self, axis, lines):
+        self.lines[axis] = np.concatenate((self.lines[axis], np.atleast_1d(np.asarray(lines, dtype=np.float64))))
+
+    def addRange(self, axis, start, stop, step):
+        self.addLines(axis, self.rangeFunction(start, stop, step))
+
+    def addLinspace(self, axis, start, stop, count):
+        self.addLines(axis, np.linspace(start, stop, int(count)))
+
+    def getLines(self, axis):
+        """
+        :return: sorted lines without duplicates
+        """
+        return np.unique(self.lines[axis])
+
+    #
+    #   Range functions matching generated scripts
+    #
+    @staticmethod
+    def arangeWithEndpoint(start, stop, step=1):
+        """
+        Same as arangeWithEndpoint() defined in generated python script.
+        """
+        if start == stop:
+            return np.array([start])
+
+        arr = np.arange(start, stop, step)
+        if arr[-1] + step == stop:
+            arr = np.concatenate([arr, [stop]])
+        return arr
+
+    @staticmethod
+    def octaveRange(start, stop, step):
+        """
+        Same as octave range start:step:stop, endpoint is included when it's reached within floating point tolerance.
+        """
+        if step == 0 or (stop - start) / step < 0:
+            return np.array([])
+
+        count = int(np.floor((stop - start) / step * (1 + 3 * np.finfo(np.float64).eps))) + 1
+        arr = start + step * np.arange(count)
+        return np.minimum(arr, stop) if step > 0 else np.maximum(arr, stop)
+
+    @staticmethod
+    def removeCloseLines(lines, minSpacing):
+        """
+        Same filter as minimal gridline spacing in generated script, in each run of lines closer than minSpacing every
+        second line is removed, first line of run is kept.
+        :param lines: sorted lines
+        """
+        lines = np.asarray(lines, dtype=np.float64)
+        closeLines = np.diff(lines) <= minSpacing
+        runStart = np.maximum.accumulate(np.where(np.diff(np.concatenate(([False], closeLines)).astype(int)) == 1, np.arange(closeLines.size), 0))
+        removeLines = np.zeros(lines.size, dtype=bool)
+        removeLines[1:] = closeLines & ((np.arange(closeLines.size) - runStart) % 2 == 0)
+        return lines[~removeLines]
+
+    #
+    #   Smooth mesh
+    #       lines are added between fixed lines so no cell is bigger than max resolution and neighbour cells differ at most
+    #       by ratio, results are memoized as same smooth mesh is computed for simulation and each postprocessing script,
+    #       memo keeps just least recently used results so it does not grow during long session
+    #
+    #       this is not port of CSXCAD SmoothMeshLines, it follows same rules but lines can differ, it's used only when
+    #       exporter smoothing is enabled, by default generated script calls CSXCAD smoothing
+    #
+    smoothMeshLinesCache = OrderedDict()
+    SMOOTH_MESH_LINES_CACHE_SIZE = 64
+    SMOOTH_MESH_MAX_PASSES = 10
+
+    @staticmethod
+    def smoothMeshLines(lines, maxRes, ratio=1.5):
+        """
+        :param lines: fixed lines
+        :param maxRes: maximal cell size
+        :param ratio: maximal ratio of neighbour cells sizes, near close fixed lines it can be exceeded as fixed lines are never moved
+        :return: sorted smoothed lines including fixed lines
+        """
+        lines = np.unique(np.round(np.asarray(lines, dtype=np.float64), 14))
+        cacheKey = (lines.tobytes(), float(maxRes), float(ratio))
+        if cacheKey in MeshEngine.smoothMeshLinesCache:
+            MeshEngine.smoothMeshLinesCache.move_to_end(cacheKey)
+        else:
+            MeshEngine.smoothMeshLinesCache[cacheKey] = MeshEngine.computeSmoothMeshLines(lines, maxRes, ratio)
+            while len(MeshEngine.smoothMeshLinesCache) > MeshEngine.SMOOTH_MESH_LINES_CACHE_SIZE:
+                MeshEngine.smoothMeshLinesCache.popitem(last=False)
+        return MeshEngine.smoothMeshLinesCache[cacheKey].copy()
+
+    @staticmethod
+    def computeSmoothMeshLines(lines, maxRes, ratio):
+        if lines.size < 2:
+            return lines
+
+        #
+        #   cells can be split next to cell which was smoothed before, so smoothing is repeated on result until neighbour
+        #   cells ratio is satisfied everywhere, it's usually needed just once or twice
+        #
+        smoothedLines = MeshEngine.smoothMeshLinesPass(lines, maxRes, ratio)
+        for k in range(MeshEngine.SMOOTH_MESH_MAX_PASSES):
+            cells = np.diff(smoothedLines)
+            if cells.size < 2 or np.max(np.maximum(cells[1:] / cells[:-1], cells[:-1] / cells[1:])) <= ratio * (1 + 1e-9):
+                break
+            smoothedLines = MeshEngine.smoothMeshLinesPass(smoothedLines, maxRes, ratio)
+
+        return smoothedLines
+
+    @staticmethod
+    def smoothMeshLinesPass(lines, maxRes, ratio):
+        #
+        #   intervals between lines are smoothed from smallest to biggest, each one is graded from resolution of
+        #   already smoothed neighbour cells, outer sides of mesh have no neighbour so max resolution is used
+        #
+        smoothedLines = lines
+        for k in np.argsort(np.diff(lines), kind="stable"):
+            start, stop = lines[k], lines[k + 1]
+            startIndex = np.searchsorted(smoothedLines, start)
+            stopIndex = np.searchsorted(smoothedLines, stop)
+            startRes = smoothedLines[startIndex] - smoothedLines[startIndex - 1] if startIndex > 0 else maxRes
+            stopRes = smoothedLines[stopIndex + 1] - smoothedLines[stopIndex] if stopIndex + 1 < smoothedLines.size else maxRes
+
+            innerLines = MeshEngine.smoothRange(start, stop, startRes, stopRes, maxRes, ratio)
+            if innerLines.size > 0:
+                smoothedLines = np.concatenate((smoothedLines[:startIndex + 1], innerLines, smoothedLines[stopIndex:]))
+
+        return smoothedLines
+
+    @staticmethod
+    def smoothRange(start, stop, startRes, stopRes, maxRes, ratio):
+        """
+        Lines inside (start, stop), cells grow geometrically by ratio from both sides up to max resolution, always smaller
+        side grows so cells where both sides meet also differ at most by ratio, at the end cells are shrunk to fit range.
+        :return: inner lines without start and stop
+        """
+        length = stop - start
+        if length <= min(maxRes, ratio * startRes, ratio * stopRes):
+            return np.array([], dtype=np.float64)
+
+        leftCells = []
+        rightCells = []
+        leftRes = min(startRes, maxRes)
+        rightRes = min(stopRes, maxRes)
+        cellsLength = 0
+        while cellsLength < length:
+            if leftRes == maxRes and rightRes == maxRes:
+                # both sides reached max resolution, rest of range is filled by uniform cells at once
+                uniformCellsCount = int(np.ceil((length - cellsLength) / maxRes))
+                leftCells += [maxRes] * uniformCellsCount
+                break
+            elif leftRes <= rightRes:
+                leftRes = min(leftRes * ratio, maxRes)
+                leftCells.append(leftRes)
+                cellsLength += leftRes
+            else:
+                rightRes = min(rightRes * ratio, maxRes)
+                rightCells.append(rightRes)
+                cellsLength += rightRes
+
+        cells = np.array(leftCells + rightCells[::-1], dtype=np.float64)
+        cells *= length / np.sum(cells)
+        return start + np.cumsum(cells[:-1])
+
+    #
+    #   Script lines values
+    #
+    @staticmethod
+    def formatLines(lines, separator):
+        return separator.join([repr(float(value)) for value in lines])
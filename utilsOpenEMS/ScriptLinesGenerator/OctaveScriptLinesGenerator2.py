@@ -13,6 +13,8 @@ from utilsOpenEMS.GuiHelpers.GuiHelpers import GuiHelpers
 from utilsOpenEMS.GuiHelpers.FactoryCadInterface import FactoryCadInterface
 
 from utilsOpenEMS.ScriptLinesGenerator.CommonScriptLinesGenerator import CommonScriptLinesGenerator
+from utilsOpenEMS.ScriptLinesGenerator.ScriptEmitter import ScriptEmitter
+from utilsOpenEMS.ScriptLinesGenerator.MeshEngine import MeshEngine
 
 class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
@@ -27,6 +29,9 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         cmd = cmd.format(opt=options, filename=mFileName)
         return cmd
 
+    def getScriptRunCommand(self, scriptFileName):
+        return self.getOctaveExecCommand(scriptFileName, "--no-gui")
+
     def getBoundaryConditionsScriptLines(self):
         genScript = ""
 
@@ -73,7 +78,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getMaterialDefinitionsScriptLines(self, items, outputDir=None, generateObjects=True):
-        genScript = ""
+        genScript = ScriptEmitter()
 
         genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
         genScript += "% MATERIALS AND GEOMETRY\n"
@@ -88,6 +93,10 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         if not items:
             return genScript
 
+        self.initPointsSidecar()
+        stlExportJobs = []
+        pointsSidecarFileName, pointsSidecarFilePath = self.getPointsSidecarFileName(outputDir, ".csv")
+
         for [item, currSetting] in items:
 
             print(f"#MATERIAL generates {currSetting.getName()}, {str(currSetting.constants)}")
@@ -128,7 +137,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                     objModelPriority = self.getItemPriority(objModelPriorityItemName)
 
                     # getting reference to FreeCAD object
-                    freeCadObj = [i for i in self.cadHelpers.getObjects() if (i.Label) == childName][0]
+                    freeCadObj = self.getCadObjectsByLabel(childName)[0]
 
                     #
                     #   HERE IS OBJECT GENERATOR THERE ARE FEW SPECIAL CASES WHICH ARE HANDLED FIRST AND IF OBJECT IS NORMAL STRUCTURE AT THE END IS GENERATED AS .stl FILR:
@@ -155,6 +164,8 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                                 genScript += "points = [];\n"
                                 if len(points[0])  == 0:
                                     genScript += "%% ERROR, no points for polygon for conducting sheet nothing generated"
+                                elif self.isPointsSidecarEnabled():
+                                    genScript += self.getPointsFromSidecarScriptLines(points, pointsSidecarFileName)
                                 else:
                                     for k in range(len(points[0])):
                                         genScript += f"points(1,{k+1}) = {points[0][k]};\n"
@@ -177,11 +188,14 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                             normDir, elevation, facesList = self.getFacePointsForConductingSheet(freeCadObj)
                             if normDir != "":
                                 for face in facesList:
-                                    genScript += "points = [];\n"
-                                    for pointIndex in range(len(face[0])):
-                                        genScript += f"points(1,{pointIndex+1}) = {face[0][pointIndex]};"
-                                        genScript += f"points(2,{pointIndex+1}) = {face[1][pointIndex]};"
-                                        genScript += "\n"
+                                    if self.isPointsSidecarEnabled():
+                                        genScript += self.getPointsFromSidecarScriptLines(face, pointsSidecarFileName)
+                                    else:
+                                        genScript += "points = [];\n"
+                                        for pointIndex in range(len(face[0])):
+                                            genScript += f"points(1,{pointIndex+1}) = {face[0][pointIndex]};"
+                                            genScript += f"points(2,{pointIndex+1}) = {face[1][pointIndex]};"
+                                            genScript += "\n"
                                     genScript += f"CSX = AddPolygon(CSX, '{currSetting.getName()}', {str(objModelPriority)}, '{normDir}', {_r(elevation)}, points);\n"
                             else:
                                 genScript += f"%\tObject has no faces, conducting sheet is generated based on object bounding box since it's planar.\n"
@@ -206,12 +220,16 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                         #
 
                         curvePoints = freeCadObj.Points
-                        genScript += "points = [];\n"
-                        for k in range(0, len(curvePoints)):
-                            genScript += "points(1," + str(k + 1) + ") = " + str(curvePoints[k].x) + ";"
-                            genScript += "points(2," + str(k + 1) + ") = " + str(curvePoints[k].y) + ";"
-                            genScript += "points(3," + str(k + 1) + ") = " + str(curvePoints[k].z) + ";"
-                            genScript += "\n"
+                        if self.isPointsSidecarEnabled():
+                            points = [[p.x for p in curvePoints], [p.y for p in curvePoints], [p.z for p in curvePoints]]
+                            genScript += self.getPointsFromSidecarScriptLines(points, pointsSidecarFileName)
+                        else:
+                            genScript += "points = [];\n"
+                            for k in range(0, len(curvePoints)):
+                                genScript += "points(1," + str(k + 1) + ") = " + str(curvePoints[k].x) + ";"
+                                genScript += "points(2," + str(k + 1) + ") = " + str(curvePoints[k].y) + ";"
+                                genScript += "points(3," + str(k + 1) + ") = " + str(curvePoints[k].z) + ";"
+                                genScript += "\n"
 
                         genScript += "CSX = AddCurve(CSX,'" + currSetting.getName() + "'," + str(
                             objModelPriority) + ", points);\n"
@@ -239,6 +257,20 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                                 genScript += "CSX = AddCurve(CSX,'" + currSetting.getName() + "'," + str(objModelPriority) + ", points);\n"
                         """
 
+                        if self.isPointsSidecarEnabled():
+                            #
+                            #   whole sketch outline is loaded from sidecar as one curve, first vertex is added at the end to close curve
+                            #
+                            sketchVertexes = list(freeCadObj.Shape.OrderedVertexes)
+                            if len(freeCadObj.OpenVertices) == 0:
+                                sketchVertexes.append(freeCadObj.Shape.OrderedVertexes[0])
+                            points = [[_r(v.X) for v in sketchVertexes], [_r(v.Y) for v in sketchVertexes], [_r(v.Z) for v in sketchVertexes]]
+                            genScript += self.getPointsFromSidecarScriptLines(points, pointsSidecarFileName)
+                            genScript += f"CSX = AddCurve(CSX,'{currSetting.getName()}',{objModelPriority}, points);\n"
+                            genScript += "\n"
+                            print("Line segments from sketch added.")
+                            continue
+
                         genScript += "points = [];\n"
                         for v in freeCadObj.Shape.OrderedVertexes:
                             genScript += f"points(1,2) = {_r(v.X)};"
@@ -286,7 +318,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                         # going through each concrete material items and generate their .stl files
 
                         currDir = os.path.dirname(self.cadHelpers.getCurrDocumentFileName())
-                        partToExport = [i for i in self.cadHelpers.getObjects() if (i.Label) == childName]
+                        partToExport = self.getCadObjectsByLabel(childName)
 
                         #output directory path construction, if there is no parameter for output dir then output is in current freecad file dir
                         if (not outputDir is None):
@@ -294,11 +326,38 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                         else:
                             exportFileName = f"{currDir}/{stlModelFileName}"
 
-                        self.cadHelpers.exportSTL(partToExport, exportFileName)
-                        print("Material object exported as STL into: " + exportFileName)
+                        stlExportJobs.append([partToExport, exportFileName])
 
             genScript += "\n"
 
+        #
+        #   export all collected material objects as STL files
+        #
+        self.exportSTLFiles(stlExportJobs)
+
+        #
+        #   write all collected points into sidecar file, one row for each point [x, y, z], for planar polygons z is 0
+        #
+        if self.isPointsSidecarEnabled() and len(self.pointsSidecar) > 0:
+            pointsTable = np.concatenate([np.vstack([pointsArray, np.zeros((3 - pointsArray.shape[0], pointsArray.shape[1]))]).T for pointsArray in self.pointsSidecar])
+            np.savetxt(pointsSidecarFilePath, pointsTable, fmt="%.17g", delimiter=",")
+            self.sectionArtifacts.append(pointsSidecarFilePath)
+            print(f"Polygon and curve points written into: {pointsSidecarFilePath}")
+
+        return genScript
+
+    def getPointsFromSidecarScriptLines(self, points, pointsSidecarFileName):
+        """
+        Add points into sidecar and return script lines which load them into variable points as 2xN or 3xN matrix, sidecar file is loaded when first points are added.
+        :param points: list of coordinates lists
+        :param pointsSidecarFileName: sidecar filename relative to script directory
+        :return: script lines
+        """
+        genScript = ""
+        pointsIndex, firstRow, lastRow = self.addPointsToSidecar(points)
+        if pointsIndex == 0:
+            genScript += f"pointsSidecar = dlmread([currDir '/{pointsSidecarFileName}'], ',');\n"
+        genScript += f"points = pointsSidecar({firstRow}:{lastRow}, 1:{len(points)})';\n"
         return genScript
 
     def getCartesianOrCylindricalScriptLinesFromStartStop(self, bbCoords, startPointName=None, stopPointName=None):
@@ -376,7 +435,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getPortDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -406,13 +465,12 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
             print(f"#PORT - {currSetting.getName()} - {currSetting.getType()}")
 
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
 
                 genScript += "%% PORT - " + currSetting.getName() + " - " + childName + "\n"
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
 
                 # print(freecadObjects)
                 for obj in freecadObjects:
@@ -771,7 +829,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getProbeDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -797,13 +855,12 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
             print(f"#PROBE - {currSetting.getName()} - {currSetting.getType()}")
 
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
 
                 genScript += "%% PROBE - " + currSetting.getName() + " - " + childName + "\n"
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
 
                 for obj in freecadObjects:
                     # BOUNDING BOX
@@ -935,7 +992,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getLumpedPartDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -950,12 +1007,11 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
             genScript += "% LUMPED PARTS " + currentSetting.getName() + "\n"
 
             # traverse through all children item for this particular lumped part settings
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
                 print(f"#LUMPED PART {currentSetting.getType()} - {currentSetting.getName()}")
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
                 for obj in freecadObjects:
                     # obj = FreeCAD Object class
 
@@ -1011,7 +1067,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getNF2FFDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -1021,11 +1077,10 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         for [item, currSetting] in items:
 
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
 
                 # print(freecadObjects)
                 for obj in freecadObjects:
@@ -1061,9 +1116,14 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         return genScript
 
-    def getOrderedGridDefinitionsScriptLines(self, items):
-        genScript = ""
+    def getOrderedGridDefinitionsScriptLines(self, items, outputDir=None):
+        genScript = ScriptEmitter()
         meshPrioritiesCount = self.form.meshPriorityTreeView.topLevelItemCount()
+        self.resolvedMeshLines = None
+
+        # mesh lines are also evaluated here, values are rounded same way as they are written into script
+        meshEngine = MeshEngine(MeshEngine.octaveRange)
+        _g = lambda x: float("{0:g}".format(_r(x)))
 
         if (not items) or (meshPrioritiesCount == 0):
             return genScript
@@ -1082,7 +1142,6 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         _assoc = lambda idx: list(map(str.strip, self.form.meshPriorityTreeView.topLevelItem(idx).text(0).split(',')))
         orderedAssociations = [_assoc(k) for k in reversed(range(meshPrioritiesCount))]
         gridSettingsNodeNames = [gridSettingsNode.text(0) for [gridSettingsNode, gridSettingsInst] in items]
-        fcObjects = {obj.Label: obj for obj in self.cadHelpers.getObjects()}
 
         for gridSettingsNodeName in gridSettingsNodeNames:
             print("Grid type : " + gridSettingsNodeName)
@@ -1106,7 +1165,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
             #   Fixed Distance, Fixed Count mesh boundaries coords obtain
             #
             if (gridSettingsInst.getType() in ['Fixed Distance', 'Fixed Count', 'User Defined']):
-                fcObject = fcObjects.get(FreeCADObjectName, None)
+                fcObject = self.getCadObjectByLabel(FreeCADObjectName)
                 if (not fcObject):
                     print("Failed to resolve '{}'.".format(FreeCADObjectName))
                     continue
@@ -1157,7 +1216,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                 for k in range(gridCategoryObj.childCount()):
                     FreeCADObjectName = gridCategoryObj.child(k).text(0)
 
-                    fcObject = fcObjects.get(FreeCADObjectName, None)
+                    fcObject = self.getCadObjectByLabel(FreeCADObjectName)
                     if (not fcObject):
                         print("Smooth Mesh - Failed to resolve '{}'.".format(FreeCADObjectName))
                         continue
@@ -1237,41 +1296,56 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                 if gridSettingsInst.xenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x(mesh.x >= {0:g} & mesh.x <= {1:g}) = [];\n".format(_r(xmin), _r(xmax))
+                        meshEngine.removeLines('x', _g(xmin), _g(xmax))
                     genScript += "mesh.x = [ mesh.x ({0:g}:{1:g}:{2:g}) ];\n".format(_r(xmin), _r(gridSettingsInst.getXYZ(refUnit)['x']), _r(xmax))
+                    meshEngine.addRange('x', _g(xmin), _g(xmax), _g(gridSettingsInst.getXYZ(refUnit)['x']))
                 if gridSettingsInst.yenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y(mesh.y >= {0:g} & mesh.y <= {1:g}) = [];\n".format(_r(ymin), _r(ymax))
+                        meshEngine.removeLines('y', _g(ymin), _g(ymax))
                     genScript += "mesh.y = [ mesh.y ({0:g}:{1:g}:{2:g}) ];\n".format(_r(ymin), _r(yParam), _r(ymax))
+                    meshEngine.addRange('y', _g(ymin), _g(ymax), _g(yParam))
                 if gridSettingsInst.zenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z(mesh.z >= {0:g} & mesh.z <= {1:g}) = [];\n".format(_r(zmin), _r(zmax))
+                        meshEngine.removeLines('z', _g(zmin), _g(zmax))
                     genScript += "mesh.z = [ mesh.z ({0:g}:{1:g}:{2:g}) ];\n".format(_r(zmin), _r(gridSettingsInst.getXYZ(refUnit)['z']), _r(zmax))
+                    meshEngine.addRange('z', _g(zmin), _g(zmax), _g(gridSettingsInst.getXYZ(refUnit)['z']))
                 genScript += "CSX = DefineRectGrid(CSX, unit, mesh);\n"
 
             elif (gridSettingsInst.getType() == 'Fixed Count'):
                 if gridSettingsInst.xenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x(mesh.x >= {0:g} & mesh.x <= {1:g}) = [];\n".format(_r(xmin), _r(xmax))
+                        meshEngine.removeLines('x', _g(xmin), _g(xmax))
                     if (not gridSettingsInst.getXYZ()['x'] == 1):
                         genScript += "mesh.x = [ mesh.x linspace({0:g},{1:g},{2:g}) ];\n".format(_r(xmin), _r(xmax), _r(gridSettingsInst.getXYZ(refUnit)['x']))
+                        meshEngine.addLinspace('x', _g(xmin), _g(xmax), _g(gridSettingsInst.getXYZ(refUnit)['x']))
                     else:
                         genScript += "mesh.x = [ mesh.x {0:g} ];\n".format(_r((xmin + xmax) / 2))
+                        meshEngine.addLines('x', _g((xmin + xmax) / 2))
 
                 if gridSettingsInst.yenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y(mesh.y >= {0:g} & mesh.y <= {1:g}) = [];\n".format(_r(ymin), _r(ymax))
+                        meshEngine.removeLines('y', _g(ymin), _g(ymax))
                     if (not gridSettingsInst.getXYZ()['y'] == 1):
                         genScript += "mesh.y = [ mesh.y linspace({0:g},{1:g},{2:g}) ];\n".format(_r(ymin), _r(ymax), _r(yParam))
+                        meshEngine.addLinspace('y', _g(ymin), _g(ymax), _g(yParam))
                     else:
                         genScript += "mesh.y = [ mesh.y {0:g} ];\n".format(_r((ymin + ymax) / 2))
+                        meshEngine.addLines('y', _g((ymin + ymax) / 2))
 
                 if gridSettingsInst.zenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z(mesh.z >= {0:g} & mesh.z <= {1:g}) = [];\n".format(_r(zmin), _r(zmax))
+                        meshEngine.removeLines('z', _g(zmin), _g(zmax))
                     if (not gridSettingsInst.getXYZ()['z'] == 1):
                         genScript += "mesh.z = [ mesh.z linspace({0:g},{1:g},{2:g}) ];\n".format(_r(zmin), _r(zmax), _r(gridSettingsInst.getXYZ(refUnit)['z']))
+                        meshEngine.addLinspace('z', _g(zmin), _g(zmax), _g(gridSettingsInst.getXYZ(refUnit)['z']))
                     else:
                         genScript += "mesh.z = [ mesh.z {0:g} ];\n".format(_r((zmin + zmax) / 2))
+                        meshEngine.addLines('z', _g((zmin + zmax) / 2))
 
                 genScript += "CSX = DefineRectGrid(CSX, unit, mesh);\n"
 
@@ -1279,12 +1353,15 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                 if gridSettingsInst.xenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x(mesh.x >= {0:g} & mesh.x <= {1:g}) = [];\n".format(_r(xmin), _r(xmax))
+                        meshEngine.removeLines('x', _g(xmin), _g(xmax))
                 if gridSettingsInst.yenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y(mesh.y >= {0:g} & mesh.y <= {1:g}) = [];\n".format(_r(ymin), _r(ymax))
+                        meshEngine.removeLines('y', _g(ymin), _g(ymax))
                 if gridSettingsInst.zenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z(mesh.z >= {0:g} & mesh.z <= {1:g}) = [];\n".format(_r(zmin), _r(zmax))
+                        meshEngine.removeLines('z', _g(zmin), _g(zmax))
 
                 genScript += "xmin = {0:g};\n".format(_r(xmin))
                 genScript += "xmax = {0:g};\n".format(_r(xmax))
@@ -1293,6 +1370,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                 genScript += "zmin = {0:g};\n".format(_r(zmin))
                 genScript += "zmax = {0:g};\n".format(_r(zmax))
                 genScript += gridSettingsInst.getXYZ() + "\n"
+                meshEngine.setUnresolved(f"User Defined grid '{gridSettingsInst.getName()}'")
                 genScript += "CSX = DefineRectGrid(CSX, unit, mesh);\n"
 
             elif (gridSettingsInst.getType() == 'Smooth Mesh'):
@@ -1302,42 +1380,105 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
                     #when top priority lines setting set, remove lines between min and max in ax direction
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x(mesh.x >= {0:g} & mesh.x <= {1:g}) = [];\n".format(_r(xList[0]), _r(xList[-1]))
+                        meshEngine.removeLines('x', _g(xList[0]), _g(xList[-1]))
 
-                    genScript += f"smoothMesh.x = {str(xList)};\n"
-                    if gridSettingsInst.smoothMesh['xMaxRes'] == 0:
-                        genScript += "smoothMesh.x = AutoSmoothMeshLines(smoothMesh.x, max_res/unit); %max_res calculated in excitation part\n"
+                    smoothMeshMaxRes = self.getSmoothMeshMaxRes(gridSettingsInst.smoothMesh['xMaxRes'])
+                    if smoothMeshMaxRes > 0:
+                        smoothMeshLines = MeshEngine.smoothMeshLines(xList, smoothMeshMaxRes, 1.4)
+                        genScript += f"mesh.x = [mesh.x [{MeshEngine.formatLines(smoothMeshLines, ' ')}]]; % smooth mesh lines computed by exporter, max resolution {smoothMeshMaxRes:g}\n"
+                        meshEngine.addLines('x', smoothMeshLines)
                     else:
-                        genScript += f"smoothMesh.x = AutoSmoothMeshLines(smoothMesh.x, {gridSettingsInst.smoothMesh['xMaxRes']});\n"
-                    genScript += "mesh.x = [mesh.x smoothMesh.x];\n"
+                        genScript += f"smoothMesh.x = {str(xList)};\n"
+                        if gridSettingsInst.smoothMesh['xMaxRes'] == 0:
+                            genScript += "smoothMesh.x = AutoSmoothMeshLines(smoothMesh.x, max_res/unit); %max_res calculated in excitation part\n"
+                        else:
+                            genScript += f"smoothMesh.x = AutoSmoothMeshLines(smoothMesh.x, {gridSettingsInst.smoothMesh['xMaxRes']});\n"
+                        genScript += "mesh.x = [mesh.x smoothMesh.x];\n"
+                        meshEngine.setUnresolved(f"Smooth Mesh grid '{gridSettingsInst.getName()}'")
                 if gridSettingsInst.yenabled:
 
                     #when top priority lines setting set, remove lines between min and max in ax direction
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y(mesh.y >= {0:g} & mesh.y <= {1:g}) = [];\n".format(_r(yList[0]), _r(yList[-1]))
+                        meshEngine.removeLines('y', _g(yList[0]), _g(yList[-1]))
 
-                    genScript += f"smoothMesh.y = {str(yList)};\n"
-                    if gridSettingsInst.smoothMesh['yMaxRes'] == 0:
-                        genScript += "smoothMesh.y = AutoSmoothMeshLines(smoothMesh.y, max_res/unit); %max_res calculated in excitation part\n"
+                    smoothMeshMaxRes = self.getSmoothMeshMaxRes(yParam)
+                    if smoothMeshMaxRes > 0:
+                        smoothMeshLines = MeshEngine.smoothMeshLines(yList, smoothMeshMaxRes, 1.4)
+                        genScript += f"mesh.y = [mesh.y [{MeshEngine.formatLines(smoothMeshLines, ' ')}]]; % smooth mesh lines computed by exporter, max resolution {smoothMeshMaxRes:g}\n"
+                        meshEngine.addLines('y', smoothMeshLines)
                     else:
-                        genScript += f"smoothMesh.y = AutoSmoothMeshLines(smoothMesh.y, {yParam});\n"
-                    genScript += "mesh.y = [mesh.y smoothMesh.y];\n"
+                        genScript += f"smoothMesh.y = {str(yList)};\n"
+                        if yParam == 0:
+                            genScript += "smoothMesh.y = AutoSmoothMeshLines(smoothMesh.y, max_res/unit); %max_res calculated in excitation part\n"
+                        else:
+                            genScript += f"smoothMesh.y = AutoSmoothMeshLines(smoothMesh.y, {yParam});\n"
+                        genScript += "mesh.y = [mesh.y smoothMesh.y];\n"
+                        meshEngine.setUnresolved(f"Smooth Mesh grid '{gridSettingsInst.getName()}'")
                 if gridSettingsInst.zenabled:
 
                     #when top priority lines setting set, remove lines between min and max in ax direction
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z(mesh.z >= {0:g} & mesh.z <= {1:g}) = [];\n".format(_r(zList[0]), _r(zList[-1]))
+                        meshEngine.removeLines('z', _g(zList[0]), _g(zList[-1]))
 
-                    genScript += f"smoothMesh.z = {str(zList)};\n"
-                    if gridSettingsInst.smoothMesh['zMaxRes'] == 0:
-                        genScript += "smoothMesh.z = AutoSmoothMeshLines(smoothMesh.z, max_res/unit); %max_res calculated in excitation part\n"
+                    smoothMeshMaxRes = self.getSmoothMeshMaxRes(gridSettingsInst.smoothMesh['zMaxRes'])
+                    if smoothMeshMaxRes > 0:
+                        smoothMeshLines = MeshEngine.smoothMeshLines(zList, smoothMeshMaxRes, 1.4)
+                        genScript += f"mesh.z = [mesh.z [{MeshEngine.formatLines(smoothMeshLines, ' ')}]]; % smooth mesh lines computed by exporter, max resolution {smoothMeshMaxRes:g}\n"
+                        meshEngine.addLines('z', smoothMeshLines)
                     else:
-                        genScript += f"smoothMesh.z = AutoSmoothMeshLines(smoothMesh.z, {gridSettingsInst.smoothMesh['zMaxRes']});\n"
-                    genScript += "mesh.z = [mesh.z smoothMesh.z];\n"
+                        genScript += f"smoothMesh.z = {str(zList)};\n"
+                        if gridSettingsInst.smoothMesh['zMaxRes'] == 0:
+                            genScript += "smoothMesh.z = AutoSmoothMeshLines(smoothMesh.z, max_res/unit); %max_res calculated in excitation part\n"
+                        else:
+                            genScript += f"smoothMesh.z = AutoSmoothMeshLines(smoothMesh.z, {gridSettingsInst.smoothMesh['zMaxRes']});\n"
+                        genScript += "mesh.z = [mesh.z smoothMesh.z];\n"
+                        meshEngine.setUnresolved(f"Smooth Mesh grid '{gridSettingsInst.getName()}'")
 
                 genScript += "CSX = DefineRectGrid(CSX, unit, mesh);\n"
 
             genScript += "\n"
 
+        if meshEngine.isResolved():
+            self.resolvedMeshLines = {axis: meshEngine.getLines(axis) for axis in MeshEngine.AXES}
+            return self.getResolvedMeshScriptLines(genScript.getvalue(), meshEngine, outputDir)
+        print(f"Mesh lines are generated as script code, they cannot be resolved in exporter due: {', '.join(meshEngine.unresolvedReasons)}")
+
+        return genScript
+
+    def getResolvedMeshScriptLines(self, gridScriptLines, meshEngine, outputDir=None):
+        """
+        Script lines with final mesh lines, comments describing grids are kept from script code generated for grids.
+        :param gridScriptLines: grid section generated as script code
+        :param meshEngine: resolved MeshEngine
+        :param outputDir: output directory used for sidecar file
+        :return: script lines
+        """
+        genScript = ScriptEmitter()
+        for line in gridScriptLines.splitlines():
+            if line.startswith("%"):
+                genScript += line + "\n"
+
+        genScript += "% mesh lines resolved by exporter, sorted and without duplicates\n"
+        if self.isMeshSidecarEnabled():
+            #   one row for each line [axis index, coordinate], axis index is 0 for x, 1 for y, 2 for z
+            meshSidecarFileName, meshSidecarFilePath = self.getMeshSidecarFileName(outputDir, ".csv")
+            os.makedirs(os.path.dirname(meshSidecarFilePath), exist_ok=True)
+            meshTable = np.concatenate([np.column_stack((np.full(len(meshEngine.getLines(axis)), k), meshEngine.getLines(axis))) for k, axis in enumerate(MeshEngine.AXES)])
+            np.savetxt(meshSidecarFilePath, meshTable, fmt="%.17g", delimiter=",")
+            self.sectionArtifacts.append(meshSidecarFilePath)
+            print(f"Mesh lines written into: {meshSidecarFilePath}")
+
+            genScript += f"meshLines = dlmread([currDir '/{meshSidecarFileName}'], ',');\n"
+            for k, axis in enumerate(MeshEngine.AXES):
+                genScript += f"mesh.{axis} = meshLines(meshLines(:,1) == {k}, 2)';\n"
+        else:
+            for axis in MeshEngine.AXES:
+                genScript += f"mesh.{axis} = [{MeshEngine.formatLines(meshEngine.getLines(axis), ' ')}];\n"
+        genScript += "CSX = DefineRectGrid(CSX, unit, mesh);\n"
+        genScript += "\n"
+
         return genScript
 
     def getMinimalGridlineSpacingScriptLines(self):
@@ -1347,39 +1488,31 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
             minSpacingX = self.form.genParamMinGridSpacingX.value() / 1000 / self.getUnitLengthFromUI_m()
             minSpacingY = self.form.genParamMinGridSpacingY.value() / 1000 / self.getUnitLengthFromUI_m()
             minSpacingZ = self.form.genParamMinGridSpacingZ.value() / 1000 / self.getUnitLengthFromUI_m()
+            printSummary = self.form.genParamMinGridSpacingSummary.isChecked()
 
             genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
             genScript += "% MINIMAL GRIDLINES SPACING, removing gridlines which are closer as defined in GUI\n"
             genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-            genScript += 'mesh.x = sort(mesh.x);\n'
-            genScript += 'mesh.y = sort(mesh.y);\n'
-            genScript += 'mesh.z = sort(mesh.z);\n'
-            genScript += '\n'
-            genScript += 'for k = 1:length(mesh.x)-1\n'
-            genScript += '  if (mesh.x(k) ~= inf && abs(mesh.x(k+1)-mesh.x(k)) <= ' + str(minSpacingX) + ')\n'
-            genScript += '    display(["Removnig line at x: " num2str(mesh.x(k+1))]);\n'
-            genScript += '    mesh.x(k+1) = inf;\n'
-            genScript += '   end\n'
-            genScript += 'end\n'
-            genScript += '\n'
-            genScript += 'for k = 1:length(mesh.y)-1\n'
-            genScript += '  if (mesh.y(k) ~= inf && abs(mesh.y(k+1)-mesh.y(k)) <= ' + str(minSpacingY) + ')\n'
-            genScript += '    display(["Removnig line at y: " num2str(mesh.y(k+1))]);\n'
-            genScript += '    mesh.y(k+1) = inf;\n'
-            genScript += '   end\n'
-            genScript += 'end\n'
-            genScript += '\n'
-            genScript += 'for k = 1:length(mesh.z)-1\n'
-            genScript += '  if (mesh.z(k) ~= inf && abs(mesh.z(k+1)-mesh.z(k)) <= ' + str(minSpacingZ) + ')\n'
-            genScript += '    display(["Removnig line at z: " num2str(mesh.z(k+1))]);\n'
-            genScript += '    mesh.z(k+1) = inf;\n'
-            genScript += '   end\n'
-            genScript += 'end\n'
-            genScript += '\n'
-            genScript += 'mesh.x(isinf(mesh.x)) = [];\n'
-            genScript += 'mesh.y(isinf(mesh.y)) = [];\n'
-            genScript += 'mesh.z(isinf(mesh.z)) = [];\n'
-            genScript += '\n'
+            #
+            #   vectorized filter, in each run of lines closer than min spacing every second line is removed starting
+            #   from the second one, result is same as sequential comparison of each line with previous kept line
+            #
+            genScript += '% lines in each run closer than min spacing are removed alternately, first line of run is kept\n'
+            for axis, minSpacing in [['x', minSpacingX], ['y', minSpacingY], ['z', minSpacingZ]]:
+                genScript += f'mesh.{axis} = sort(mesh.{axis}(:)\');\n'
+                genScript += f'closeLines = diff(mesh.{axis}) <= {minSpacing};\n'
+                genScript += 'lineIndex = 1:numel(closeLines);\n'
+                genScript += 'runStart = cummax(lineIndex .* (diff([false closeLines]) == 1));\n'
+                genScript += 'removeLines = [false, closeLines & mod(lineIndex - runStart, 2) == 0];\n'
+                if printSummary:
+                    genScript += f'display(["Removed " num2str(sum(removeLines)) " gridlines in {axis} closer than {minSpacing}"]);\n'
+                else:
+                    genScript += f'removedLines = mesh.{axis}(removeLines);\n'
+                    genScript += 'for k = 1:numel(removedLines)\n'
+                    genScript += f'  display(["Removing line at {axis}: " num2str(removedLines(k))]);\n'
+                    genScript += 'end\n'
+                genScript += f'mesh.{axis}(removeLines) = [];\n'
+                genScript += '\n'
             genScript += 'CSX = DefineRectGrid(CSX, unit, mesh);\n'
             genScript += '\n'
 
@@ -1406,6 +1539,13 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         genScript += "end\n"
         genScript += "\n"
 
+        genScript += "%% plotting, headless mode saves figures into files instead of showing them\n"
+        genScript += "headless_plotting = " + ("true" if self.form.postprocessingHeadlessCheckbox.isChecked() else "false") + " || strcmp(getenv('OPENEMS_HEADLESS'), '1');\n"
+        genScript += "if headless_plotting\n"
+        genScript += "  set(0, 'defaultfigurevisible', 'off');\n"
+        genScript += "end\n"
+        genScript += "\n"
+
         genScript += "%% constants\n"
         genScript += "physical_constants;\n"
         genScript += "unit    = " + str(
@@ -1416,73 +1556,115 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         return genScript
 
-    def getExcitationScriptLines(self, definitionsOnly=False):
+    def getExcitationScriptLines(self, items, definitionsOnly=False):
+        """
+        :param items: excitation settings items as returned by getItemsByClassName(), parameter sweep overrides are already applied
+        :param definitionsOnly: generate just variables, without setting excitation of FDTD
+        """
         genScript = ""
 
-        excitationCategory = self.form.objectAssignmentRightTreeWidget.findItems("Excitation",
-                                                                                 QtCore.Qt.MatchFixedString)
-        if len(excitationCategory) >= 0:
-
-            # FOR WHOLE SIMULATION THERE IS JUST ONE EXCITATION DEFINED, so first is taken!
-            if (excitationCategory[0].childCount() > 0):
-                item = excitationCategory[0].child(0)
-                currSetting = item.data(0, QtCore.Qt.UserRole)  # At index 0 is Default Excitation.
-                # Currently only 1 excitation is allowed. Multiple excitations could be managed by setting one of them as "selected" or "active", while all others are deactivated.
-                # This would help the user to manage different analysis scenarios / excitation ranges.
-
-                print(f"#EXCITATION - {currSetting.getName()} - {currSetting.getType()}")
-
-                genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-                genScript += "% EXCITATION " + currSetting.getName() + "\n"
-                genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-
-                # EXCITATION FREQUENCY AND CELL MAXIMUM RESOLUTION CALCULATION (1/20th of minimal lambda - calculated based on maximum simulation frequency)
-                # maximum grid resolution is generated into script but NOT USED IN OCTAVE SCRIPT, instead is also calculated here into python variable and used in bounding box correction
-                if (currSetting.getType() == 'sinusodial'):
-                    genScript += "f0 = " + str(currSetting.sinusodial['f0']) + "*" + str(currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
-                    genScript += "fc = 0;\n"
-                    if not definitionsOnly:
-                        genScript += "FDTD = SetSinusExcite( FDTD, f0 );\n"
-                    genScript += "max_res = c0 / f0 / 20;\n"
-                    self.maxGridResolution_m = 3e8 / (currSetting.sinusodial['f0'] * currSetting.getUnitsAsNumber(currSetting.units) * 20)
-                    pass
-                elif (currSetting.getType() == 'gaussian'):
-                    genScript += "f0 = " + str(currSetting.gaussian['f0']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
-                    genScript += "fc = " + str(currSetting.gaussian['fc']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
-                    if not definitionsOnly:
-                        genScript += "FDTD = SetGaussExcite( FDTD, f0, fc );\n"
-                    genScript += "max_res = c0 / (f0 + fc) / 20;\n"
-                    self.maxGridResolution_m = 3e8 / ((currSetting.gaussian['f0'] + currSetting.gaussian[
-                        'fc']) * currSetting.getUnitsAsNumber(currSetting.units) * 20)
-                    pass
-                elif (currSetting.getType() == 'custom'):
-                    f0 = currSetting.custom['f0'] * currSetting.getUnitsAsNumber(currSetting.units)
-                    genScript += "f0 = " + str(currSetting.custom['f0']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
-                    genScript += "fc = 0.0;\n"
-                    if not definitionsOnly:
-                        genScript += "FDTD = SetCustomExcite( FDTD, f0, '" + currSetting.custom['functionStr'].replace(
-                            'f0', str(f0)) + "' );\n"
-                    genScript += "max_res = 0;\n"
-                    self.maxGridResolution_m = 0
-                    pass
-                elif (currSetting.getType() == 'dirac'):
-                    if not definitionsOnly:
-                        genScript += "FDTD = SetDiracExcite(FDTD);\n"
-                    pass
-                elif (currSetting.getType() == 'step'):
-                    if not definitionsOnly:
-                        genScript += "FDTD = SetStepExcite(FDTD);\n"
-                    pass
-                pass
 
-                genScript += "\n"
-            else:
-                self.guiHelpers.displayMessage("Missing excitation, please define one.")
+        # FOR WHOLE SIMULATION THERE IS JUST ONE EXCITATION DEFINED, so first is taken!
+        if items:
+            [item, currSetting] = items[0]  # At index 0 is Default Excitation.
+            # Currently only 1 excitation is allowed. Multiple excitations could be managed by setting one of them as "selected" or "active", while all others are deactivated.
+            # This would help the user to manage different analysis scenarios / excitation ranges.
+
+            print(f"#EXCITATION - {currSetting.getName()} - {currSetting.getType()}")
+
+            genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+            genScript += "% EXCITATION " + currSetting.getName() + "\n"
+            genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+
+            # EXCITATION FREQUENCY AND CELL MAXIMUM RESOLUTION CALCULATION (1/20th of minimal lambda - calculated based on maximum simulation frequency)
+            # maximum grid resolution is generated into script but NOT USED IN OCTAVE SCRIPT, instead is also calculated here into python variable and used in bounding box correction
+            if (currSetting.getType() == 'sinusodial'):
+                genScript += "f0 = " + str(currSetting.sinusodial['f0']) + "*" + str(currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
+                genScript += "fc = 0;\n"
+                if not definitionsOnly:
+                    genScript += "FDTD = SetSinusExcite( FDTD, f0 );\n"
+                genScript += "max_res = c0 / f0 / 20;\n"
+                self.maxGridResolution_m = 3e8 / (currSetting.sinusodial['f0'] * currSetting.getUnitsAsNumber(currSetting.units) * 20)
+                pass
+            elif (currSetting.getType() == 'gaussian'):
+                genScript += "f0 = " + str(currSetting.gaussian['f0']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
+                genScript += "fc = " + str(currSetting.gaussian['fc']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
+                if not definitionsOnly:
+                    genScript += "FDTD = SetGaussExcite( FDTD, f0, fc );\n"
+                genScript += "max_res = c0 / (f0 + fc) / 20;\n"
+                self.maxGridResolution_m = 3e8 / ((currSetting.gaussian['f0'] + currSetting.gaussian[
+                    'fc']) * currSetting.getUnitsAsNumber(currSetting.units) * 20)
+                pass
+            elif (currSetting.getType() == 'custom'):
+                f0 = currSetting.custom['f0'] * currSetting.getUnitsAsNumber(currSetting.units)
+                genScript += "f0 = " + str(currSetting.custom['f0']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + ";\n"
+                genScript += "fc = 0.0;\n"
+                if not definitionsOnly:
+                    genScript += "FDTD = SetCustomExcite( FDTD, f0, '" + currSetting.custom['functionStr'].replace(
+                        'f0', str(f0)) + "' );\n"
+                genScript += "max_res = 0;\n"
+                self.maxGridResolution_m = 0
+                pass
+            elif (currSetting.getType() == 'dirac'):
+                if not definitionsOnly:
+                    genScript += "FDTD = SetDiracExcite(FDTD);\n"
+                pass
+            elif (currSetting.getType() == 'step'):
+                if not definitionsOnly:
+                    genScript += "FDTD = SetStepExcite(FDTD);\n"
                 pass
             pass
+
+            genScript += "\n"
+        else:
+            self.guiHelpers.displayMessage("Missing excitation, please define one.")
+            pass
+        return genScript
+
+    #
+    #   Post-processing model
+    #       simulation script saves port and NF2FF box structures into simulation output directory,
+    #       post-processing scripts load them instead of defining geometry and mesh again
+    #
+    def getPostprocessingModelSaveScriptLines(self):
+        genScript = ""
+        genScript += "% save ports and NF2FF boxes for post-processing scripts\n"
+        genScript += "if ~exist('port', 'var')\n"
+        genScript += "    port = {};\n"
+        genScript += "end\n"
+        genScript += "if ~exist('nf2ffBox', 'var')\n"
+        genScript += "    nf2ffBox = {};\n"
+        genScript += "end\n"
+        genScript += "if ~exist('fc', 'var')\n"
+        genScript += "    fc = 0;\n"
+        genScript += "end\n"
+        genScript += "save('-mat7-binary', [Sim_Path '/postprocessing_model.mat'], 'f0', 'fc', 'port', 'nf2ffBox');\n"
+
+        return genScript
+
+    def getPostprocessingStructureScriptLines(self, structureScriptLines):
+        """
+        :param structureScriptLines: script lines defining FDTD, geometry, mesh, ports and NF2FF boxes, they must be generated always as they fill port and NF2FF indexes
+        :return: structure definition, or if enabled in GUI loading of ports and NF2FF boxes saved by simulation script with structure definition used just when they were not saved
+        """
+        if not self.form.postprocessingLoadSavedModelCheckbox.isChecked():
+            return structureScriptLines
+
+        genScript = ""
+        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += "% PORTS AND NF2FF BOXES SAVED BY SIMULATION\n"
+        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += "if exist([Sim_Path '/postprocessing_model.mat'], 'file')\n"
+        genScript += "    disp('Ports and NF2FF boxes loaded from simulation output, structure is not defined.');\n"
+        genScript += "    load([Sim_Path '/postprocessing_model.mat']);\n"
+        genScript += "else\n"
+        genScript += "".join(["    " + line + "\n" for line in structureScriptLines.splitlines()])
+        genScript += "end\n"
+        genScript += "\n"
+
         return genScript
 
     #########################################################################################################################
@@ -1498,6 +1680,7 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
     #	GENERATE SCRIPT CLICKED - go through object assignment tree categories, output child item data.
     #
     def generateOpenEMSScript(self, outputDir=None):
+        self.beginExportSession()
 
         # Create outputDir relative to local FreeCAD file if output dir does not exists
         #   if outputDir is set to same value
@@ -1527,181 +1710,417 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         itemsByClassName = self.getItemsByClassName()
 
-        # Write script header.
+        # Write script header, sections are streamed into file as they are generated.
 
-        genScript = ""
+        with ScriptEmitter(fileName) as genScript:
 
-        genScript += "% OpenEMS FDTD Analysis Automation Script\n"
-        genScript += "%\n"
+            genScript += "% OpenEMS FDTD Analysis Automation Script\n"
+            genScript += "%\n"
 
-        genScript += self.getInitScriptLines()
+            genScript += self.getInitScriptLines()
 
-        genScript += "%% switches & options\n"
-        genScript += "postprocessing_only = " + ('1' if self.form.generateJustPreviewCheckbox.isChecked() else '0')+ ";\n"
-        genScript += "draw_3d_pattern = 0; % this may take a while...\n"
-        genScript += "use_pml = 0;         % use pml boundaries instead of mur\n"
-        genScript += "\n"
-        genScript += "currDir = strrep(pwd(), '\\', '\\\\');\n"
-        genScript += "display(currDir);\n"
-        genScript += "\n"
+            genScript += "%% switches & options\n"
+            genScript += "postprocessing_only = " + ('1' if self.form.generateJustPreviewCheckbox.isChecked() else '0')+ ";\n"
+            previewMode, runSimulation = self.getSimulationRunMode()
+            genScript += "% preview_mode   : geometry preview in AppCSXCAD, '' none, 'blocking' waits until its window is closed, 'background' does not wait\n"
+            genScript += "% run_simulation : 0 when only geometry preview is shown\n"
+            genScript += "preview_mode = '" + ("" if previewMode is None else previewMode) + "';\n"
+            genScript += "run_simulation = " + ('1' if runSimulation else '0') + ";\n"
+            genScript += "draw_3d_pattern = 0; % this may take a while...\n"
+            genScript += "use_pml = 0;         % use pml boundaries instead of mur\n"
+            genScript += "\n"
+            genScript += "currDir = strrep(pwd(), '\\', '\\\\');\n"
+            genScript += "display(currDir);\n"
+            genScript += "\n"
 
-        genScript += "% --no-simulation : dry run to view geometry, validate settings, no FDTD computations\n"
-        genScript += "% --debug-PEC     : generated PEC skeleton (use ParaView to inspect)\n"
-        openEMS_opt = []
-        if self.form.generateDebugPECCheckbox.isChecked():
-            openEMS_opt.append('--debug-PEC')
-        if self.form.generateJustPreviewCheckbox.isChecked():
-            openEMS_opt.append('--no-simulation')
-        genScript += "openEMS_opts = '" + " ".join(openEMS_opt) + "';\n"
-        genScript += "\n"
+            genScript += "% --no-simulation : dry run to view geometry, validate settings, no FDTD computations\n"
+            genScript += "% --debug-PEC     : generated PEC skeleton (use ParaView to inspect)\n"
+            genScript += "% --engine        : FDTD engine (basic, sse, sse-compressed, multithreaded)\n"
+            genScript += "% --numThreads    : number of threads used by multithreaded engine\n"
+            openEMS_opt = []
+            if self.form.generateDebugPECCheckbox.isChecked():
+                openEMS_opt.append('--debug-PEC')
+            if self.form.generateJustPreviewCheckbox.isChecked():
+                openEMS_opt.append('--no-simulation')
+            openEMS_opt += self.getOpenEMSEngineCommandLineOptions()
+            genScript += "openEMS_opts = '" + " ".join(openEMS_opt) + "';\n"
+            genScript += "% threads budget set by job scheduler overrides exported number of threads\n"
+            genScript += "if ~isempty(getenv('OPENEMS_NUM_THREADS'))\n"
+            genScript += "    openEMS_opts = [regexprep(openEMS_opts, '--numThreads=\\d+', '') ' --numThreads=' getenv('OPENEMS_NUM_THREADS')];\n"
+            genScript += "end\n"
+            genScript += "\n"
 
-        # Write simulation settings.
+            # Write simulation settings.
 
-        genScript += "%% prepare simulation folder\n"
-        genScript += "Sim_Path = 'simulation_output';\n"
+            genScript += "%% prepare simulation folder\n"
+            genScript += "Sim_Path = 'simulation_output';\n"
 
-        #genScript += "Sim_CSX = '" + os.path.splitext(os.path.basename(self.cadHelpers.getCurrDocumentFileName()))[0] + ".xml';\n"
-        genScript += "Sim_CSX = '" + nameBase + ".xml';\n"
+            #genScript += "Sim_CSX = '" + os.path.splitext(os.path.basename(self.cadHelpers.getCurrDocumentFileName()))[0] + ".xml';\n"
+            genScript += "Sim_CSX = '" + nameBase + ".xml';\n"
 
-        genScript += "[status, message, messageid] = rmdir( Sim_Path, 's' ); % clear previous directory\n"
-        genScript += "[status, message, messageid] = mkdir( Sim_Path ); % create empty simulation folder\n"
-        genScript += "\n"
+            genScript += "[status, message, messageid] = rmdir( Sim_Path, 's' ); % clear previous directory\n"
+            genScript += "[status, message, messageid] = mkdir( Sim_Path ); % create empty simulation folder\n"
+            genScript += "\n"
 
-        genScript += "%% setup FDTD parameter & excitation function\n"
-        genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + ";\n"
-        genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + "; % 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
+            genScript += "%% setup FDTD parameter & excitation function\n"
+            genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + ";\n"
+            genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + "; % 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
 
-        if (self.getModelCoordsType() == "cylindrical"):
-            genScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement, 'CoordSystem', 1);\n"
-        else:
-            genScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement);\n"
+            if (self.getModelCoordsType() == "cylindrical"):
+                genScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement, 'CoordSystem', 1);\n"
+            else:
+                genScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement);\n"
 
-        genScript += "\n"
+            genScript += "\n"
 
-        print("======================== REPORT BEGIN ========================\n")
+            print("======================== REPORT BEGIN ========================\n")
 
-        self.reportFreeCADItemSettings(itemsByClassName.get("FreeCADSettingsItem", None))
+            self.reportFreeCADItemSettings(itemsByClassName.get("FreeCADSettingsItem", None))
 
-        # Write boundary conditions definitions.
-        genScript += self.getBoundaryConditionsScriptLines()
+            # Write boundary conditions definitions.
+            genScript += self.getCachedSectionScriptLines("boundaryConditions", lambda: self.getBoundaryConditionsScriptLines(), itemsByClassName)
 
-        # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
+            # Write coordinate system definitions.
+            genScript += self.getCoordinateSystemScriptLines()
 
-        # Write excitation definition.
-        genScript += self.getExcitationScriptLines()
+            # Write excitation definition.
+            genScript += self.getCachedSectionScriptLines("excitation", lambda: self.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None)), itemsByClassName)
 
-        # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir)
+            # Write material definitions.
+            genScript += self.getCachedSectionScriptLines("materials", lambda: self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir), itemsByClassName, outputDir)
 
-        # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
+            # Write grid definitions.
+            genScript += self.getCachedSectionScriptLines("grid", lambda: self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None), outputDir), itemsByClassName, outputDir)
 
-        # Write port definitions, due microstrip ports it must be defined after grid.
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
+            # Write port definitions, due microstrip ports it must be defined after grid.
+            genScript += self.getCachedSectionScriptLines("ports", lambda: self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None)), itemsByClassName)
 
-        # Write lumped part definitions.
-        genScript += self.getLumpedPartDefinitionsScriptLines(itemsByClassName.get("LumpedPartSettingsItem", None))
+            # Write lumped part definitions.
+            genScript += self.getCachedSectionScriptLines("lumpedParts", lambda: self.getLumpedPartDefinitionsScriptLines(itemsByClassName.get("LumpedPartSettingsItem", None)), itemsByClassName)
 
-        # Write probes definitions
-        genScript += self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+            # Write probes definitions
+            genScript += self.getCachedSectionScriptLines("probes", lambda: self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None)), itemsByClassName)
 
-        # Write NF2FF probe grid definitions.
-        genScript += self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+            # Write NF2FF probe grid definitions.
+            genScript += self.getCachedSectionScriptLines("nf2ff", lambda: self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None)), itemsByClassName)
 
-        # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
+            # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
+            genScript += self.getCachedSectionScriptLines("minimalGridlineSpacing", lambda: self.getMinimalGridlineSpacingScriptLines(), itemsByClassName)
 
-        print("======================== REPORT END ========================\n")
+            # Estimate simulation cost from resolved mesh lines, shown in GUI and written next to script.
+            self.reportMeshCostEstimate(itemsByClassName, outputDir)
 
-        # Finalize script.
+            print("======================== REPORT END ========================\n")
 
-        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-        genScript += "% RUN\n"
-        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+            # Finalize script.
 
-        genScript += "WriteOpenEMS( [Sim_Path '/' Sim_CSX], FDTD, CSX );\n"
-        genScript += "CSXGeomPlot( [Sim_Path '/' Sim_CSX] );\n"
-        genScript += "\n"
-        genScript += "if (postprocessing_only==0)\n"
-        genScript += "    %% run openEMS\n"
-        genScript += "    RunOpenEMS( Sim_Path, Sim_CSX, openEMS_opts );\n"
-        genScript += "end\n"
+            genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+            genScript += "% RUN\n"
+            genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
 
-        f = open(fileName, "w", encoding='utf-8')
-        f.write(genScript)
-        f.close()
+            genScript += "WriteOpenEMS( [Sim_Path '/' Sim_CSX], FDTD, CSX );\n"
+            genScript += "% job scheduler runs scripts unattended so preview is never opened\n"
+            genScript += "if ~isempty(getenv('OPENEMS_NO_PREVIEW'))\n"
+            genScript += "    preview_mode = '';\n"
+            genScript += "end\n"
+            genScript += "if strcmp(preview_mode, 'blocking')\n"
+            genScript += "    CSXGeomPlot( [Sim_Path '/' Sim_CSX] );\n"
+            genScript += "elseif strcmp(preview_mode, 'background')\n"
+            genScript += "    % CSXGeomPlot waits until AppCSXCAD is closed, so viewer is started asynchronously\n"
+            genScript += "    appcsxcad_bin = getenv('APPCSXCAD_BIN');\n"
+            genScript += "    if isempty(appcsxcad_bin)\n"
+            genScript += "        appcsxcad_bin = 'AppCSXCAD';\n"
+            genScript += "    end\n"
+            genScript += "    % simulation rewrites Sim_Path while viewer is still open, viewer gets copy of model in temp directory\n"
+            genScript += "    preview_CSX_file = [tempname() '.xml'];\n"
+            genScript += "    copyfile([Sim_Path '/' Sim_CSX], preview_CSX_file);\n"
+            genScript += "    system(['\"' appcsxcad_bin '\" --disableEdit \"' preview_CSX_file '\"'], false, 'async');\n"
+            genScript += "end\n"
+            genScript += "\n"
+            resultCacheDir = self.getResultCacheDir()
+            genScript += "%% result cache, results of model with same hash of FDTD parameters, geometry, mesh, excitation, ports and STL files are reused\n"
+            genScript += f"model_hash = '{self.getModelHash()}';\n"
+            genScript += "result_cache_dir = '" + ("" if resultCacheDir is None else resultCacheDir.replace("'", "''")) + "';\n"
+            genScript += "result_cache_path = '';\n"
+            genScript += "if ~isempty(result_cache_dir)\n"
+            genScript += "    result_cache_path = fullfile(result_cache_dir, model_hash);\n"
+            genScript += "end\n"
+            genScript += "store_results = ~isempty(result_cache_path) && isempty(strfind(openEMS_opts, '--debug-PEC'));\n"
+            genScript += "use_cached_results = store_results && exist(fullfile(result_cache_path, 'simulation_output'), 'dir');\n"
+            genScript += "\n"
+
+            genScript += "if (postprocessing_only==0 && run_simulation)\n"
+            genScript += "    if use_cached_results\n"
+            genScript += "        disp(['Simulation results found in result cache, simulation is not run: ' result_cache_path]);\n"
+            genScript += "        copyfile(fullfile(result_cache_path, 'simulation_output', '*'), Sim_Path);\n"
+            genScript += "    else\n"
+            genScript += "        %% run openEMS\n"
+            genScript += "        RunOpenEMS( Sim_Path, Sim_CSX, openEMS_opts );\n"
+            genScript += "\n"
+            genScript += "".join(["        " + line + "\n" for line in self.getPostprocessingModelSaveScriptLines().splitlines()])
+            genScript += "\n"
+            genScript += "        % completed results are copied into uniquely named .part directory and stored into cache by renaming it, aborted simulation is not stored\n"
+            genScript += "        if store_results && ~exist(fullfile(Sim_Path, 'ABORT'), 'file')\n"
+            genScript += "            [status, message, messageid] = mkdir(result_cache_path);\n"
+            genScript += "            result_cache_part = [tempname(result_cache_path, 'simulation_output.') '.part'];\n"
+            genScript += "            copyfile(Sim_Path, result_cache_part);\n"
+            genScript += "            [err, message] = rename(result_cache_part, fullfile(result_cache_path, 'simulation_output'));\n"
+            genScript += "            if err == 0\n"
+            genScript += "                disp(['Simulation results stored in result cache: ' result_cache_path]);\n"
+            genScript += "            elseif exist(fullfile(result_cache_path, 'simulation_output'), 'dir')\n"
+            genScript += "                % results of same model were already stored by other run, they are kept\n"
+            genScript += "                [status, message, messageid] = rmdir(result_cache_part, 's');\n"
+            genScript += "            else\n"
+            genScript += "                error(['Cannot store simulation results in result cache: ' message]);\n"
+            genScript += "            end\n"
+            genScript += "        end\n"
+            genScript += "    end\n"
+            genScript += "end\n"
 
         # Show message or update status bar to inform user that exporting has finished.
 
-        self.guiHelpers.displayMessage('Simulation script written to: ' + fileName, forceModal=True)
+        self.guiHelpers.displayMessage('Simulation script written to: ' + fileName, forceModal=self.settingsOverrides is None)
         print('Simulation script written to: ' + fileName)
 
-        return
+        return fileName
 
     #
     #	Write NF2FF Button clicked, generate script to display far field pattern
     #
-    def writeNf2ffButtonClicked(self, outputDir=None, nf2ffBoxName="", nf2ffBoxInputPortName="", plotFrequency=0, freqCount=501):
-        genScript = ""
-        genScript += "% Plot far field for structure.\n"
-        genScript += "%\n"
+    def getNF2FFResultsScriptLines(self, nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency, fileSuffix=""):
+        """
+        Far field of NF2FF box for all plot frequencies, script must already define freq, thetaRange, phiRange,
+        figureHandles and calculated input port.
+        :param plotFrequency: frequency in Hz or list of them, output files get frequency appended if there are more of them
+        :param fileSuffix: appended to output file names
+        """
+        nf2ffBoxIndex = self.internalNF2FFIndexNamesList[nf2ffBoxName.replace(" ", "_")]
+        inputPortIndex = self.internalPortIndexNamesList[nf2ffBoxInputPortName]
+        plotFrequencies = self.getNF2FFPlotFrequencies(plotFrequency)
+        reuseCached = "true" if self.form.portNf2ffReuseCachedCheckbox.isChecked() else "false"
 
-        genScript += self.getInitScriptLines()
+        genScript = f"""%
+% NF2FF box {nf2ffBoxName}, input port {nf2ffBoxInputPortName}
+%
+plotFrequency = [{" ".join([str(freq) for freq in plotFrequencies])}];
+P_in = interp1(freq, port{{{inputPortIndex}}}.P_acc, plotFrequency);
 
-        genScript += "Sim_Path = 'simulation_output';\n"
-        genScript += "currDir = strrep(pwd(), '\\', '\\\\');\n"
-        genScript += "display(currDir);\n"
-        genScript += "\n"
+%
+%	nf2ffBox{{index}} - NF2FF box which should be calculated, all frequencies are calculated at once
+%	'Mode',0 - far field file is read, it's used only when it was calculated for same box, frequencies and angles
+%	'Mode',1 - always recalculate data
+%		url: https://github.com/thliebig/openEMS/blob/master/matlab/CalcNF2FF.m
+%
+disp( 'calculating the 3D far field for {nf2ffBoxName}...' );
+nf2ffOutfile = '3D_Pattern{fileSuffix}.h5';
+nf2ffCacheKey = '{self.getNF2FFCacheKey(nf2ffBoxName, plotFrequencies)}';
+nf2ffMode = 1;
+if ({reuseCached} && exist([Sim_Path '/' nf2ffOutfile], 'file') && exist([Sim_Path '/' nf2ffOutfile '.key'], 'file'))
+	if (strcmp(fileread([Sim_Path '/' nf2ffOutfile '.key']), nf2ffCacheKey))
+		nf2ffMode = 0;
+	end
+end
+nf2ff = CalcNF2FF(nf2ffBox{{{nf2ffBoxIndex}}}, Sim_Path, plotFrequency, thetaRange*pi/180, phiRange*pi/180, 'Mode', nf2ffMode, 'Outfile', nf2ffOutfile, 'Verbose', 1);
+fid = fopen([Sim_Path '/' nf2ffOutfile '.key'], 'w');
+fprintf(fid, '%s', nf2ffCacheKey);
+fclose(fid);
+
+nf2ffTable = zeros(numel(plotFrequency), 7);
+figureHandles(end+1) = figure;
+hold on
+grid on
+for k = 1:numel(plotFrequency)
+	if (numel(plotFrequency) == 1)
+		frequencySuffix = '';
+	else
+		frequencySuffix = sprintf('_%gMHz', plotFrequency(k)/1e6);
+	end
+
+	theta_HPBW = interp1(nf2ff.E_norm{{k}}(:,1)/max(nf2ff.E_norm{{k}}(:,1)),thetaRange,1/sqrt(2))*2;
+	gain_dBi = 10*log10(nf2ff.Dmax(k)*nf2ff.Prad(k)/P_in(k));
+
+	% display power and directivity
+	disp( ['frequency: f = ' num2str(plotFrequency(k)/1e9) ' GHz']);
+	disp( ['radiated power: Prad = ' num2str(nf2ff.Prad(k)) ' Watt']);
+	disp( ['directivity: Dmax = ' num2str(nf2ff.Dmax(k)) ' (' num2str(10*log10(nf2ff.Dmax(k))) ' dBi)'] );
+	disp( ['efficiency: nu_rad = ' num2str(100*nf2ff.Prad(k)/P_in(k)) ' %']);
+	disp( ['theta_HPBW = ' num2str(theta_HPBW) ' °']);
+
+	nf2ffTable(k,:) = [plotFrequency(k) nf2ff.Prad(k) P_in(k) 10*log10(nf2ff.Dmax(k)) gain_dBi 100*nf2ff.Prad(k)/P_in(k) theta_HPBW];
+
+	directivity = nf2ff.P_rad{{k}}/nf2ff.Prad(k)*4*pi;
+	directivity_CPRH = abs(nf2ff.E_cprh{{k}}).^2./max(nf2ff.E_norm{{k}}(:)).^2*nf2ff.Dmax(k);
+	directivity_CPLH = abs(nf2ff.E_cplh{{k}}).^2./max(nf2ff.E_norm{{k}}(:)).^2*nf2ff.Dmax(k);
+
+	if (numel(plotFrequency) == 1)
+		plot(thetaRange, 10*log10(directivity(:,1)'),'k-','LineWidth',2);
+		plot(thetaRange, 10*log10(directivity_CPRH(:,1)'),'g--','LineWidth',2);
+		plot(thetaRange, 10*log10(directivity_CPLH(:,1)'),'r-.','LineWidth',2);
+		legend('norm','CPRH','CPLH');
+	else
+		plot(thetaRange, 10*log10(directivity(:,1)'),'LineWidth',2,'DisplayName',sprintf('norm %g GHz', plotFrequency(k)/1e9));
+		legend('show');
+	end
+
+	% dump to vtk
+	DumpFF2VTK([Sim_Path '/3D_Pattern_GAIN{fileSuffix}' frequencySuffix '.vtk'],directivity,thetaRange,phiRange,'scale',1e-3);
+	DumpFF2VTK([Sim_Path '/3D_Pattern_CPRH{fileSuffix}' frequencySuffix '.vtk'],directivity_CPRH,thetaRange,phiRange,'scale',1e-3);
+	DumpFF2VTK([Sim_Path '/3D_Pattern_CPLH{fileSuffix}' frequencySuffix '.vtk'],directivity_CPLH,thetaRange,phiRange,'scale',1e-3);
+
+	E_far_normalized = nf2ff.E_norm{{k}} / max(nf2ff.E_norm{{k}}(:)) * nf2ff.Dmax(k);
+	DumpFF2VTK([Sim_Path '/3D_Pattern_Efield_normalized{fileSuffix}' frequencySuffix '.vtk'],E_far_normalized,thetaRange,phiRange,1e-3);
+end
+xlabel('theta (deg)');
+ylabel('directivity (dBi)');
+title('{nf2ffBoxName}');
 
-        genScript += "%% setup FDTD parameter & excitation function\n"
-        genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + ";\n"
-        genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + "; % 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
+% far field results, one row per frequency
+nf2ffTableColumns = {{'freq (Hz)', 'Prad (W)', 'P_in (W)', 'Dmax (dBi)', 'gain (dBi)', 'efficiency (%)', 'theta_HPBW (deg)'}};
+filename = 'openEMS_simulation_nf2ff_table{fileSuffix}.csv';
+fid = fopen(filename, 'w');
+fprintf(fid, '%s\\n', strjoin(nf2ffTableColumns, ';'));
+fclose(fid);
+dlmwrite(filename, nf2ffTable, '-append', 'delimiter', ';', 'precision', '%.9g');
+save('-hdf5', 'openEMS_simulation_nf2ff_table{fileSuffix}.h5', 'nf2ffTable', 'nf2ffTableColumns');
+
+"""
+
+        return genScript
+
+    def getPostprocessingStructureDefinitionScriptLines(self, itemsByClassName, outputDir):
+        """
+        :return: FDTD, geometry, mesh, ports and NF2FF boxes definition for post-processing scripts, it also fills port and NF2FF indexes used by result sections
+        """
+        structureScript = ""
+
+        structureScript += "%% setup FDTD parameter & excitation function\n"
+        structureScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + ";\n"
+        structureScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + "; % 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
         if (self.getModelCoordsType() == "cylindrical"):
-            genScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement, 'CoordSystem', 1);\n"
+            structureScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement, 'CoordSystem', 1);\n"
         else:
-            genScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement);\n"
-        genScript += "\n"
-
-        # List categories and items.
-        itemsByClassName = self.getItemsByClassName()
+            structureScript += "FDTD = InitFDTD( 'NrTS', max_timesteps, 'EndCriteria', min_decrement);\n"
+        structureScript += "\n"
 
         # Write boundary conditions definitions.
-        genScript += self.getBoundaryConditionsScriptLines()
+        structureScript += self.getBoundaryConditionsScriptLines()
 
         # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
+        structureScript += self.getCoordinateSystemScriptLines()
 
         # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
+        structureScript += self.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None), definitionsOnly=True)
 
         # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
+        structureScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
 
         # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
+        structureScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None), outputDir)
 
         # Write port definitions:
         #    - must be after gridlines definitions
         #    - must be before nf2ff
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
+        structureScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
 
         # Write probes definitions
-        genScript += self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+        structureScript += self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
 
         # Write NF2FF probe grid definitions. THIS NEEDS TO BE DONE TO FILL self.internalNF2FFIndexNamesList[] with keys and indexes, key = "[nf2ff probe category name] - [object label]"
-        genScript += self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+        structureScript += self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
 
         # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
+        structureScript += self.getMinimalGridlineSpacingScriptLines()
 
-        #
-        #   Current NF2FF box index
-        #
-        print(f"writeNf2ffButtonClicked() > generate script, getting nf2ff box index for '{nf2ffBoxName}'")
-        currentNF2FFBoxIndex = self.internalNF2FFIndexNamesList[nf2ffBoxName.replace(" ", "_")]
-        currentNF2FFInputPortIndex = self.internalPortIndexNamesList[nf2ffBoxInputPortName]
+        return structureScript
+
+    def getS11ResultsScriptLines(self, portName, csvFileName):
+        """
+        S11 and input impedance plots of port, script must already define freq, figureHandles and port calculated by calcPort().
+        :param csvFileName: file into which S11 and input impedance are written
+        """
+        portIndex = self.internalPortIndexNamesList[portName]
+
+        genScript = f"""%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+% S11 AND INPUT IMPEDANCE OF {portName}
+%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
+s11 = port{{{portIndex}}}.uf.ref ./ port{{{portIndex}}}.uf.inc;
+s11_dB = 20*log10(abs(s11));
+Zin = port{{{portIndex}}}.uf.tot ./ port{{{portIndex}}}.if.tot;
+
+% plot feed point impedance
+figureHandles(end+1) = figure;
+plot( freq/1e6, real(Zin), 'k-', 'Linewidth', 2 );
+hold on
+grid on
+plot( freq/1e6, imag(Zin), 'r--', 'Linewidth', 2 );
+title( 'feed point impedance of {portName}' );
+xlabel( 'frequency f / MHz' );
+ylabel( 'impedance Z_{{in}} / Ohm' );
+legend( 'real', 'imag' );
+
+figureHandles(end+1) = figure;
+plot( freq/1e6, s11_dB, 'k-', 'Linewidth', 2 );
+grid on
+title( 'reflection coefficient S_{{11}} of {portName}' );
+xlabel( 'frequency f / MHz' );
+ylabel( 'reflection coefficient |S_{{11}}|' );
+
+%
+%   Write S11, real and imag Z_in into CSV file separated by ';'
+%
+filename = '{csvFileName}';
+fid = fopen(filename, 'w');
+fprintf(fid, 'freq (MHz);s11 (dB);Z real (Ohm);Z imag (Ohm);Z abs (Ohm)\\n');
+fclose(fid);
+dlmwrite(filename, horzcat((freq/1e6)', s11_dB', real(Zin)', imag(Zin)', abs(Zin)'), '-append', 'delimiter', ';');
+
+"""
+
+        return genScript
+
+    def getS21ResultsScriptLines(self, sourcePortName, targetPortName, csvFileName):
+        """
+        S11 and S21 plot of port pair, script must already define freq, figureHandles and both ports calculated by calcPort().
+        :param csvFileName: file into which S11 and S21 are written
+        """
+        sourcePortIndex = self.internalPortIndexNamesList[sourcePortName]
+        targetPortIndex = self.internalPortIndexNamesList[targetPortName]
+
+        genScript = f"""%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+% S21 {sourcePortName} -> {targetPortName}
+%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
+s11 = port{{{sourcePortIndex}}}.uf.ref ./ port{{{sourcePortIndex}}}.uf.inc;
+s21 = port{{{targetPortIndex}}}.uf.ref ./ port{{{sourcePortIndex}}}.uf.inc;
+s11_dB = 20*log10(abs(s11));
+s21_dB = 20*log10(abs(s21));
+
+figureHandles(end+1) = figure;
+plot(freq/1e9,s11_dB,'k-','LineWidth',2);
+hold on;
+grid on;
+plot(freq/1e9,s21_dB,'r--','LineWidth',2);
+legend('S_{{11}}','S_{{21}}');
+title('S21-Parameter {sourcePortName} -> {targetPortName}');
+ylabel('S-Parameter (dB)','FontSize',12);
+xlabel('frequency (GHz)','FontSize',12);
+ylim([-40 2]);
+
+filename = '{csvFileName}';
+fid = fopen(filename, 'w');
+fprintf(fid, 'freq (Hz);s11 (dB);s21 (dB)\\n');
+fclose(fid);
+dlmwrite(filename, [abs(freq)', s11_dB', s21_dB'], '-append', 'delimiter', ';', 'precision', 6);
 
+"""
+
+        return genScript
+
+    def getFarfieldScriptLines(self):
+        """
+        :return: theta, phi ranges set in GUI, common part of all NF2FF boxes results
+        """
         thetaStart = str(self.form.portNf2ffThetaStart.value())
         thetaStop = str(self.form.portNf2ffThetaStop.value())
         thetaStep = str(self.form.portNf2ffThetaStep.value())
@@ -1710,73 +2129,84 @@ class OctaveScriptLinesGenerator2(CommonScriptLinesGenerator):
         phiStop = str(self.form.portNf2ffPhiStop.value())
         phiStep = str(self.form.portNf2ffPhiStep.value())
 
-        #
-        #   ATTENTION THIS IS SPECIFIC FOR FAR FIELD PLOTTING, plotFrequency and frequencies count
-        #
-        genScript += "freq = linspace(max([0,f0-fc]), f0+fc, " + str(freqCount) + ");\n"
-        genScript += f"plotFrequency = [{plotFrequency}];\n"
-        genScript += "port{" + str(currentNF2FFInputPortIndex) + "} = calcPort(port{" + str(currentNF2FFInputPortIndex) + "}, Sim_Path, freq);\n"
-        genScript += "\n"
+        genScript = f"""% calculate the far field, angles in degrees
+thetaRange = unique([{thetaStart}:{thetaStep}:{thetaStop}]);
+phiRange = ({phiStart}:{phiStep}:{phiStop}) - 180;
 
-        genScript += """
-%% NFFF contour plots %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-% get accepted antenna power at frequency f0
-%
-%	WARNING - hardwired 1st port
-%
-P_in_0 = interp1(freq, port{""" + str(currentNF2FFInputPortIndex) + """}.P_acc, f0);
+"""
 
-% calculate the far field at phi=0 degrees and at phi=90 degrees
+        return genScript
 
-%thetaRange = unique([0:0.5:90 90:180]);
-thetaRange = unique([""" + thetaStart + """:""" + thetaStep + """:""" + thetaStop + """]);
+    def getFiguresWaitScriptLines(self):
+        genScript = ""
+        genScript += "% wait for plot windows to be closed\n"
+        genScript += "if ~headless_plotting\n"
+        genScript += "\tfor figureHandle = figureHandles\n"
+        genScript += "\t\twaitfor(figureHandle);\n"
+        genScript += "\tend\n"
+        genScript += "end\n"
+        genScript += "\n"
 
-%phiRange = (0:2:360) - 180;
-phiRange = (""" + phiStart + """:""" + phiStep + """:""" + phiStop + """) - 180;
+        return genScript
 
-disp( 'calculating the 3D far field...' );
+    def getHeadlessFiguresSaveScriptLines(self):
+        """
+        Headless plotting (GUI option or OPENEMS_HEADLESS=1 set by job queue) saves all figures as PNG and SVG into script
+        directory, figures are not visible so nobody has to close them.
+        """
+        genScript = ""
+        genScript += "% headless plotting, all figures are saved into files\n"
+        genScript += "if headless_plotting\n"
+        genScript += "\t[figure_dir, figure_name_base] = fileparts(mfilename('fullpath'));\n"
+        genScript += "\tfigure_file_base = fullfile(figure_dir, figure_name_base);\n"
+        genScript += "\tfigure_handles = sort(findall(0, 'type', 'figure'));\n"
+        genScript += "\tfor k = 1:numel(figure_handles)\n"
+        genScript += "\t\tprint(figure_handles(k), [figure_file_base '_figure_' num2str(k) '.png'], '-dpng');\n"
+        genScript += "\t\tprint(figure_handles(k), [figure_file_base '_figure_' num2str(k) '.svg'], '-dsvg');\n"
+        genScript += "\t\tdisp(['figure saved into: ' figure_file_base '_figure_' num2str(k) '.png/svg']);\n"
+        genScript += "\tend\n"
+        genScript += "end\n"
 
-%
-%	nf2ffBox{index} - index is set based on GUI option choosed which NF2FF box should be calculated
-%
-%	'Mode',1 - always recalculate data
-%		url: https://github.com/thliebig/openEMS/blob/master/matlab/CalcNF2FF.m
-%
-nf2ff = CalcNF2FF(nf2ffBox{""" + str(currentNF2FFBoxIndex) + """}, Sim_Path, plotFrequency, thetaRange*pi/180, phiRange*pi/180, 'Mode', 1, 'Outfile', '3D_Pattern.h5', 'Verbose', 1);
+        return genScript
 
-theta_HPBW = interp1(nf2ff.E_norm{1}(:,1)/max(nf2ff.E_norm{1}(:,1)),thetaRange,1/sqrt(2))*2;
+    def writeNf2ffButtonClicked(self, outputDir=None, nf2ffBoxName="", nf2ffBoxInputPortName="", plotFrequency=0, freqCount=501):
+        self.beginExportSession()
+        genScript = ""
+        genScript += "% Plot far field for structure.\n"
+        genScript += "%\n"
 
-% display power and directivity
-disp( ['radiated power: Prad = ' num2str(nf2ff.Prad) ' Watt']);
-disp( ['directivity: Dmax = ' num2str(nf2ff.Dmax) ' (' num2str(10*log10(nf2ff.Dmax)) ' dBi)'] );
-disp( ['efficiency: nu_rad = ' num2str(100*nf2ff.Prad./P_in_0) ' %']);
-disp( ['theta_HPBW = ' num2str(theta_HPBW) ' Â°']);
+        genScript += self.getInitScriptLines()
+
+        genScript += "Sim_Path = 'simulation_output';\n"
+        genScript += "currDir = strrep(pwd(), '\\', '\\\\');\n"
+        genScript += "display(currDir);\n"
+        genScript += "\n"
 
+        # List categories and items.
+        itemsByClassName = self.getItemsByClassName()
 
-%%
-directivity = nf2ff.P_rad{1}/nf2ff.Prad*4*pi;
-directivity_CPRH = abs(nf2ff.E_cprh{1}).^2./max(nf2ff.E_norm{1}(:)).^2*nf2ff.Dmax;
-directivity_CPLH = abs(nf2ff.E_cplh{1}).^2./max(nf2ff.E_norm{1}(:)).^2*nf2ff.Dmax;
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
 
-%%
-figure
-plot(thetaRange, 10*log10(directivity(:,1)'),'k-','LineWidth',2);
-hold on
-grid on
-xlabel('theta (deg)');
-ylabel('directivity (dBi)');
-plot(thetaRange, 10*log10(directivity_CPRH(:,1)'),'g--','LineWidth',2);
-plot(thetaRange, 10*log10(directivity_CPLH(:,1)'),'r-.','LineWidth',2);
-legend('norm','CPRH','CPLH');
+        #
+        #   Current NF2FF box index
+        #
+        print(f"writeNf2ffButtonClicked() > generate script, getting nf2ff box index for '{nf2ffBoxName}'")
+        currentNF2FFInputPortIndex = self.internalPortIndexNamesList[nf2ffBoxInputPortName]
 
-%% dump to vtk
-DumpFF2VTK([Sim_Path '/3D_Pattern_GAIN.vtk'],directivity,thetaRange,phiRange,'scale',1e-3);
-DumpFF2VTK([Sim_Path '/3D_Pattern_CPRH.vtk'],directivity_CPRH,thetaRange,phiRange,'scale',1e-3);
-DumpFF2VTK([Sim_Path '/3D_Pattern_CPLH.vtk'],directivity_CPLH,thetaRange,phiRange,'scale',1e-3);
+        #
+        #   ATTENTION THIS IS SPECIFIC FOR FAR FIELD PLOTTING, plotFrequency and frequencies count
+        #
+        genScript += "freq = linspace(max([0,f0-fc]), f0+fc, " + str(freqCount) + ");\n"
+        genScript += "port{" + str(currentNF2FFInputPortIndex) + "} = calcPort(port{" + str(currentNF2FFInputPortIndex) + "}, Sim_Path, freq);\n"
+        genScript += "\n"
 
-E_far_normalized = nf2ff.E_norm{1} / max(nf2ff.E_norm{1}(:)) * nf2ff.Dmax;
-DumpFF2VTK([Sim_Path '/3D_Pattern_Efield_normalized.vtk'],E_far_normalized,thetaRange,phiRange,1e-3);
-"""
+        genScript += "%% NFFF contour plots %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += self.getFarfieldScriptLines()
+        genScript += "figureHandles = [];\n"
+        genScript += "\n"
+        genScript += self.getNF2FFResultsScriptLines(nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency)
+        genScript += self.getHeadlessFiguresSaveScriptLines()
 
         #
         # WRITE OpenEMS Script file into current dir
@@ -1796,6 +2226,7 @@ DumpFF2VTK([Sim_Path '/3D_Pattern_Efield_normalized.vtk'],E_far_normalized,theta
         self.guiHelpers.displayMessage('Script to display far field written into: ' + fileName, forceModal=False)
 
     def drawS11ButtonClicked(self, outputDir=None, portName=""):
+        self.beginExportSession()
         genScript = ""
         genScript += "% Plot S11\n"
         genScript += "%\n"
@@ -1810,64 +2241,18 @@ DumpFF2VTK([Sim_Path '/3D_Pattern_Efield_normalized.vtk'],E_far_normalized,theta
         # List categories and items.
         itemsByClassName = self.getItemsByClassName()
 
-        # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
-
-        # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
-
-        # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
-
-        # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
-
-        # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
-
-        # Write port definitions.
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
-
-        genScript += """%% postprocessing & do the plots
-freq = linspace( max([0,f0-fc]), f0+fc, 501 );
-
-port = calcPort(port, Sim_Path, freq);
-s11 = port{""" + str(self.internalPortIndexNamesList[portName]) + """}.uf.ref ./ port{""" + str(self.internalPortIndexNamesList[portName]) + """}.uf.inc;
-s11_dB = 20*log10(abs(s11));
-Zin = port{""" + str(self.internalPortIndexNamesList[portName]) + """}.uf.tot ./ port{""" + str(self.internalPortIndexNamesList[portName]) + """}.if.tot;
-
-% plot feed point impedance
-figure
-plotObj1 = plot( freq/1e6, real(Zin), 'k-', 'Linewidth', 2 );
-hold on
-grid on
-plot( freq/1e6, imag(Zin), 'r--', 'Linewidth', 2 );
-title( 'feed point impedance' );
-xlabel( 'frequency f / MHz' );
-ylabel( 'impedance Z_{in} / Ohm' );
-legend( 'real', 'imag' );
-
-figure
-plotObj2 = plot( freq/1e6, 20*log10(abs(s11)), 'k-', 'Linewidth', 2 );
-grid on
-title( 'reflection coefficient S_{11}' );
-xlabel( 'frequency f / MHz' );
-ylabel( 'reflection coefficient |S_{11}|' );
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
 
-% wait for plot windows to be closed
-waitfor(plotObj1);
-waitfor(plotObj2);
-
-%
-%   Write S11, real and imag Z_in into CSV file separated by ';'
-%
-filename = 'openEMS_simulation_s11_dB.csv';
-fid = fopen(filename, 'w');
-fprintf(fid, 'freq (MHz);s11 (dB);Z real (Ohm);Z imag (Ohm);Z abs (Ohm)\\n');
-fclose(fid)
-s11_dB = horzcat((freq/1e6)', s11_dB', real(Zin)', imag(Zin)', abs(Zin)');
-dlmwrite(filename, s11_dB, '-append', 'delimiter', ';');
-"""
+        portIndex = self.internalPortIndexNamesList[portName]
+        genScript += "%% postprocessing & do the plots\n"
+        genScript += "freq = linspace( max([0,f0-fc]), f0+fc, 501 );\n"
+        genScript += f"port{{{portIndex}}} = calcPort(port{{{portIndex}}}, Sim_Path, freq);\n"
+        genScript += "figureHandles = [];\n"
+        genScript += "\n"
+        genScript += self.getS11ResultsScriptLines(portName, "openEMS_simulation_s11_dB.csv")
+        genScript += self.getFiguresWaitScriptLines()
+        genScript += self.getHeadlessFiguresSaveScriptLines()
 
         #
         # WRITE OpenEMS Script file into current dir
@@ -1894,6 +2279,7 @@ dlmwrite(filename, s11_dB, '-append', 'delimiter', ';');
         :param portName:
         :return: Octave scriptlines for openEMS to calculate S11 for port{1}
         """
+        self.beginExportSession()
         genScript = ""
         genScript += "% Plot S11\n"
         genScript += "%\n"
@@ -1912,14 +2298,14 @@ dlmwrite(filename, s11_dB, '-append', 'delimiter', ';');
         genScript += self.getCoordinateSystemScriptLines()
 
         # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
+        genScript += self.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None), definitionsOnly=True)
 
         # Write material definitions.
         genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None),
                                                             outputDir, generateObjects=False)
 
         # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
+        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None), outputDir)
 
         # Write port definitions.
         genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
@@ -1984,6 +2370,7 @@ fclose(fid)
 s11_dB = horzcat((freq/1e6)', 20*log10(abs(s11))', real(Zin)', imag(Zin)');
 dlmwrite(filename, s11_dB, '-append', 'delimiter', ';');
 """
+        genScript += self.getHeadlessFiguresSaveScriptLines()
 
         #
         # WRITE OpenEMS Script file into current dir
@@ -2004,6 +2391,7 @@ dlmwrite(filename, s11_dB, '-append', 'delimiter', ';');
                                        forceModal=False)
 
     def drawS21ButtonClicked(self, outputDir=None, sourcePortName="", targetPortName=""):
+        self.beginExportSession()
         genScript = ""
         genScript += "% Plot S11, S21 parameters from OpenEMS results.\n"
         genScript += "%\n"
@@ -2018,82 +2406,287 @@ dlmwrite(filename, s11_dB, '-append', 'delimiter', ';');
         # List categories and items.
         itemsByClassName = self.getItemsByClassName()
 
-        # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
 
-        # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
+        # Post-processing and plot generation.
+        genScript += "freq = linspace( max([0,f0-fc]), f0+fc, 501 );\n"
+        for portIndex in [self.internalPortIndexNamesList[sourcePortName], self.internalPortIndexNamesList[targetPortName]]:
+            genScript += f"port{{{portIndex}}} = calcPort(port{{{portIndex}}}, Sim_Path, freq);\n"
+        genScript += "figureHandles = [];\n"
+        genScript += "\n"
+        genScript += self.getS21ResultsScriptLines(sourcePortName, targetPortName, "openEMS_simulation_s21_dB.csv")
+        genScript += self.getFiguresWaitScriptLines()
+        genScript += self.getHeadlessFiguresSaveScriptLines()
 
-        # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
+        # Write OpenEMS Script file into current dir.
 
-        # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
+        currDir, nameBase = self.getCurrDir()
 
-        # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
+        self.createOuputDir(outputDir)
+        if (not outputDir is None):
+            fileName = f"{outputDir}/{nameBase}_draw_S21.m"
+        else:
+            fileName = f"{currDir}/{nameBase}_draw_S21.m"
 
-        # Write port definitions.
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
+        f = open(fileName, "w", encoding='utf-8')
+        f.write(genScript)
+        f.close()
+        print('Draw result from simulation file written to: ' + fileName)
+        self.guiHelpers.displayMessage('Draw result from simulation file written to: ' + fileName, forceModal=False)
 
-        # Post-processing and plot generation.
-        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-        genScript += "% POST-PROCESSING AND PLOT GENERATION\n"
-        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-        genScript += "\n"
-        genScript += "freq = linspace( max([0,f0-fc]), f0+fc, 501 );\n"
-        genScript += "port = calcPort( port, Sim_Path, freq);\n"
-        genScript += "\n"
-        genScript += "s11 = port{" + str(self.internalPortIndexNamesList[sourcePortName]) + "}.uf.ref./ port{" + str(self.internalPortIndexNamesList[sourcePortName]) + "}.uf.inc;\n"
-        genScript += "s21 = port{" + str(self.internalPortIndexNamesList[targetPortName]) + "}.uf.ref./ port{" + str(self.internalPortIndexNamesList[sourcePortName]) + "}.uf.inc;\n"
-        genScript += "\n"
-        genScript += "s11_dB = 20*log10(abs(s11));\n"
-        genScript += "s21_dB = 20*log10(abs(s21));\n"
-        genScript += "\n"
-        genScript += "plot(freq/1e9,s11_dB,'k-','LineWidth',2);\n"
-        genScript += "hold on;\n"
-        genScript += "grid on;\n"
-        genScript += "plot(freq/1e9,s21_dB,'r--','LineWidth',2);\n"
-        genScript += "legend('S_{11}','S_{21}');\n"
-        genScript += "ylabel('S-Parameter (dB)','FontSize',12);\n"
-        genScript += "xlabel('frequency (GHz)','FontSize',12);\n"
-        genScript += "ylim([-40 2]);\n"
+    def combinedPostprocessingButtonClicked(self, outputDir=None, s11PortNames=[], s21PortPairs=[], nf2ffBoxes=[], freqCount=501, sParameterExport=False):
+        """
+        Write one post-processing script for all requested results, structure is defined once and each port is
+        calculated by calcPort() just once, S11, S21, input impedances and far fields are computed from these results.
+        :param s11PortNames: list of port names, S11 and input impedance is plotted for each
+        :param s21PortPairs: list of [source port name, target port name]
+        :param nf2ffBoxes: list of [nf2ff box name, input port name, plot frequency]
+        :param freqCount: number of frequencies in post-processing frequency range
+        :param sParameterExport: complex S-parameters of all ports are written into Touchstone and HDF5 file
+        :return: script file name
+        """
+        self.beginExportSession()
+        genScript = ""
+        genScript += "% Combined post-processing, S-parameters, input impedances and far field from one set of port results.\n"
+        genScript += "%\n"
+
+        genScript += self.getInitScriptLines()
+
+        genScript += "Sim_Path = 'simulation_output';\n"
+        genScript += "currDir = strrep(pwd(), '\\', '\\\\');\n"
+        genScript += "display(currDir);\n"
         genScript += "\n"
 
+        # List categories and items.
+        itemsByClassName = self.getItemsByClassName()
+
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
+
+        portIndexes = self.getCombinedPostprocessingPortIndexes(s11PortNames, s21PortPairs, nf2ffBoxes)
+        if sParameterExport:
+            sParameterPorts, excitedPorts = self.getSParameterExportPorts()
+            if len(excitedPorts) == 0:
+                print("combinedPostprocessingButtonClicked() > S-parameters export skipped, there is no active port")
+                self.guiHelpers.displayMessage("S-parameters export skipped, there is no active port to excite.", forceModal=False)
+                sParameterExport = False
+            else:
+                portIndexes = sorted(set(portIndexes + [portIndex for [portName, portIndex] in sParameterPorts]))
+
+        #
+        #   Ports are calculated once for whole frequency range, all results below use their values.
+        #
         genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
-        genScript += "% SAVE PLOT DATA\n"
+        genScript += "% PORTS CALCULATION\n"
         genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
         genScript += "\n"
-        genScript += "save_plot_data = 0;\n"
-        genScript += "\n"
-        genScript += "if (save_plot_data != 0)\n"
-        genScript += "	mfile_name = mfilename('fullpath');\n"
-        genScript += "	[pathstr,name,ext] = fileparts(mfile_name);\n"
-        genScript += "	output_fn = strcat(pathstr, '/', name, '.csv')\n"
-        genScript += "	\n"
-        genScript += "	%% write header to file\n"
-        genScript += "	textHeader = '#f(Hz)\\tS11(dB)\\tS21(dB)';\n"
-        genScript += "	fid = fopen(output_fn, 'w');\n"
-        genScript += "	fprintf(fid, '%s\\n', textHeader);\n"
-        genScript += "	fclose(fid);\n"
-        genScript += "	\n"
-        genScript += "	%% write data to end of file\n"
-        genScript += "	dlmwrite(output_fn, [abs(freq)', s11_dB', s21_dB'],'delimiter','\\t','precision',6, '-append');\n"
+        genScript += f"freq = linspace( max([1e6,f0-fc]), f0+fc, {freqCount} );\n"
+        genScript += "for portIndex = [" + " ".join([str(portIndex) for portIndex in portIndexes]) + "]\n"
+        genScript += "\tport{portIndex} = calcPort(port{portIndex}, Sim_Path, freq);\n"
         genScript += "end\n"
+        genScript += "figureHandles = [];\n"
         genScript += "\n"
 
-        # Write OpenEMS Script file into current dir.
+        if sParameterExport:
+            genScript += self.getSParameterExportScriptLines(sParameterPorts, excitedPorts)
+
+        for portName in s11PortNames:
+            genScript += self.getS11ResultsScriptLines(portName, f'openEMS_simulation_s11_dB_{portName.replace(" ", "_")}.csv')
+
+        for [sourcePortName, targetPortName] in s21PortPairs:
+            genScript += self.getS21ResultsScriptLines(sourcePortName, targetPortName, f'openEMS_simulation_s21_dB_{sourcePortName.replace(" ", "_")}_{targetPortName.replace(" ", "_")}.csv')
 
+        if len(nf2ffBoxes) > 0:
+            genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+            genScript += "% FARFIELD\n"
+            genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+            genScript += "\n"
+            genScript += self.getFarfieldScriptLines()
+
+            for [nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency] in nf2ffBoxes:
+                # single box keeps output file names of NF2FF script, more boxes have their name appended
+                fileSuffix = "" if len(nf2ffBoxes) == 1 else "_" + nf2ffBoxName.replace(" ", "_")
+
+                genScript += self.getNF2FFResultsScriptLines(nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency, fileSuffix)
+
+        genScript += self.getFiguresWaitScriptLines()
+        genScript += self.getHeadlessFiguresSaveScriptLines()
+
+        #
+        # WRITE OpenEMS Script file into current dir
+        #
         currDir, nameBase = self.getCurrDir()
 
         self.createOuputDir(outputDir)
         if (not outputDir is None):
-            fileName = f"{outputDir}/{nameBase}_draw_S21.m"
+            fileName = f"{outputDir}/{nameBase}_postprocessing.m"
         else:
-            fileName = f"{currDir}/{nameBase}_draw_S21.m"
+            fileName = f"{currDir}/{nameBase}_postprocessing.m"
 
         f = open(fileName, "w", encoding='utf-8')
         f.write(genScript)
         f.close()
-        print('Draw result from simulation file written to: ' + fileName)
-        self.guiHelpers.displayMessage('Draw result from simulation file written to: ' + fileName, forceModal=False)
+        print('Combined post-processing script written into: ' + fileName)
+        self.guiHelpers.displayMessage('Combined post-processing script written into: ' + fileName, forceModal=False)
+
+        return fileName
+
+    def getTouchstoneWriterScriptLines(self):
+        """
+        Script lines writing Touchstone file touchstone_file from touchstone_S [frequency, row, column] referenced to Z0,
+        touchstone_comments is cell array of comment lines.
+        """
+        genScript = ""
+        genScript += "%\n"
+        genScript += "%   Touchstone file, values as real and imaginary part, 2-port data are in order S11 S21 S12 S22,\n"
+        genScript += "%   more ports are written row by row with 4 values per line\n"
+        genScript += "%\n"
+        genScript += "touchstone_ports_count = size(touchstone_S, 2);\n"
+        genScript += "fid = fopen(touchstone_file, 'w');\n"
+        genScript += "for k = 1:numel(touchstone_comments)\n"
+        genScript += "    fprintf(fid, '! %s\\n', touchstone_comments{k});\n"
+        genScript += "end\n"
+        genScript += "fprintf(fid, '# Hz S RI R %g\\n', Z0);\n"
+        genScript += "for n = 1:numel(freq)\n"
+        genScript += "    Sn = reshape(touchstone_S(n, :, :), touchstone_ports_count, touchstone_ports_count);\n"
+        genScript += "    if touchstone_ports_count <= 2\n"
+        genScript += "        value_lines = {reshape(Sn, 1, [])};\n"
+        genScript += "    else\n"
+        genScript += "        value_lines = {};\n"
+        genScript += "        for row = 1:touchstone_ports_count\n"
+        genScript += "            for k = 1:4:touchstone_ports_count\n"
+        genScript += "                value_lines{end+1} = Sn(row, k:min(k+3, touchstone_ports_count));\n"
+        genScript += "            end\n"
+        genScript += "        end\n"
+        genScript += "    end\n"
+        genScript += "    for k = 1:numel(value_lines)\n"
+        genScript += "        if k == 1\n"
+        genScript += "            fprintf(fid, '%.9e', freq(n));\n"
+        genScript += "        else\n"
+        genScript += "            fprintf(fid, repmat(' ', 1, 15));\n"
+        genScript += "        end\n"
+        genScript += "        fprintf(fid, ' %.9e %.9e', [real(value_lines{k}); imag(value_lines{k})]);\n"
+        genScript += "        fprintf(fid, '\\n');\n"
+        genScript += "    end\n"
+        genScript += "end\n"
+        genScript += "fclose(fid);\n"
+
+        return genScript
+
+    def getSParameterExportScriptLines(self, ports, excitedPorts, referenceImpedance=50):
+        """
+        S-parameters of all ports for each excited port from already calculated ports, they are referenced to one
+        impedance using total voltages and currents, so calcPort() is not called again.
+        :param ports: list of [port name, port index]
+        :param excitedPorts: list of [port name, port index]
+        :return: script lines writing <name>_s_parameters.h5 and Touchstone file of each excited port
+        """
+        currDir, nameBase = self.getCurrDir()
+
+        genScript = ""
+        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += "% S-PARAMETERS EXPORT\n"
+        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += "\n"
+        genScript += "%\n"
+        genScript += "%   One column of S-matrix for each excited port, complete matrix of more ports is assembled by S-matrix runs\n"
+        genScript += "%\n"
+        genScript += f"Z0 = {referenceImpedance};\n"
+        genScript += "s_parameter_ports = [" + " ".join([str(portIndex) for [portName, portIndex] in ports]) + "];\n"
+        genScript += "s_parameter_port_names = {" + ", ".join(["'" + portName + "'" for [portName, portIndex] in ports]) + "};\n"
+        genScript += "excited_ports = [" + " ".join([str(portIndex) for [portName, portIndex] in excitedPorts]) + "];\n"
+        genScript += "excited_port_names = {" + ", ".join(["'" + portName + "'" for [portName, portIndex] in excitedPorts]) + "};\n"
+        genScript += "S = zeros(numel(freq), numel(s_parameter_ports), numel(excited_ports));\n"
+        genScript += "for column = 1:numel(excited_ports)\n"
+        genScript += "    incident_wave = (port{excited_ports(column)}.uf.tot + Z0*port{excited_ports(column)}.if.tot) / 2;\n"
+        genScript += "    for row = 1:numel(s_parameter_ports)\n"
+        genScript += "        S(:, row, column) = (port{s_parameter_ports(row)}.uf.tot - Z0*port{s_parameter_ports(row)}.if.tot) / 2 ./ incident_wave;\n"
+        genScript += "    end\n"
+        genScript += "end\n"
+        genScript += "\n"
+        genScript += f"save('-hdf5', '{nameBase}_s_parameters.h5', 'freq', 'S', 'Z0', 's_parameter_port_names', 'excited_port_names');\n"
+        genScript += "\n"
+
+        #
+        #   reflection of excited port is complete 1-port data, single port model keeps just its name
+        #
+        for column, [portName, portIndex] in enumerate(excitedPorts):
+            row = [index for [name, index] in ports].index(portIndex)
+            fileSuffix = "" if len(ports) == 1 else "_" + re.sub(r"[^0-9a-zA-Z_.\-]+", "_", portName)
+            genScript += f"touchstone_file = '{nameBase}{fileSuffix}.s1p';\n"
+            genScript += f"touchstone_S = S(:, {row + 1}, {column + 1});\n"
+            genScript += f"touchstone_comments = {{'reflection of excited port {portName}'}};\n"
+            genScript += self.getTouchstoneWriterScriptLines()
+            genScript += "\n"
+
+        return genScript
+
+    def writeSMatrixScript(self, outputDir, runs, referenceImpedance=50, freqCount=501):
+        """
+        Write script which reads results of all S-matrix runs and writes them into Touchstone file, each run has one port
+        excited and gives one column of S-matrix.
+        :param runs: list of [excited port name, excited port index, run directory relative to outputDir]
+        :return: script file name
+        """
+        currDir, nameBase = self.getCurrDir()
+        portsCount = len(runs)
+
+        genScript = ""
+        genScript += "% Assemble S-matrix from runs with one excited port each and write it into Touchstone file.\n"
+        genScript += "%\n"
+
+        genScript += self.getInitScriptLines()
+
+        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += "% S-MATRIX\n"
+        genScript += "%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%\n"
+        genScript += "\n"
+        genScript += f"Z0 = {referenceImpedance};\n"
+        genScript += "% excited port name, port index and run directory of each run\n"
+        genScript += "port_names = {" + ", ".join(["'" + portName + "'" for [portName, portIndex, runDir] in runs]) + "};\n"
+        genScript += "run_ports = [" + " ".join([str(portIndex) for [portName, portIndex, runDir] in runs]) + "];\n"
+        genScript += "run_dirs = {" + ", ".join(["'" + runDir + "'" for [portName, portIndex, runDir] in runs]) + "};\n"
+        genScript += "ports_count = numel(run_ports);\n"
+        genScript += "\n"
+        genScript += "for column = 1:ports_count\n"
+        genScript += "    Sim_Path = [run_dirs{column} '/simulation_output'];\n"
+        genScript += "    if ~exist([Sim_Path '/postprocessing_model.mat'], 'file')\n"
+        genScript += "        error(['ports were not saved in ' Sim_Path ', run simulation script first']);\n"
+        genScript += "    end\n"
+        genScript += "    load([Sim_Path '/postprocessing_model.mat']);\n"
+        genScript += "\n"
+        genScript += "    if column == 1\n"
+        genScript += f"        freq = linspace( max([1e6,f0-fc]), f0+fc, {freqCount} );\n"
+        genScript += "        S = zeros(numel(freq), ports_count, ports_count);\n"
+        genScript += "    end\n"
+        genScript += "\n"
+        genScript += "    for row = 1:ports_count\n"
+        genScript += "        port{run_ports(row)} = calcPort(port{run_ports(row)}, Sim_Path, freq, 'RefImpedance', Z0);\n"
+        genScript += "    end\n"
+        genScript += "    for row = 1:ports_count\n"
+        genScript += "        S(:, row, column) = port{run_ports(row)}.uf.ref ./ port{run_ports(column)}.uf.inc;\n"
+        genScript += "    end\n"
+        genScript += "end\n"
+        genScript += "\n"
+        genScript += f"touchstone_file = '{nameBase}.s{portsCount}p';\n"
+        genScript += "touchstone_S = S;\n"
+        genScript += "touchstone_comments = {};\n"
+        genScript += "for column = 1:ports_count\n"
+        genScript += "    touchstone_comments{end+1} = sprintf('port %d: %s, run %s', column, port_names{column}, run_dirs{column});\n"
+        genScript += "end\n"
+        genScript += self.getTouchstoneWriterScriptLines()
+        genScript += "disp(['S-matrix written into: ' touchstone_file]);\n"
+        genScript += "\n"
+        genScript += "excited_port_names = port_names;\n"
+        genScript += f"save('-hdf5', '{nameBase}_s_matrix.h5', 'freq', 'S', 'Z0', 'port_names', 'excited_port_names', 'run_dirs');\n"
+        genScript += f"disp('S-matrix written into: {nameBase}_s_matrix.h5');\n"
+
+        fileName = os.path.join(outputDir, f"{nameBase}_s_matrix.m")
+        f = open(fileName, "w", encoding='utf-8')
+        f.write(genScript)
+        f.close()
+        print('S-matrix script written into: ' + fileName)
+        self.guiHelpers.displayMessage('S-matrix script written into: ' + fileName, forceModal=False)
+
+        return fileName
@@ -0,0 +1,150 @@
+#   author: Lubomir Jagos
+#
+#
+import os
+import re
+import csv
+import copy
+import json
+import itertools
+
+class ParameterSweep:
+    """
+    Parameter sweep definition, each variant is set of settings overrides keyed by settings item name (material, port,
+    excitation, ... as named in GUI), values are addressed by attribute path of settings item, ie. 'constants.epsilon'
+    for material or 'R' for port.
+
+    JSON definition, parameters are combined as cartesian product, variants are added as they are:
+        {
+            "parameters": {"FR4": {"constants.epsilon": [4.2, 4.4]}, "port1": {"R": [50, 75]}},
+            "variants": [{"name": "lossy", "overrides": {"FR4": {"constants.kappa": 0.001}}}]
+        }
+
+    CSV definition, one row per variant, optional column 'name', other columns are '<item name>:<attribute path>':
+        name,FR4:constants.epsilon,port1:R
+        low,4.2,50
+        high,4.6,75
+    """
+
+    def __init__(self, variants=None):
+        """
+        :param variants: list of [variant name, overrides], overrides is dict item name -> {attribute path: value}
+        """
+        self.variants = [] if variants is None else variants
+
+    @staticmethod
+    def load(fileName):
+        if os.path.splitext(fileName)[1].lower() == ".csv":
+            return ParameterSweep.loadCsv(fileName)
+        return ParameterSweep.loadJson(fileName)
+
+    @staticmethod
+    def loadJson(fileName):
+        with open(fileName, "r", encoding="utf-8") as f:
+            definition = json.load(f)
+
+        variants = []
+
+        parameters = definition.get("parameters", {})
+        columns = [[itemName, attributePath] for itemName, attributes in parameters.items() for attributePath in attributes.keys()]
+        if len(columns) > 0:
+            for values in itertools.product(*[parameters[itemName][attributePath] for itemName, attributePath in columns]):
+                overrides = {}
+                for [itemName, attributePath], value in zip(columns, values):
+                    overrides.setdefault(itemName, {})[attributePath] = value
+                variants.append([None, overrides])
+
+        for variant in definition.get("variants", []):
+            variants.append([variant.get("name", None), variant.get("overrides", {})])
+
+        return ParameterSweep(ParameterSweep.nameVariants(variants))
+
+    @staticmethod
+    def loadCsv(fileName):
+        variants = []
+        with open(fileName, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                overrides = {}
+                for column, value in row.items():
+                    if column == "name" or value is None or value.strip() == "":
+                        continue
+                    if ":" not in column:
+                        raise ValueError(f"sweep column '{column}' must be in format <item name>:<attribute path>")
+                    itemName, attributePath = column.split(":", 1)
+                    overrides.setdefault(itemName.strip(), {})[attributePath.strip()] = ParameterSweep.parseValue(value)
+                variants.append([row.get("name", None), overrides])
+
+        return ParameterSweep(ParameterSweep.nameVariants(variants))
+
+    @staticmethod
+    def createSMatrixSweep(portNames):
+        """
+        One variant per port, just that port is excited, runs of all variants give all columns of S-matrix.
+        :param portNames: port settings item names
+        """
+        variants = [[f"excite_{excitedPortName}", {portName: {"isActive": portName == excitedPortName} for portName in portNames}] for excitedPortName in portNames]
+        return ParameterSweep(ParameterSweep.nameVariants(variants))
+
+    @staticmethod
+    def parseValue(value):
+        """
+        Table cells are parsed as JSON values (numbers, true/false, quoted strings), anything else is kept as string.
+        """
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value.strip()
+
+    @staticmethod
+    def nameVariants(variants):
+        """
+        Variants without name are named by their index, names are used as output directory names so they are sanitized.
+        """
+        namedVariants = []
+        for k, [name, overrides] in enumerate(variants):
+            if not name:
+                name = f"variant_{k + 1:03d}"
+            name = re.sub(r"[^0-9a-zA-Z_.\-]+", "_", str(name))
+            if name in [namedVariant[0] for namedVariant in namedVariants]:
+                raise ValueError(f"sweep variant name {name} is used more than once")
+            namedVariants.append([name, overrides])
+        return namedVariants
+
+    def getVariants(self):
+        return self.variants
+
+    @staticmethod
+    def applyOverrides(itemData, overrides):
+        """
+        Returns copy of settings item with overridden attributes, original item displayed in GUI is not changed.
+        :param itemData: settings item
+        :param overrides: dict attribute path -> value
+        """
+        itemData = copy.deepcopy(itemData)
+        for attributePath, value in overrides.items():
+            path = attributePath.split(".")
+            parent = itemData
+            for k, name in enumerate(path):
+                if (isinstance(parent, dict) and name not in parent) or (not isinstance(parent, dict) and not hasattr(parent, name)):
+                    raise ValueError(f"settings item {itemData.name} has no attribute {attributePath}")
+                if k < len(path) - 1:
+                    parent = parent[name] if isinstance(parent, dict) else getattr(parent, name)
+
+            if isinstance(parent, dict):
+                parent[path[-1]] = value
+            else:
+                setattr(parent, path[-1], value)
+
+        return itemData
+
+    def writeManifest(self, fileName, variantsOutput):
+        """
+        :param variantsOutput: list of [variant name, output dir, script file name]
+        """
+        overridesByName = dict(self.variants)
+        manifest = {"variants": [
+            {"name": name, "outputDir": outputDir, "script": scriptFileName, "overrides": overridesByName.get(name, {})}
+            for [name, outputDir, scriptFileName] in variantsOutput
+        ]}
+        with open(fileName, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
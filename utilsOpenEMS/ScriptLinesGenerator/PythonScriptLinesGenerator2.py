@@ -1,7 +1,7 @@
 #   author: Lubomir Jagos
 #
 #
-import os
+import os, sys
 from PySide2 import QtGui, QtCore, QtWidgets
 import numpy as np
 import re
@@ -13,6 +13,8 @@ from utilsOpenEMS.GuiHelpers.GuiHelpers import GuiHelpers
 from utilsOpenEMS.GuiHelpers.FactoryCadInterface import FactoryCadInterface
 
 from utilsOpenEMS.ScriptLinesGenerator.CommonScriptLinesGenerator import CommonScriptLinesGenerator
+from utilsOpenEMS.ScriptLinesGenerator.ScriptEmitter import ScriptEmitter
+from utilsOpenEMS.ScriptLinesGenerator.MeshEngine import MeshEngine
 
 class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
@@ -22,6 +24,12 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
     def __init__(self, form, statusBar = None):
         super(PythonScriptLinesGenerator2, self).__init__(form, statusBar)
 
+    def getScriptRunCommand(self, scriptFileName):
+        #
+        #   inside FreeCAD sys.executable is FreeCAD itself, so python interpreter from PATH with openEMS installed is used
+        #
+        return ["python" if sys.platform.startswith("win") else "python3", scriptFileName]
+
     def getCoordinateSystemScriptLines(self):
         genScript = ""
 
@@ -53,7 +61,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getMaterialDefinitionsScriptLines(self, items, outputDir=None, generateObjects=True):
-        genScript = ""
+        genScript = ScriptEmitter()
 
         genScript += "#######################################################################################################################################\n"
         genScript += "# MATERIALS AND GEOMETRY\n"
@@ -68,6 +76,10 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         if not items:
             return genScript
 
+        self.initPointsSidecar()
+        stlExportJobs = []
+        pointsSidecarFileName, pointsSidecarFilePath = self.getPointsSidecarFileName(outputDir, ".npz")
+
         materialCounter = -1    #increment of this variable is at beginning f for loop so start at 0
         simObjectCounter = 0
 
@@ -143,7 +155,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                     objModelPriority = self.getItemPriority(objModelPriorityItemName)
 
                     # getting reference to FreeCAD object
-                    freeCadObj = [i for i in self.cadHelpers.getObjects() if (i.Label) == childName][0]
+                    freeCadObj = self.getCadObjectsByLabel(childName)[0]
 
                     #
                     #   HERE IS OBJECT GENERATOR THERE ARE FEW SPECIAL CASES WHICH ARE HANDLED FIRST AND IF OBJECT IS NORMAL STRUCTURE AT THE END IS GENERATED AS .stl FILR:
@@ -170,6 +182,8 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                                 genScript += "points = [[],[]]\n"
                                 if len(points[0])  == 0:
                                     genScript += "## ERROR, no points for polygon for conducting sheet nothing generated"
+                                elif self.isPointsSidecarEnabled():
+                                    genScript += self.getPointsFromSidecarScriptLines(points, pointsSidecarFileName)
                                 else:
                                     for k in range(len(points[0])):
                                         genScript += f"points[0].append({points[0][k]})\n"
@@ -192,11 +206,14 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                             normDir, elevation, facesList = self.getFacePointsForConductingSheet(freeCadObj)
                             if normDir != "":
                                 for face in facesList:
-                                    genScript += f"points = [[],[]]\n"
-                                    for pointIndex in range(len(face[0])):
-                                        genScript += f"points[0].append({face[0][pointIndex]})\n"
-                                        genScript += f"points[1].append({face[1][pointIndex]})\n"
-                                        genScript += "\n"
+                                    if self.isPointsSidecarEnabled():
+                                        genScript += self.getPointsFromSidecarScriptLines(face, pointsSidecarFileName)
+                                    else:
+                                        genScript += f"points = [[],[]]\n"
+                                        for pointIndex in range(len(face[0])):
+                                            genScript += f"points[0].append({face[0][pointIndex]})\n"
+                                            genScript += f"points[1].append({face[1][pointIndex]})\n"
+                                            genScript += "\n"
                                     genScript += f"{materialPythonVariable}.AddPolygon(points, '{normDir}', {elevation}, priority={objModelPriority})\n"
                                     genScript += "\n"
                             else:
@@ -224,12 +241,16 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                         #
 
                         curvePoints = freeCadObj.Points
-                        genScript += "points = [[],[],[]]\n"
-                        for k in range(0, len(curvePoints)):
-                            genScript += f"points[0].append({_r(curvePoints[k].x)})\n"
-                            genScript += f"points[1].append({_r(curvePoints[k].y)})\n"
-                            genScript += f"points[2].append({_r(curvePoints[k].z)})\n"
-                            genScript += "\n"
+                        if self.isPointsSidecarEnabled():
+                            points = [[_r(p.x) for p in curvePoints], [_r(p.y) for p in curvePoints], [_r(p.z) for p in curvePoints]]
+                            genScript += self.getPointsFromSidecarScriptLines(points, pointsSidecarFileName)
+                        else:
+                            genScript += "points = [[],[],[]]\n"
+                            for k in range(0, len(curvePoints)):
+                                genScript += f"points[0].append({_r(curvePoints[k].x)})\n"
+                                genScript += f"points[1].append({_r(curvePoints[k].y)})\n"
+                                genScript += f"points[2].append({_r(curvePoints[k].z)})\n"
+                                genScript += "\n"
 
                         genScript += f"{materialPythonVariable}.AddCurve(points, priority={objModelPriority})\n"
                         genScript += "\n"
@@ -241,8 +262,6 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                         #	there can be circle, circle arc and maybe something else in sketch geometry
                         #
 
-                        genScript += "points = [[],[],[]]\n"
-
                         """
                         # WRONG SINCE StartPoint, EndPoint are defined in XY and not in absolute coordinates
                         for geometryObj in freeCadObj.Geometry:
@@ -258,23 +277,25 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                                 genScript += "\n"
                         """
 
-                        for v in freeCadObj.Shape.OrderedVertexes:
-                            genScript += f"points[0].append({_r(v.X)})\n"
-                            genScript += f"points[1].append({_r(v.Y)})\n"
-                            genScript += f"points[2].append({_r(v.Z)})\n"
-                            genScript += "\n"
-
                         #   HERE IS MADE ASSUMPTION THAT:
                         #       We suppose in sketch there are no mulitple closed sketches
                         #
-                        #   Add first vertex into list
+                        #   First vertex is added at the end of list to close curve
                         #
-                        v = freeCadObj.Shape.OrderedVertexes[0]
+                        sketchVertexes = list(freeCadObj.Shape.OrderedVertexes)
                         if len(freeCadObj.OpenVertices) == 0:
-                            genScript += f"points[0].append({_r(v.X)})\n"
-                            genScript += f"points[1].append({_r(v.Y)})\n"
-                            genScript += f"points[2].append({_r(v.Z)})\n"
-                            genScript += "\n"
+                            sketchVertexes.append(freeCadObj.Shape.OrderedVertexes[0])
+
+                        if self.isPointsSidecarEnabled():
+                            points = [[_r(v.X) for v in sketchVertexes], [_r(v.Y) for v in sketchVertexes], [_r(v.Z) for v in sketchVertexes]]
+                            genScript += self.getPointsFromSidecarScriptLines(points, pointsSidecarFileName)
+                        else:
+                            genScript += "points = [[],[],[]]\n"
+                            for v in sketchVertexes:
+                                genScript += f"points[0].append({_r(v.X)})\n"
+                                genScript += f"points[1].append({_r(v.Y)})\n"
+                                genScript += f"points[2].append({_r(v.Z)})\n"
+                                genScript += "\n"
 
                         genScript += f"{materialPythonVariable}.AddCurve(points, priority={objModelPriority})\n"
                         genScript += "\n"
@@ -304,7 +325,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                         # going through each concrete material items and generate their .stl files
 
                         currDir = os.path.dirname(self.cadHelpers.getCurrDocumentFileName())
-                        partToExport = [i for i in self.cadHelpers.getObjects() if (i.Label) == childName]
+                        partToExport = self.getCadObjectsByLabel(childName)
 
                         #output directory path construction, if there is no parameter for output dir then output is in current freecad file dir
                         if (not outputDir is None):
@@ -312,13 +333,39 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                         else:
                             exportFileName = os.path.join(currDir, stlModelFileName)
 
-                        self.cadHelpers.exportSTL(partToExport, exportFileName)
-                        print("Material object exported as STL into: " + stlModelFileName)
+                        stlExportJobs.append([partToExport, exportFileName])
 
                 genScript += "\n"   #newline after each COMPLETE material category code generated
 
             genScript += "\n"
 
+        #
+        #   export all collected material objects as STL files
+        #
+        self.exportSTLFiles(stlExportJobs)
+
+        #
+        #   write all collected points into sidecar file, each points set is stored under its own name
+        #
+        if self.isPointsSidecarEnabled() and len(self.pointsSidecar) > 0:
+            np.savez_compressed(pointsSidecarFilePath, **{f"points_{k}": pointsArray for k, pointsArray in enumerate(self.pointsSidecar)})
+            self.sectionArtifacts.append(pointsSidecarFilePath)
+            print(f"Polygon and curve points written into: {pointsSidecarFilePath}")
+
+        return genScript
+
+    def getPointsFromSidecarScriptLines(self, points, pointsSidecarFileName):
+        """
+        Add points into sidecar and return script lines which load them into variable points, sidecar file is loaded when first points are added.
+        :param points: list of coordinates lists
+        :param pointsSidecarFileName: sidecar filename relative to script directory
+        :return: script lines
+        """
+        genScript = ""
+        pointsIndex, firstRow, lastRow = self.addPointsToSidecar(points)
+        if pointsIndex == 0:
+            genScript += f"pointsSidecar = np.load(os.path.join(currDir, '{pointsSidecarFileName}'))\n"
+        genScript += f"points = pointsSidecar['points_{pointsIndex}']\n"
         return genScript
 
     def getCartesianOrCylindricalScriptLinesFromStartStop(self, bbCoords, startPointName=None, stopPointName=None):
@@ -396,7 +443,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getPortDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -435,13 +482,12 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
             print(f"#PORT - {currSetting.getName()} - {currSetting.getType()}")
 
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
 
                 genScript += "## PORT - " + currSetting.getName() + " - " + childName + "\n"
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
 
                 # print(freecadObjects)
                 for obj in freecadObjects:
@@ -604,7 +650,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getProbeDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -638,13 +684,12 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
             print(f"#PROBE - {currSetting.getName()} - {currSetting.getType()}")
 
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
 
                 genScript += "# PROBE - " + currSetting.getName() + " - " + childName + "\n"
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
 
                 # print(freecadObjects)
                 for obj in freecadObjects:
@@ -789,7 +834,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getLumpedPartDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -804,13 +849,12 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
             genScript += "# LUMPED PARTS " + currentSetting.getName() + "\n"
 
             # traverse through all children item for this particular lumped part settings
-            objs = self.cadHelpers.getObjects()
             objsExport = []
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
                 print("#LUMPED PART " + currentSetting.getType())
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
                 for obj in freecadObjects:
                     # obj = FreeCAD Object class
 
@@ -857,7 +901,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
     def getNF2FFDefinitionsScriptLines(self, items):
-        genScript = ""
+        genScript = ScriptEmitter()
         if not items:
             return genScript
 
@@ -867,11 +911,10 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         for [item, currSetting] in items:
 
-            objs = self.cadHelpers.getObjects()
             for k in range(item.childCount()):
                 childName = item.child(k).text(0)
 
-                freecadObjects = [i for i in objs if (i.Label) == childName]
+                freecadObjects = self.getCadObjectsByLabel(childName)
 
                 # print(freecadObjects)
                 for obj in freecadObjects:
@@ -912,9 +955,14 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         return genScript
 
-    def getOrderedGridDefinitionsScriptLines(self, items):
-        genScript = ""
+    def getOrderedGridDefinitionsScriptLines(self, items, outputDir=None):
+        genScript = ScriptEmitter()
         meshPrioritiesCount = self.form.meshPriorityTreeView.topLevelItemCount()
+        self.resolvedMeshLines = None
+
+        # mesh lines are also evaluated here, values are rounded same way as they are written into script
+        meshEngine = MeshEngine(MeshEngine.arangeWithEndpoint)
+        _g = lambda x: float("{0:g}".format(_r(x)))
 
         if (not items) or (meshPrioritiesCount == 0):
             return genScript
@@ -933,7 +981,6 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         _assoc = lambda idx: list(map(str.strip, self.form.meshPriorityTreeView.topLevelItem(idx).text(0).split(',')))
         orderedAssociations = [_assoc(k) for k in reversed(range(meshPrioritiesCount))]
         gridSettingsNodeNames = [gridSettingsNode.text(0) for [gridSettingsNode, gridSettingsInst] in items]
-        fcObjects = {obj.Label: obj for obj in self.cadHelpers.getObjects()}
 
         for gridSettingsNodeName in gridSettingsNodeNames:
             print("Grid type : " + gridSettingsNodeName)
@@ -957,7 +1004,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
             #   Fixed Distance, Fixed Count mesh boundaries coords obtain
             #
             if (gridSettingsInst.getType() in ['Fixed Distance', 'Fixed Count', 'User Defined']):
-                fcObject = fcObjects.get(FreeCADObjectName, None)
+                fcObject = self.getCadObjectByLabel(FreeCADObjectName)
                 if (not fcObject):
                     print("Failed to resolve '{}'.".format(FreeCADObjectName))
                     continue
@@ -1008,7 +1055,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                 for k in range(gridCategoryObj.childCount()):
                     FreeCADObjectName = gridCategoryObj.child(k).text(0)
 
-                    fcObject = fcObjects.get(FreeCADObjectName, None)
+                    fcObject = self.getCadObjectByLabel(FreeCADObjectName)
                     if (not fcObject):
                         print("Smooth Mesh - Failed to resolve '{}'.".format(FreeCADObjectName))
                         continue
@@ -1088,51 +1135,69 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                 if gridSettingsInst.xenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x = np.delete(mesh.x, np.argwhere((mesh.x >= {0:g}) & (mesh.x <= {1:g})))\n".format(_r(xmin), _r(xmax))
+                        meshEngine.removeLines('x', _g(xmin), _g(xmax))
                     genScript += "mesh.x = np.concatenate((mesh.x, arangeWithEndpoint({0:g},{1:g},{2:g})))\n".format(_r(xmin), _r(xmax), _r(gridSettingsInst.getXYZ(refUnit)['x']))
+                    meshEngine.addRange('x', _g(xmin), _g(xmax), _g(gridSettingsInst.getXYZ(refUnit)['x']))
                 if gridSettingsInst.yenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y = np.delete(mesh.y, np.argwhere((mesh.y >= {0:g}) & (mesh.y <= {1:g})))\n".format(_r(ymin), _r(ymax))
+                        meshEngine.removeLines('y', _g(ymin), _g(ymax))
                     genScript += "mesh.y = np.concatenate((mesh.y, arangeWithEndpoint({0:g},{1:g},{2:g})))\n".format(_r(ymin),_r(ymax),_r(yParam))
+                    meshEngine.addRange('y', _g(ymin), _g(ymax), _g(yParam))
                 if gridSettingsInst.zenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z = np.delete(mesh.z, np.argwhere((mesh.z >= {0:g}) & (mesh.z <= {1:g})))\n".format(_r(zmin), _r(zmax))
+                        meshEngine.removeLines('z', _g(zmin), _g(zmax))
                     genScript += "mesh.z = np.concatenate((mesh.z, arangeWithEndpoint({0:g},{1:g},{2:g})))\n".format(_r(zmin),_r(zmax),_r(gridSettingsInst.getXYZ(refUnit)['z']))
+                    meshEngine.addRange('z', _g(zmin), _g(zmax), _g(gridSettingsInst.getXYZ(refUnit)['z']))
 
             elif (gridSettingsInst.getType() == 'Fixed Count'):
                 if gridSettingsInst.xenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x = np.delete(mesh.x, np.argwhere((mesh.x >= {0:g}) & (mesh.x <= {1:g})))\n".format(_r(xmin), _r(xmax))
+                        meshEngine.removeLines('x', _g(xmin), _g(xmax))
                     if (not gridSettingsInst.getXYZ()['x'] == 1):
                         genScript += "mesh.x = np.concatenate((mesh.x, linspace({0:g},{1:g},{2:g})))\n".format(_r(xmin), _r(xmax), _r(gridSettingsInst.getXYZ(refUnit)['x']))
+                        meshEngine.addLinspace('x', _g(xmin), _g(xmax), _g(gridSettingsInst.getXYZ(refUnit)['x']))
                     else:
                         genScript += "mesh.x = np.append(mesh.x, {0:g})\n".format(_r((xmin + xmax) / 2))
+                        meshEngine.addLines('x', _g((xmin + xmax) / 2))
 
                 if gridSettingsInst.yenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y = np.delete(mesh.y, np.argwhere((mesh.y >= {0:g}) & (mesh.y <= {1:g})))\n".format(_r(ymin), _r(ymax))
+                        meshEngine.removeLines('y', _g(ymin), _g(ymax))
                     if (not gridSettingsInst.getXYZ()['y'] == 1):
                         genScript += "mesh.y = np.concatenate((mesh.y, linspace({0:g},{1:g},{2:g})))\n".format(_r(ymin), _r(ymax), _r(yParam))
+                        meshEngine.addLinspace('y', _g(ymin), _g(ymax), _g(yParam))
                     else:
                         genScript += "mesh.y = np.append(mesh.y, {0:g})\n".format(_r((ymin + ymax) / 2))
+                        meshEngine.addLines('y', _g((ymin + ymax) / 2))
 
                 if gridSettingsInst.zenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z = np.delete(mesh.z, np.argwhere((mesh.z >= {0:g}) & (mesh.z <= {1:g})))\n".format(_r(zmin), _r(zmax))
+                        meshEngine.removeLines('z', _g(zmin), _g(zmax))
                     if (not gridSettingsInst.getXYZ()['z'] == 1):
                         genScript += "mesh.z = np.concatenate((mesh.z, linspace({0:g},{1:g},{2:g})))\n".format(_r(zmin), _r(zmax), _r(gridSettingsInst.getXYZ(refUnit)['z']))
+                        meshEngine.addLinspace('z', _g(zmin), _g(zmax), _g(gridSettingsInst.getXYZ(refUnit)['z']))
                     else:
                         genScript += "mesh.z = np.append(mesh.z, {0:g})\n".format(_r((zmin + zmax) / 2))
+                        meshEngine.addLines('z', _g((zmin + zmax) / 2))
 
             elif (gridSettingsInst.getType() == 'User Defined'):
                 if gridSettingsInst.xenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x = np.delete(mesh.x, np.argwhere((mesh.x >= {0:g}) & (mesh.x <= {1:g})))\n".format(_r(xmin), _r(xmax))
+                        meshEngine.removeLines('x', _g(xmin), _g(xmax))
                 if gridSettingsInst.yenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y = np.delete(mesh.y, np.argwhere((mesh.y >= {0:g}) & (mesh.y <= {1:g})))\n".format(_r(ymin), _r(ymax))
+                        meshEngine.removeLines('y', _g(ymin), _g(ymax))
                 if gridSettingsInst.zenabled:
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z = np.delete(mesh.z, np.argwhere((mesh.z >= {0:g}) & (mesh.z <= {1:g})))\n".format(_r(zmin), _r(zmax))
+                        meshEngine.removeLines('z', _g(zmin), _g(zmax))
 
                 genScript += "xmin = {0:g}\n".format(_r(xmin))
                 genScript += "xmax = {0:g}\n".format(_r(xmax))
@@ -1141,6 +1206,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                 genScript += "zmin = {0:g}\n".format(_r(zmin))
                 genScript += "zmax = {0:g}\n".format(_r(zmax))
                 genScript += gridSettingsInst.getXYZ() + "\n"
+                meshEngine.setUnresolved(f"User Defined grid '{gridSettingsInst.getName()}'")
 
             elif (gridSettingsInst.getType() == 'Smooth Mesh'):
                 genScript += "smoothMesh = {}\n"
@@ -1149,40 +1215,105 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
                     #when top priority lines setting set, remove lines between min and max in ax direction
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.x = np.delete(mesh.x, np.argwhere((mesh.x >= {0:g}) & (mesh.x <= {1:g})))\n".format(_r(xList[0]), _r(xList[-1]))
+                        meshEngine.removeLines('x', _g(xList[0]), _g(xList[-1]))
 
-                    genScript += f"smoothMesh.x = {str(xList)};\n"
-                    if gridSettingsInst.smoothMesh['xMaxRes'] == 0:
-                        genScript += "smoothMesh.x = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.x, max_res/unit) #max_res calculated in excitation part\n"
+                    smoothMeshMaxRes = self.getSmoothMeshMaxRes(gridSettingsInst.smoothMesh['xMaxRes'])
+                    if smoothMeshMaxRes > 0:
+                        smoothMeshLines = MeshEngine.smoothMeshLines(xList, smoothMeshMaxRes, 1.5)
+                        genScript += f"mesh.x = np.concatenate((mesh.x, np.array([{MeshEngine.formatLines(smoothMeshLines, ', ')}]))) # smooth mesh lines computed by exporter, max resolution {smoothMeshMaxRes:g}\n"
+                        meshEngine.addLines('x', smoothMeshLines)
                     else:
-                        genScript += f"smoothMesh.x = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.x, {gridSettingsInst.smoothMesh['xMaxRes']})\n"
-                    genScript += "mesh.x = np.concatenate((mesh.x, smoothMesh.x))\n"
+                        genScript += f"smoothMesh.x = {str(xList)};\n"
+                        if gridSettingsInst.smoothMesh['xMaxRes'] == 0:
+                            genScript += "smoothMesh.x = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.x, max_res/unit) #max_res calculated in excitation part\n"
+                        else:
+                            genScript += f"smoothMesh.x = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.x, {gridSettingsInst.smoothMesh['xMaxRes']})\n"
+                        genScript += "mesh.x = np.concatenate((mesh.x, smoothMesh.x))\n"
+                        meshEngine.setUnresolved(f"Smooth Mesh grid '{gridSettingsInst.getName()}'")
                 if gridSettingsInst.yenabled:
 
                     #when top priority lines setting set, remove lines between min and max in ax direction
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.y = np.delete(mesh.y, np.argwhere((mesh.y >= {0:g}) & (mesh.y <= {1:g})))\n".format(_r(yList[0]), _r(yList[-1]))
+                        meshEngine.removeLines('y', _g(yList[0]), _g(yList[-1]))
 
-                    genScript += f"smoothMesh.y = {str(yList)};\n"
-                    if gridSettingsInst.smoothMesh['yMaxRes'] == 0:
-                        genScript += "smoothMesh.y = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.y, max_res/unit) #max_res calculated in excitation part\n"
+                    smoothMeshMaxRes = self.getSmoothMeshMaxRes(yParam)
+                    if smoothMeshMaxRes > 0:
+                        smoothMeshLines = MeshEngine.smoothMeshLines(yList, smoothMeshMaxRes, 1.5)
+                        genScript += f"mesh.y = np.concatenate((mesh.y, np.array([{MeshEngine.formatLines(smoothMeshLines, ', ')}]))) # smooth mesh lines computed by exporter, max resolution {smoothMeshMaxRes:g}\n"
+                        meshEngine.addLines('y', smoothMeshLines)
                     else:
-                        genScript += f"smoothMesh.y = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.y, {yParam})\n"
-                    genScript += "mesh.y = np.concatenate((mesh.y, smoothMesh.y))\n"
+                        genScript += f"smoothMesh.y = {str(yList)};\n"
+                        if yParam == 0:
+                            genScript += "smoothMesh.y = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.y, max_res/unit) #max_res calculated in excitation part\n"
+                        else:
+                            genScript += f"smoothMesh.y = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.y, {yParam})\n"
+                        genScript += "mesh.y = np.concatenate((mesh.y, smoothMesh.y))\n"
+                        meshEngine.setUnresolved(f"Smooth Mesh grid '{gridSettingsInst.getName()}'")
                 if gridSettingsInst.zenabled:
 
                     #when top priority lines setting set, remove lines between min and max in ax direction
                     if gridSettingsInst.topPriorityLines:
                         genScript += "mesh.z = np.delete(mesh.z, np.argwhere((mesh.z >= {0:g}) & (mesh.z <= {1:g})))\n".format(_r(zList[0]), _r(zList[-1]))
+                        meshEngine.removeLines('z', _g(zList[0]), _g(zList[-1]))
 
-                    genScript += f"smoothMesh.z = {str(zList)};\n"
-                    if gridSettingsInst.smoothMesh['zMaxRes'] == 0:
-                        genScript += "smoothMesh.z = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.z, max_res/unit) #max_res calculated in excitation part\n"
+                    smoothMeshMaxRes = self.getSmoothMeshMaxRes(gridSettingsInst.smoothMesh['zMaxRes'])
+                    if smoothMeshMaxRes > 0:
+                        smoothMeshLines = MeshEngine.smoothMeshLines(zList, smoothMeshMaxRes, 1.5)
+                        genScript += f"mesh.z = np.concatenate((mesh.z, np.array([{MeshEngine.formatLines(smoothMeshLines, ', ')}]))) # smooth mesh lines computed by exporter, max resolution {smoothMeshMaxRes:g}\n"
+                        meshEngine.addLines('z', smoothMeshLines)
                     else:
-                        genScript += f"smoothMesh.z = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.z, {gridSettingsInst.smoothMesh['zMaxRes']})\n"
-                    genScript += "mesh.z = np.concatenate((mesh.z, smoothMesh.z))\n"
+                        genScript += f"smoothMesh.z = {str(zList)};\n"
+                        if gridSettingsInst.smoothMesh['zMaxRes'] == 0:
+                            genScript += "smoothMesh.z = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.z, max_res/unit) #max_res calculated in excitation part\n"
+                        else:
+                            genScript += f"smoothMesh.z = CSXCAD.SmoothMeshLines.SmoothMeshLines(smoothMesh.z, {gridSettingsInst.smoothMesh['zMaxRes']})\n"
+                        genScript += "mesh.z = np.concatenate((mesh.z, smoothMesh.z))\n"
+                        meshEngine.setUnresolved(f"Smooth Mesh grid '{gridSettingsInst.getName()}'")
 
             genScript += "\n"
 
+        if meshEngine.isResolved():
+            self.resolvedMeshLines = {axis: meshEngine.getLines(axis) for axis in MeshEngine.AXES}
+            return self.getResolvedMeshScriptLines(genScript.getvalue(), meshEngine, outputDir)
+        print(f"Mesh lines are generated as script code, they cannot be resolved in exporter due: {', '.join(meshEngine.unresolvedReasons)}")
+
+        genScript += "openEMS_grid.AddLine('x', mesh.x)\n"
+        genScript += "openEMS_grid.AddLine('y', mesh.y)\n"
+        genScript += "openEMS_grid.AddLine('z', mesh.z)\n"
+        genScript += "\n"
+
+        return genScript
+
+    def getResolvedMeshScriptLines(self, gridScriptLines, meshEngine, outputDir=None):
+        """
+        Script lines with final mesh lines, comments describing grids are kept from script code generated for grids.
+        :param gridScriptLines: grid section generated as script code
+        :param meshEngine: resolved MeshEngine
+        :param outputDir: output directory used for sidecar file
+        :return: script lines
+        """
+        genScript = ScriptEmitter()
+        for line in gridScriptLines.splitlines():
+            if line.startswith("#"):
+                genScript += line + "\n"
+
+        genScript += "# mesh lines resolved by exporter, sorted and without duplicates\n"
+        if self.isMeshSidecarEnabled():
+            meshSidecarFileName, meshSidecarFilePath = self.getMeshSidecarFileName(outputDir, ".npz")
+            os.makedirs(os.path.dirname(meshSidecarFilePath), exist_ok=True)
+            np.savez_compressed(meshSidecarFilePath, **{axis: meshEngine.getLines(axis) for axis in MeshEngine.AXES})
+            self.sectionArtifacts.append(meshSidecarFilePath)
+            print(f"Mesh lines written into: {meshSidecarFilePath}")
+
+            genScript += f"meshLines = np.load(os.path.join(currDir, '{meshSidecarFileName}'))\n"
+            for axis in MeshEngine.AXES:
+                genScript += f"mesh.{axis} = meshLines['{axis}']\n"
+        else:
+            for axis in MeshEngine.AXES:
+                genScript += f"mesh.{axis} = np.array([{MeshEngine.formatLines(meshEngine.getLines(axis), ', ')}])\n"
+        genScript += "\n"
+
         genScript += "openEMS_grid.AddLine('x', mesh.x)\n"
         genScript += "openEMS_grid.AddLine('y', mesh.y)\n"
         genScript += "openEMS_grid.AddLine('z', mesh.z)\n"
@@ -1320,6 +1451,55 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         return genScript
 
 
+    def getPlottingInitScriptLines(self):
+        """
+        Headless plotting is set in GUI or by OPENEMS_HEADLESS=1 environment variable (set by job queue), matplotlib is
+        imported with Agg backend when first figure is created and show() saves all figures as PNG and SVG into script
+        directory instead of opening windows, so script does not wait for anybody to close them.
+        """
+        headlessPlotting = self.form.postprocessingHeadlessCheckbox.isChecked()
+
+        genScript = ""
+        genScript += "#\n"
+        genScript += "# PLOTTING, headless mode saves figures into files instead of showing them\n"
+        genScript += "#\n"
+        genScript += f"headlessPlotting = {headlessPlotting} or os.environ.get('OPENEMS_HEADLESS', '') == '1'\n"
+        genScript += "if headlessPlotting:\n"
+        genScript += "\tfrom numpy import *\n"
+        genScript += "\t# numpy star import shadows builtins, script expects them as they are\n"
+        genScript += "\timport builtins\n"
+        genScript += "\tabs, min, max, round, pow, bool = builtins.abs, builtins.min, builtins.max, builtins.round, builtins.pow, builtins.bool\n"
+        genScript += "\n"
+        genScript += "\tdef generatorFunc_Pyplot():\n"
+        genScript += "\t\timport matplotlib\n"
+        genScript += "\t\tmatplotlib.use('Agg')\n"
+        genScript += "\t\timport matplotlib.pyplot\n"
+        genScript += "\t\treturn matplotlib.pyplot\n"
+        genScript += "\n"
+        genScript += "\tdef generatorFunc_LazyPyplotFunction(name):\n"
+        genScript += "\t\treturn lambda *args, **kwargs: getattr(generatorFunc_Pyplot(), name)(*args, **kwargs)\n"
+        genScript += "\n"
+        genScript += "\tfor generatorFunc_name in ['figure', 'plot', 'grid', 'xlabel', 'ylabel', 'title', 'legend', 'xlim', 'ylim', 'subplot', 'semilogx', 'semilogy', 'polar', 'close']:\n"
+        genScript += "\t\tglobals()[generatorFunc_name] = generatorFunc_LazyPyplotFunction(generatorFunc_name)\n"
+        genScript += "\n"
+        genScript += "\tdef show(*args, **kwargs):\n"
+        genScript += "\t\timport sys\n"
+        genScript += "\t\tif 'matplotlib.pyplot' not in sys.modules:\n"
+        genScript += "\t\t\treturn\n"
+        genScript += "\t\tpyplot = generatorFunc_Pyplot()\n"
+        genScript += "\t\tfigureNameBase = os.path.splitext(os.path.basename(__file__))[0]\n"
+        genScript += "\t\tfor figureNumber in pyplot.get_fignums():\n"
+        genScript += "\t\t\tfor fileExtension in ['png', 'svg']:\n"
+        genScript += "\t\t\t\tfigureFileName = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{figureNameBase}_figure_{figureNumber}.{fileExtension}')\n"
+        genScript += "\t\t\t\tpyplot.figure(figureNumber).savefig(figureFileName)\n"
+        genScript += "\t\t\t\tprint('figure saved into: ' + figureFileName)\n"
+        genScript += "\t\tpyplot.close('all')\n"
+        genScript += "else:\n"
+        genScript += "\tfrom pylab import *\n"
+        genScript += "\n"
+
+        return genScript
+
     def getInitScriptLines(self):
         genScript = ""
         genScript += "# To be run with python.\n"
@@ -1331,14 +1511,15 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
         genScript += "### Import Libraries\n"
         genScript += "import math\n"
         genScript += "import numpy as np\n"
-        genScript += "import os, tempfile, shutil\n"
-        genScript += "from pylab import *\n"
+        genScript += "import os, tempfile, shutil, subprocess\n"
         genScript += "import csv\n"
         genScript += "import CSXCAD\n"
         genScript += "from openEMS import openEMS\n"
         genScript += "from openEMS.physical_constants import *\n"
         genScript += "\n"
 
+        genScript += self.getPlottingInitScriptLines()
+
         genScript += "#\n"
         genScript += "# FUNCTION TO CONVERT CARTESIAN TO CYLINDRICAL COORDINATES\n"
         genScript += "#     returns coordinates in order [theta, r, z]\n"
@@ -1379,69 +1560,68 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         return genScript
 
-    def getExcitationScriptLines(self, definitionsOnly=False):
+    def getExcitationScriptLines(self, items, definitionsOnly=False):
+        """
+        :param items: excitation settings items as returned by getItemsByClassName(), parameter sweep overrides are already applied
+        :param definitionsOnly: generate just variables, without setting excitation of FDTD
+        """
         genScript = ""
 
-        excitationCategory = self.form.objectAssignmentRightTreeWidget.findItems("Excitation",
-                                                                                 QtCore.Qt.MatchFixedString)
-        if len(excitationCategory) >= 0:
-            print("Excitation Settings detected")
-            print("#")
-            print("#EXCITATION")
+        print("Excitation Settings detected")
+        print("#")
+        print("#EXCITATION")
 
-            # FOR WHOLE SIMULATION THERE IS JUST ONE EXCITATION DEFINED, so first is taken!
-            if (excitationCategory[0].childCount() > 0):
-                item = excitationCategory[0].child(0)
-                currSetting = item.data(0, QtCore.Qt.UserRole)  # At index 0 is Default Excitation.
-                # Currently only 1 excitation is allowed. Multiple excitations could be managed by setting one of them as "selected" or "active", while all others are deactivated.
-                # This would help the user to manage different analysis scenarios / excitation ranges.
+        # FOR WHOLE SIMULATION THERE IS JUST ONE EXCITATION DEFINED, so first is taken!
+        if items:
+            [item, currSetting] = items[0]  # At index 0 is Default Excitation.
+            # Currently only 1 excitation is allowed. Multiple excitations could be managed by setting one of them as "selected" or "active", while all others are deactivated.
+            # This would help the user to manage different analysis scenarios / excitation ranges.
 
-                print("#name: " + currSetting.getName())
-                print("#type: " + currSetting.getType())
-
-                genScript += "#######################################################################################################################################\n"
-                genScript += "# EXCITATION " + currSetting.getName() + "\n"
-                genScript += "#######################################################################################################################################\n"
-
-                # EXCITATION FREQUENCY AND CELL MAXIMUM RESOLUTION CALCULATION (1/20th of minimal lambda - calculated based on maximum simulation frequency)
-                # maximum grid resolution is generated into script but NOT USED IN OCTAVE SCRIPT, instead is also calculated here into python variable and used in bounding box correction
-                if (currSetting.getType() == 'sinusodial'):
-                    genScript += "f0 = " + str(currSetting.sinusodial['f0']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
-                    if not definitionsOnly:
-                        genScript += "FDTD.SetSinusExcite(fc);\n"
-                    genScript += "max_res = C0 / f0 / 20\n"
-                    self.maxGridResolution_m = 3e8 / (
-                                currSetting.sinusodial['f0'] * currSetting.getUnitsAsNumber(currSetting.units) * 20)
-                    pass
-                elif (currSetting.getType() == 'gaussian'):
-                    genScript += "f0 = " + str(currSetting.gaussian['f0']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
-                    genScript += "fc = " + str(currSetting.gaussian['fc']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
-                    if not definitionsOnly:
-                        genScript += "FDTD.SetGaussExcite(f0, fc)\n"
-                    genScript += "max_res = C0 / (f0 + fc) / 20\n"
-                    self.maxGridResolution_m = 3e8 / ((currSetting.gaussian['f0'] + currSetting.gaussian[
-                        'fc']) * currSetting.getUnitsAsNumber(currSetting.units) * 20)
-                    pass
-                elif (currSetting.getType() == 'custom'):
-                    f0 = currSetting.custom['f0'] * currSetting.getUnitsAsNumber(currSetting.units)
-                    genScript += "f0 = " + str(currSetting.custom['f0']) + "*" + str(
-                        currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
-                    genScript += "fc = 0.0;\n"
-                    if not definitionsOnly:
-                        genScript += "FDTD.SetCustomExcite(f0, '" + currSetting.custom['functionStr'].replace(
-                            'f0', str(f0)) + "' )\n"
-                    genScript += "max_res = 0\n"
-                    self.maxGridResolution_m = 0
-                    pass
-                pass
+            print("#name: " + currSetting.getName())
+            print("#type: " + currSetting.getType())
 
-                genScript += "\n"
-            else:
-                self.guiHelpers.displayMessage("Missing excitation, please define one.")
+            genScript += "#######################################################################################################################################\n"
+            genScript += "# EXCITATION " + currSetting.getName() + "\n"
+            genScript += "#######################################################################################################################################\n"
+
+            # EXCITATION FREQUENCY AND CELL MAXIMUM RESOLUTION CALCULATION (1/20th of minimal lambda - calculated based on maximum simulation frequency)
+            # maximum grid resolution is generated into script but NOT USED IN OCTAVE SCRIPT, instead is also calculated here into python variable and used in bounding box correction
+            if (currSetting.getType() == 'sinusodial'):
+                genScript += "f0 = " + str(currSetting.sinusodial['f0']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
+                if not definitionsOnly:
+                    genScript += "FDTD.SetSinusExcite(fc);\n"
+                genScript += "max_res = C0 / f0 / 20\n"
+                self.maxGridResolution_m = 3e8 / (
+                            currSetting.sinusodial['f0'] * currSetting.getUnitsAsNumber(currSetting.units) * 20)
                 pass
+            elif (currSetting.getType() == 'gaussian'):
+                genScript += "f0 = " + str(currSetting.gaussian['f0']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
+                genScript += "fc = " + str(currSetting.gaussian['fc']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
+                if not definitionsOnly:
+                    genScript += "FDTD.SetGaussExcite(f0, fc)\n"
+                genScript += "max_res = C0 / (f0 + fc) / 20\n"
+                self.maxGridResolution_m = 3e8 / ((currSetting.gaussian['f0'] + currSetting.gaussian[
+                    'fc']) * currSetting.getUnitsAsNumber(currSetting.units) * 20)
+                pass
+            elif (currSetting.getType() == 'custom'):
+                f0 = currSetting.custom['f0'] * currSetting.getUnitsAsNumber(currSetting.units)
+                genScript += "f0 = " + str(currSetting.custom['f0']) + "*" + str(
+                    currSetting.getUnitsAsNumber(currSetting.units)) + "\n"
+                genScript += "fc = 0.0;\n"
+                if not definitionsOnly:
+                    genScript += "FDTD.SetCustomExcite(f0, '" + currSetting.custom['functionStr'].replace(
+                        'f0', str(f0)) + "' )\n"
+                genScript += "max_res = 0\n"
+                self.maxGridResolution_m = 0
+                pass
+            pass
+
+            genScript += "\n"
+        else:
+            self.guiHelpers.displayMessage("Missing excitation, please define one.")
             pass
         return genScript
 
@@ -1474,6 +1654,7 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
             minSpacingX = self.form.genParamMinGridSpacingX.value() / 1000 / self.getUnitLengthFromUI_m()
             minSpacingY = self.form.genParamMinGridSpacingY.value() / 1000 / self.getUnitLengthFromUI_m()
             minSpacingZ = self.form.genParamMinGridSpacingZ.value() / 1000 / self.getUnitLengthFromUI_m()
+            printSummary = self.form.genParamMinGridSpacingSummary.isChecked()
 
             genScript += "#######################################################################################################################################\n"
             genScript += "# MINIMAL GRIDLINES SPACING, removing gridlines which are closer as defined in GUI\n"
@@ -1486,26 +1667,23 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
             genScript += 'openEMS_grid.ClearLines("y")\n'
             genScript += 'openEMS_grid.ClearLines("z")\n'
             genScript += '\n'
-            genScript += 'for k in range(len(mesh.x)-1):\n'
-            genScript += '\tif (not np.isinf(mesh.x[k]) and abs(mesh.x[k+1]-mesh.x[k]) <= ' + str(minSpacingX) + '):\n'
-            genScript += '\t\tprint("Removnig line at x: " + str(mesh.x[k+1]))\n'
-            genScript += '\t\tmesh.x[k+1] = np.inf\n'
-            genScript += '\n'
-            genScript += 'for k in range(len(mesh.y)-1):\n'
-            genScript += '\tif (not np.isinf(mesh.y[k]) and abs(mesh.y[k+1]-mesh.y[k]) <= ' + str(minSpacingY) + '):\n'
-            genScript += '\t\tprint("Removnig line at y: " + str(mesh.y[k+1]))\n'
-            genScript += '\t\tmesh.y[k+1] = np.inf\n'
-            genScript += '\n'
-            genScript += 'for k in range(len(mesh.z)-1):\n'
-            genScript += '\tif (not np.isinf(mesh.z[k]) and abs(mesh.z[k+1]-mesh.z[k]) <= ' + str(minSpacingZ) + '):\n'
-            genScript += '\t\tprint("Removnig line at z: " + str(mesh.z[k+1]))\n'
-            genScript += '\t\tmesh.z[k+1] = np.inf\n'
-            genScript += '\n'
-
-            genScript += 'mesh.x = mesh.x[~np.isinf(mesh.x)]\n'
-            genScript += 'mesh.y = mesh.y[~np.isinf(mesh.y)]\n'
-            genScript += 'mesh.z = mesh.z[~np.isinf(mesh.z)]\n'
-            genScript += '\n'
+            #
+            #   vectorized filter, in each run of lines closer than min spacing every second line is removed starting
+            #   from the second one, result is same as sequential comparison of each line with previous kept line
+            #
+            genScript += '# lines in each run closer than min spacing are removed alternately, first line of run is kept\n'
+            for axis, minSpacing in [['x', minSpacingX], ['y', minSpacingY], ['z', minSpacingZ]]:
+                genScript += f'closeLines = np.diff(mesh.{axis}) <= {minSpacing}\n'
+                genScript += 'runStart = np.maximum.accumulate(np.where(np.diff(np.concatenate(([False], closeLines)).astype(int)) == 1, np.arange(closeLines.size), 0))\n'
+                genScript += f'removeLines = np.zeros(mesh.{axis}.size, dtype=bool)\n'
+                genScript += 'removeLines[1:] = closeLines & ((np.arange(closeLines.size) - runStart) % 2 == 0)\n'
+                if printSummary:
+                    genScript += f'print("Removed " + str(np.count_nonzero(removeLines)) + " gridlines in {axis} closer than {minSpacing}")\n'
+                else:
+                    genScript += f'for removedLine in mesh.{axis}[removeLines]:\n'
+                    genScript += f'\tprint("Removing line at {axis}: " + str(removedLine))\n'
+                genScript += f'mesh.{axis} = mesh.{axis}[~removeLines]\n'
+                genScript += '\n'
 
             genScript += "openEMS_grid.AddLine('x', mesh.x)\n"
             genScript += "openEMS_grid.AddLine('y', mesh.y)\n"
@@ -1514,350 +1692,836 @@ class PythonScriptLinesGenerator2(CommonScriptLinesGenerator):
 
         return genScript
 
-    #########################################################################################################################
-    #                                  _                       _       _          _ _      _            _
-    #                                 | |                     (_)     | |        | (_)    | |          | |
-    #   __ _  ___ _ __   ___ _ __ __ _| |_ ___   ___  ___ _ __ _ _ __ | |_    ___| |_  ___| | _____  __| |
-    #  / _` |/ _ \ '_ \ / _ \ '__/ _` | __/ _ \ / __|/ __| '__| | '_ \| __|  / __| | |/ __| |/ / _ \/ _` |
-    # | (_| |  __/ | | |  __/ | | (_| | ||  __/ \__ \ (__| |  | | |_) | |_  | (__| | | (__|   <  __/ (_| |
-    #  \__, |\___|_| |_|\___|_|  \__,_|\__\___| |___/\___|_|  |_| .__/ \__|  \___|_|_|\___|_|\_\___|\__,_|
-    #   __/ |                                                   | |
-    #  |___/
     #
-    #	GENERATE SCRIPT CLICKED - go through object assignment tree categories, output child item data.
+    #   Post-processing model
+    #       simulation script saves ports and NF2FF boxes without CSX primitives into simulation output directory,
+    #       post-processing scripts restore them instead of defining geometry and mesh again
     #
-    def generateOpenEMSScript(self, outputDir=None):
-
-        # Create outputDir relative to local FreeCAD file if output dir does not exists
-        #   if outputDir is set to same value
-        #   if outputStr is None then folder with name as FreeCAD file with suffix _openEMS_simulation is created
-        outputDir = self.createOuputDir(outputDir)
-
-        # Update status bar to inform user that exporting has begun.
-        if self.statusBar is not None:
-            self.statusBar.showMessage("Generating OpenEMS script and geometry files ...", 5000)
-            QtWidgets.QApplication.processEvents()
-
-        # Constants and variable initialization.
-
-        refUnit = self.getUnitLengthFromUI_m()  # Coordinates need to be given in drawing units
-        refUnitStr = self.form.simParamsDeltaUnitList.currentText()
-        sf = self.getFreeCADUnitLength_m() / refUnit  # scaling factor for FreeCAD units to drawing units
-
-        # List categories and items.
-
-        itemsByClassName = self.getItemsByClassName()
-
-        # Write script header.
-
+    def getPostprocessingModelSaveScriptLines(self):
         genScript = ""
-
-        genScript += "# OpenEMS FDTD Analysis Automation Script\n"
-        genScript += "#\n"
-
-        genScript += self.getInitScriptLines()
-
-        genScript += "## switches & options\n"
-        genScript += "draw_3d_pattern = 0  # this may take a while...\n"
-        genScript += "use_pml = 0          # use pml boundaries instead of mur\n"
+        genScript += "def generatorFunc_SavePostprocessingModel(Sim_Path, port, nf2ffBoxList):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Save ports and NF2FF boxes for post-processing scripts, attributes referencing CSX are left out, numpy arrays\n"
+        genScript += "\t   are written into .npz file, other values into .json file.\n"
+        genScript += "\t'''\n"
+        genScript += "\timport json\n"
+        genScript += "\tdef jsonValue(value):\n"
+        genScript += "\t\tif isinstance(value, (np.generic, np.ndarray)):\n"
+        genScript += "\t\t\treturn value.tolist()\n"
+        genScript += "\t\traise TypeError()\n"
         genScript += "\n"
-        genScript += "currDir = os.getcwd()\n"
-        genScript += "print(currDir)\n"
+        genScript += "\tmodel = {'f0': globals().get('f0', 0), 'fc': globals().get('fc', 0), 'ports': {}, 'nf2ffBoxes': {}}\n"
+        genScript += "\tarrays = {}\n"
+        genScript += "\tfor objectsName, objects in [['ports', port], ['nf2ffBoxes', nf2ffBoxList]]:\n"
+        genScript += "\t\tfor key, obj in objects.items():\n"
+        genScript += "\t\t\tattributes = {}\n"
+        genScript += "\t\t\tfor name, value in vars(obj).items():\n"
+        genScript += "\t\t\t\tif isinstance(value, np.ndarray) and value.dtype != object:\n"
+        genScript += "\t\t\t\t\tarrays[f'{objectsName}/{key}/{name}'] = value\n"
+        genScript += "\t\t\t\t\tcontinue\n"
+        genScript += "\t\t\t\ttry:\n"
+        genScript += "\t\t\t\t\tattributes[name] = json.loads(json.dumps(value, default=jsonValue))\n"
+        genScript += "\t\t\t\texcept (TypeError, ValueError):\n"
+        genScript += "\t\t\t\t\tpass\n"
+        genScript += "\t\t\tmodel[objectsName][str(key)] = {'module': type(obj).__module__, 'class': type(obj).__name__, 'attributes': attributes}\n"
         genScript += "\n"
-
-        genScript += "# setup_only : dry run to view geometry, validate settings, no FDTD computations\n"
-        genScript += "# debug_pec  : generated PEC skeleton (use ParaView to inspect)\n"
-        genScript += f"debug_pec = {'True' if self.form.generateDebugPECCheckbox.isChecked() else 'False'}\n"
-        genScript += f"setup_only = {'True' if self.form.generateJustPreviewCheckbox.isChecked() else 'False'}\n"
+        genScript += "\twith open(os.path.join(Sim_Path, 'postprocessing_model.json'), 'w') as f:\n"
+        genScript += "\t\tjson.dump(model, f, indent=1)\n"
+        genScript += "\tnp.savez(os.path.join(Sim_Path, 'postprocessing_model.npz'), **arrays)\n"
         genScript += "\n"
 
-        # Write simulation settings.
-
-        genScript += "## prepare simulation folder\n"
-        genScript += "Sim_Path = os.path.join(currDir, 'simulation_output')\n"
-        genScript += "Sim_CSX = '" + os.path.splitext(os.path.basename(self.cadHelpers.getCurrDocumentFileName()))[0] + ".xml'\n"
+        return genScript
 
-        genScript += "if os.path.exists(Sim_Path):\n"
-        genScript += "\tshutil.rmtree(Sim_Path)   # clear previous directory\n"
-        genScript += "\tos.mkdir(Sim_Path)    # create empty simulation folder\n"
+    def getPostprocessingModelLoadScriptLines(self):
+        genScript = ""
+        genScript += "def generatorFunc_LoadPostprocessingModel(Sim_Path):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Restore ports and NF2FF boxes saved by simulation script, objects are created without constructor so CSX\n"
+        genScript += "\t   geometry and mesh are not needed, CalcPort() and CalcNF2FF() use restored attributes and simulation output.\n"
+        genScript += "\t   returns None if simulation script did not save them\n"
+        genScript += "\t'''\n"
+        genScript += "\timport json, importlib\n"
+        genScript += "\tif not os.path.exists(os.path.join(Sim_Path, 'postprocessing_model.json')):\n"
+        genScript += "\t\treturn None\n"
         genScript += "\n"
-
-        genScript += "## setup FDTD parameter & excitation function\n"
-        genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + "\n"
-        genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + " # 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
-
-        if (self.getModelCoordsType() == "cylindrical"):
-            genScript += "CSX = CSXCAD.ContinuousStructure(CoordSystem=1)\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement, CoordSystem=1)\n"
-        else:
-            genScript += "CSX = CSXCAD.ContinuousStructure()\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement)\n"
-
-        genScript += "FDTD.SetCSX(CSX)\n"
+        genScript += "\twith open(os.path.join(Sim_Path, 'postprocessing_model.json'), 'r') as f:\n"
+        genScript += "\t\tmodel = json.load(f)\n"
+        genScript += "\tarrays = np.load(os.path.join(Sim_Path, 'postprocessing_model.npz'))\n"
+        genScript += "\n"
+        genScript += "\tobjects = {'ports': {}, 'nf2ffBoxes': {}}\n"
+        genScript += "\tfor objectsName in objects.keys():\n"
+        genScript += "\t\tfor key, definition in model[objectsName].items():\n"
+        genScript += "\t\t\tobj = object.__new__(getattr(importlib.import_module(definition['module']), definition['class']))\n"
+        genScript += "\t\t\tobj.__dict__.update(definition['attributes'])\n"
+        genScript += "\t\t\tprefix = f'{objectsName}/{key}/'\n"
+        genScript += "\t\t\tobj.__dict__.update({name[len(prefix):]: arrays[name] for name in arrays.files if name.startswith(prefix)})\n"
+        genScript += "\t\t\tobjects[objectsName][int(key) if objectsName == 'ports' else key] = obj\n"
+        genScript += "\n"
+        genScript += "\treturn model['f0'], model['fc'], objects['ports'], objects['nf2ffBoxes']\n"
         genScript += "\n"
 
-        print("======================== REPORT BEGIN ========================\n")
+        return genScript
 
-        self.reportFreeCADItemSettings(itemsByClassName.get("FreeCADSettingsItem", None))
+    def getPostprocessingStructureScriptLines(self, structureScriptLines):
+        """
+        :param structureScriptLines: script lines defining FDTD, geometry, mesh, ports and NF2FF boxes, they must be generated always as they fill port and NF2FF indexes
+        :return: structure definition, or if enabled in GUI loading of ports and NF2FF boxes saved by simulation script with structure definition used just when they were not saved
+        """
+        if not self.form.postprocessingLoadSavedModelCheckbox.isChecked():
+            return structureScriptLines
 
-        # Write boundary conditions definitions.
-        genScript += self.getBoundaryConditionsScriptLines()
+        genScript = ""
+        genScript += "#######################################################################################################################################\n"
+        genScript += "# PORTS AND NF2FF BOXES SAVED BY SIMULATION\n"
+        genScript += "#######################################################################################################################################\n"
+        genScript += self.getPostprocessingModelLoadScriptLines()
+        genScript += "postprocessing_model = generatorFunc_LoadPostprocessingModel(Sim_Path)\n"
+        genScript += "if postprocessing_model is not None:\n"
+        genScript += "\tprint('Ports and NF2FF boxes loaded from simulation output, structure is not defined.')\n"
+        genScript += "\tf0, fc, port, nf2ffBoxList = postprocessing_model\n"
+        genScript += "else:\n"
+        genScript += "".join(["\t" + line + "\n" for line in structureScriptLines.splitlines()])
+        genScript += "\n"
 
-        # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
+        return genScript
 
-        # Write excitation definition.
-        genScript += self.getExcitationScriptLines()
+    def getTouchstoneWriterScriptLines(self):
+        genScript = ""
+        genScript += "def generatorFunc_WriteTouchstone(fileName, freq, S, Z0, comments=[]):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Write Touchstone file, S is array [frequency, row, column], values are written as real and imaginary part,\n"
+        genScript += "\t   2-port data are in order S11 S21 S12 S22, more ports are written row by row with 4 values per line.\n"
+        genScript += "\t'''\n"
+        genScript += "\tportsCount = S.shape[1]\n"
+        genScript += "\twith open(fileName, 'w') as f:\n"
+        genScript += "\t\tfor comment in comments:\n"
+        genScript += "\t\t\tf.write(f'! {comment}\\n')\n"
+        genScript += "\t\tf.write(f'# Hz S RI R {Z0}\\n')\n"
+        genScript += "\t\tfor n in range(len(freq)):\n"
+        genScript += "\t\t\tif portsCount <= 2:\n"
+        genScript += "\t\t\t\tvalueLines = [S[n].T.flatten()]\n"
+        genScript += "\t\t\telse:\n"
+        genScript += "\t\t\t\tvalueLines = [S[n, row, k:k + 4] for row in range(portsCount) for k in range(0, portsCount, 4)]\n"
+        genScript += "\t\t\tfor k, values in enumerate(valueLines):\n"
+        genScript += "\t\t\t\tf.write(('%.9e' % freq[n] if k == 0 else ' ' * 15) + ''.join([' %.9e %.9e' % (value.real, value.imag) for value in values]) + '\\n')\n"
+        genScript += "\n"
 
-        # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir)
+        return genScript
 
-        # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
+    def getSParameterHDF5WriterScriptLines(self):
+        genScript = ""
+        genScript += "def generatorFunc_WriteSParameterHDF5(fileName, freq, S, Z0, portNames, excitedPortNames):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Write complex S-parameters into HDF5 file, S is array [frequency, port, excited port].\n"
+        genScript += "\t'''\n"
+        genScript += "\timport h5py\n"
+        genScript += "\twith h5py.File(fileName, 'w') as h5file:\n"
+        genScript += "\t\th5file.create_dataset('freq', data=freq)\n"
+        genScript += "\t\th5file.create_dataset('S', data=S, compression='gzip')\n"
+        genScript += "\t\th5file.attrs['Z0'] = Z0\n"
+        genScript += "\t\th5file.attrs['port_names'] = np.array(portNames, dtype=h5py.string_dtype())\n"
+        genScript += "\t\th5file.attrs['excited_port_names'] = np.array(excitedPortNames, dtype=h5py.string_dtype())\n"
+        genScript += "\n"
 
-        # Write port definitions.
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
+        return genScript
 
-        # Write lumped part definitions.
-        genScript += self.getLumpedPartDefinitionsScriptLines(itemsByClassName.get("LumpedPartSettingsItem", None))
+    def getSParameterExportScriptLines(self, ports, excitedPorts, referenceImpedance=50):
+        """
+        S-parameters of all ports for each excited port from already calculated ports, they are referenced to one
+        impedance using total voltages and currents, so CalcPort() is not called again.
+        :param ports: list of [port name, port index]
+        :param excitedPorts: list of [port name, port index]
+        :return: script lines writing <name>_s_parameters.h5 and Touchstone file of each excited port
+        """
+        currDir, nameBase = self.getCurrDir()
 
-        # Write probes definitions
-        genScript += self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+        genScript = ""
+        genScript += "#######################################################################################################################################\n"
+        genScript += "# S-PARAMETERS EXPORT\n"
+        genScript += "#######################################################################################################################################\n"
+        genScript += "\n"
+        genScript += "#\n"
+        genScript += "#   One column of S-matrix for each excited port, complete matrix of more ports is assembled by S-matrix runs\n"
+        genScript += "#\n"
+        genScript += f"Z0 = {referenceImpedance}\n"
+        genScript += f"sParameterPorts = {[portIndex for [portName, portIndex] in ports]}\n"
+        genScript += f"excitedPorts = {[portIndex for [portName, portIndex] in excitedPorts]}\n"
+        genScript += "S = np.zeros((len(freq), len(sParameterPorts), len(excitedPorts)), dtype=complex)\n"
+        genScript += "for column, excitedPortIndex in enumerate(excitedPorts):\n"
+        genScript += "\tincidentWave = (port[excitedPortIndex].uf_tot + Z0*port[excitedPortIndex].if_tot) / 2\n"
+        genScript += "\tfor row, portIndex in enumerate(sParameterPorts):\n"
+        genScript += "\t\tS[:, row, column] = (port[portIndex].uf_tot - Z0*port[portIndex].if_tot) / 2 / incidentWave\n"
+        genScript += "\n"
+        genScript += f"generatorFunc_WriteSParameterHDF5('{nameBase}_s_parameters.h5', freq, S, Z0, {[portName for [portName, portIndex] in ports]}, {[portName for [portName, portIndex] in excitedPorts]})\n"
 
-        # Write NF2FF probe grid definitions.
-        genScript += self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+        #
+        #   reflection of excited port is complete 1-port data, single port model keeps just its name
+        #
+        for column, [portName, portIndex] in enumerate(excitedPorts):
+            row = [index for [name, index] in ports].index(portIndex)
+            fileSuffix = "" if len(ports) == 1 else "_" + re.sub(r"[^0-9a-zA-Z_.\-]+", "_", portName)
+            genScript += f"generatorFunc_WriteTouchstone('{nameBase}{fileSuffix}.s1p', freq, S[:, {row}:{row + 1}, {column}:{column + 1}], Z0, comments=[{repr('reflection of excited port ' + portName)}])\n"
+        genScript += "\n"
 
-        # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
+        return genScript
 
-        print("======================== REPORT END ========================\n")
+    def getFarfieldVtkFormat(self):
+        """
+        :return: [file format passed to generatorFunc_DumpFF2VTK(), file extension] selected in GUI
+        """
+        return {
+            "XML .vts": ["vts", "vts"],
+            "ASCII .vtk": ["vtk-ascii", "vtk"],
+        }.get(self.form.portNf2ffVtkFormat.currentText(), ["vtk-binary", "vtk"])
 
-        # Finalize script.
+    def getFarfieldVtkWriterScriptLines(self):
+        genScript = ""
+        genScript += "def generatorFunc_DumpFF2VTK(farfield, t, a, filename, fileFormat='vtk-binary'):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Write far field pattern as structured grid, point distance from origin is field value, theta changes fastest.\n"
+        genScript += "\t   params:\n"
+        genScript += "\t       farfield:   2D array of values of field [theta, phi]\n"
+        genScript += "\t       t:          theta angles in radians\n"
+        genScript += "\t       a:          phi angles in radians\n"
+        genScript += "\t       filename:   output file name\n"
+        genScript += "\t       fileFormat: 'vtk-binary' or 'vtk-ascii' legacy VTK file, 'vts' VTK XML structured grid with raw appended data\n"
+        genScript += "\t'''\n"
+        genScript += "\tt = np.asarray(t, dtype=np.float64).flatten()\n"
+        genScript += "\ta = np.asarray(a, dtype=np.float64).flatten()\n"
+        genScript += "\tfarfield = np.asarray(farfield, dtype=np.float64).reshape(len(t), len(a))\n"
+        genScript += "\n"
+        genScript += "\ttt, aa = np.meshgrid(t, a, indexing='ij')\n"
+        genScript += "\tpoints = np.stack([farfield*np.sin(tt)*np.cos(aa), farfield*np.sin(tt)*np.sin(aa), farfield*np.cos(tt)], axis=-1)\n"
+        genScript += "\tpoints = points.transpose(1, 0, 2).reshape(-1, 3)\n"
+        genScript += "\tvalues = farfield.T.reshape(-1)\n"
+        genScript += "\tpointsCount = len(values)\n"
+        genScript += "\n"
+        genScript += "\tif fileFormat == 'vts':\n"
+        genScript += "\t\tpointsData = points.astype('<f4').tobytes()\n"
+        genScript += "\t\tvaluesData = values.astype('<f4').tobytes()\n"
+        genScript += "\t\textent = f'0 0 0 {len(t) - 1} 0 {len(a) - 1}'\n"
+        genScript += "\t\twith open(filename, 'wb') as outFile:\n"
+        genScript += "\t\t\toutFile.write((\n"
+        genScript += "\t\t\t\tf'<?xml version=\"1.0\"?>\\n'\n"
+        genScript += "\t\t\t\tf'<VTKFile type=\"StructuredGrid\" version=\"1.0\" byte_order=\"LittleEndian\" header_type=\"UInt64\">\\n'\n"
+        genScript += "\t\t\t\tf'  <StructuredGrid WholeExtent=\"{extent}\">\\n'\n"
+        genScript += "\t\t\t\tf'    <Piece Extent=\"{extent}\">\\n'\n"
+        genScript += "\t\t\t\tf'      <PointData Scalars=\"gain\">\\n'\n"
+        genScript += "\t\t\t\tf'        <DataArray type=\"Float32\" Name=\"gain\" NumberOfComponents=\"1\" format=\"appended\" offset=\"0\"/>\\n'\n"
+        genScript += "\t\t\t\tf'      </PointData>\\n'\n"
+        genScript += "\t\t\t\tf'      <Points>\\n'\n"
+        genScript += "\t\t\t\tf'        <DataArray type=\"Float32\" NumberOfComponents=\"3\" format=\"appended\" offset=\"{8 + len(valuesData)}\"/>\\n'\n"
+        genScript += "\t\t\t\tf'      </Points>\\n'\n"
+        genScript += "\t\t\t\tf'    </Piece>\\n'\n"
+        genScript += "\t\t\t\tf'  </StructuredGrid>\\n'\n"
+        genScript += "\t\t\t\tf'  <AppendedData encoding=\"raw\">\\n'\n"
+        genScript += "\t\t\t\tf'   _'\n"
+        genScript += "\t\t\t).encode('ascii'))\n"
+        genScript += "\t\t\tfor data in [valuesData, pointsData]:\n"
+        genScript += "\t\t\t\toutFile.write(np.uint64(len(data)).astype('<u8').tobytes())\n"
+        genScript += "\t\t\t\toutFile.write(data)\n"
+        genScript += "\t\t\toutFile.write(b'\\n  </AppendedData>\\n</VTKFile>\\n')\n"
+        genScript += "\t\treturn\n"
+        genScript += "\n"
+        genScript += "\tisBinary = fileFormat != 'vtk-ascii'\n"
+        genScript += "\twith open(filename, 'wb') as outFile:\n"
+        genScript += "\t\toutFile.write((\n"
+        genScript += "\t\t\tf'# vtk DataFile Version 3.0\\n'\n"
+        genScript += "\t\t\tf'Structured Grid by python-interface of openEMS\\n'\n"
+        genScript += "\t\t\tf'{\"BINARY\" if isBinary else \"ASCII\"}\\n'\n"
+        genScript += "\t\t\tf'DATASET STRUCTURED_GRID\\n'\n"
+        genScript += "\t\t\tf'DIMENSIONS 1 {len(t)} {len(a)}\\n'\n"
+        genScript += "\t\t\tf'POINTS {pointsCount} {\"float\" if isBinary else \"double\"}\\n'\n"
+        genScript += "\t\t).encode('ascii'))\n"
+        genScript += "\t\tif isBinary:\n"
+        genScript += "\t\t\toutFile.write(points.astype('>f4').tobytes())\n"
+        genScript += "\t\telse:\n"
+        genScript += "\t\t\tnp.savetxt(outFile, points, fmt='%.9e')\n"
+        genScript += "\n"
+        genScript += "\t\toutFile.write((\n"
+        genScript += "\t\t\tf'\\n\\n'\n"
+        genScript += "\t\t\tf'POINT_DATA {pointsCount}\\n'\n"
+        genScript += "\t\t\tf'SCALARS gain {\"float\" if isBinary else \"double\"} 1\\n'\n"
+        genScript += "\t\t\tf'LOOKUP_TABLE default\\n'\n"
+        genScript += "\t\t).encode('ascii'))\n"
+        genScript += "\t\tif isBinary:\n"
+        genScript += "\t\t\toutFile.write(values.astype('>f4').tobytes())\n"
+        genScript += "\t\t\toutFile.write(b'\\n')\n"
+        genScript += "\t\telse:\n"
+        genScript += "\t\t\tnp.savetxt(outFile, values, fmt='%.9e')\n"
+        genScript += "\n"
 
-        genScript += "#######################################################################################################################################\n"
-        genScript += "# RUN\n"
-        genScript += "#######################################################################################################################################\n"
+        return genScript
 
-        genScript += "### Run the simulation\n"
-        genScript += "CSX_file = os.path.join(Sim_Path, Sim_CSX)\n"
-        genScript += "if not os.path.exists(Sim_Path):\n"
-        genScript += "\tos.mkdir(Sim_Path)\n"
-        genScript += "CSX.Write2XML(CSX_file)\n"
-        genScript += "from CSXCAD import AppCSXCAD_BIN\n"
-        genScript += "os.system(AppCSXCAD_BIN + ' \"{}\"'.format(CSX_file))\n"
+    def getNF2FFCacheScriptLines(self):
+        genScript = ""
+        genScript += "def generatorFunc_IsNF2FFCached(Sim_Path, outfile, cacheKey):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Far field file is reused when it was calculated for same NF2FF box, frequencies and angles.\n"
+        genScript += "\t'''\n"
+        genScript += "\tkeyFileName = os.path.join(Sim_Path, outfile + '.key')\n"
+        genScript += "\tif not (os.path.isfile(os.path.join(Sim_Path, outfile)) and os.path.isfile(keyFileName)):\n"
+        genScript += "\t\treturn False\n"
+        genScript += "\twith open(keyFileName, 'r') as f:\n"
+        genScript += "\t\treturn f.read() == cacheKey\n"
+        genScript += "\n"
+        genScript += "def generatorFunc_WriteNF2FFCacheKey(Sim_Path, outfile, cacheKey):\n"
+        genScript += "\twith open(os.path.join(Sim_Path, outfile + '.key'), 'w') as f:\n"
+        genScript += "\t\tf.write(cacheKey)\n"
+        genScript += "\n"
+        genScript += "def generatorFunc_WriteNF2FFTable(fileNameBase, columns, table):\n"
+        genScript += "\t'''\n"
+        genScript += "\t   Write far field results, one row per frequency, into CSV and HDF5 file with one dataset per column.\n"
+        genScript += "\t'''\n"
+        genScript += "\twith open(fileNameBase + '.csv', 'w', newline='') as csvfile:\n"
+        genScript += "\t\twriter = csv.writer(csvfile, delimiter=';', quotechar='|', quoting=csv.QUOTE_MINIMAL)\n"
+        genScript += "\t\twriter.writerow(columns)\n"
+        genScript += "\t\twriter.writerows(table)\n"
+        genScript += "\n"
+        genScript += "\timport h5py\n"
+        genScript += "\twith h5py.File(fileNameBase + '.h5', 'w') as h5file:\n"
+        genScript += "\t\tfor column, values in zip(columns, np.array(table).T):\n"
+        genScript += "\t\t\th5file.create_dataset(column, data=values)\n"
         genScript += "\n"
-        genScript += "FDTD.Run(Sim_Path, verbose=3, cleanup=True, setup_only=setup_only, debug_pec=debug_pec)\n"
 
-        # Write _OpenEMS.py script file to current directory.
-        currDir, nameBase = self.getCurrDir()
+        return genScript
 
-        if (not outputDir is None):
-            fileName = f"{outputDir}/{nameBase}_openEMS.py"
+    def getNF2FFResultsScriptLines(self, nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency, fileSuffix=""):
+        """
+        Far field of NF2FF box for all plot frequencies, script must already define freq, thetaRange, phiRange, calculated
+        input port and functions from getFarfieldVtkWriterScriptLines() and getNF2FFCacheScriptLines().
+        :param plotFrequency: frequency in Hz or list of them, output files get frequency appended if there are more of them
+        :param fileSuffix: appended to output file names
+        """
+        nf2ffBoxKey = nf2ffBoxName.replace(" ", "_")
+        inputPortIndex = self.internalPortIndexNamesList[nf2ffBoxInputPortName]
+        plotFrequencies = self.getNF2FFPlotFrequencies(plotFrequency)
+        reuseCached = self.form.portNf2ffReuseCachedCheckbox.isChecked()
+        vtkFormat, vtkExtension = self.getFarfieldVtkFormat()
+
+        genScript = f"""#
+# NF2FF box {nf2ffBoxName}, input port {nf2ffBoxInputPortName}
+#
+plotFrequency = np.array([{", ".join([str(freq) for freq in plotFrequencies])}])
+P_in = np.interp(plotFrequency, freq, port[{inputPortIndex}].P_acc)
+
+#
+#	nf2ffBoxList[<name>] - NF2FF box structure which should be calculated
+#       INPUT ANGLES ARE IN DEGREES for python interface!
+#       all frequencies are calculated at once, far field file is reused if it was calculated for same box, frequencies and angles
+#
+print('calculating the 3D far field for {nf2ffBoxName}...')
+nf2ffOutfile = '3D_Pattern{fileSuffix}.h5'
+nf2ffCacheKey = '{self.getNF2FFCacheKey(nf2ffBoxName, plotFrequencies)}'
+nf2ffReadCached = {reuseCached} and generatorFunc_IsNF2FFCached(Sim_Path, nf2ffOutfile, nf2ffCacheKey)
+nf2ff = nf2ffBoxList['{nf2ffBoxKey}'].CalcNF2FF(Sim_Path, plotFrequency, thetaRange, phiRange, outfile=nf2ffOutfile, verbose=True, read_cached=nf2ffReadCached)
+generatorFunc_WriteNF2FFCacheKey(Sim_Path, nf2ffOutfile, nf2ffCacheKey)
+
+nf2ffTable = []
+figure()
+with (open('openEMS_simulation_nf2ff_info{fileSuffix}.txt', 'w') as outFile):
+    for k in range(len(plotFrequency)):
+        frequencySuffix = '' if len(plotFrequency) == 1 else f'_{{plotFrequency[k]/1e6:g}}MHz'
+
+        Dmax_dB = 10*log10(nf2ff.Dmax[k])
+        gain_dB = 10*log10(nf2ff.Dmax[k]*nf2ff.Prad[k]/P_in[k])
+        E_norm = 20.0*log10(nf2ff.E_norm[k]/np.max(nf2ff.E_norm[k])) + 10*log10(nf2ff.Dmax[k])
+        E_CPRH = 20.0*log10(np.abs(nf2ff.E_cprh[k])/np.max(nf2ff.E_norm[k])) + 10*log10(nf2ff.Dmax[k])
+        E_CPLH = 20.0*log10(np.abs(nf2ff.E_cplh[k])/np.max(nf2ff.E_norm[k])) + 10*log10(nf2ff.Dmax[k])
+
+        belowHalfPower = np.where(squeeze(E_norm[:,phiRange==0])<Dmax_dB-3)[0]
+        theta_HPBW = thetaRange[belowHalfPower[0]] if len(belowHalfPower) > 0 else np.nan
+
+        # display power and directivity
+        print('frequency: f = ' + str(plotFrequency[k]/1e9) + ' GHz')
+        print('radiated power: Prad = ' + str(nf2ff.Prad[k]) + ' Watt')
+        print('directivity: Dmax = ' + str(Dmax_dB) + ' dBi)')
+        print('efficiency: nu_rad = ' + str(100*nf2ff.Prad[k]/P_in[k]) + ' %')
+        print('theta_HPBW = ' + str(theta_HPBW) + '°')
+
+        outFile.write(f'frequency: f = {{plotFrequency[k]/1e9}} GHz\\n')
+        outFile.write(f'radiated power: Prad = {{nf2ff.Prad[k]}} Watt\\n')
+        outFile.write(f'directivity: Dmax = {{Dmax_dB}} dBi)\\n')
+        outFile.write(f'efficiency: nu_rad = {{100*nf2ff.Prad[k]/P_in[k]}} %\\n')
+        outFile.write(f'theta_HPBW = {{theta_HPBW}}°\\n')
+        outFile.write(f'\\n')
+
+        nf2ffTable.append([plotFrequency[k], nf2ff.Prad[k], P_in[k], Dmax_dB, gain_dB, 100*nf2ff.Prad[k]/P_in[k], theta_HPBW])
+
+        if len(plotFrequency) == 1:
+            plot(thetaRange, E_norm[:,phiRange==0],'k-' , linewidth=2, label='$|E|$')
+            plot(thetaRange, E_CPRH[:,phiRange==0],'g--', linewidth=2, label='$|E_{{CPRH}}|$')
+            plot(thetaRange, E_CPLH[:,phiRange==0],'r-.', linewidth=2, label='$|E_{{CPLH}}|$')
         else:
-            fileName = f"{currDir}/{nameBase}_openEMS.py"
+            plot(thetaRange, E_norm[:,phiRange==0], linewidth=2, label='$|E|$ {{:g}} GHz'.format(plotFrequency[k]/1e9))
 
-        f = open(fileName, "w", encoding='utf-8')
-        f.write(genScript)
-        f.close()
+        #
+        # Dump radiation field to vtk file
+        #
+        directivity = nf2ff.P_rad[k]/nf2ff.Prad[k]*4*pi
+        directivity_CPRH = np.abs(nf2ff.E_cprh[k])**2/np.max(nf2ff.E_norm[k][:])**2*nf2ff.Dmax[k]
+        directivity_CPLH = np.abs(nf2ff.E_cplh[k])**2/np.max(nf2ff.E_norm[k][:])**2*nf2ff.Dmax[k]
 
-        # Show message or update status bar to inform user that exporting has finished.
+        generatorFunc_DumpFF2VTK(directivity, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, f'3D_Pattern_GAIN{fileSuffix}{{frequencySuffix}}.{vtkExtension}'), '{vtkFormat}')
+        generatorFunc_DumpFF2VTK(directivity_CPRH, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, f'3D_Pattern_CPRH{fileSuffix}{{frequencySuffix}}.{vtkExtension}'), '{vtkFormat}')
+        generatorFunc_DumpFF2VTK(directivity_CPLH, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, f'3D_Pattern_CPLH{fileSuffix}{{frequencySuffix}}.{vtkExtension}'), '{vtkFormat}')
 
-        self.guiHelpers.displayMessage('Simulation script written to: ' + fileName, forceModal=True)
-        print('Simulation script written to: ' + fileName)
+        E_far_normalized = E_norm / np.max(E_norm) * nf2ff.Dmax[k]
+        generatorFunc_DumpFF2VTK(E_far_normalized, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, f'3D_Pattern_Efield_norm{fileSuffix}{{frequencySuffix}}.{vtkExtension}'), '{vtkFormat}')
 
-        return
+grid()
+xlabel('theta (deg)')
+ylabel('directivity (dBi)')
+title('{nf2ffBoxName}, frequency: ' + ', '.join(['{{:g}}'.format(f/1e9) for f in plotFrequency]) + ' GHz')
+legend()
 
-    #
-    #	Write NF2FF Button clicked, generate script to display far field pattern
-    #
-    def writeNf2ffButtonClicked(self, outputDir=None, nf2ffBoxName="", nf2ffBoxInputPortName="", plotFrequency=0, freqCount=501):
-        genScript = ""
-        genScript += "# Plot far field for structure.\n"
-        genScript += "#\n"
+generatorFunc_WriteNF2FFTable('openEMS_simulation_nf2ff_table{fileSuffix}', ['freq (Hz)', 'Prad (W)', 'P_in (W)', 'Dmax (dBi)', 'gain (dBi)', 'efficiency (%)', 'theta_HPBW (deg)'], nf2ffTable)
 
-        genScript += self.getInitScriptLines()
+"""
 
-        genScript += "currDir = os.getcwd()\n"
-        genScript += "Sim_Path = os.path.join(currDir, r'simulation_output')\n"
-        genScript += "print(currDir)\n"
-        genScript += "\n"
+        return genScript
+
+    def getPostprocessingStructureDefinitionScriptLines(self, itemsByClassName, outputDir):
+        """
+        :return: FDTD, geometry, mesh, ports and NF2FF boxes definition for post-processing scripts, it also fills port and NF2FF indexes used by result sections
+        """
+        structureScript = ""
 
-        genScript += "## setup FDTD parameter & excitation function\n"
-        genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + "\n"
-        genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + " # 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
+        structureScript += "## setup FDTD parameter & excitation function\n"
+        structureScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + "\n"
+        structureScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + " # 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
 
         if (self.getModelCoordsType() == "cylindrical"):
-            genScript += "CSX = CSXCAD.ContinuousStructure(CoordSystem=1)\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement, CoordSystem=1)\n"
+            structureScript += "CSX = CSXCAD.ContinuousStructure(CoordSystem=1)\n"
+            structureScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement, CoordSystem=1)\n"
         else:
-            genScript += "CSX = CSXCAD.ContinuousStructure()\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement)\n"
-
-        genScript += "FDTD.SetCSX(CSX)\n"
-        genScript += "\n"
+            structureScript += "CSX = CSXCAD.ContinuousStructure()\n"
+            structureScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement)\n"
 
-        # List categories and items.
-        itemsByClassName = self.getItemsByClassName()
+        structureScript += "FDTD.SetCSX(CSX)\n"
+        structureScript += "\n"
 
         # Write boundary conditions definitions.
-        genScript += self.getBoundaryConditionsScriptLines()
+        structureScript += self.getBoundaryConditionsScriptLines()
 
         # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
+        structureScript += self.getCoordinateSystemScriptLines()
 
         # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
+        structureScript += self.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None), definitionsOnly=True)
 
         # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
+        structureScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
 
         # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
+        structureScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None), outputDir)
 
         # Write port definitions:
         #    - must be after gridlines definitions
         #    - must be before nf2ff
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
+        structureScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
 
         # Write probes definitions
-        genScript += self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+        structureScript += self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
 
         # Write NF2FF probe grid definitions. THIS NEEDS TO BE DONE TO FILL self.internalNF2FFIndexNamesList[] with keys and indexes, key = "[nf2ff probe category name] - [object label]"
-        genScript += self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
+        structureScript += self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None))
 
         # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
-
-        #
-        #   Current NF2FF box index
-        #
-        print(f"writeNf2ffButtonClicked() > generate script, getting nf2ff box index for '{nf2ffBoxName}'")
-        currentNF2FFBoxIndex = self.internalNF2FFIndexNamesList[nf2ffBoxName.replace(" ", "_")]
-        currentNF2FFInputPortIndex = self.internalPortIndexNamesList[nf2ffBoxInputPortName]
+        structureScript += self.getMinimalGridlineSpacingScriptLines()
 
-        thetaStart = str(self.form.portNf2ffThetaStart.value())
-        thetaStop = str(self.form.portNf2ffThetaStop.value())
-        thetaStep = str(self.form.portNf2ffThetaStep.value())
+        return structureScript
 
-        phiStart = str(self.form.portNf2ffPhiStart.value())
-        phiStop = str(self.form.portNf2ffPhiStop.value())
-        phiStep = str(self.form.portNf2ffPhiStep.value())
+    def getS11ResultsScriptLines(self, portName, csvFileName):
+        """
+        S11 and input impedance plots of port, script must already define freq and port calculated by CalcPort().
+        :param csvFileName: file into which S11 and input impedance are written
+        """
+        portIndex = self.internalPortIndexNamesList[portName]
 
-        #
-        #   ATTENTION THIS IS SPECIFIC FOR FAR FIELD PLOTTING, plotFrequency and frequencies count
-        #       port is calculated to get P_in (input power)
-        #
-        genScript += f"""
-#######################################################################################################################################
-# Farfield plot and 3D gain generated
+        genScript = f"""#######################################################################################################################################
+# S11 AND INPUT IMPEDANCE OF {portName}
 #######################################################################################################################################
 
-def generatorFunc_DumpFF2VTK(farfield, t, a, filename):
-    '''
-       Create .vtk file
-       params:
-           farfield: 2D array of values of field
-           t:        theta angles in radians
-           a:        phi angles in radians
-           filename: output file name
-    '''
-
-    with (open(filename, 'w') as outFile):
-         outFile.write(f"# vtk DataFile Version 3.0\\n")
-         outFile.write(f"Structured Grid by python-interface of openEMS\\n")
-         outFile.write(f"ASCII\\n")
-         outFile.write(f"DATASET STRUCTURED_GRID\\n")
-
-         outFile.write(f"DIMENSIONS 1 {{len(t)}} {{len(a)}}\\n")
-         outFile.write(f"POINTS {{len(t)*len(a)}} double\\n")
-
-         for na in range(len(a)):
-             for nt in range(len(t)):
-                 val1 = farfield[nt][na]*math.sin(t[nt])*math.cos(a[na])
-                 val2 = farfield[nt][na]*math.sin(t[nt])*math.sin(a[na])
-                 val3 = farfield[nt][na]*math.cos(t[nt])
-                 outFile.write(f"{{val1}} {{val2}} {{val3}}\\n")
-
-         outFile.write(f'\\n\\n');
-         outFile.write(f'POINT_DATA {{len(t)*len(a)}}\\n');
-         outFile.write(f'SCALARS gain double 1\\n');
-         outFile.write(f'LOOKUP_TABLE default\\n');
-         for na in range(len(a)):
-             for nt in range(len(t)):
-                 outFile.write(f"{{farfield[nt][na]}}\\n")
+Zin = port[{portIndex}].uf_tot / port[{portIndex}].if_tot
+s11 = port[{portIndex}].uf_ref / port[{portIndex}].uf_inc
+s11_dB = 20.0*np.log10(np.abs(s11))
+
+# plot the feed point impedance
+figure()
+plot(freq / 1e6, np.real(Zin), 'k-', linewidth=2, label=r'$\\Re(Z_{{in}})$')
+grid()
+plot(freq / 1e6, np.imag(Zin), 'r--', linewidth=2, label=r'$\\Im(Z_{{in}})$')
+title('impedance of {portName}')
+xlabel('frequency (MHz)')
+ylabel('$Z (\\Omega)$')
+legend()
+
+# plot S11 parameter
+figure()
+plot(freq/1e6, s11_dB, 'k-', linewidth=2, label='$S_{{11}}$')
+grid()
+legend()
+title('S11-Parameter (dB) of {portName}')
+ylabel('S11 (dB)')
+xlabel('Frequency (MHz)')
 
 #
-# Frequency range
+#   Write S11, real and imag Z_in into CSV file separated by ';'
 #
-freq = np.linspace(max([0, f0-fc]), f0+fc, {freqCount})
-plotFrequency = {plotFrequency}
-port[{currentNF2FFInputPortIndex}].CalcPort(Sim_Path, freq)
-P_in_0 = np.interp(f0, freq, port[{currentNF2FFInputPortIndex}].P_acc)
+filename = '{csvFileName}'
+
+with open(filename, 'w', newline='') as csvfile:
+\twriter = csv.writer(csvfile, delimiter=';', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+\twriter.writerow(['freq (MHz)', 's11 (dB)', 'real Z_in', 'imag Z_in', 'Z_in total'])
+\twriter.writerows(np.array([(freq/1e6), s11_dB, np.real(Zin), np.imag(Zin), np.abs(Zin)]).T)
+
+"""
+
+        return genScript
+
+    def getS21ResultsScriptLines(self, sourcePortName, targetPortName, csvFileName):
+        """
+        S11 and S21 plot of port pair, script must already define freq and both ports calculated by CalcPort().
+        :param csvFileName: file into which S11 and S21 are written
+        """
+        sourcePortIndex = self.internalPortIndexNamesList[sourcePortName]
+        targetPortIndex = self.internalPortIndexNamesList[targetPortName]
+
+        genScript = f"""#######################################################################################################################################
+# S21 {sourcePortName} -> {targetPortName}
+#######################################################################################################################################
+
+s11 = port[{sourcePortIndex}].uf_ref / port[{sourcePortIndex}].uf_inc
+s21 = port[{targetPortIndex}].uf_ref / port[{sourcePortIndex}].uf_inc
+s11_dB = 20*log10(abs(s11))
+s21_dB = 20*log10(abs(s21))
+
+figure()
+plot(freq/1e9, s11_dB, 'k-', linewidth=2)
+grid()
+plot(freq/1e9, s21_dB, 'r--', linewidth=2)
+legend(('$S_{{11}}$','$S_{{21}}$'))
+title('S21-Parameter\\n{sourcePortName} $\\\\rightarrow$ {targetPortName}', fontsize=12)
+ylabel('S21(dB)', fontsize=12)
+xlabel('frequency (GHz)', fontsize=12)
+ylim([-40, 2])
+
+filename = '{csvFileName}'
+
+with open(filename, 'w', newline='') as csvfile:
+\twriter = csv.writer(csvfile, delimiter=';', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+\twriter.writerow(['freq (Hz)', 's11 (dB)', 's21 (dB)'])
+\twriter.writerows(np.array([freq, s11_dB, s21_dB]).T)
+
+"""
 
+        return genScript
+
+    def getFarfieldScriptLines(self):
+        """
+        :return: far field functions and theta, phi ranges set in GUI, common part of all NF2FF boxes results
+        """
+        thetaStart = str(self.form.portNf2ffThetaStart.value())
+        thetaStop = str(self.form.portNf2ffThetaStop.value())
+        thetaStep = str(self.form.portNf2ffThetaStep.value())
+
+        phiStart = str(self.form.portNf2ffPhiStart.value())
+        phiStop = str(self.form.portNf2ffPhiStop.value())
+        phiStep = str(self.form.portNf2ffPhiStep.value())
+
+        genScript = f"""{self.getFarfieldVtkWriterScriptLines()}
+{self.getNF2FFCacheScriptLines()}
 #
-# Calculate the far field at phi=0 degrees and at phi=90 degrees
-#   Using angles in degrees.
+# Calculate the far field, using angles in degrees.
 #
 thetaRange = arangeWithEndpoint({thetaStart}, {thetaStop}, {thetaStep})
 phiRange = arangeWithEndpoint({phiStart}, {phiStop}, {phiStep}) - 180
 
-print( 'calculating the 3D far field...' )
+"""
 
-#
-#	nf2ffBoxList[<name>] - NF2FF box structure which should be calculated
-#       INPUT ANGLES ARE IN DEGREES for python interface!
-#
-nf2ff = nf2ffBoxList['{nf2ffBoxName.replace(" ", "_")}'].CalcNF2FF(Sim_Path, plotFrequency, thetaRange, phiRange, outfile='3D_Pattern.h5', verbose=True, read_cached=False)
+        return genScript
+
+    #########################################################################################################################
+    #                                  _                       _       _          _ _      _            _
+    #                                 | |                     (_)     | |        | (_)    | |          | |
+    #   __ _  ___ _ __   ___ _ __ __ _| |_ ___   ___  ___ _ __ _ _ __ | |_    ___| |_  ___| | _____  __| |
+    #  / _` |/ _ \ '_ \ / _ \ '__/ _` | __/ _ \ / __|/ __| '__| | '_ \| __|  / __| | |/ __| |/ / _ \/ _` |
+    # | (_| |  __/ | | |  __/ | | (_| | ||  __/ \__ \ (__| |  | | |_) | |_  | (__| | | (__|   <  __/ (_| |
+    #  \__, |\___|_| |_|\___|_|  \__,_|\__\___| |___/\___|_|  |_| .__/ \__|  \___|_|_|\___|_|\_\___|\__,_|
+    #   __/ |                                                   | |
+    #  |___/
+    #
+    #	GENERATE SCRIPT CLICKED - go through object assignment tree categories, output child item data.
+    #
+    def generateOpenEMSScript(self, outputDir=None):
+        self.beginExportSession()
+
+        # Create outputDir relative to local FreeCAD file if output dir does not exists
+        #   if outputDir is set to same value
+        #   if outputStr is None then folder with name as FreeCAD file with suffix _openEMS_simulation is created
+        outputDir = self.createOuputDir(outputDir)
+
+        # Write _OpenEMS.py script file to current directory.
+        currDir, nameBase = self.getCurrDir()
+        if (not outputDir is None):
+            fileName = f"{outputDir}/{nameBase}_openEMS.py"
+        else:
+            fileName = f"{currDir}/{nameBase}_openEMS.py"
+
+        # Update status bar to inform user that exporting has begun.
+        if self.statusBar is not None:
+            self.statusBar.showMessage("Generating OpenEMS script and geometry files ...", 5000)
+            QtWidgets.QApplication.processEvents()
+
+        # Constants and variable initialization.
+
+        refUnit = self.getUnitLengthFromUI_m()  # Coordinates need to be given in drawing units
+        refUnitStr = self.form.simParamsDeltaUnitList.currentText()
+        sf = self.getFreeCADUnitLength_m() / refUnit  # scaling factor for FreeCAD units to drawing units
 
-Dmax_dB = 10*log10(nf2ff.Dmax[0])
-E_norm = 20.0*log10(nf2ff.E_norm[0]/np.max(nf2ff.E_norm[0])) + 10*log10(nf2ff.Dmax[0])
+        # List categories and items.
 
-theta_HPBW = thetaRange[ np.where(squeeze(E_norm[:,phiRange==0])<Dmax_dB-3)[0][0] ]
+        itemsByClassName = self.getItemsByClassName()
 
-# display power and directivity
-print('radiated power: Prad = ' + str(nf2ff.Prad[0]) + ' Watt')
-print('directivity: Dmax = ' + str(Dmax_dB) + ' dBi)')
-print('efficiency: nu_rad = ' + str(100*nf2ff.Prad[0]/P_in_0) + ' %')
-print('theta_HPBW = ' + str(theta_HPBW) + '°')
+        # Write script header, sections are streamed into file as they are generated.
 
-with (open('openEMS_simulation_nf2ff_info.txt', 'w') as outFile):
-    outFile.write(f'radiated power: Prad = {{nf2ff.Prad[0]}} Watt\\n')
-    outFile.write(f'directivity: Dmax = {{Dmax_dB}} dBi)\\n')
-    outFile.write(f'efficiency: nu_rad = {{100*nf2ff.Prad[0]/P_in_0}} %\\n')
-    outFile.write(f'theta_HPBW = {{theta_HPBW}}°\\n')
-    outFile.write(f'\\n')
+        with ScriptEmitter(fileName) as genScript:
 
-##
-E_norm = 20.0*log10(nf2ff.E_norm[0]/np.max(nf2ff.E_norm[0])) + 10*log10(nf2ff.Dmax[0])
-E_CPRH = 20.0*log10(np.abs(nf2ff.E_cprh[0])/np.max(nf2ff.E_norm[0])) + 10*log10(nf2ff.Dmax[0])
-E_CPLH = 20.0*log10(np.abs(nf2ff.E_cplh[0])/np.max(nf2ff.E_norm[0])) + 10*log10(nf2ff.Dmax[0])
+            genScript += "# OpenEMS FDTD Analysis Automation Script\n"
+            genScript += "#\n"
 
-##
-figure()
-plot(thetaRange, E_norm[:,phiRange==0],'k-' , linewidth=2, label='$|E|$')
-plot(thetaRange, E_CPRH[:,phiRange==0],'g--', linewidth=2, label='$|E_{{CPRH}}|$')
-plot(thetaRange, E_CPLH[:,phiRange==0],'r-.', linewidth=2, label='$|E_{{CPLH}}|$')
-grid()
-xlabel('theta (deg)')
-ylabel('directivity (dBi)')
-title('Frequency: {{}} GHz'.format(nf2ff.freq[0]/1e9))
-legend()
+            genScript += self.getInitScriptLines()
+
+            genScript += "## switches & options\n"
+            genScript += "draw_3d_pattern = 0  # this may take a while...\n"
+            genScript += "use_pml = 0          # use pml boundaries instead of mur\n"
+            genScript += "\n"
+            genScript += "currDir = os.getcwd()\n"
+            genScript += "print(currDir)\n"
+            genScript += "\n"
+
+            genScript += "# setup_only : dry run to view geometry, validate settings, no FDTD computations\n"
+            genScript += "# debug_pec  : generated PEC skeleton (use ParaView to inspect)\n"
+            genScript += f"debug_pec = {'True' if self.form.generateDebugPECCheckbox.isChecked() else 'False'}\n"
+            genScript += f"setup_only = {'True' if self.form.generateJustPreviewCheckbox.isChecked() else 'False'}\n"
+            genScript += "\n"
+
+            previewMode, runSimulation = self.getSimulationRunMode()
+            genScript += "# preview_mode   : geometry preview in AppCSXCAD, None, 'blocking' waits until its window is closed, 'background' does not wait\n"
+            genScript += "# run_simulation : False when only geometry preview is shown\n"
+            genScript += f"preview_mode = {'None' if previewMode is None else repr(previewMode)}\n"
+            genScript += f"run_simulation = {'True' if runSimulation else 'False'}\n"
+            genScript += "\n"
+
+            openEMSEngine, openEMSNumThreads = self.getOpenEMSEngineSettings()
+            genScript += "# openEMS_engine : FDTD engine (basic, sse, sse-compressed, multithreaded), None means openEMS default engine\n"
+            genScript += "# numThreads     : number of threads used by multithreaded engine, 0 means all cores, job scheduler sets it by OPENEMS_NUM_THREADS\n"
+            genScript += f"openEMS_engine = {'None' if openEMSEngine is None else repr(openEMSEngine)}\n"
+            genScript += f"numThreads = int(os.environ.get('OPENEMS_NUM_THREADS', {openEMSNumThreads}))\n"
+            genScript += "\n"
+
+            # Write simulation settings.
+
+            genScript += "## prepare simulation folder\n"
+            genScript += "Sim_Path = os.path.join(currDir, 'simulation_output')\n"
+            genScript += "Sim_CSX = '" + os.path.splitext(os.path.basename(self.cadHelpers.getCurrDocumentFileName()))[0] + ".xml'\n"
+
+            genScript += "if os.path.exists(Sim_Path):\n"
+            genScript += "\tshutil.rmtree(Sim_Path)   # clear previous directory\n"
+            genScript += "\tos.mkdir(Sim_Path)    # create empty simulation folder\n"
+            genScript += "\n"
+
+            genScript += "## setup FDTD parameter & excitation function\n"
+            genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + "\n"
+            genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + " # 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
+
+            if (self.getModelCoordsType() == "cylindrical"):
+                genScript += "CSX = CSXCAD.ContinuousStructure(CoordSystem=1)\n"
+                genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement, CoordSystem=1)\n"
+            else:
+                genScript += "CSX = CSXCAD.ContinuousStructure()\n"
+                genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement)\n"
+
+            genScript += "FDTD.SetCSX(CSX)\n"
+            genScript += "\n"
+
+            print("======================== REPORT BEGIN ========================\n")
+
+            self.reportFreeCADItemSettings(itemsByClassName.get("FreeCADSettingsItem", None))
+
+            # Write boundary conditions definitions.
+            genScript += self.getCachedSectionScriptLines("boundaryConditions", lambda: self.getBoundaryConditionsScriptLines(), itemsByClassName)
+
+            # Write coordinate system definitions.
+            genScript += self.getCoordinateSystemScriptLines()
+
+            # Write excitation definition.
+            genScript += self.getCachedSectionScriptLines("excitation", lambda: self.getExcitationScriptLines(itemsByClassName.get("ExcitationSettingsItem", None)), itemsByClassName)
+
+            # Write material definitions.
+            genScript += self.getCachedSectionScriptLines("materials", lambda: self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir), itemsByClassName, outputDir)
+
+            # Write grid definitions.
+            genScript += self.getCachedSectionScriptLines("grid", lambda: self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None), outputDir), itemsByClassName, outputDir)
+
+            # Write port definitions.
+            genScript += self.getCachedSectionScriptLines("ports", lambda: self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None)), itemsByClassName)
+
+            # Write lumped part definitions.
+            genScript += self.getCachedSectionScriptLines("lumpedParts", lambda: self.getLumpedPartDefinitionsScriptLines(itemsByClassName.get("LumpedPartSettingsItem", None)), itemsByClassName)
+
+            # Write probes definitions
+            genScript += self.getCachedSectionScriptLines("probes", lambda: self.getProbeDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None)), itemsByClassName)
+
+            # Write NF2FF probe grid definitions.
+            genScript += self.getCachedSectionScriptLines("nf2ff", lambda: self.getNF2FFDefinitionsScriptLines(itemsByClassName.get("ProbeSettingsItem", None)), itemsByClassName)
+
+            # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
+            genScript += self.getCachedSectionScriptLines("minimalGridlineSpacing", lambda: self.getMinimalGridlineSpacingScriptLines(), itemsByClassName)
+
+            # Estimate simulation cost from resolved mesh lines, shown in GUI and written next to script.
+            self.reportMeshCostEstimate(itemsByClassName, outputDir)
+
+            print("======================== REPORT END ========================\n")
+
+            # Finalize script.
+
+            genScript += "#######################################################################################################################################\n"
+            genScript += "# RUN\n"
+            genScript += "#######################################################################################################################################\n"
+
+            genScript += "### Run the simulation\n"
+            genScript += "CSX_file = os.path.join(Sim_Path, Sim_CSX)\n"
+            genScript += "if not os.path.exists(Sim_Path):\n"
+            genScript += "\tos.mkdir(Sim_Path)\n"
+            genScript += "CSX.Write2XML(CSX_file)\n"
+            genScript += "# job scheduler runs scripts unattended so preview is never opened\n"
+            genScript += "if os.environ.get('OPENEMS_NO_PREVIEW', '') == '1':\n"
+            genScript += "\tpreview_mode = None\n"
+            genScript += "if preview_mode is not None:\n"
+            genScript += "\tfrom CSXCAD import AppCSXCAD_BIN\n"
+            genScript += "\tif preview_mode == 'background':\n"
+            genScript += "\t\t# simulation rewrites Sim_Path while viewer is still open, viewer gets copy of model in temp directory\n"
+            genScript += "\t\tpreview_fd, preview_CSX_file = tempfile.mkstemp(prefix='preview_', suffix='.xml')\n"
+            genScript += "\t\tos.close(preview_fd)\n"
+            genScript += "\t\tshutil.copyfile(CSX_file, preview_CSX_file)\n"
+            genScript += "\t\tsubprocess.Popen([AppCSXCAD_BIN, preview_CSX_file])\n"
+            genScript += "\telse:\n"
+            genScript += "\t\tos.system(AppCSXCAD_BIN + ' \"{}\"'.format(CSX_file))\n"
+            genScript += "\n"
+
+            resultCacheDir = self.getResultCacheDir()
+            genScript += "## result cache, results of model with same hash of FDTD parameters, geometry, mesh, excitation, ports and STL files are reused\n"
+            genScript += f"model_hash = '{self.getModelHash()}'\n"
+            genScript += f"result_cache_dir = {'None' if resultCacheDir is None else repr(resultCacheDir)}\n"
+            genScript += "result_cache_path = os.path.join(result_cache_dir, model_hash) if result_cache_dir else None\n"
+            genScript += "use_cached_results = result_cache_path is not None and os.path.isdir(os.path.join(result_cache_path, 'simulation_output')) and not setup_only and not debug_pec\n"
+            genScript += "\n"
+
+            genScript += self.getPostprocessingModelSaveScriptLines()
+
+            runScript = ""
+            if openEMSEngine is None:
+                runScript += "FDTD.Run(Sim_Path, verbose=3, cleanup=True, setup_only=setup_only, debug_pec=debug_pec, numThreads=numThreads)\n"
+            else:
+                #
+                #   openEMS python interface has no engine selection, simulation setup is written into XML file and openEMS
+                #   executable is run with engine command line option same way as octave RunOpenEMS() does it
+                #
+                runScript += "# engine cannot be selected in openEMS python interface, openEMS executable is run instead\n"
+                runScript += "openEMS_file = os.path.join(Sim_Path, 'openEMS_' + Sim_CSX)\n"
+                runScript += "FDTD.Write2XML(openEMS_file)\n"
+                runScript += "openEMS_args = ['openEMS', openEMS_file, '--engine=' + openEMS_engine]\n"
+                runScript += "if numThreads > 0:\n"
+                runScript += "\topenEMS_args.append('--numThreads=' + str(numThreads))\n"
+                runScript += "if setup_only:\n"
+                runScript += "\topenEMS_args.append('--no-simulation')\n"
+                runScript += "if debug_pec:\n"
+                runScript += "\topenEMS_args.append('--debug-PEC')\n"
+                runScript += "subprocess.run(openEMS_args, cwd=Sim_Path, check=True)\n"
+
+            # ports and NF2FF boxes are saved with results so they are also in result cache
+            runScript += "generatorFunc_SavePostprocessingModel(Sim_Path, globals().get('port', {}), globals().get('nf2ffBoxList', {}))\n"
+
+            #
+            #   completed results are copied into uniquely named .part directory and stored into cache by renaming it, so
+            #   runs of same model at once do not write into same directory, aborted simulation is not stored
+            #   files are copied, not hard linked, so postprocessing writing into simulation output cannot change cache
+            #
+            runScript += "if result_cache_path is not None and not setup_only and not debug_pec and not os.path.exists(os.path.join(Sim_Path, 'ABORT')):\n"
+            runScript += "\tos.makedirs(result_cache_path, exist_ok=True)\n"
+            runScript += "\tresult_cache_part = tempfile.mkdtemp(prefix='simulation_output.', suffix='.part', dir=result_cache_path)\n"
+            runScript += "\tshutil.copytree(Sim_Path, result_cache_part, dirs_exist_ok=True)\n"
+            runScript += "\ttry:\n"
+            runScript += "\t\tos.rename(result_cache_part, os.path.join(result_cache_path, 'simulation_output'))\n"
+            runScript += "\t\tprint('Simulation results stored in result cache: ' + result_cache_path)\n"
+            runScript += "\texcept OSError:\n"
+            runScript += "\t\t# results of same model were already stored by other run, they are kept\n"
+            runScript += "\t\tif not os.path.isdir(os.path.join(result_cache_path, 'simulation_output')):\n"
+            runScript += "\t\t\traise\n"
+            runScript += "\t\tshutil.rmtree(result_cache_part, ignore_errors=True)\n"
+
+            genScript += "if not run_simulation:\n"
+            genScript += "\tprint('Simulation is not run, run mode is preview only.')\n"
+            genScript += "elif use_cached_results:\n"
+            genScript += "\tprint('Simulation results found in result cache, simulation is not run: ' + result_cache_path)\n"
+            genScript += "\tshutil.copytree(os.path.join(result_cache_path, 'simulation_output'), Sim_Path, dirs_exist_ok=True)\n"
+            genScript += "else:\n"
+            genScript += "".join(["\t" + line + "\n" for line in runScript.splitlines()])
+
+        # Show message or update status bar to inform user that exporting has finished.
+
+        self.guiHelpers.displayMessage('Simulation script written to: ' + fileName, forceModal=self.settingsOverrides is None)
+        print('Simulation script written to: ' + fileName)
+
+        return fileName
+
+    #
+    #	Write NF2FF Button clicked, generate script to display far field pattern
+    #
+    def writeNf2ffButtonClicked(self, outputDir=None, nf2ffBoxName="", nf2ffBoxInputPortName="", plotFrequency=0, freqCount=501):
+        self.beginExportSession()
+        genScript = ""
+        genScript += "# Plot far field for structure.\n"
+        genScript += "#\n"
+
+        genScript += self.getInitScriptLines()
+
+        genScript += "currDir = os.getcwd()\n"
+        genScript += "Sim_Path = os.path.join(currDir, r'simulation_output')\n"
+        genScript += "print(currDir)\n"
+        genScript += "\n"
+
+        # List categories and items.
+        itemsByClassName = self.getItemsByClassName()
+
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
+
+        #
+        #   Current NF2FF box index
+        #
+        print(f"writeNf2ffButtonClicked() > generate script, getting nf2ff box index for '{nf2ffBoxName}'")
+        currentNF2FFInputPortIndex = self.internalPortIndexNamesList[nf2ffBoxInputPortName]
+
+        #
+        #   ATTENTION THIS IS SPECIFIC FOR FAR FIELD PLOTTING, plotFrequency and frequencies count
+        #       port is calculated to get P_in (input power)
+        #
+        genScript += f"""
+#######################################################################################################################################
+# Farfield plot and 3D gain generated
+#######################################################################################################################################
 
-show()
-  
 #
-# Dump radiation field to vtk file
+# Frequency range
 #
-directivity = nf2ff.P_rad[0]/nf2ff.Prad*4*pi
-directivity_CPRH = np.abs(nf2ff.E_cprh[0])**2/np.max(nf2ff.E_norm[0][:])**2*nf2ff.Dmax[0]
-directivity_CPLH = np.abs(nf2ff.E_cplh[0])**2/np.max(nf2ff.E_norm[0][:])**2*nf2ff.Dmax[0]
-
-generatorFunc_DumpFF2VTK(directivity, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, '3D_Pattern_GAIN.vtk'))
-generatorFunc_DumpFF2VTK(directivity_CPRH, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, '3D_Pattern_CPRH.vtk'))
-generatorFunc_DumpFF2VTK(directivity_CPLH, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, '3D_Pattern_CPLH.vtk'))
+freq = np.linspace(max([0, f0-fc]), f0+fc, {freqCount})
+port[{currentNF2FFInputPortIndex}].CalcPort(Sim_Path, freq)
 
-E_far_normalized = E_norm / np.max(E_norm) * nf2ff.Dmax[0]
-generatorFunc_DumpFF2VTK(E_far_normalized, nf2ff.theta, nf2ff.phi, os.path.join(Sim_Path, '3D_Pattern_Efield_norm.vtk'))
+{self.getFarfieldScriptLines()}{self.getNF2FFResultsScriptLines(nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency)}
+show()
 """
 
         #
@@ -1878,6 +2542,7 @@ generatorFunc_DumpFF2VTK(E_far_normalized, nf2ff.theta, nf2ff.phi, os.path.join(
         self.guiHelpers.displayMessage('Script to display far field written into: ' + fileName, forceModal=False)
 
     def drawS11ButtonClicked(self, outputDir=None, portName=""):
+        self.beginExportSession()
         genScript = ""
         genScript += "# Plot S11\n"
         genScript += "#\n"
@@ -1889,87 +2554,18 @@ generatorFunc_DumpFF2VTK(E_far_normalized, nf2ff.theta, nf2ff.phi, os.path.join(
         genScript += "print(currDir)\n"
         genScript += "\n"
 
-        genScript += "## setup FDTD parameter & excitation function\n"
-        genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + "\n"
-        genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + " # 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
-
-        if (self.getModelCoordsType() == "cylindrical"):
-            genScript += "CSX = CSXCAD.ContinuousStructure(CoordSystem=1)\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement, CoordSystem=1)\n"
-        else:
-            genScript += "CSX = CSXCAD.ContinuousStructure()\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement)\n"
-
-        genScript += "FDTD.SetCSX(CSX)\n"
-        genScript += "\n"
-
         # List categories and items.
         itemsByClassName = self.getItemsByClassName()
 
-        # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
-
-        # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
-
-        # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None),
-                                                            outputDir, generateObjects=False)
-
-        # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
-
-        # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
-
-        # Write port definitions.
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
-
-        genScript += f"""## postprocessing & do the plots
-freq = np.linspace(max(1e6,f0-fc), f0+fc, 501)
-port[{self.internalPortIndexNamesList[portName]}].CalcPort(Sim_Path, freq)
-
-Zin = port[{self.internalPortIndexNamesList[portName]}].uf_tot / port[{self.internalPortIndexNamesList[portName]}].if_tot
-s11 = port[{self.internalPortIndexNamesList[portName]}].uf_ref / port[{self.internalPortIndexNamesList[portName]}].uf_inc
-s11_dB = 20.0*np.log10(np.abs(s11))
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
 
-# plot the feed point impedance
-figure()
-plot(freq / 1e6, np.real(Zin), 'k-', linewidth=2, label=r'$\Re(Z_{{in}})$')
-grid()
-plot(freq / 1e6, np.imag(Zin), 'r--', linewidth=2, label=r'$\Im(Z_{{in}})$')
-title('impedance of {portName}')
-xlabel('frequency (MHz)')
-ylabel('$Z (\\Omega)$')
-legend()
-
-# plot S11 parameter
-figure()
-plot(freq/1e6, s11_dB, 'k-', linewidth=2, label='$S_{{11}}$')
-grid()
-legend()
-title('S11-Parameter (dB) of {portName}')
-ylabel('S11 (dB)')
-xlabel('Frequency (MHz)')
-
-show()  #show all figures at once
-
-#
-#   Write S11, real and imag Z_in into CSV file separated by ';'
-#
-filename = 'openEMS_simulation_s11_dB.csv'
-
-with open(filename, 'w', newline='') as csvfile:
-\twriter = csv.writer(csvfile, delimiter=';', quotechar='|', quoting=csv.QUOTE_MINIMAL)
-\twriter.writerow(['freq (MHz)', 's11 (dB)', 'real Z_in', 'imag Z_in', 'Z_in total'])
-\twriter.writerows(np.array([
-\t\t(freq/1e6),
-\t\ts11_dB,
-\t\tnp.real(Zin),
-\t\tnp.imag(Zin),
-\t\tnp.abs(Zin)
-\t]).T) #creates array with 1st row frequencies, 2nd row S11, ... and transpose it
-"""
+        genScript += "## postprocessing & do the plots\n"
+        genScript += "freq = np.linspace(max(1e6,f0-fc), f0+fc, 501)\n"
+        genScript += f"port[{self.internalPortIndexNamesList[portName]}].CalcPort(Sim_Path, freq)\n"
+        genScript += "\n"
+        genScript += self.getS11ResultsScriptLines(portName, "openEMS_simulation_s11_dB.csv")
+        genScript += "show()  #show all figures at once\n"
 
         #
         # WRITE OpenEMS Script file into current dir
@@ -1989,6 +2585,7 @@ with open(filename, 'w', newline='') as csvfile:
         self.guiHelpers.displayMessage('Draw result from simulation file written into: ' + fileName, forceModal=False)
 
     def drawS21ButtonClicked(self, outputDir=None, sourcePortName="", targetPortName=""):
+        self.beginExportSession()
         genScript = ""
         genScript += "# Plot S11, S21 parameters from OpenEMS results.\n"
         genScript += "#\n"
@@ -2000,94 +2597,197 @@ with open(filename, 'w', newline='') as csvfile:
         genScript += "print(currDir)\n"
         genScript += "\n"
 
-        genScript += "## setup FDTD parameter & excitation function\n"
-        genScript += "max_timesteps = " + str(self.form.simParamsMaxTimesteps.value()) + "\n"
-        genScript += "min_decrement = " + str(self.form.simParamsMinDecrement.value()) + " # 10*log10(min_decrement) dB  (i.e. 1E-5 means -50 dB)\n"
-
-        if (self.getModelCoordsType() == "cylindrical"):
-            genScript += "CSX = CSXCAD.ContinuousStructure(CoordSystem=1)\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement, CoordSystem=1)\n"
-        else:
-            genScript += "CSX = CSXCAD.ContinuousStructure()\n"
-            genScript += "FDTD = openEMS(NrTS=max_timesteps, EndCriteria=min_decrement)\n"
-
-        genScript += "FDTD.SetCSX(CSX)\n"
-        genScript += "\n"
-
         # List categories and items.
         itemsByClassName = self.getItemsByClassName()
 
-        # Write coordinate system definitions.
-        genScript += self.getCoordinateSystemScriptLines()
-
-        # Write excitation definition.
-        genScript += self.getExcitationScriptLines(definitionsOnly=True)
-
-        # Write material definitions.
-        genScript += self.getMaterialDefinitionsScriptLines(itemsByClassName.get("MaterialSettingsItem", None), outputDir, generateObjects=False)
-
-        # Write grid definitions.
-        genScript += self.getOrderedGridDefinitionsScriptLines(itemsByClassName.get("GridSettingsItem", None))
-
-        # Write scriptlines which removes gridline too close, must be enabled in GUI, it's checking checkbox inside
-        genScript += self.getMinimalGridlineSpacingScriptLines()
-
-        # Write port definitions.
-        genScript += self.getPortDefinitionsScriptLines(itemsByClassName.get("PortSettingsItem", None))
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
 
         # Post-processing and plot generation.
-        genScript += "#######################################################################################################################################\n"
-        genScript += "# POST-PROCESSING AND PLOT GENERATION\n"
-        genScript += "#######################################################################################################################################\n"
-        genScript += "\n"
         genScript += "freq = np.linspace(max(1e6, f0 - fc), f0 + fc, 501)\n"
         genScript += f"port[{self.internalPortIndexNamesList[sourcePortName]}].CalcPort(Sim_Path, freq)\n"
         genScript += f"port[{self.internalPortIndexNamesList[targetPortName]}].CalcPort(Sim_Path, freq)\n"
         genScript += "\n"
-        genScript += f"s11 = port[{self.internalPortIndexNamesList[sourcePortName]}].uf_ref / port[{self.internalPortIndexNamesList[sourcePortName]}].uf_inc\n"
-        genScript += f"s21 = port[{self.internalPortIndexNamesList[targetPortName]}].uf_ref / port[{self.internalPortIndexNamesList[sourcePortName]}].uf_inc\n"
-        genScript += "\n"
-        genScript += "s11_dB = 20*log10(abs(s11))\n"
-        genScript += "s21_dB = 20*log10(abs(s21))\n"
-        genScript += "\n"
-        genScript += "plot(freq/1e9,s11_dB,'k-', linewidth=2)\n"
-        genScript += "grid()\n"
-        genScript += "plot(freq/1e9,s21_dB,'r--', linewidth=2)\n"
-        genScript += "legend(('$S_{11}$','$S_{21}$'))\n"
-        genScript += f"title('S21-Parameter\\n{sourcePortName} $\\\\rightarrow$ {targetPortName}', fontsize=12)\n"
-        genScript += "ylabel('S21(dB)', fontsize=12)\n"
-        genScript += "xlabel('frequency (GHz)', fontsize=12)\n"
-        genScript += "ylim([-40, 2])\n"
+        genScript += self.getS21ResultsScriptLines(sourcePortName, targetPortName, "openEMS_simulation_s11_dB.csv")
         genScript += "show()\n"
+
+        # Write OpenEMS Script file into current dir.
+
+        currDir, nameBase = self.getCurrDir()
+
+        self.createOuputDir(outputDir)
+        if (not outputDir is None):
+            fileName = f"{outputDir}/{nameBase}_draw_S21.py"
+        else:
+            fileName = f"{currDir}/{nameBase}_draw_S21.py"
+
+        f = open(fileName, "w", encoding='utf-8')
+        f.write(genScript)
+        f.close()
+        print('Draw result from simulation file written to: ' + fileName)
+        self.guiHelpers.displayMessage('Draw result from simulation file written to: ' + fileName, forceModal=False)
+
+    def combinedPostprocessingButtonClicked(self, outputDir=None, s11PortNames=[], s21PortPairs=[], nf2ffBoxes=[], freqCount=501, sParameterExport=False):
+        """
+        Write one post-processing script for all requested results, structure is defined once and each port is
+        calculated by CalcPort() just once, S11, S21, input impedances and far fields are computed from these results.
+        :param s11PortNames: list of port names, S11 and input impedance is plotted for each
+        :param s21PortPairs: list of [source port name, target port name]
+        :param nf2ffBoxes: list of [nf2ff box name, input port name, plot frequency]
+        :param freqCount: number of frequencies in post-processing frequency range
+        :param sParameterExport: complex S-parameters of all ports are written into Touchstone and HDF5 file
+        :return: script file name
+        """
+        self.beginExportSession()
+        genScript = ""
+        genScript += "# Combined post-processing, S-parameters, input impedances and far field from one set of port results.\n"
+        genScript += "#\n"
+
+        genScript += self.getInitScriptLines()
+
+        genScript += "currDir = os.getcwd()\n"
+        genScript += "Sim_Path = os.path.join(currDir, r'simulation_output')\n"
+        genScript += "print(currDir)\n"
         genScript += "\n"
 
+        # List categories and items.
+        itemsByClassName = self.getItemsByClassName()
+
+        # Structure is defined only when post-processing does not load ports and NF2FF boxes saved by simulation script.
+        genScript += self.getPostprocessingStructureScriptLines(self.getPostprocessingStructureDefinitionScriptLines(itemsByClassName, outputDir))
+
+        portIndexes = self.getCombinedPostprocessingPortIndexes(s11PortNames, s21PortPairs, nf2ffBoxes)
+        if sParameterExport:
+            sParameterPorts, excitedPorts = self.getSParameterExportPorts()
+            if len(excitedPorts) == 0:
+                print("combinedPostprocessingButtonClicked() > S-parameters export skipped, there is no active port")
+                self.guiHelpers.displayMessage("S-parameters export skipped, there is no active port to excite.", forceModal=False)
+                sParameterExport = False
+            else:
+                portIndexes = sorted(set(portIndexes + [portIndex for [portName, portIndex] in sParameterPorts]))
+
+        #
+        #   Ports are calculated once for whole frequency range, all results below use their values.
+        #
         genScript += "#######################################################################################################################################\n"
-        genScript += "# SAVE PLOT DATA\n"
+        genScript += "# PORTS CALCULATION\n"
         genScript += "#######################################################################################################################################\n"
         genScript += "\n"
-        genScript += "#\n"
-        genScript += "#   Write S11, real and imag Z_in into CSV file separated by ';'\n"
-        genScript += "#\n"
-        genScript += "filename = 'openEMS_simulation_s11_dB.csv'\n"
-        genScript += "\n"
-        genScript += "with open(filename, 'w', newline='') as csvfile:\n"
-        genScript += "\twriter = csv.writer(csvfile, delimiter=';', quotechar='|', quoting=csv.QUOTE_MINIMAL)\n"
-        genScript += "\twriter.writerow(['freq (Hz)', 's11 (dB)', 's21 (dB)'])\n"
-        genScript += "\twriter.writerows(np.array([freq, s11_dB, s21_dB]).T)  # creates array with 1st row frequencies, 2nd row S11 and transpose it\n"
+        genScript += f"freq = np.linspace(max(1e6, f0 - fc), f0 + fc, {freqCount})\n"
+        genScript += f"for portIndex in {portIndexes}:\n"
+        genScript += "\tport[portIndex].CalcPort(Sim_Path, freq)\n"
         genScript += "\n"
 
-        # Write OpenEMS Script file into current dir.
+        if sParameterExport:
+            genScript += self.getTouchstoneWriterScriptLines()
+            genScript += self.getSParameterHDF5WriterScriptLines()
+            genScript += self.getSParameterExportScriptLines(sParameterPorts, excitedPorts)
 
+        for portName in s11PortNames:
+            genScript += self.getS11ResultsScriptLines(portName, f'openEMS_simulation_s11_dB_{portName.replace(" ", "_")}.csv')
+
+        for [sourcePortName, targetPortName] in s21PortPairs:
+            genScript += self.getS21ResultsScriptLines(sourcePortName, targetPortName, f'openEMS_simulation_s21_dB_{sourcePortName.replace(" ", "_")}_{targetPortName.replace(" ", "_")}.csv')
+
+        if len(nf2ffBoxes) > 0:
+            genScript += "#######################################################################################################################################\n"
+            genScript += "# FARFIELD\n"
+            genScript += "#######################################################################################################################################\n"
+            genScript += "\n"
+            genScript += self.getFarfieldScriptLines()
+
+            for [nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency] in nf2ffBoxes:
+                # single box keeps output file names of NF2FF script, more boxes have their name appended
+                fileSuffix = "" if len(nf2ffBoxes) == 1 else "_" + nf2ffBoxName.replace(" ", "_")
+
+                genScript += self.getNF2FFResultsScriptLines(nf2ffBoxName, nf2ffBoxInputPortName, plotFrequency, fileSuffix)
+
+        genScript += "show()  #show all figures at once\n"
+
+        #
+        # WRITE OpenEMS Script file into current dir
+        #
         currDir, nameBase = self.getCurrDir()
 
         self.createOuputDir(outputDir)
         if (not outputDir is None):
-            fileName = f"{outputDir}/{nameBase}_draw_S21.py"
+            fileName = f"{outputDir}/{nameBase}_postprocessing.py"
         else:
-            fileName = f"{currDir}/{nameBase}_draw_S21.py"
+            fileName = f"{currDir}/{nameBase}_postprocessing.py"
 
         f = open(fileName, "w", encoding='utf-8')
         f.write(genScript)
         f.close()
-        print('Draw result from simulation file written to: ' + fileName)
-        self.guiHelpers.displayMessage('Draw result from simulation file written to: ' + fileName, forceModal=False)
+        print('Combined post-processing script written into: ' + fileName)
+        self.guiHelpers.displayMessage('Combined post-processing script written into: ' + fileName, forceModal=False)
+
+        return fileName
+
+    def writeSMatrixScript(self, outputDir, runs, referenceImpedance=50, freqCount=501):
+        """
+        Write script which reads results of all S-matrix runs and writes them into Touchstone file, each run has one port
+        excited and gives one column of S-matrix.
+        :param runs: list of [excited port name, excited port index, run directory relative to outputDir]
+        :return: script file name
+        """
+        currDir, nameBase = self.getCurrDir()
+        portsCount = len(runs)
+
+        genScript = ""
+        genScript += "# Assemble S-matrix from runs with one excited port each and write it into Touchstone file.\n"
+        genScript += "#\n"
+
+        genScript += self.getInitScriptLines()
+
+        genScript += "currDir = os.path.dirname(os.path.abspath(__file__))\n"
+        genScript += "\n"
+
+        genScript += self.getPostprocessingModelLoadScriptLines()
+        genScript += self.getTouchstoneWriterScriptLines()
+        genScript += self.getSParameterHDF5WriterScriptLines()
+
+        genScript += "#######################################################################################################################################\n"
+        genScript += "# S-MATRIX\n"
+        genScript += "#######################################################################################################################################\n"
+        genScript += "\n"
+        genScript += f"Z0 = {referenceImpedance}\n"
+        genScript += "runs = [\n"
+        for [portName, portIndex, runDir] in runs:
+            genScript += f"\t[{portIndex}, {repr(runDir)}],\t# excited port index, run directory\n"
+        genScript += "]\n"
+        genScript += "portNames = [" + ", ".join([repr(portName) for [portName, portIndex, runDir] in runs]) + "]\n"
+        genScript += "portIndexes = [portIndex for [portIndex, runDir] in runs]\n"
+        genScript += "\n"
+        genScript += "freq = None\n"
+        genScript += "for column, [excitedPortIndex, runDir] in enumerate(runs):\n"
+        genScript += "\tSim_Path = os.path.join(currDir, runDir, 'simulation_output')\n"
+        genScript += "\tpostprocessing_model = generatorFunc_LoadPostprocessingModel(Sim_Path)\n"
+        genScript += "\tif postprocessing_model is None:\n"
+        genScript += "\t\traise RuntimeError('ports were not saved in ' + Sim_Path + ', run simulation script first')\n"
+        genScript += "\tf0, fc, port, nf2ffBoxList = postprocessing_model\n"
+        genScript += "\n"
+        genScript += "\tif freq is None:\n"
+        genScript += f"\t\tfreq = np.linspace(max(1e6, f0 - fc), f0 + fc, {freqCount})\n"
+        genScript += "\t\tS = np.zeros((len(freq), len(runs), len(runs)), dtype=complex)\n"
+        genScript += "\n"
+        genScript += "\tfor portIndex in portIndexes:\n"
+        genScript += "\t\tport[portIndex].CalcPort(Sim_Path, freq, ref_impedance=Z0)\n"
+        genScript += "\tfor row, portIndex in enumerate(portIndexes):\n"
+        genScript += "\t\tS[:, row, column] = port[portIndex].uf_ref / port[excitedPortIndex].uf_inc\n"
+        genScript += "\n"
+        genScript += f"touchstoneFileName = os.path.join(currDir, '{nameBase}.s{portsCount}p')\n"
+        genScript += "generatorFunc_WriteTouchstone(touchstoneFileName, freq, S, Z0, comments=[f'port {n + 1}: {portNames[n]}, run {runDir}' for n, [portIndex, runDir] in enumerate(runs)])\n"
+        genScript += "print('S-matrix written into: ' + touchstoneFileName)\n"
+        genScript += "\n"
+        genScript += f"hdf5FileName = os.path.join(currDir, '{nameBase}_s_matrix.h5')\n"
+        genScript += "generatorFunc_WriteSParameterHDF5(hdf5FileName, freq, S, Z0, portNames, portNames)\n"
+        genScript += "print('S-matrix written into: ' + hdf5FileName)\n"
+
+        fileName = os.path.join(outputDir, f"{nameBase}_s_matrix.py")
+        f = open(fileName, "w", encoding='utf-8')
+        f.write(genScript)
+        f.close()
+        print('S-matrix script written into: ' + fileName)
+        self.guiHelpers.displayMessage('S-matrix script written into: ' + fileName, forceModal=False)
+
+        return fileName
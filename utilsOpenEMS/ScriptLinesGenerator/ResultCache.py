@@ -0,0 +1,64 @@
+#   author: Lubomir Jagos
+#
+#
+import os
+import sys
+import hashlib
+
+class ResultCache:
+    """
+    Cache of completed simulation results addressed by model hash.
+
+    Exporter computes hash of everything simulation result depends on (FDTD parameters, generated model script sections
+    and content of files they read like STL and sidecar files), generated script looks for <cacheDir>/<hash>/simulation_output
+    and if it exists results are reused instead of running simulation again, otherwise finished simulation output is
+    stored there. Entry is created by renaming .part directory so half copied results are never used.
+    """
+
+    # file content hashes, (path, size, modification time) -> digest, STL files are hashed just when they change
+    fileHashCache = {}
+
+    def __init__(self, cacheDir=None):
+        self.cacheDir = cacheDir if cacheDir is not None else ResultCache.getDefaultCacheDir()
+
+    @staticmethod
+    def getDefaultCacheDir():
+        if sys.platform.startswith("win"):
+            baseDir = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        elif sys.platform == "darwin":
+            baseDir = os.path.expanduser("~/Library/Caches")
+        else:
+            baseDir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+        return os.path.join(baseDir, "FreeCAD-OpenEMS-Export", "results")
+
+    @staticmethod
+    def getFileHash(fileName):
+        fileStat = os.stat(fileName)
+        key = (os.path.abspath(fileName), fileStat.st_size, fileStat.st_mtime_ns)
+        if key not in ResultCache.fileHashCache:
+            fileHash = hashlib.sha256()
+            with open(fileName, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    fileHash.update(chunk)
+            ResultCache.fileHashCache[key] = fileHash.hexdigest()
+        return ResultCache.fileHashCache[key]
+
+    @staticmethod
+    def computeModelHash(modelValues, fileNames):
+        """
+        :param modelValues: list of values defining model (parameters, script lines), they must not contain output directory path
+        :param fileNames: files read by simulation script, they are identified by base name as script reads them relative to its directory
+        :return: hex digest
+        """
+        modelHash = hashlib.sha256()
+        modelHash.update(repr(modelValues).encode("utf-8"))
+        for fileName in sorted(set(fileNames), key=os.path.basename):
+            modelHash.update(os.path.basename(fileName).encode("utf-8"))
+            modelHash.update(ResultCache.getFileHash(fileName).encode("utf-8") if os.path.isfile(fileName) else b"missing")
+        return modelHash.hexdigest()
+
+    def getEntryDir(self, modelHash):
+        return os.path.join(self.cacheDir, modelHash)
+
+    def hasResults(self, modelHash):
+        return os.path.isdir(os.path.join(self.getEntryDir(modelHash), "simulation_output"))
@@ -0,0 +1,106 @@
+#   author: Lubomir Jagos
+#
+#
+import os
+
+class ScriptEmitter:
+    """
+    Collects generated script code as list of chunks instead of concatenating one big string.
+
+    It can be used in place of string in generators, genScript += "..." just appends chunk:
+        - without fileName all chunks are kept in memory, section generators return emitter itself and its chunks are
+          appended into script emitter without joining them, getvalue() joins them when string is really needed
+        - with fileName chunks are written into <fileName>.part whenever buffer exceeds flushSize and file is renamed
+          to fileName when generation finished, so memory use does not grow with script size and previous script is not
+          overwritten by half generated one
+
+    File emitter is used as context manager, if generation fails .part file is removed:
+        with ScriptEmitter(fileName) as genScript:
+            genScript += "..."
+    """
+
+    def __init__(self, fileName=None, flushSize=1024*1024):
+        self.fileName = fileName
+        self.flushSize = flushSize
+        self.chunks = []
+        self.bufferedSize = 0
+        self.file = None
+
+        if self.fileName is not None:
+            self.file = open(self.fileName + ".part", "w", encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+    def write(self, text):
+        #
+        #   section emitter is appended chunk by chunk, its content is never joined into one string
+        #
+        chunks = text.chunks if isinstance(text, ScriptEmitter) else [text]
+        for chunk in chunks:
+            self.chunks.append(chunk)
+            self.bufferedSize += len(chunk)
+        if self.file is not None and self.bufferedSize >= self.flushSize:
+            self.flush()
+
+    def __iadd__(self, text):
+        self.write(text)
+        return self
+
+    def __radd__(self, text):
+        """
+        String + emitter, used by callers still building their script as string.
+        """
+        return text + self.getvalue()
+
+    def flush(self):
+        if self.file is None:
+            return
+        self.file.write("".join(self.chunks))
+        self.chunks = []
+        self.bufferedSize = 0
+
+    def getvalue(self):
+        """
+        Returns whole generated code, available just for in memory emitter.
+        :return: string
+        """
+        if self.fileName is not None:
+            raise Exception("ScriptEmitter: content already streamed into file, getvalue() is available just for in memory emitter.")
+        return "".join(self.chunks)
+
+    def close(self):
+        """
+        Write rest of buffer and move file to its final name.
+        :return: name of written file
+        """
+        if self.file is None:
+            return None
+
+        self.flush()
+        self.file.close()
+        self.file = None
+        os.replace(self.fileName + ".part", self.fileName)
+
+        return self.fileName
+
+    def discard(self):
+        """
+        Close and remove .part file, previously written script with same name is left untouched.
+        """
+        if self.file is None:
+            return
+
+        self.file.close()
+        self.file = None
+        self.chunks = []
+        self.bufferedSize = 0
+        if os.path.exists(self.fileName + ".part"):
+            os.remove(self.fileName + ".part")
@@ -0,0 +1,104 @@
+#   author: Lubomir Jagos
+#
+#
+import os
+import sys
+import shutil
+import tempfile
+
+class StlCache:
+    """
+    Content addressed cache of generated STL files.
+
+    Files are stored as <cacheDir>/<key>.stl where key is hash of shape geometry, placement and tessellation parameters
+    computed by CAD helper. Cache is limited by size, when it's exceeded least recently used files are removed, each hit
+    touches file modification time so it's used as last access time.
+    """
+
+    def __init__(self, cacheDir=None, maxSizeMB=1024):
+        self.cacheDir = cacheDir if cacheDir is not None else StlCache.getDefaultCacheDir()
+        self.maxSizeBytes = maxSizeMB * 1024 * 1024
+
+    @staticmethod
+    def getDefaultCacheDir():
+        if sys.platform.startswith("win"):
+            baseDir = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        elif sys.platform == "darwin":
+            baseDir = os.path.expanduser("~/Library/Caches")
+        else:
+            baseDir = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+        return os.path.join(baseDir, "FreeCAD-OpenEMS-Export", "stl")
+
+    def getCacheFileName(self, key):
+        return os.path.join(self.cacheDir, key + ".stl")
+
+    def get(self, key, exportFileName):
+        """
+        Place copy of cached STL file at exportFileName, file is not hard linked so output file can be changed or
+        overwritten by next export without changing cache content.
+        :param key: cache key
+        :param exportFileName: output STL file path
+        :return: True if file was found in cache
+        """
+        if key is None:
+            return False
+
+        cacheFileName = self.getCacheFileName(key)
+        if not os.path.isfile(cacheFileName):
+            return False
+
+        if os.path.lexists(exportFileName):
+            os.remove(exportFileName)
+        shutil.copyfile(cacheFileName, exportFileName)
+
+        os.utime(cacheFileName)
+        return True
+
+    def put(self, key, exportFileName):
+        """
+        Store exported STL file into cache, file is copied so later changes of output file do not affect cache.
+        Copy is written into uniquely named temporary file first so concurrent exports never write into same file.
+        :param key: cache key
+        :param exportFileName: exported STL file path
+        """
+        if key is None or not os.path.isfile(exportFileName):
+            return
+
+        os.makedirs(self.cacheDir, exist_ok=True)
+        cacheFileName = self.getCacheFileName(key)
+        [partFileHandle, partFileName] = tempfile.mkstemp(prefix=key + ".", suffix=".part", dir=self.cacheDir)
+        os.close(partFileHandle)
+        try:
+            shutil.copyfile(exportFileName, partFileName)
+            os.replace(partFileName, cacheFileName)
+        finally:
+            if os.path.exists(partFileName):
+                os.remove(partFileName)
+
+    def evict(self):
+        """
+        Remove least recently used files until cache fits into its size limit.
+        :return: number of removed files
+        """
+        if not os.path.isdir(self.cacheDir):
+            return 0
+
+        cacheFiles = []
+        for entry in os.scandir(self.cacheDir):
+            if entry.is_file() and entry.name.endswith(".stl"):
+                fileStat = entry.stat()
+                cacheFiles.append([fileStat.st_mtime, fileStat.st_size, entry.path])
+
+        totalSize = sum([fileSize for [mtime, fileSize, path] in cacheFiles])
+        removedCount = 0
+        for [mtime, fileSize, path] in sorted(cacheFiles):
+            if totalSize <= self.maxSizeBytes:
+                break
+            try:
+                os.remove(path)
+                totalSize -= fileSize
+                removedCount += 1
+            except OSError as e:
+                print(f"{__file__} > evict() > cannot remove {path}: {e}")
+
+        return removedCount